@@ -5,25 +5,29 @@ Unified client for A2A, Plexiglass, and other threat intelligence APIs.
 Implements retry logic, timeout handling, error recovery, and rate limiting.
 
 Features:
-- Automatic retry with exponential backoff
+- Automatic retry with exponential backoff, scheduled on the provider I/O
+  loop so back-off and rate-limit waits never park a thread
+- Per-scan deadlines: every attempt, retry and rate-limit wait must fit in
+  the scan's remaining time, otherwise the call fails fast
 - Request/response logging
 - Rate limit handling
-- Timeout management (5-10 seconds per URL)
-- Connection pooling
+- Timeout management (5-10 seconds per URL, tightened to the observed p99)
+- Connection pooling (shared provider_client pools)
 - Development mode for A2A testing
 
 Author: Security Team
 Version: 1.0.0
 """
 
+import asyncio
 import logging
+import math
 import time
+from concurrent.futures import Future
 from typing import Dict, Any, Optional, List, Tuple
 from functools import wraps
 from datetime import datetime, timedelta
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+import httpx
 
 from config import Config
 from error_handler import (
@@ -31,10 +35,14 @@ from error_handler import (
     APITimeoutError,
     APIConnectionError,
     APIAuthenticationError,
+    DeadlineExceededError,
     RateLimitExceededError,
 )
-from performance_cache import get_rate_limiter, api_cache
-from logging_config import get_logger, PerformanceLogger, get_audit_logger
+from performance_cache import get_rate_limiter
+from cache_manager import unified_cache
+from provider_client import provider_client
+from quota_scheduler import current_context
+from logging_config import get_logger, get_audit_logger
 
 logger = get_logger(__name__)
 audit_logger = get_audit_logger()
@@ -56,6 +64,9 @@ class ThreatIntelligenceAPIClient:
     - Caching integration
     """
 
+    # Responses retried with back-off; other error statuses fail immediately
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
     def __init__(self, api_name: str, api_key: Optional[str] = None):
         """
         Initialize API client.
@@ -69,12 +80,22 @@ class ThreatIntelligenceAPIClient:
         """
         self.api_name = api_name
         self.api_key = api_key
-        self.session = self._create_session()
+        self.provider = api_name.lower()
+        self.headers = self._get_headers()
         
         # Get API-specific configuration
         self.base_url = self._get_base_url()
         self.timeout = self._get_timeout()
-        self.max_retries = Config.LLM_MAX_RETRIES
+        self.max_retries = max(1, Config.LLM_MAX_RETRIES)
+        
+        # Per-API namespace in the shared cache, keyed by canonical URL
+        self.cache_namespace = f"api_{api_name.lower()}"
+        unified_cache.register_namespace(
+            self.cache_namespace, Config.CACHE_TTL_HOURS * 3600,
+            stale_seconds=Config.TI_CACHE_STALE_SECONDS,
+            negative_ttl_seconds=Config.TI_NEGATIVE_CACHE_TTL,
+            error_ttl_seconds=Config.TI_ERROR_CACHE_TTL
+        )
         
         logger.info(f"Initialized {api_name} API client")
 
@@ -98,38 +119,6 @@ class ThreatIntelligenceAPIClient:
         
         return (Config.CONNECT_TIMEOUT, timeout)
 
-    def _create_session(self) -> requests.Session:
-        """
-        Create requests session with connection pooling and retry strategy.
-        
-        Returns:
-            Configured requests.Session
-        """
-        session = requests.Session()
-        
-        # Configure retry strategy
-        retry_strategy = Retry(
-            total=self.max_retries,
-            backoff_factor=0.5,  # Exponential backoff: 0.5s, 1s, 2s...
-            status_forcelist=[429, 500, 502, 503, 504],
-            method_whitelist=["GET", "POST", "PUT"],
-            raise_on_status=False
-        )
-        
-        # Mount retry strategy for both http and https
-        adapter = HTTPAdapter(
-            max_retries=retry_strategy,
-            pool_connections=Config.POOL_CONNECTIONS,
-            pool_maxsize=Config.POOL_MAXSIZE
-        )
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        # Set default headers
-        session.headers.update(self._get_headers())
-        
-        return session
-
     def _get_headers(self) -> Dict[str, str]:
         """
         Get headers for API requests.
@@ -154,7 +143,7 @@ class ThreatIntelligenceAPIClient:
         
         return headers
 
-    def _handle_response_error(self, response: requests.Response) -> None:
+    def _handle_response_error(self, response: httpx.Response) -> None:
         """
         Handle API response errors.
         
@@ -207,52 +196,163 @@ class ThreatIntelligenceAPIClient:
                 recovery_suggestions=f"Check {self.api_name} status and try again"
             )
 
-    def _retry_with_backoff(
+    def _remaining(self, deadline: Optional[float], operation: str) -> Optional[float]:
+        """
+        Seconds left before the deadline (None without a deadline).
+        
+        Raises:
+            DeadlineExceededError: If the deadline has already passed
+        """
+        if deadline is None:
+            return None
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise DeadlineExceededError(self.api_name, operation)
+        return remaining
+
+    async def _acquire_rate_limit(self, deadline: Optional[float]) -> None:
+        """
+        Take a rate-limiter slot, waiting on the event loop.
+        
+        Raises:
+            RateLimitExceededError: If the slot frees up only after the deadline
+        """
+        limiter = get_rate_limiter(self.api_name)
+        while not limiter.is_allowed(self.api_name):
+            wait = max(limiter.get_retry_after(self.api_name), 0.05)
+            remaining = self._remaining(deadline, 'rate-limit wait')
+            if remaining is not None and wait >= remaining:
+                raise RateLimitExceededError(self.api_name, math.ceil(wait))
+            await asyncio.sleep(wait)
+
+    async def _retry_with_backoff(
         self,
-        func,
-        *args,
+        method: str,
+        url: str,
+        endpoint: str,
+        deadline: Optional[float],
         **kwargs
-    ) -> Any:
+    ) -> httpx.Response:
         """
-        Retry function with exponential backoff.
+        Send a request, retrying timeouts, connection errors and RETRY_STATUSES
+        with exponential backoff.
+        
+        Runs on the provider I/O loop: waits are asyncio sleeps, and a wait or
+        attempt that cannot finish before the deadline ends the retries.
         
-        Args:
-            func: Function to call
-            args: Function arguments
-            kwargs: Function keyword arguments
-            
         Returns:
-            Function result
-            
+            Last response (its status may still be an error)
+        
         Raises:
-            APIError: If all retries exhausted
+            APITimeoutError / APIConnectionError: If the last attempt failed
+            DeadlineExceededError: If no attempt fit before the deadline
         """
-        last_error = None
+        read_timeout = self.timeout[1]
+        response: Optional[httpx.Response] = None
+        last_error: Optional[Exception] = None
         
         for attempt in range(self.max_retries):
-            try:
-                return func(*args, **kwargs)
-            
-            except (APITimeoutError, APIConnectionError) as e:
-                last_error = e
-                if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff
+            if attempt:
+                wait_time = 2 ** (attempt - 1)  # Exponential backoff
+                if response is not None and response.status_code == 429:
+                    wait_time = max(wait_time, self._retry_after(response))
+                remaining = self._remaining(deadline, 'retry')
+                if remaining is not None and wait_time >= remaining:
                     logger.warning(
-                        f"{self.api_name} attempt {attempt + 1} failed, "
-                        f"retrying in {wait_time}s: {e.message}"
+                        f"{self.api_name} retry in {wait_time}s would miss the deadline "
+                        f"({remaining:.1f}s left), giving up"
                     )
-                    time.sleep(wait_time)
+                    break
+                logger.warning(
+                    f"{self.api_name} attempt {attempt} failed, retrying in {wait_time}s"
+                )
+                await asyncio.sleep(wait_time)
+            
+            await self._acquire_rate_limit(deadline)
+            remaining = self._remaining(deadline, f"request to {endpoint}")
+            timeout = read_timeout if remaining is None else min(read_timeout, remaining)
             
-            except APIError as e:
-                raise  # Don't retry on other API errors
+            start_time = time.time()
+            try:
+                response = await provider_client.request_async(
+                    self.provider, method, url,
+                    headers=self.headers, timeout=timeout, **kwargs
+                )
+            except (APITimeoutError, APIConnectionError) as e:
+                duration = time.time() - start_time
+                logger.error(f"{self.api_name} request failed after {duration:.2f}s: {e.message}")
+                audit_logger.log_api_call(self.api_name, endpoint, None, duration, e.message)
+                response, last_error = None, e
+                continue
+            
+            audit_logger.log_api_call(
+                self.api_name, endpoint, response.status_code, time.time() - start_time
+            )
+            if response.status_code not in self.RETRY_STATUSES:
+                return response
         
-        if last_error:
+        if response is not None:
+            return response
+        if last_error is not None:
             raise last_error
+        raise DeadlineExceededError(self.api_name, f"request to {endpoint}")
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> int:
+        """Seconds from a Retry-After header (60 if missing or malformed)"""
+        try:
+            return int(response.headers.get('Retry-After', '60'))
+        except ValueError:
+            return 60
+
+    async def _request_json(
+        self,
+        method: str,
+        endpoint: str,
+        deadline: Optional[float],
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Request with retries, mapped to the client's errors and parsed as JSON"""
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        response = await self._retry_with_backoff(
+            method.upper(), url, endpoint, deadline, json=data, params=params, **kwargs
+        )
         
-        raise APIError(
-            message="Max retries exceeded",
-            api_name=self.api_name,
-            status_code=500
+        # Check for errors
+        if response.status_code >= 400:
+            self._handle_response_error(response)
+        
+        # Parse response
+        try:
+            return response.json()
+        except ValueError:
+            raise APIError(
+                message="Invalid JSON response",
+                api_name=self.api_name,
+                status_code=500
+            )
+
+    def submit_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+        **kwargs
+    ) -> Future:
+        """
+        Start an API request without blocking (see request for arguments).
+        
+        Returns:
+            Future resolving to the response JSON
+        """
+        if deadline is None:
+            deadline = current_context().deadline
+        return provider_client.submit_coroutine(
+            self._request_json(method, endpoint, deadline, data, params, **kwargs)
         )
 
     def request(
@@ -261,6 +361,7 @@ class ThreatIntelligenceAPIClient:
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -271,138 +372,71 @@ class ThreatIntelligenceAPIClient:
             endpoint: API endpoint
             data: Request body
             params: Query parameters
-            **kwargs: Additional arguments for requests
-            
+            deadline: time.time() by which the scan needs the answer
+                      (default: deadline of the enclosing scheduling() scope)
+            **kwargs: Additional arguments for httpx
+        
         Returns:
             Response JSON as dictionary
-            
+        
         Raises:
             APIError: If request fails
             RateLimitExceededError: If rate limited
             APITimeoutError: If request times out
+            DeadlineExceededError: If the deadline leaves no time to (re)try
         """
-        # Check rate limit
-        get_rate_limiter(self.api_name).wait_if_needed(self.api_name)
-        
-        # Build URL
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        
-        # Merge defaults with provided kwargs
-        request_kwargs = {
-            'timeout': self.timeout,
-            'verify': True,  # Always verify SSL
-        }
-        request_kwargs.update(kwargs)
-        
-        start_time = time.time()
-        
-        try:
-            with PerformanceLogger(f"{self.api_name}_request", endpoint):
-                response = self.session.request(
-                    method=method.upper(),
-                    url=url,
-                    json=data,
-                    params=params,
-                    **request_kwargs
-                )
-                
-                duration = time.time() - start_time
-                
-                # Log API call
-                audit_logger.log_api_call(
-                    self.api_name,
-                    endpoint,
-                    response.status_code,
-                    duration
-                )
-                
-                # Check for errors
-                if response.status_code >= 400:
-                    self._handle_response_error(response)
-                
-                # Parse response
-                try:
-                    return response.json()
-                except ValueError:
-                    raise APIError(
-                        message="Invalid JSON response",
-                        api_name=self.api_name,
-                        status_code=500
-                    )
-        
-        except requests.Timeout as e:
-            duration = time.time() - start_time
-            logger.error(f"{self.api_name} request timeout after {duration:.2f}s")
-            audit_logger.log_api_call(
-                self.api_name,
-                endpoint,
-                None,
-                duration,
-                f"Timeout after {duration:.2f}s"
-            )
-            raise APITimeoutError(self.api_name, self.timeout[1])
-        
-        except requests.ConnectionError as e:
-            duration = time.time() - start_time
-            logger.error(f"{self.api_name} connection error: {e}")
-            audit_logger.log_api_call(
-                self.api_name,
-                endpoint,
-                None,
-                duration,
-                f"Connection error: {str(e)}"
-            )
-            raise APIConnectionError(self.api_name, str(e))
+        return self.submit_request(method, endpoint, data, params, deadline, **kwargs).result()
 
-    def scan_url(self, url: str) -> Dict[str, Any]:
+    def scan_url(self, url: str, deadline: Optional[float] = None) -> Dict[str, Any]:
         """
         Scan URL using threat intelligence API.
         
         Args:
             url: URL to scan
-            
+            deadline: time.time() by which the scan needs the answer
+                      (default: deadline of the enclosing scheduling() scope)
+        
         Returns:
             Scan results
         """
-        # Try cache first
-        cache_key = f"{self.api_name}:scan:{url}"
-        cached_result = api_cache.get(cache_key)
-        if cached_result:
-            logger.info(f"URL scan cache hit: {url}")
-            return cached_result
-        
-        # Perform scan
-        result = self._perform_scan(url)
-        
-        # Cache result
-        api_cache.set(cache_key, result)
-        
-        return result
+        if deadline is None:
+            deadline = current_context().deadline
+        
+        # Cached result (refreshed in the background once stale) or a new
+        # scan; empty results and provider errors are cached briefly
+        return unified_cache.get_or_load(
+            self.cache_namespace, url,
+            lambda: self._perform_scan(url, deadline),
+            classify=lambda result: None if result else 'negative',
+            cache_errors=(APIError, APITimeoutError, APIConnectionError, RateLimitExceededError)
+        )
 
-    def _perform_scan(self, url: str) -> Dict[str, Any]:
+    def _perform_scan(self, url: str, deadline: Optional[float] = None) -> Dict[str, Any]:
         """
         Implementation of URL scan.
         
         Args:
             url: URL to scan
+            deadline: time.time() by which the scan needs the answer
             
         Returns:
             Scan results
         """
         # API-specific scan implementations
         if self.api_name.lower() == 'a2a':
-            return self._scan_a2a(url)
+            return self._scan_a2a(url, deadline)
         elif self.api_name.lower() == 'plexiglass':
-            return self._scan_plexiglass(url)
+            return self._scan_plexiglass(url, deadline)
         else:
             raise NotImplementedError(f"Scan not implemented for {self.api_name}")
 
-    def _scan_a2a(self, url: str) -> Dict[str, Any]:
+    def _scan_a2a(self, url: str, deadline: Optional[float] = None) -> Dict[str, Any]:
         """
         Scan URL using A2A API.
         
         Args:
             url: URL to scan
+            deadline: time.time() by which the scan needs the answer
             
         Returns:
             A2A scan results
@@ -412,17 +446,19 @@ class ThreatIntelligenceAPIClient:
         response = self.request(
             'POST',
             f'/urls/scan{dev_mode}',
-            data={'url': url}
+            data={'url': url},
+            deadline=deadline
         )
         
         return response
 
-    def _scan_plexiglass(self, url: str) -> Dict[str, Any]:
+    def _scan_plexiglass(self, url: str, deadline: Optional[float] = None) -> Dict[str, Any]:
         """
         Scan URL using Plexiglass API.
         
         Args:
             url: URL to scan
+            deadline: time.time() by which the scan needs the answer
             
         Returns:
             Plexiglass scan results
@@ -430,7 +466,8 @@ class ThreatIntelligenceAPIClient:
         response = self.request(
             'POST',
             '/analyze',
-            data={'url': url}
+            data={'url': url},
+            deadline=deadline
         )
         
         return response
@@ -449,8 +486,7 @@ class ThreatIntelligenceAPIClient:
             return False
 
     def close(self) -> None:
-        """Close session and release resources."""
-        self.session.close()
+        """Release resources (connection pools are shared via provider_client)."""
         logger.info(f"Closed {self.api_name} API client")
 
     def __enter__(self):
@@ -1,7 +1,7 @@
 # MALWARE SNIPPER - BACKEND API SERVER
 # Integrates with VirusTotal API (70+ engines) and NVD for CVE/CVSS data
 
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, has_request_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from urllib.parse import urlparse
@@ -14,6 +14,7 @@ import hashlib
 import re
 import sys
 import sqlite3
+import threading
 
 # Optional: feedparser (may have compatibility issues with Python 3.13+)
 try:
@@ -114,6 +115,7 @@ except ImportError as e:
 # Import URL ML Model for advanced malware detection
 try:
     sys.path.append(os.path.join(os.path.dirname(__file__), 'ml_advanced'))
+    import url_model_predict
     from url_model_predict import predict_url
     URL_ML_MODEL_AVAILABLE = True
     print("[+] URL ML Model loaded (trained phishing detection)")
@@ -125,6 +127,7 @@ except ImportError as e:
 
 # Import JavaScript ML Model for JS malware detection
 try:
+    import js_model_predict
     from js_model_predict import predict_js
     JS_ML_MODEL_AVAILABLE = True
     print("[+] JavaScript ML Model loaded (trained malware detection)")
@@ -134,12 +137,53 @@ except ImportError as e:
     JS_ML_MODEL_AVAILABLE = False
     predict_js = None
 
+# Hot-reloadable model registry (swap url/js models without a restart)
+try:
+    from model_manager import model_manager
+    from config import Config
+    if URL_ML_MODEL_AVAILABLE:
+        model_manager.register(
+            'url', url_model_predict.URLMLPredictor,
+            [url_model_predict.MODEL_PATH, url_model_predict.VECTORIZER_PATH,
+             os.path.splitext(url_model_predict.MODEL_PATH)[0] + '_compiled.npz'],
+            initial=url_model_predict._url_predictor
+        )
+        predict_url = model_manager.bind('url')
+    if JS_ML_MODEL_AVAILABLE:
+        model_manager.register(
+            'js', js_model_predict.JavaScriptMLPredictor,
+            [js_model_predict.MODEL_PATH, js_model_predict.VECTORIZER_PATH,
+             os.path.splitext(js_model_predict.MODEL_PATH)[0] + '_compiled.npz'],
+            initial=js_model_predict._js_predictor
+        )
+        predict_js = model_manager.bind('js')
+    if Config.MODEL_RELOAD_ENABLED:
+        model_manager.start()
+    MODEL_MANAGER_AVAILABLE = True
+    print(f"[+] Model manager watching models: {model_manager.versions()}")
+except ImportError as e:
+    print(f"[-] Model manager not available: {e}")
+    MODEL_MANAGER_AVAILABLE = False
+    model_manager = None
+
+def model_versions():
+    """Active version of each hot-reloadable model ({} without the manager)"""
+    return model_manager.versions() if model_manager else {}
+
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
+@app.after_request
+def add_model_versions_header(response):
+    """Tag every response with the model versions that were live for it"""
+    versions = model_versions()
+    if versions:
+        response.headers['X-Model-Versions'] = ','.join(f'{name}={version}' for name, version in versions.items())
+    return response
+
 # ═══════════════════════════════════════════════════════════════════════════
 # URL SCANNER BLUEPRINT - Real-time Scanning Pipeline
 # ═══════════════════════════════════════════════════════════════════════════
@@ -178,6 +222,14 @@ if SCANNER_ROUTES_AVAILABLE and url_scanner_bp:
         register_socketio_handlers(socketio)
         print("[+] SocketIO handlers registered for real-time updates")
 
+# Queued, coalesced dashboard events (see event_bus.py), numbered for
+# catch-up in the event log (see event_log.py)
+from event_bus import event_bus
+from event_log import event_log
+event_bus.attach(socketio)
+from stats_stream import stats_stream
+stats_stream.attach(socketio)
+
 # Register Report Handler Blueprint
 if REPORT_HANDLER_AVAILABLE and report_bp:
     register_report_routes(app)
@@ -192,6 +244,19 @@ if RISK_ENGINE_AVAILABLE and UnifiedRiskEngine:
     risk_engine = UnifiedRiskEngine(api_keys=api_keys, base_ml_detector=ml_detector)
     print("[+] Multi-layer security analysis engine ready")
 
+# Warm the threat-intel cache from scan history (see cache_warmer.py)
+cache_warmer = None
+if risk_engine:
+    try:
+        from config import Config
+        from cache_warmer import CacheWarmer
+        if Config.CACHE_WARMUP_ENABLED:
+            cache_warmer = CacheWarmer(risk_engine, scan_storage)
+            cache_warmer.start()
+            print("[+] Cache warm-up started in the background")
+    except ImportError as e:
+        print(f"[-] Cache warm-up not available: {e}")
+
 # ═══════════════════════════════════════════════════════════════════════════
 # SYSTEM STARTUP VALIDATION - PRINT DIAGNOSTICS
 # ═══════════════════════════════════════════════════════════════════════════
@@ -258,8 +323,11 @@ def print_startup_diagnostics():
 # CYBERSECURITY NEWS - DYNAMIC FROM NEWSAPI ONLY
 # ═══════════════════════════════════════════════════════════════════════════
 # NOTE: All news fetching is NOW DYNAMIC from NewsAPI
-# No database storage - pure live API calls
-# See /api/news/newsapi endpoints for live fetching
+# No database storage - one shared poller keeps the latest articles in memory
+# See /api/cyber-news and /api/news/stream
+
+# One shared NewsAPI poller behind the news endpoints (see news_manager.py)
+from news_manager import news_poller
 
 print("[+] News system: Dynamic NewsAPI fetching only (no database storage)")
 
@@ -306,11 +374,47 @@ VIRUSTOTAL_URL = 'https://www.virustotal.com/api/v3/urls'
 # NVD (National Vulnerability Database) API configuration
 NVD_API_URL = 'https://services.nvd.nist.gov/rest/json/cves/2.0'
 
-# Cache for rate limiting and performance
-scan_cache = {}
-cve_cache = {}
+# Local NVD mirror: CVE lookups and keyword search become SQLite queries.
+# Feed files in Config.NVD_FEED_DIR are (re)ingested in the background.
+try:
+    from config import Config
+    from nvd_mirror import NVDMirror, parse_nvd_cve
+    nvd_mirror = NVDMirror()
+    if Config.NVD_FEED_DIR.is_dir():
+        threading.Thread(
+            target=nvd_mirror.ingest_paths, args=([str(Config.NVD_FEED_DIR)],),
+            name='nvd-ingest', daemon=True
+        ).start()
+    print(f"[+] NVD mirror ready ({nvd_mirror.count()} CVEs)")
+except Exception as e:
+    print(f"[-] NVD mirror not available: {e}")
+    nvd_mirror = None
+
+# Cache for rate limiting and performance (shared two-tier cache, see cache_manager.py)
+from cache_manager import unified_cache, canonicalize_identifier, canonicalize_text
+from config import Config
 CACHE_DURATION = 3600  # 1 hour
 CVE_CACHE_DURATION = 7200  # 2 hours
+unified_cache.register_namespace('virustotal', CACHE_DURATION)
+unified_cache.register_namespace('cve', CVE_CACHE_DURATION, key_func=canonicalize_identifier,
+                                 negative_ttl_seconds=Config.NVD_MISS_CACHE_SECONDS,
+                                 error_ttl_seconds=60)
+unified_cache.register_namespace('vulnerability_feed', 10, persistent=False, key_func=canonicalize_text)
+
+# Single-flight for concurrent scans of the same URL (see request_coalescer.py)
+from request_coalescer import request_coalescer
+
+# Pooled async HTTP client for provider APIs (see provider_client.py)
+from provider_client import provider_client
+from latency_tracker import latency_tracker
+
+# Priority scheduling of metered API quota (see quota_scheduler.py)
+from error_handler import APIConnectionError, APIError, APITimeoutError, QuotaDeadlineExceededError
+from quota_scheduler import Priority, current_context, get_scheduler, get_scheduler_stats, scheduling
+
+def quota_user():
+    """Fair-queuing key of the current request (client id or address)"""
+    return request.headers.get('X-Client-ID') or request.remote_addr or 'anonymous'
 
 # ═══════════════════════════════════════════════════════════════════════════
 # CALL STARTUP DIAGNOSTICS (after all variables are initialized)
@@ -327,6 +431,86 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'Malware Snipper Scanner',
+        'model_versions': model_versions(),
+        'cache_warmup': cache_warmer.get_progress() if cache_warmer else {'state': 'disabled'},
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/models', methods=['GET'])
+def model_status():
+    """Active/candidate model versions, reload counters and shadow statistics"""
+    if not model_manager:
+        return jsonify({'error': 'Model manager not available'}), 503
+    return jsonify({
+        'shadow_mode': model_manager.shadow_mode,
+        'models': model_manager.get_status(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/models/<name>/promote', methods=['POST'])
+def promote_model(name):
+    """Promote a shadow candidate to active"""
+    if not model_manager:
+        return jsonify({'error': 'Model manager not available'}), 503
+    try:
+        return jsonify({'success': True, 'model': model_manager.promote(name)})
+    except KeyError:
+        return jsonify({'error': f'Unknown model: {name}'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+
+@app.route('/api/models/<name>/candidate', methods=['DELETE'])
+def discard_model_candidate(name):
+    """Drop a shadow candidate and keep the active model"""
+    if not model_manager:
+        return jsonify({'error': 'Model manager not available'}), 503
+    try:
+        model_manager.discard_candidate(name)
+    except KeyError:
+        return jsonify({'error': f'Unknown model: {name}'}), 404
+    return jsonify({'success': True, 'versions': model_manager.versions()})
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters per cache namespace and tier sizes"""
+    return jsonify({
+        'cache': unified_cache.get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/coalescing/stats', methods=['GET'])
+def coalescing_stats():
+    """Duplicate scans absorbed by single-flight, per endpoint group"""
+    return jsonify({
+        'coalescing': request_coalescer.get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/providers/stats', methods=['GET'])
+def provider_stats():
+    """Connection pool usage, latency histograms and adaptive timeouts per provider API"""
+    return jsonify({
+        'providers': provider_client.get_stats(),
+        'latency': latency_tracker.get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/quota/stats', methods=['GET'])
+def quota_stats():
+    """Queue depth, waits, drops and dedup per metered API and priority class"""
+    return jsonify({
+        'quota': get_scheduler_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/events/stats', methods=['GET'])
+def event_stats():
+    """Dashboard events published, coalesced, dropped and delivered"""
+    return jsonify({
+        'events': event_bus.get_stats(),
+        'event_log': event_log.get_stats(),
+        'stats_stream': stats_stream.get_stats(),
+        'news': news_poller.get_stats(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -2171,11 +2355,12 @@ def _get_demo_articles():
 def get_unified_cyber_news():
     """
     GET REAL-TIME CYBERSECURITY NEWS FROM NEWSAPI
-    Fresh articles on every request - NO CACHING, NO DATABASE
+    Latest articles from the shared news poller (one NewsAPI fetch per
+    category per NEWS_POLL_INTERVAL); supports If-None-Match
     
     Query Parameters:
     - category: Filter by category (malware, ransomware, vulnerability, threat, breach, phishing, ddos, all)
-    - limit: Number of articles to fetch (default: 30, max: 100)
+    - limit: Number of articles to return (default: 30, max: 100)
     
     Example: /api/cyber-news?category=malware&limit=10
     """
@@ -2185,22 +2370,8 @@ def get_unified_cyber_news():
         limit = int(request.args.get('limit', 30))
         limit = min(max(limit, 1), 100)  # Clamp between 1 and 100
         
-        print(f"\n[+] NEWS API REQUEST - Category: {category}, Limit: {limit}")
-        
-        # Set no-cache headers for fresh data on each request
-        response_headers = {
-            'Cache-Control': 'no-store, no-cache, must-revalidate, max-age=0',
-            'Pragma': 'no-cache',
-            'Expires': '0'
-        }
-        
-        # Import and use CyberNewsManager
-        from news_manager import CyberNewsManager
-        
-        news_mgr = CyberNewsManager()
-        
-        # Fetch fresh articles from NewsAPI
-        articles_list = news_mgr.fetch_from_newsapi(category=category, limit=limit)
+        snapshot = news_poller.get(category)
+        articles_list = snapshot.articles[:limit]
         
         if not articles_list:
             print(f"[-] No articles fetched from NewsAPI for category: {category}")
@@ -2221,13 +2392,13 @@ def get_unified_cyber_news():
                     'title': article.get('title', ''),
                     'link': article.get('link', article.get('url', '')),
                     'pubDate': article.get('published', article.get('publishedAt', '')),
-                    'contentSnippet': article.get('description', '')[:500],
+                    'contentSnippet': (article.get('description') or '')[:500],
                     'source': article.get('source', 'NewsAPI'),
                     'image': article.get('image_url', ''),
                     'category': article.get('category', category),
                     'priority': article.get('priority', 'medium'),
                     'author': article.get('author', 'Unknown'),
-                    'fetched_at': datetime.now().isoformat()
+                    'fetched_at': snapshot.fetched_at
                 })
             except Exception as e:
                 print(f"[-] Error transforming article: {e}")
@@ -2236,28 +2407,20 @@ def get_unified_cyber_news():
         # Sort by date (newest first)
         articles.sort(key=lambda x: x.get('pubDate', ''), reverse=True)
         
-        print(f"[+] SUCCESS: {len(articles)} fresh articles from NewsAPI (Category: {category})")
-        
-        return jsonify({
+        response = jsonify({
             'success': True,
             'articles': articles,
             'total': len(articles),
             'category': category,
-            'last_updated': datetime.now().isoformat(),
-            'cached': False,
+            'last_updated': snapshot.fetched_at,
+            'cached': True,
             'source': 'NewsAPI',
-            'message': f'Fresh {category} news articles from NewsAPI'
-        }), 200, response_headers
-    
-    except ImportError as ie:
-        print(f"[-] Import error: {ie}")
-        return jsonify({
-            'success': False,
-            'error': str(ie),
-            'articles': [],
-            'total': 0,
-            'message': 'NewsAPI module import error'
-        }), 500
+            'message': f'Latest {category} news articles from NewsAPI'
+        })
+        # Clients revalidate; unchanged news costs a 304 and no body
+        response.headers['Cache-Control'] = 'no-cache'
+        response.set_etag(f'{snapshot.etag}-{limit}')
+        return response.make_conditional(request)
         
     except Exception as e:
         print(f"[-] NEWS API ERROR: {e}")
@@ -2274,44 +2437,35 @@ def get_unified_cyber_news():
         }), 500
 
 # ═══════════════════════════════════════════════════════════════════════════
-# DIRECT NEWSAPI ENDPOINT - Fresh from NewsAPI
+# DIRECT NEWSAPI ENDPOINT - Latest NewsAPI articles, unformatted
 # ═══════════════════════════════════════════════════════════════════════════
 
 @app.route('/api/newsapi', methods=['GET'])
 def get_newsapi_articles():
     """
-    GET FRESH NEWS DIRECTLY FROM NEWSAPI
-    Fetches cybersecurity news directly from NewsAPI endpoint
-    No database caching - always fresh
+    GET NEWS AS RETURNED BY NEWSAPI
+    Articles of the 'all' category from the shared news poller; supports If-None-Match
     """
     try:
-        from backend.news_manager import CyberNewsManager
-        
         limit = request.args.get('limit', 20, type=int)
         limit = min(limit, 50)  # Cap at 50
         
-        print(f"\n📰 NEWSAPI REQUEST - Fetching {limit} fresh articles from NewsAPI...")
-        
-        manager = CyberNewsManager()
-        articles = manager.fetch_from_newsapi(limit=limit)
-        
-        response_headers = {
-            'Cache-Control': 'no-store, no-cache, must-revalidate, max-age=0',
-            'Pragma': 'no-cache',
-            'Expires': '0'
-        }
+        snapshot = news_poller.get('all')
+        articles = snapshot.articles[:limit]
         
         if articles:
-            print(f"[+] SUCCESS: {len(articles)} articles fetched from NewsAPI")
-            return jsonify({
+            response = jsonify({
                 'success': True,
                 'source': 'NewsAPI',
                 'articles': articles,
                 'total': len(articles),
-                'fetched_at': datetime.now().isoformat(),
-                'cache': 'DISABLED - Direct API',
-                'message': f'Fresh articles from NewsAPI (no database, no caching)'
-            }), 200, response_headers
+                'fetched_at': snapshot.fetched_at,
+                'cache': f'Shared poller, refreshed every {news_poller.interval:.0f}s',
+                'message': 'Latest articles from NewsAPI'
+            })
+            response.headers['Cache-Control'] = 'no-cache'
+            response.set_etag(f'{snapshot.etag}-{limit}')
+            return response.make_conditional(request)
         else:
             print("⚠️ No articles returned from NewsAPI")
             return jsonify({
@@ -2320,7 +2474,7 @@ def get_newsapi_articles():
                 'articles': [],
                 'total': 0,
                 'message': 'No articles found from NewsAPI'
-            }), 204, response_headers
+            }), 204
     
     except Exception as e:
         print(f"❌ NewsAPI ERROR: {e}")
@@ -2340,7 +2494,7 @@ def get_newsapi_articles():
 def get_live_news():
     """
     Fetch live cybersecurity news immediately (instant fetch)
-    Redirects to main /api/cyber-news endpoint for pure NewsAPI fetching
+    Redirects to main /api/cyber-news endpoint for the latest snapshot
     """
     # Simply call the main cyber-news endpoint
     return get_unified_cyber_news()
@@ -2349,50 +2503,13 @@ def get_live_news():
 def news_stream():
     """
     Server-Sent Events (SSE) endpoint for live streaming news from NewsAPI
-    Pushes new articles every 30 minutes automatically
+    Pushes the shared poller's articles whenever they change; reconnecting
+    clients send Last-Event-ID and only get what they have not seen
     """
-    def generate():
-        print("🔴 SSE Connection established - streaming live news from NewsAPI")
-        try:
-            import json
-            import time
-            
-            while True:
-                try:
-                    # Fetch fresh articles from NewsAPI
-                    from news_manager import CyberNewsManager
-                    news_mgr = CyberNewsManager()
-                    articles_list = news_mgr.fetch_from_newsapi(limit=10)
-                    
-                    if articles_list:
-                        articles = []
-                        for article in articles_list[:6]:
-                            articles.append({
-                                'title': article.get('title', 'N/A'),
-                                'link': article.get('link', ''),
-                                'pubDate': article.get('published', datetime.now().isoformat()),
-                                'description': article.get('description', '')[:200],
-                                'source': article.get('source', 'NewsAPI'),
-                            })
-                        
-                        print(f"🔴 SSE Push: {len(articles)} articles - {datetime.now().isoformat()}")
-                        
-                        # Send SSE event
-                        yield f"data: {json.dumps({'articles': articles, 'timestamp': datetime.now().isoformat(), 'source': 'NewsAPI'})}\n\n"
-                except Exception as e:
-                    print(f"⚠️ SSE fetch error: {e}")
-                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
-                
-                # Wait 30 minutes before next update
-                time.sleep(1800)  # 30 minutes
-                
-        except GeneratorExit:
-            print("🔴 SSE Connection closed")
-        except Exception as e:
-            print(f"❌ SSE Stream error: {e}")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+    category = request.args.get('category', 'all').lower()
+    last_version = news_poller.resume_version(request.headers.get('Last-Event-ID', ''))
     
-    return Response(generate(), mimetype='text/event-stream', headers={
+    return Response(news_poller.stream(category, last_version), mimetype='text/event-stream', headers={
         'Cache-Control': 'no-cache',
         'X-Accel-Buffering': 'no',
         'Connection': 'keep-alive'
@@ -2430,23 +2547,15 @@ def scan_url():
         if not url_to_scan:
             return jsonify({'error': 'URL is required'}), 400
         
-        # Check cache
-        if url_to_scan in scan_cache:
-            cached_result, timestamp = scan_cache[url_to_scan]
-            if time.time() - timestamp < CACHE_DURATION:
-                print(f"✅ Returning cached result for {url_to_scan}")
-                return jsonify(cached_result)
-        
-        print(f"🔍 Scanning URL: {url_to_scan}")
-        
-        # Submit URL to VirusTotal
-        result = scan_with_virustotal(url_to_scan)
-        
-        # Cache the result
-        scan_cache[url_to_scan] = (result, time.time())
+        # Cached, or scanned once for all concurrent requests of this URL
+        with scheduling(Priority.MANUAL, user=quota_user()):
+            result = get_virustotal_result(url_to_scan)
         
         return jsonify(result)
         
+    except QuotaDeadlineExceededError as e:
+        print(f"⚠️ VirusTotal quota busy, scan of {url_to_scan} dropped")
+        return jsonify(e.to_dict()), e.status_code
     except Exception as e:
         print(f"❌ Error scanning URL: {str(e)}")
         return jsonify({
@@ -2464,6 +2573,29 @@ def scan_url():
             'scan_date': datetime.now().isoformat()
         }), 500
 
+def get_virustotal_result(url):
+    """
+    VirusTotal result for a URL via the shared cache.
+    
+    On a miss, concurrent callers for the same canonical URL are coalesced
+    so only one of them spends VirusTotal quota.
+    """
+    cached_result = unified_cache.get('virustotal', url)
+    if cached_result is not None:
+        print(f"✅ Returning cached result for {url}")
+        return cached_result
+    
+    def scan_and_cache():
+        print(f"🔍 Scanning URL: {url}")
+        result = scan_with_virustotal(url)
+        unified_cache.set('virustotal', url, result)
+        return result
+    
+    result, shared = request_coalescer.do('virustotal', url, scan_and_cache)
+    if shared:
+        print(f"🔗 Reused in-flight VirusTotal scan for {url}")
+    return result
+
 def scan_with_virustotal(url):
     """Scan URL with VirusTotal API"""
     
@@ -2479,12 +2611,18 @@ def scan_with_virustotal(url):
             'x-apikey': VIRUSTOTAL_API_KEY
         }
         
+        scheduler = get_scheduler('virustotal')
+        
         # Step 1: Submit URL for scanning
         print(f"📤 Submitting URL to VirusTotal...")
-        response = requests.post(
-            VIRUSTOTAL_URL,
-            headers=headers,
-            data={'url': url}
+        response = scheduler.call(
+            lambda: provider_client.post(
+                'virustotal',
+                VIRUSTOTAL_URL,
+                headers=headers,
+                data={'url': url}
+            ),
+            key=('submit', url)
         )
         
         print(f"📡 VirusTotal response status: {response.status_code}")
@@ -2499,9 +2637,16 @@ def scan_with_virustotal(url):
             time.sleep(15)  # VirusTotal needs time to scan
             
             print(f"📥 Fetching analysis results...")
-            analysis_response = requests.get(
-                f'{VIRUSTOTAL_URL}/{url_id}',
-                headers=headers
+            # The submit already spent a token: give the fetch its own wait
+            # budget instead of what the 15 s pause left of the scope's
+            analysis_response = scheduler.call(
+                lambda: provider_client.get(
+                    'virustotal',
+                    f'{VIRUSTOTAL_URL}/{url_id}',
+                    headers=headers
+                ),
+                key=('analysis', url_id),
+                deadline=current_context().renewed_deadline()
             )
             
             print(f"📡 Analysis response status: {analysis_response.status_code}")
@@ -2522,6 +2667,9 @@ def scan_with_virustotal(url):
         
         return generate_mock_result(url)
         
+    except QuotaDeadlineExceededError:
+        # No quota in time: callers decide (503 / skip), never mock data
+        raise
     except Exception as e:
         print(f"❌ VirusTotal API error: {str(e)}")
         print(f"   Falling back to mock data")
@@ -2779,9 +2927,11 @@ def fetch_cve_data(threat_names):
                     cve_records.extend(fetch_cves_by_keyword(keyword))
                     break
         else:
-            # Fetch specific CVEs
-            for cve_id in cve_ids[:5]:  # Limit to 5 CVEs
-                cve_data = fetch_single_cve(cve_id)
+            # Fetch specific CVEs (one mirror query, live API only for gaps)
+            cve_ids = list(dict.fromkeys(cve_id.upper() for cve_id in cve_ids))[:5]  # Limit to 5 CVEs
+            mirrored = nvd_mirror.get_cves(cve_ids) if nvd_mirror else {}
+            for cve_id in cve_ids:
+                cve_data = mirrored.get(cve_id) or fetch_single_cve(cve_id)
                 if cve_data:
                     cve_records.append(cve_data)
         
@@ -2792,130 +2942,58 @@ def fetch_cve_data(threat_names):
         return []
 
 def fetch_single_cve(cve_id):
-    """Fetch a single CVE record from NVD"""
-    cache_key = f"cve_{cve_id}"
-    
-    # Check cache
-    if cache_key in cve_cache:
-        cached_time, cached_data = cve_cache[cache_key]
-        if time.time() - cached_time < CVE_CACHE_DURATION:
-            return cached_data
-    
+    """Fetch a single CVE record from the local mirror, falling back to NVD"""
+    # Records and unknown ids are cached; failed live lookups briefly
     try:
-        response = requests.get(
-            f"{NVD_API_URL}?cveId={cve_id}",
-            timeout=10
+        return unified_cache.get_or_load(
+            'cve', cve_id, lambda: _load_single_cve(cve_id),
+            classify=lambda record: None if record else 'negative',
+            cache_errors=(APIError, APITimeoutError, APIConnectionError)
         )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('vulnerabilities'):
-                vuln = data['vulnerabilities'][0]['cve']
-                
-                # Extract CVSS scores
-                cvss_data = {}
-                if 'metrics' in vuln:
-                    metrics = vuln['metrics']
-                    if 'cvssMetricV31' in metrics:
-                        cvss_v3 = metrics['cvssMetricV31'][0]['cvssData']
-                        cvss_data = {
-                            'version': '3.1',
-                            'score': cvss_v3.get('baseScore', 0),
-                            'severity': cvss_v3.get('baseSeverity', 'UNKNOWN'),
-                            'vector': cvss_v3.get('vectorString', ''),
-                            'attackVector': cvss_v3.get('attackVector', ''),
-                            'attackComplexity': cvss_v3.get('attackComplexity', ''),
-                            'privilegesRequired': cvss_v3.get('privilegesRequired', ''),
-                            'userInteraction': cvss_v3.get('userInteraction', ''),
-                            'scope': cvss_v3.get('scope', ''),
-                            'confidentialityImpact': cvss_v3.get('confidentialityImpact', ''),
-                            'integrityImpact': cvss_v3.get('integrityImpact', ''),
-                            'availabilityImpact': cvss_v3.get('availabilityImpact', '')
-                        }
-                    elif 'cvssMetricV2' in metrics:
-                        cvss_v2 = metrics['cvssMetricV2'][0]['cvssData']
-                        cvss_data = {
-                            'version': '2.0',
-                            'score': cvss_v2.get('baseScore', 0),
-                            'severity': 'MEDIUM',  # V2 doesn't have severity
-                            'vector': cvss_v2.get('vectorString', ''),
-                            'accessVector': cvss_v2.get('accessVector', ''),
-                            'accessComplexity': cvss_v2.get('accessComplexity', ''),
-                            'authentication': cvss_v2.get('authentication', '')
-                        }
-                
-                # Extract description
-                descriptions = vuln.get('descriptions', [])
-                description = next(
-                    (d['value'] for d in descriptions if d['lang'] == 'en'),
-                    'No description available'
-                )
-                
-                cve_record = {
-                    'id': cve_id,
-                    'description': description,
-                    'cvss': cvss_data,
-                    'published': vuln.get('published', ''),
-                    'lastModified': vuln.get('lastModified', ''),
-                    'references': [
-                        {
-                            'url': ref.get('url', ''),
-                            'source': ref.get('source', ''),
-                            'tags': ref.get('tags', [])
-                        }
-                        for ref in vuln.get('references', [])[:5]
-                    ]
-                }
-                
-                # Cache the result
-                cve_cache[cache_key] = (time.time(), cve_record)
-                return cve_record
-        
-        return None
-        
     except Exception as e:
         print(f"❌ Error fetching CVE {cve_id}: {str(e)}")
         return None
 
+def _load_single_cve(cve_id):
+    """CVE record from the mirror or the live API, None if NVD does not know it"""
+    if nvd_mirror:
+        cve_record = nvd_mirror.get_cve(cve_id)
+        if cve_record:
+            return cve_record
+        if not Config.NVD_LIVE_FALLBACK:
+            return None
+    
+    response = provider_client.get(
+        'nvd',
+        NVD_API_URL,
+        params={'cveId': cve_id},
+        timeout=10,
+        hedge=True
+    )
+    
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise APIError(f"CVE lookup returned {response.status_code}", 'NVD',
+                       response_status=response.status_code)
+    
+    data = response.json()
+    if not data.get('vulnerabilities'):
+        return None
+    cve_record = parse_nvd_cve(data['vulnerabilities'][0]['cve'])
+    cve_record['id'] = cve_id
+    
+    # Keep it locally for next time
+    if nvd_mirror:
+        nvd_mirror.upsert_records([cve_record])
+    return cve_record
+
 def fetch_cves_by_keyword(keyword):
-    """Fetch recent CVEs by keyword search"""
+    """Fetch CVEs by keyword search (full-text search over the local mirror)"""
     try:
-        # For demo, return mock CVE data based on threat type
-        mock_cves = {
-            'malware': {
-                'id': 'CVE-2024-1234',
-                'description': 'Critical malware vulnerability allowing remote code execution',
-                'cvss': {
-                    'version': '3.1',
-                    'score': 9.8,
-                    'severity': 'CRITICAL',
-                    'vector': 'CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H',
-                    'attackVector': 'NETWORK',
-                    'attackComplexity': 'LOW',
-                    'privilegesRequired': 'NONE',
-                    'userInteraction': 'NONE'
-                },
-                'published': datetime.now().isoformat(),
-                'references': []
-            },
-            'phishing': {
-                'id': 'CVE-2024-5678',
-                'description': 'Phishing attack exploiting browser vulnerability',
-                'cvss': {
-                    'version': '3.1',
-                    'score': 7.5,
-                    'severity': 'HIGH',
-                    'vector': 'CVSS:3.1/AV:N/AC:L/PR:N/UI:R/S:U/C:H/I:H/A:N',
-                    'attackVector': 'NETWORK',
-                    'attackComplexity': 'LOW',
-                    'userInteraction': 'REQUIRED'
-                },
-                'published': datetime.now().isoformat(),
-                'references': []
-            }
-        }
-        
-        return [mock_cves.get(keyword.lower(), mock_cves['malware'])]
+        if nvd_mirror:
+            return nvd_mirror.search(keyword, limit=5)
+        return []
         
     except Exception as e:
         print(f"❌ Error searching CVEs by keyword: {str(e)}")
@@ -2967,6 +3045,32 @@ def get_cve_details():
             'count': 0
         }), 500
 
+@app.route('/api/cve/search', methods=['GET'])
+def search_cves():
+    """
+    Full-text CVE search over the local NVD mirror
+    
+    Query params: q (keywords), limit (default 10), min_score (CVSS base score)
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    if not nvd_mirror:
+        return jsonify({'error': 'NVD mirror not available', 'cves': [], 'count': 0}), 503
+    
+    try:
+        limit = min(int(request.args.get('limit', 10)), 100)
+        min_score = request.args.get('min_score', type=float)
+        results = nvd_mirror.search(query, limit=limit, min_score=min_score)
+        return jsonify({
+            'cves': results,
+            'count': len(results),
+            'mirror': {'cve_count': nvd_mirror.count()},
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'cves': [], 'count': 0}), 500
+
 # ============================================================================
 # NEW API ENDPOINTS FOR MALWARESNIPPER
 # ============================================================================
@@ -3023,6 +3127,7 @@ def api_scan_url():
         scan_history_db.insert(0, scan_record)
         if len(scan_history_db) > 100:
             scan_history_db.pop()
+        stats_stream.append('scans', scan_record)
         
         return jsonify(result)
         
@@ -3073,13 +3178,13 @@ def api_instant_scan():
         print(f"   SSL Status: {data.get('checks', {}).get('sslStatus', {}).get('secure', 'Unknown')}")
         
         # Broadcast to dashboard via WebSocket (33% complete)
-        socketio.emit('instant_results', {
+        event_bus.publish('instant_results', {
             'url': url,
             'phase': 'instant',
             'progress': 33,
             'checks': data.get('checks', {}),
             'timestamp': datetime.now().isoformat()
-        }, broadcast=True)
+        }, key=url, progress=True, user=quota_user())
         
         return jsonify({
             'status': 'received',
@@ -3136,13 +3241,13 @@ def api_scan_progress():
             print(f"   Threat Intel Level: {threat_intel.get('combinedThreatLevel', {}).get('level', 'UNKNOWN')}")
         
         # Broadcast to dashboard via WebSocket (66% complete)
-        socketio.emit('scan_progress', {
+        event_bus.publish('scan_progress', {
             'url': url,
             'phase': phase,
             'progress': 66,
             'checks': data.get('checks', {}),
             'timestamp': datetime.now().isoformat()
-        }, broadcast=True)
+        }, key=url, progress=True, user=quota_user())
         
         return jsonify({
             'status': 'updated',
@@ -3218,16 +3323,17 @@ def api_scan_final():
         scan_history_db.insert(0, scan_record)
         if len(scan_history_db) > 100:
             scan_history_db.pop()
+        stats_stream.append('scans', scan_record)
         
         # Broadcast to dashboard via WebSocket (100% complete)
-        socketio.emit('scan_complete', {
+        event_bus.publish('scan_complete', {
             'url': url,
             'phase': 'complete',
             'progress': 100,
             'classification': final_classification,
             'riskScore': final_risk_score,
             'timestamp': datetime.now().isoformat()
-        }, broadcast=True)
+        }, key=url, user=quota_user())
         
         return jsonify({
             'status': 'complete',
@@ -3314,29 +3420,11 @@ def api_dashboard_stats():
     Returns: Aggregated metrics for dashboard overview
     """
     try:
-        total_scans = len(scan_history_db)
-        
-        # Calculate statistics
-        safe_count = sum(1 for s in scan_history_db if s['threat_level'] == 'SAFE')
-        suspicious_count = sum(1 for s in scan_history_db if s['threat_level'] == 'SUSPICIOUS')
-        malicious_count = sum(1 for s in scan_history_db if s['threat_level'] == 'MALICIOUS')
-        
-        # Calculate average risk score
-        avg_risk = (
-            sum(s['risk_score'] for s in scan_history_db) / total_scans
-            if total_scans > 0 else 0
-        )
-        
         # Get recent scans (last 24 hours simulation)
         recent_scans = scan_history_db[:20]
         
         return jsonify({
-            'total_scans': total_scans,
-            'safe': safe_count,
-            'suspicious': suspicious_count,
-            'malicious': malicious_count,
-            'average_risk_score': round(avg_risk, 2),
-            'detection_rate': round((safe_count / total_scans * 100) if total_scans > 0 else 0, 1),
+            **scan_history_summary(),
             'recent_scans': recent_scans,
             'timestamp': datetime.now().isoformat()
         })
@@ -3344,6 +3432,30 @@ def api_dashboard_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def scan_history_summary():
+    """Counters of /api/dashboard-stats (also streamed by stats_stream)"""
+    total_scans = len(scan_history_db)
+    
+    # Calculate statistics
+    safe_count = sum(1 for s in scan_history_db if s['threat_level'] == 'SAFE')
+    suspicious_count = sum(1 for s in scan_history_db if s['threat_level'] == 'SUSPICIOUS')
+    malicious_count = sum(1 for s in scan_history_db if s['threat_level'] == 'MALICIOUS')
+    
+    # Calculate average risk score
+    avg_risk = (
+        sum(s['risk_score'] for s in scan_history_db) / total_scans
+        if total_scans > 0 else 0
+    )
+    
+    return {
+        'total_scans': total_scans,
+        'safe': safe_count,
+        'suspicious': suspicious_count,
+        'malicious': malicious_count,
+        'average_risk_score': round(avg_risk, 2),
+        'detection_rate': round((safe_count / total_scans * 100) if total_scans > 0 else 0, 1)
+    }
+
 @app.route('/api/threat-statistics', methods=['GET'])
 def api_threat_statistics():
     """
@@ -3489,11 +3601,10 @@ def api_vulnerability_feed():
     """
     cache_key = 'vuln_feed'
     
-    # Check cache
-    if cache_key in scan_cache:
-        cached_data, timestamp = scan_cache[cache_key]
-        if time.time() - timestamp < 10:  # 10-second cache
-            return jsonify(cached_data)
+    # Check cache (10-second TTL)
+    cached_data = unified_cache.get('vulnerability_feed', cache_key)
+    if cached_data is not None:
+        return jsonify(cached_data)
     
     try:
         # Mock vulnerability feed (replace with real API calls in production)
@@ -3548,7 +3659,7 @@ def api_vulnerability_feed():
         }
         
         # Cache result
-        scan_cache[cache_key] = (result, time.time())
+        unified_cache.set('vulnerability_feed', cache_key, result)
         
         return jsonify(result)
         
@@ -3566,24 +3677,13 @@ def get_recent_scans():
         # Get 'since' parameter (timestamp in milliseconds)
         since_param = request.args.get('since', type=int)
         
+        # scan_history_db is kept newest first; no re-sort needed
         if since_param:
-            # Convert milliseconds to datetime
-            since_datetime = datetime.fromtimestamp(since_param / 1000.0)
-            
-            # Filter scans that occurred after the 'since' timestamp
-            recent_scans = [
-                scan for scan in scan_history_db
-                if datetime.fromisoformat(scan.get('timestamp', scan.get('scanned_at', ''))) > since_datetime
-            ]
+            since_seconds = since_param / 1000.0
+            recent_scans = [scan for scan in scan_history_db if scan_epoch(scan) > since_seconds]
         else:
             # If no 'since' parameter, return last 20 scans
-            recent_scans = scan_history_db[-20:]
-        
-        # Sort by timestamp descending (most recent first)
-        recent_scans.sort(
-            key=lambda x: x.get('timestamp', x.get('scanned_at', '')),
-            reverse=True
-        )
+            recent_scans = scan_history_db[:20]
         
         return jsonify({
             'scans': recent_scans,
@@ -3594,6 +3694,34 @@ def get_recent_scans():
     except Exception as e:
         return jsonify({'error': str(e), 'scans': []}), 500
 
+def scan_epoch(scan):
+    """Unix time of a scan record; 'timestamp' is a float, older records use ISO strings"""
+    value = scan.get('timestamp', scan.get('scanned_at'))
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+@app.route('/api/events', methods=['GET'])
+def get_events():
+    """
+    Dashboard events after a cursor, for catch-up after a reload or reconnect
+    
+    GET /api/events?after=<seq>&log=<id>&limit=100
+    GET /api/events?since=<ms timestamp>
+    
+    Returns: {log, events, cursor, has_more, reset}; pass cursor as 'after'
+    next time, and reload the full state when reset is true
+    """
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    since = request.args.get('since', type=int)
+    if since is not None and 'after' not in request.args:
+        return jsonify(event_log.since_time(since / 1000.0, limit)), 200
+    return jsonify(event_log.after(request.args.get('after', 0, type=int), limit,
+                                   log_id=request.args.get('log'))), 200
+
 def get_remediation_steps(threat_level, threat_names):
     """Generate remediation steps based on threat analysis"""
     steps = []
@@ -3690,6 +3818,140 @@ def check_rate_limit(client_ip):
 # REAL-TIME SCAN ENDPOINT - EXTENSION
 # ═══════════════════════════════════════════════════════════════════════════
 
+def run_realtime_analysis(url, data):
+    """Multi-layer (or fallback ML) analysis behind /api/scan-realtime"""
+    # Prepare page data for analysis
+    page_data = {
+        'html': '',  # Extension doesn't send full HTML (privacy)
+        'scripts': [
+            {'src': script, 'content': ''} for script in data.get('scripts', [])
+        ] + [
+            {'src': '', 'content': inline_script[:5000]}  # Limit size
+            for inline_script in data.get('inline_scripts', [])
+        ],
+        'headers': {},  # Could be added from extension
+        'iframes': data.get('iframes', 0),
+        'forms': data.get('forms', 0),
+        'page_title': data.get('page_title', ''),
+        'dom_elements': data.get('dom_structure', {}).get('total_elements', 0),
+        'resources': data.get('external_resources', [])
+    }
+    
+    # Run enhanced multi-layer analysis if available
+    if RISK_ENGINE_AVAILABLE and risk_engine:
+        print("🚀 Running 6-layer security analysis...")
+        
+        # Emit progress update
+        try:
+            event_bus.publish('new_scan', {
+                'status': 'SCAN_UPDATE',
+                'url': url,
+                'stage': 'LAYER_ANALYSIS',
+                'progress': 30,
+                'message': 'Running 6-layer security analysis...',
+                'timestamp': datetime.now().isoformat()
+            }, key=url, progress=True, user=quota_user())
+            print(f"📡 [WEBSOCKET] Emitted SCAN_UPDATE (30%) - Layer Analysis")
+        except Exception as ws_error:
+            print(f"⚠️ WebSocket SCAN_UPDATE failed: {ws_error}")
+        
+        result = risk_engine.analyze(url, page_data)
+        
+        # Add page data to result
+        result['page_data'] = {
+            'title': data.get('page_title', ''),
+            'scripts': len(data.get('scripts', [])),
+            'inline_scripts': len(data.get('inline_scripts', [])),
+            'resources': len(data.get('external_resources', [])),
+            'forms': data.get('forms', 0),
+            'iframes': data.get('iframes', 0)
+        }
+        
+    else:
+        # Fallback to basic ML analysis
+        print("⚠️ Using basic ML analysis (Risk Engine not available)")
+        
+        classification = 'BENIGN'
+        risk_score = 0
+        ml_confidence = 0
+        threat_indicators = []
+        
+        if ML_AVAILABLE and ml_detector:
+            try:
+                # Run ML prediction
+                prediction = ml_detector.predict_url(url)
+                classification = prediction['classification']
+                ml_confidence = prediction['confidence']
+                
+                # Calculate basic risk score
+                risk_score = 0
+                
+                if len(data.get('scripts', [])) > 10:
+                    risk_score += 20
+                    threat_indicators.append('High number of external scripts')
+                
+                if len(data.get('inline_scripts', [])) > 5:
+                    risk_score += 15
+                    threat_indicators.append('Many inline scripts detected')
+                
+                if data.get('iframes', 0) > 3:
+                    risk_score += 25
+                    threat_indicators.append('Multiple iframes detected')
+                
+                if data.get('forms', 0) > 0 and len(data.get('scripts', [])) > 5:
+                    risk_score += 20
+                    threat_indicators.append('Forms with external scripts')
+                
+                # ML model override
+                if classification == 'MALICIOUS':
+                    risk_score = max(risk_score, 70)
+                elif classification == 'SUSPICIOUS':
+                    risk_score = max(risk_score, 40)
+                
+                risk_score = min(risk_score, 100)
+                
+                # Update classification
+                if risk_score >= 70:
+                    classification = 'MALICIOUS'
+                elif risk_score >= 40:
+                    classification = 'SUSPICIOUS'
+                else:
+                    classification = 'BENIGN'
+                
+            except Exception as ml_error:
+                print(f"⚠️ ML analysis failed: {ml_error}")
+                classification = 'BENIGN'
+                risk_score = 0
+                ml_confidence = 0
+        
+        # Create basic result format
+        result = {
+            'url': url,
+            'final_classification': classification,
+            'overall_risk': risk_score,
+            'risk_level': 'HIGH' if risk_score >= 70 else 'MEDIUM' if risk_score >= 40 else 'LOW',
+            'layer_scores': {
+                'machine_learning': ml_confidence
+            },
+            'summary': {
+                'total_findings': len(threat_indicators),
+                'threats_detected': threat_indicators,
+                'classification': classification
+            },
+            'page_data': {
+                'title': data.get('page_title', ''),
+                'scripts': len(data.get('scripts', [])),
+                'inline_scripts': len(data.get('inline_scripts', [])),
+                'resources': len(data.get('external_resources', [])),
+                'forms': data.get('forms', 0),
+                'iframes': data.get('iframes', 0)
+            },
+            'timestamp': datetime.now().isoformat(),
+            'status': 'completed'
+        }
+    
+    return result
+
 @app.route('/api/scan-realtime', methods=['POST'])
 def scan_realtime_from_extension():
     """
@@ -3754,148 +4016,28 @@ def scan_realtime_from_extension():
         # EMIT SCAN_STARTED - Real-time update #1
         # ========================================
         try:
-            socketio.emit('new_scan', {
+            event_bus.publish('new_scan', {
                 'status': 'SCAN_STARTED',
                 'url': url,
                 'timestamp': datetime.now().isoformat(),
                 'message': 'Initiating security analysis...'
-            })
+            }, key=url, progress=True, user=quota_user())
             print(f"📡 [WEBSOCKET] Emitted SCAN_STARTED for {url}")
         except Exception as ws_error:
             print(f"⚠️ WebSocket SCAN_STARTED failed: {ws_error}")
         
-        # Prepare page data for analysis
-        page_data = {
-            'html': '',  # Extension doesn't send full HTML (privacy)
-            'scripts': [
-                {'src': script, 'content': ''} for script in data.get('scripts', [])
-            ] + [
-                {'src': '', 'content': inline_script[:5000]}  # Limit size
-                for inline_script in data.get('inline_scripts', [])
-            ],
-            'headers': {},  # Could be added from extension
-            'iframes': data.get('iframes', 0),
-            'forms': data.get('forms', 0),
-            'page_title': data.get('page_title', ''),
-            'dom_elements': data.get('dom_structure', {}).get('total_elements', 0),
-            'resources': data.get('external_resources', [])
-        }
-        
-        # Run enhanced multi-layer analysis if available
-        if RISK_ENGINE_AVAILABLE and risk_engine:
-            print("🚀 Running 6-layer security analysis...")
-            
-            # Emit progress update
-            try:
-                socketio.emit('new_scan', {
-                    'status': 'SCAN_UPDATE',
-                    'url': url,
-                    'stage': 'LAYER_ANALYSIS',
-                    'progress': 30,
-                    'message': 'Running 6-layer security analysis...',
-                    'timestamp': datetime.now().isoformat()
-                })
-                print(f"📡 [WEBSOCKET] Emitted SCAN_UPDATE (30%) - Layer Analysis")
-            except Exception as ws_error:
-                print(f"⚠️ WebSocket SCAN_UPDATE failed: {ws_error}")
-            
-            result = risk_engine.analyze(url, page_data)
-            
-            # Add page data to result
-            result['page_data'] = {
-                'title': data.get('page_title', ''),
-                'scripts': len(data.get('scripts', [])),
-                'inline_scripts': len(data.get('inline_scripts', [])),
-                'resources': len(data.get('external_resources', [])),
-                'forms': data.get('forms', 0),
-                'iframes': data.get('iframes', 0)
-            }
-            
-        else:
-            # Fallback to basic ML analysis
-            print("⚠️ Using basic ML analysis (Risk Engine not available)")
-            
-            classification = 'BENIGN'
-            risk_score = 0
-            ml_confidence = 0
-            threat_indicators = []
-            
-            if ML_AVAILABLE and ml_detector:
-                try:
-                    # Run ML prediction
-                    prediction = ml_detector.predict_url(url)
-                    classification = prediction['classification']
-                    ml_confidence = prediction['confidence']
-                    
-                    # Calculate basic risk score
-                    risk_score = 0
-                    
-                    if len(data.get('scripts', [])) > 10:
-                        risk_score += 20
-                        threat_indicators.append('High number of external scripts')
-                    
-                    if len(data.get('inline_scripts', [])) > 5:
-                        risk_score += 15
-                        threat_indicators.append('Many inline scripts detected')
-                    
-                    if data.get('iframes', 0) > 3:
-                        risk_score += 25
-                        threat_indicators.append('Multiple iframes detected')
-                    
-                    if data.get('forms', 0) > 0 and len(data.get('scripts', [])) > 5:
-                        risk_score += 20
-                        threat_indicators.append('Forms with external scripts')
-                    
-                    # ML model override
-                    if classification == 'MALICIOUS':
-                        risk_score = max(risk_score, 70)
-                    elif classification == 'SUSPICIOUS':
-                        risk_score = max(risk_score, 40)
-                    
-                    risk_score = min(risk_score, 100)
-                    
-                    # Update classification
-                    if risk_score >= 70:
-                        classification = 'MALICIOUS'
-                    elif risk_score >= 40:
-                        classification = 'SUSPICIOUS'
-                    else:
-                        classification = 'BENIGN'
-                    
-                except Exception as ml_error:
-                    print(f"⚠️ ML analysis failed: {ml_error}")
-                    classification = 'BENIGN'
-                    risk_score = 0
-                    ml_confidence = 0
-            
-            # Create basic result format
-            result = {
-                'url': url,
-                'final_classification': classification,
-                'overall_risk': risk_score,
-                'risk_level': 'HIGH' if risk_score >= 70 else 'MEDIUM' if risk_score >= 40 else 'LOW',
-                'layer_scores': {
-                    'machine_learning': ml_confidence
-                },
-                'summary': {
-                    'total_findings': len(threat_indicators),
-                    'threats_detected': threat_indicators,
-                    'classification': classification
-                },
-                'page_data': {
-                    'title': data.get('page_title', ''),
-                    'scripts': len(data.get('scripts', [])),
-                    'inline_scripts': len(data.get('inline_scripts', [])),
-                    'resources': len(data.get('external_resources', [])),
-                    'forms': data.get('forms', 0),
-                    'iframes': data.get('iframes', 0)
-                },
-                'timestamp': datetime.now().isoformat(),
-                'status': 'completed'
-            }
+        # Concurrent scans of the same URL share one analysis; its metered
+        # lookups jump the quota queue ahead of background work
+        with scheduling(Priority.INTERACTIVE, user=quota_user()):
+            result, shared = request_coalescer.do(
+                'scan_realtime', url, lambda: run_realtime_analysis(url, data)
+            )
+        if shared:
+            print(f"🔗 [REAL-TIME SCAN] Reused in-flight analysis for {url}")
         
         analysis_time = time.time() - start_time
         result['analysis_duration'] = round(analysis_time, 3)
+        result['model_versions'] = model_versions()
         
         # ========================================
         # EMIT SCAN_COMPLETE - Final real-time update
@@ -3918,7 +4060,7 @@ def scan_realtime_from_extension():
                 'message': 'Analysis complete'
             }
             
-            socketio.emit('new_scan', ws_data)
+            event_bus.publish('new_scan', ws_data, key=url, user=quota_user())
             print(f"📡 [WEBSOCKET] Emitted SCAN_COMPLETE to dashboard")
             print(f"   - URL: {url}")
             print(f"   - Classification: {result.get('final_classification', 'BENIGN')}")
@@ -4287,6 +4429,7 @@ def scan_url_realtime():
         risk_score = 0
         url_ml_score = None
         url_ml_label = None
+        url_ml_version = None
         js_ml_score = None
         js_ml_label = None
         
@@ -4297,6 +4440,7 @@ def scan_url_realtime():
                 url_ml_result = predict_url(url)
                 url_ml_score = url_ml_result.get('score', 0.0)  # 0-1 probability
                 url_ml_label = url_ml_result.get('label', 'unknown')  # benign/malicious
+                url_ml_version = url_ml_result.get('model_version')  # version that scored it
                 
                 print(f"   🎯 URL ML Result: {url_ml_label.upper()} (score: {url_ml_score:.4f})")
                 
@@ -4385,6 +4529,7 @@ def scan_url_realtime():
             'url_ml_label': url_ml_label,
             'js_ml_score': round(js_ml_score, 4) if js_ml_score is not None else None,
             'js_ml_label': js_ml_label,
+            'model_versions': {**model_versions(), **({'url': url_ml_version} if url_ml_version else {})},
             'timestamp': datetime.now().isoformat(),
             'stats': stats
         }
@@ -4412,7 +4557,7 @@ def scan_url_realtime():
         print(f"   Total Scans: {stats['total_scans']}")
         print(f"{'='*80}\n")
         
-        socketio.emit('new_scan', websocket_data)
+        event_bus.publish('new_scan', websocket_data, key=url, user=quota_user())
         
         print(f"   ✅ Scan complete and broadcast to dashboard")
         
@@ -4556,29 +4701,18 @@ def analyze_traffic_async(traffic_entry):
     try:
         url = traffic_entry['url']
         
-        # Check cache first
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        if url_hash in scan_cache:
-            cached = scan_cache[url_hash]
-            if time.time() - cached['cached_at'] < CACHE_DURATION:
-                apply_scan_result(traffic_entry, cached['result'])
-                return
-        
-        # Perform analysis
-        print(f"🔍 [ANALYZE] Scanning: {url}")
-        
-        # Use existing scan_with_virustotal function
-        scan_result = scan_with_virustotal(url)
-        
-        # Cache result
-        scan_cache[url_hash] = {
-            'result': scan_result,
-            'cached_at': time.time()
-        }
+        # Cache and in-flight scans are shared with /scan-url
+        with scheduling(Priority.BACKGROUND, user='traffic'):
+            scan_result = get_virustotal_result(url)
         
         # Apply results
         apply_scan_result(traffic_entry, scan_result)
         
+    except QuotaDeadlineExceededError:
+        print(f"⏭️ [ANALYZE] VirusTotal quota busy, skipped: {traffic_entry['url']}")
+        traffic_entry['analyzed'] = True
+        traffic_entry['threat_level'] = 'skipped'
+        real_time_stats['pending_scans'] -= 1
     except Exception as e:
         print(f"❌ [ANALYZE] Error: {e}")
         traffic_entry['analyzed'] = True
@@ -4611,19 +4745,20 @@ def apply_scan_result(traffic_entry, scan_result):
         'analyzed_at': datetime.now().isoformat(),
         'result': scan_result
     }
+    stats_stream.append('traffic', {k: v for k, v in traffic_entry.items() if k != 'scan_result'})
     
     print(f"✅ [ANALYZE] Complete: {traffic_entry['url']} - {threat_level}")
     
     # Broadcast to dashboard instantly
     try:
-        socketio.emit('new_scan', {
+        event_bus.publish('new_scan', {
             'id': traffic_entry['id'],
             'url': traffic_entry['url'],
             'threat_level': threat_level,
             'risk_score': traffic_entry['risk_score'],
             'timestamp': traffic_entry['timestamp'],
             'method': traffic_entry.get('method', 'GET')
-        })
+        }, key=traffic_entry['url'], user=quota_user() if has_request_context() else None)
         print(f"📡 Sent to dashboard")
     except:
         pass
@@ -4675,6 +4810,31 @@ def dashboard_stats():
     """Get real-time dashboard statistics"""
     return jsonify(real_time_stats), 200
 
+# Snapshot + delta stream of the dashboard counters (see stats_stream.py)
+stats_stream.add_source('realtime', lambda: real_time_stats)
+stats_stream.add_source('history', scan_history_summary)
+if scan_storage:
+    stats_stream.add_source('storage', scan_storage.get_stats)
+
+@app.route('/api/stats/stream', methods=['GET'])
+def stats_stream_poll():
+    """
+    Deltas since a sequence number, for clients without Socket.IO
+    
+    GET /api/stats/stream?stream=<id>&since=<seq>
+    
+    Returns: {stream, seq, deltas} when resumable, otherwise a full snapshot
+    """
+    since = request.args.get('since', type=int)
+    if since is not None and request.args.get('stream') == stats_stream.stream_id:
+        stats_stream.tick()
+        deltas = stats_stream.since(since)
+        if deltas is not None:
+            return jsonify({'stream': stats_stream.stream_id, 'seq': stats_stream.seq,
+                            'deltas': deltas}), 200
+    stats_stream.tick()
+    return jsonify(stats_stream.snapshot()), 200
+
 @app.route('/api/scan/stats', methods=['GET'])
 def get_scan_stats():
     """Get persistent scan statistics from storage"""
@@ -4969,6 +5129,7 @@ def scan_page():
                 'iframe_count': dom.get('iframeCount', 0)
             },
             
+            'model_versions': model_versions(),
             'timestamp': datetime.now().isoformat()
         }
         
@@ -5002,6 +5163,7 @@ def scan_page():
             'analyzed_at': datetime.now().isoformat(),
             'result': result
         }
+        stats_stream.append('traffic', traffic_entry)
         
         # Update real-time stats
         real_time_stats['total_requests'] += 1
@@ -5014,7 +5176,7 @@ def scan_page():
         
         # Broadcast to dashboard
         try:
-            socketio.emit('new_scan', {
+            event_bus.publish('new_scan', {
                 'id': scan_id,
                 'url': url,
                 'threat_level': classification,
@@ -5022,7 +5184,7 @@ def scan_page():
                 'timestamp': traffic_entry['timestamp'],
                 'method': 'PAGE_SCAN',
                 'indicators': all_indicators[:5]  # Send first 5 indicators
-            })
+            }, key=url, user=quota_user())
             print(f"📡 [ML SCAN] Broadcasted to dashboard")
         except Exception as e:
             print(f"⚠️ [ML SCAN] WebSocket broadcast failed: {e}")
@@ -6,7 +6,12 @@ error handling, and progress tracking.
 
 Features:
 - Async scanning of multiple URLs (configurable concurrency)
-- Per-URL timeout (5-10 seconds)
+- Duplicate URLs (after canonicalization) scanned once per batch
+- URLs grouped by registrable domain; the first URL of each domain is
+  scanned before the rest so domain-level lookups are made once and cached
+- Streaming: results yielded in completion order (iter_batch)
+- Per-URL timeout (5-10 seconds), counted from when a worker picks the
+  URL up, so URLs queued behind other batches do not time out unscanned
 - Progress tracking and callbacks
 - Graceful error handling
 - Result aggregation
@@ -17,13 +22,14 @@ Version: 1.0.0
 
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional, Callable, Coroutine
+from typing import List, Dict, Any, Optional, Callable, Coroutine, AsyncIterator, Iterator, Tuple
 from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass, asdict
-from datetime import datetime
+from dataclasses import dataclass, asdict, replace
+from datetime import datetime, timedelta
 
 from url_validator import validate_url, URLValidator
-from error_handler import URLValidationError
+from cache_manager import canonicalize_url
+from error_handler import CyberGuardException
 from config import Config
 from logging_config import get_logger, PerformanceLogger, get_audit_logger
 
@@ -80,6 +86,7 @@ class BatchScanProgress:
         completed_urls: Number of completed scans
         failed_urls: Number of failed scans
         successful_urls: Number of successful scans
+        duplicate_urls: URLs skipped as duplicates of another URL in the batch
         start_time: When batch scan started
         estimated_completion: Estimated completion time
     """
@@ -88,6 +95,7 @@ class BatchScanProgress:
     completed_urls: int = 0
     failed_urls: int = 0
     successful_urls: int = 0
+    duplicate_urls: int = 0
     start_time: Optional[datetime] = None
     estimated_completion: Optional[datetime] = None
 
@@ -105,6 +113,16 @@ class BatchScanProgress:
             return 0.0
         return (datetime.now() - self.start_time).total_seconds()
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert progress to dictionary."""
+        result = asdict(self)
+        for field in ('start_time', 'estimated_completion'):
+            if result[field]:
+                result[field] = result[field].isoformat()
+        result['progress_percent'] = round(self.progress_percent, 1)
+        result['elapsed_seconds'] = round(self.elapsed_seconds, 3)
+        return result
+
     def update(self, success: bool) -> None:
         """Update progress with scan result."""
         self.completed_urls += 1
@@ -118,7 +136,7 @@ class BatchScanProgress:
             avg_per_url = self.elapsed_seconds / self.completed_urls
             remaining = self.total_urls - self.completed_urls
             remaining_seconds = avg_per_url * remaining
-            self.estimated_completion = datetime.now() + asyncio.timedelta(
+            self.estimated_completion = datetime.now() + timedelta(
                 seconds=remaining_seconds
             )
 
@@ -137,6 +155,7 @@ class AsyncURLScanner:
     - Progress tracking and callbacks
     - Error handling and recovery
     - Result aggregation and reporting
+    - Streaming results as each URL completes (iter_batch)
     
     Thread-safe implementation using ThreadPoolExecutor.
     """
@@ -145,7 +164,8 @@ class AsyncURLScanner:
         self,
         max_concurrent: int = Config.MAX_CONCURRENT_SCANS,
         timeout_per_url: int = Config.REQUEST_TIMEOUT,
-        progress_callback: Optional[Callable[[BatchScanProgress], None]] = None
+        progress_callback: Optional[Callable[[BatchScanProgress], None]] = None,
+        validate: bool = True
     ):
         """
         Initialize async scanner.
@@ -154,10 +174,13 @@ class AsyncURLScanner:
             max_concurrent: Maximum concurrent scans
             timeout_per_url: Timeout per URL in seconds
             progress_callback: Optional callback for progress updates
+            validate: Run validate_url and scan the sanitized URL; when False
+                the scan function gets each URL exactly as submitted
         """
         self.max_concurrent = max_concurrent
         self.timeout_per_url = timeout_per_url
         self.progress_callback = progress_callback
+        self.validate = validate
         self.executor = ThreadPoolExecutor(max_workers=max_concurrent)
 
     def _validate_and_normalize(self, url: str) -> Optional[str]:
@@ -173,7 +196,8 @@ class AsyncURLScanner:
         try:
             sanitized, _ = validate_url(url)
             return sanitized
-        except URLValidationError as e:
+        except CyberGuardException as e:
+            # URLMalformedError, PrivateIPError, ... are not URLValidationError
             logger.warning(f"URL validation failed: {e.message}")
             return None
 
@@ -224,7 +248,7 @@ class AsyncURLScanner:
         start_time = datetime.now()
         
         # Validate URL
-        normalized_url = self._validate_and_normalize(url)
+        normalized_url = self._validate_and_normalize(url) if self.validate else url
         if not normalized_url:
             duration = (datetime.now() - start_time).total_seconds()
             return self._create_scan_error(
@@ -233,19 +257,37 @@ class AsyncURLScanner:
                 duration
             )
         
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        
+        def mark_started():
+            if not started.done():
+                started.set_result(datetime.now())
+        
+        def run_scan():
+            # The pool is shared by every batch: the timeout starts only
+            # once a worker picks the URL up, not while it is queued
+            try:
+                loop.call_soon_threadsafe(mark_started)
+            except RuntimeError:
+                # The batch's event loop is gone; nobody waits for this scan
+                return None
+            return scan_function(normalized_url)
+        
+        scan = loop.run_in_executor(self.executor, run_scan)
         try:
-            # Run scan in thread pool with timeout
-            loop = asyncio.get_event_loop()
-            
             with PerformanceLogger("URL_Scan", normalized_url[:50]):
-                result = await asyncio.wait_for(
-                    loop.run_in_executor(
-                        self.executor,
-                        scan_function,
-                        normalized_url
-                    ),
-                    timeout=self.timeout_per_url
-                )
+                try:
+                    await asyncio.wait({started, scan}, return_when=asyncio.FIRST_COMPLETED)
+                except asyncio.CancelledError:
+                    # Batch abandoned: drop the scan if it is still queued
+                    scan.cancel()
+                    raise
+                if started.done():
+                    start_time = started.result()
+                # A timed-out scan keeps its worker until it returns, so the
+                # pool never counts it as free capacity
+                result = await asyncio.wait_for(scan, timeout=self.timeout_per_url)
             
             duration = (datetime.now() - start_time).total_seconds()
             
@@ -288,58 +330,105 @@ class AsyncURLScanner:
                 duration
             )
 
-    async def scan_batch(
+    async def iter_batch(
         self,
         urls: List[str],
-        scan_function: Callable[[str], Dict[str, Any]]
-    ) -> List[ScanResult]:
+        scan_function: Callable[[str], Dict[str, Any]],
+        max_urls: Optional[int] = None,
+        progress: Optional[BatchScanProgress] = None
+    ) -> AsyncIterator[Tuple[int, ScanResult]]:
         """
-        Scan multiple URLs concurrently.
+        Scan multiple URLs concurrently, yielding each result as it completes.
         
         Respects limits:
         - Maximum URLs per request
         - Maximum concurrent scans
         - Per-URL timeout
         
+        URLs that canonicalize to the same key are scanned once. URLs are
+        grouped by registrable domain; each group scans its first URL on its
+        own, so the domain-level lookups it triggers (DNS, WHOIS, reputation)
+        are cached before the group's other URLs run concurrently.
+        
         Args:
             urls: List of URLs to scan
             scan_function: Function to perform actual scan
+            max_urls: Maximum URLs allowed (default Config.MAX_URLS_PER_REQUEST)
+            progress: Progress object to fill in, for callers that report it
             
-        Returns:
-            List of ScanResult objects
+        Yields:
+            (index into urls, ScanResult) in completion order; duplicates are
+            yielded together with the URL they duplicate
         """
         # Validate input
         if not isinstance(urls, list):
             raise ValueError("URLs must be a list")
         
-        if len(urls) > Config.MAX_URLS_PER_REQUEST:
+        max_urls = max_urls or Config.MAX_URLS_PER_REQUEST
+        if len(urls) > max_urls:
             raise ValueError(
-                f"Too many URLs. Maximum {Config.MAX_URLS_PER_REQUEST} allowed"
+                f"Too many URLs. Maximum {max_urls} allowed"
             )
         
+        # Deduplicate by canonical URL, then group by registrable domain
+        first_url: Dict[str, str] = {}
+        positions: Dict[str, List[int]] = {}
+        groups: Dict[str, List[str]] = {}
+        for index, url in enumerate(urls):
+            key = canonicalize_url(url)
+            if key not in first_url:
+                first_url[key] = url
+                groups.setdefault(URLValidator.registrable_domain(key), []).append(key)
+            positions.setdefault(key, []).append(index)
+        
         # Initialize progress tracking
-        progress = BatchScanProgress(total_urls=len(urls))
+        progress = progress or BatchScanProgress(total_urls=0)
+        progress.total_urls = len(first_url)
+        progress.duplicate_urls = len(urls) - len(first_url)
         progress.start_time = datetime.now()
         
         # Create scan tasks with semaphore to limit concurrency
         semaphore = asyncio.Semaphore(self.max_concurrent)
+        completed: asyncio.Queue = asyncio.Queue()
         
-        async def bounded_scan(url: str) -> ScanResult:
+        async def bounded_scan(key: str) -> None:
             async with semaphore:
-                result = await self.scan_single_url(url, scan_function)
+                result = await self.scan_single_url(first_url[key], scan_function)
                 progress.update(success=not result.is_error)
                 
                 if self.progress_callback:
                     self.progress_callback(progress)
                 
-                return result
+                completed.put_nowait((key, result))
         
-        # Run all scans concurrently
-        tasks = [bounded_scan(url) for url in urls]
+        async def scan_group(group: List[str]) -> None:
+            await bounded_scan(group[0])
+            await asyncio.gather(*(bounded_scan(key) for key in group[1:]))
+        
+        logger.info(
+            f"Starting batch scan of {len(first_url)} URLs "
+            f"({progress.duplicate_urls} duplicates, {len(groups)} domains, "
+            f"max {self.max_concurrent} concurrent)"
+        )
         
-        logger.info(f"Starting batch scan of {len(urls)} URLs (max {self.max_concurrent} concurrent)")
+        # Run all domain groups concurrently
+        tasks = [asyncio.ensure_future(scan_group(group)) for group in groups.values()]
+        total_risk = 0.0
         
-        results = await asyncio.gather(*tasks)
+        try:
+            for _ in range(len(first_url)):
+                key, result = await completed.get()
+                for index in positions[key]:
+                    total_risk += result.risk_score
+                    if result.url != urls[index]:
+                        yield index, replace(result, url=urls[index])
+                    else:
+                        yield index, result
+        finally:
+            # Consumer went away early: stop scans that have not started
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         
         # Log summary
         logger.info(
@@ -351,44 +440,93 @@ class AsyncURLScanner:
             f"batch_{len(urls)}_urls",
             None,
             'completed',
-            sum(r.risk_score for r in results) / len(results) if results else 0,
+            total_risk / len(urls) if urls else 0,
             progress.elapsed_seconds
         )
+
+    async def scan_batch(
+        self,
+        urls: List[str],
+        scan_function: Callable[[str], Dict[str, Any]],
+        max_urls: Optional[int] = None
+    ) -> List[ScanResult]:
+        """
+        Scan multiple URLs concurrently (see iter_batch).
         
+        Args:
+            urls: List of URLs to scan
+            scan_function: Function to perform actual scan
+            max_urls: Maximum URLs allowed (default Config.MAX_URLS_PER_REQUEST)
+            
+        Returns:
+            List of ScanResult objects, one per input URL and in input order
+        """
+        results: List[Optional[ScanResult]] = [None] * len(urls)
+        async for index, result in self.iter_batch(urls, scan_function, max_urls):
+            results[index] = result
         return results
 
+    def iter_urls_sync(
+        self,
+        urls: List[str],
+        scan_function: Callable[[str], Dict[str, Any]],
+        max_urls: Optional[int] = None,
+        progress: Optional[BatchScanProgress] = None
+    ) -> Iterator[Tuple[int, ScanResult]]:
+        """
+        Synchronous wrapper for iter_batch, for streaming responses.
+        
+        Drives a private event loop one result at a time. Closing the
+        generator early (e.g. the client disconnected) cancels the scans
+        that have not started yet.
+        
+        Args:
+            urls: List of URLs to scan
+            scan_function: Function to perform actual scan
+            max_urls: Maximum URLs allowed (default Config.MAX_URLS_PER_REQUEST)
+            progress: Progress object to fill in
+            
+        Yields:
+            (index into urls, ScanResult) in completion order
+        """
+        loop = asyncio.new_event_loop()
+        batch = self.iter_batch(urls, scan_function, max_urls, progress)
+        try:
+            while True:
+                try:
+                    item = loop.run_until_complete(batch.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            loop.run_until_complete(batch.aclose())
+            loop.close()
+
     def scan_urls_sync(
         self,
         urls: List[str],
-        scan_function: Callable[[str], Dict[str, Any]]
+        scan_function: Callable[[str], Dict[str, Any]],
+        max_urls: Optional[int] = None
     ) -> List[ScanResult]:
         """
         Synchronous wrapper for async batch scanning.
         
+        Runs the batch on a new event loop, so it can be called from any
+        request thread. Coroutines should await scan_batch() instead.
+        
         Args:
             urls: List of URLs to scan
             scan_function: Function to perform actual scan
+            max_urls: Maximum URLs allowed (default Config.MAX_URLS_PER_REQUEST)
             
         Returns:
             List of ScanResult objects
         """
-        # Create new event loop if needed
         try:
-            loop = asyncio.get_event_loop()
+            asyncio.get_running_loop()
         except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        # Run async scan
-        if loop.is_running():
-            # Already in async context, use executor
-            return loop.run_until_complete(
-                self.scan_batch(urls, scan_function)
-            )
-        else:
-            return loop.run_until_complete(
-                self.scan_batch(urls, scan_function)
-            )
+            return asyncio.run(self.scan_batch(urls, scan_function, max_urls))
+        raise RuntimeError("scan_urls_sync() called from a running event loop; await scan_batch()")
 
     def close(self) -> None:
         """Close thread pool executor."""
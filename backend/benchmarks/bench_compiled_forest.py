@@ -0,0 +1,84 @@
+"""
+Benchmark: compiled forest vs scikit-learn predict_proba
+
+Trains a forest shaped like the production URL model (100 trees, depth 20,
+100 TF-IDF char n-gram features), then measures per-call latency for
+single-row and small-batch scoring through both paths.
+
+Usage:
+    python benchmarks/bench_compiled_forest.py [--trees 100] [--calls 2000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'ml_advanced'))
+
+from compiled_forest import CompiledForest
+
+
+def synthetic_urls(n, seed=0):
+    rng = np.random.RandomState(seed)
+    words = ['login', 'verify', 'docs', 'account', 'github', 'secure', 'paypal',
+             'news', 'update', 'blog', 'cdn', 'wiki', 'bank', 'free', 'gift']
+    tlds = ['com', 'org', 'xyz', 'tk', 'ru', 'io']
+    urls, labels = [], []
+    for _ in range(n):
+        parts = rng.choice(words, size=rng.randint(1, 4))
+        tld = rng.choice(tlds)
+        urls.append(f"https://{'-'.join(parts)}.{tld}/{rng.choice(words)}?id={rng.randint(1e6)}")
+        labels.append(int(tld in ('xyz', 'tk', 'ru') or 'verify' in parts))
+    return urls, np.array(labels)
+
+
+def time_calls(fn, inputs, calls):
+    for x in inputs[:50]:
+        fn(x)
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(inputs[i % len(inputs)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--depth', type=int, default=20)
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    urls, labels = synthetic_urls(5000)
+    vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(2, 3), max_features=100)
+    X = vectorizer.fit_transform(urls)
+    model = RandomForestClassifier(n_estimators=args.trees, max_depth=args.depth,
+                                   min_samples_split=5, min_samples_leaf=2,
+                                   random_state=42, n_jobs=1).fit(X, labels)
+    compiled = CompiledForest.from_sklearn(model)
+
+    val_urls, _ = synthetic_urls(1000, seed=1)
+    X_val = vectorizer.transform(val_urls)
+    identical = np.array_equal(model.predict_proba(X_val), compiled.predict_proba(X_val))
+
+    rows = [X_val[i] for i in range(X_val.shape[0])]
+    batches = [X_val[i:i + 16] for i in range(0, X_val.shape[0], 16)]
+
+    print(f"Forest: {compiled.n_trees} trees, {len(compiled.feature)} nodes, "
+          f"max depth {compiled.max_depth}")
+    print(f"Bit-identical on {X_val.shape[0]} validation rows: {identical}")
+    print(f"{'path':<28}{'single row (us)':>18}{'batch of 16 (us)':>20}")
+    for name, fn in [('sklearn predict_proba', model.predict_proba),
+                     ('compiled predict_proba', compiled.predict_proba)]:
+        single = time_calls(fn, rows, args.calls)
+        batch = time_calls(fn, batches, max(args.calls // 10, 50))
+        print(f"{name:<28}{single:>18.1f}{batch:>20.1f}")
+
+
+if __name__ == '__main__':
+    main()
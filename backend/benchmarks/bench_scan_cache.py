@@ -0,0 +1,116 @@
+"""
+Benchmark: concurrent ScanCache vs a single locked connection
+
+Runs N threads issuing a read-heavy mix of cache lookups and writes for a
+fixed duration against two stores on a temporary database:
+  - naive:  one shared connection, a global lock, commit per write
+  - scan:   ScanCache (WAL, per-thread connections, UPSERT, group commit)
+
+Usage:
+    python benchmarks/bench_scan_cache.py [--threads 8] [--seconds 5] [--write-ratio 0.2]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from cache_manager import ScanCache
+
+
+class NaiveStore:
+    """The pre-WAL design: shared connection, lock, commit per write."""
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL, cache_key TEXT NOT NULL, value TEXT NOT NULL,
+                stored_at REAL NOT NULL, expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, cache_key))
+        ''')
+        self.conn.commit()
+
+    def get_entry(self, namespace, cache_key):
+        with self.lock:
+            return self.conn.execute(
+                'SELECT value FROM cache_entries WHERE namespace = ? AND cache_key = ?',
+                (namespace, cache_key)
+            ).fetchone()
+
+    def put_entry(self, namespace, cache_key, value, stored_at, expires_at):
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)',
+                (namespace, cache_key, json.dumps(value), stored_at, expires_at)
+            )
+            self.conn.commit()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.conn.close()
+
+
+def run(store, threads, seconds, write_ratio, keyspace):
+    stop = threading.Event()
+    counts = [[0, 0] for _ in range(threads)]
+
+    def worker(index):
+        rng = random.Random(index)
+        while not stop.is_set():
+            key = f'https://site{rng.randrange(keyspace)}.com/'
+            if rng.random() < write_ratio:
+                now = time.time()
+                store.put_entry('scan', key, {'risk_score': rng.random()}, now, now + 3600)
+                counts[index][1] += 1
+            else:
+                store.get_entry('scan', key)
+                counts[index][0] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    store.flush()
+    elapsed = time.perf_counter() - start
+    reads = sum(c[0] for c in counts)
+    writes = sum(c[1] for c in counts)
+    return reads / elapsed, writes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--keys', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Naive stores in the default rollback journal on a real file
+        stores = [('naive (lock + commit/write)', NaiveStore(os.path.join(tmp, 'naive.db'))),
+                  ('ScanCache (WAL + group commit)', ScanCache(os.path.join(tmp, 'scan.db')))]
+        print(f"{args.threads} threads, {args.seconds:.0f}s, write ratio {args.write_ratio}")
+        for label, store in stores:
+            reads, writes = run(store, args.threads, args.seconds, args.write_ratio, args.keys)
+            print(f"  {label:32s} reads/s {reads:10,.0f}   writes/s {writes:10,.0f}")
+            store.close()
+
+
+if __name__ == '__main__':
+    main()
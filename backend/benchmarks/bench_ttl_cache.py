@@ -0,0 +1,120 @@
+"""
+Benchmark: TTLCache eviction at capacity, single lock vs. sharded
+
+Fills each cache to max_size, then runs N threads issuing a mix of gets and
+sets over a keyspace larger than the cache (so most sets evict) for a fixed
+duration against:
+  - legacy:  the previous TTLCache (min() over access times to find the LRU)
+  - lru:     TTLCache (OrderedDict LRU + expiry heap)
+  - sharded: ShardedTTLCache (N independently locked TTLCaches)
+
+Usage:
+    python benchmarks/bench_ttl_cache.py [--entries 100000] [--threads 16] [--seconds 5]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from performance_cache import CacheEntry, TTLCache, ShardedTTLCache
+
+
+class LegacyTTLCache:
+    """The previous design: O(n) LRU search and full expiry scans when full."""
+
+    def __init__(self, max_size, default_ttl_seconds=3600):
+        self.max_size = max_size
+        self.default_ttl = default_ttl_seconds
+        self.cache = {}
+        self.access_times = {}
+        self.lock = threading.Lock()
+
+    def set(self, key, value, ttl_seconds=None):
+        ttl = ttl_seconds or self.default_ttl
+        with self.lock:
+            if len(self.cache) >= self.max_size:
+                for expired in [k for k, e in self.cache.items() if e.is_expired()]:
+                    del self.cache[expired]
+                    self.access_times.pop(expired, None)
+            if len(self.cache) >= self.max_size:
+                lru_key = min(self.access_times, key=self.access_times.get)
+                del self.cache[lru_key]
+                del self.access_times[lru_key]
+            self.cache[key] = CacheEntry(value, ttl)
+            self.access_times[key] = time.time()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            value = entry.get_value()
+            if value is not None:
+                self.access_times[key] = time.time()
+            return value
+
+
+def run(cache, entries, threads, seconds, write_ratio):
+    for i in range(entries):
+        cache.set(f'https://site{i}.com/', i)
+
+    stop = threading.Event()
+    counts = [[0, 0] for _ in range(threads)]
+    keyspace = entries * 2
+
+    def worker(index):
+        rng = random.Random(index)
+        while not stop.is_set():
+            key = f'https://site{rng.randrange(keyspace)}.com/'
+            if rng.random() < write_ratio:
+                cache.set(key, index)
+                counts[index][1] += 1
+            else:
+                cache.get(key)
+                counts[index][0] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    reads = sum(c[0] for c in counts)
+    writes = sum(c[1] for c in counts)
+    return reads / elapsed, writes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--shards', type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{args.entries} entries, {args.threads} threads, {args.seconds:.0f}s, "
+          f"{args.write_ratio:.0%} writes\n")
+    print(f"{'cache':<10}{'reads/s':>14}{'writes/s':>14}")
+    caches = [
+        ('legacy', LegacyTTLCache(args.entries)),
+        ('lru', TTLCache(args.entries)),
+        ('sharded', ShardedTTLCache(args.entries, shards=args.shards)),
+    ]
+    for name, cache in caches:
+        reads, writes = run(cache, args.entries, args.threads, args.seconds, args.write_ratio)
+        print(f"{name:<10}{reads:>14,.0f}{writes:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark: SIEM WebSocket broadcast, sequential sends vs per-client queues
+
+Connects N simulated clients (a small share of them slow) and broadcasts a
+series of scan results through:
+  - legacy:  the previous broadcast (json.dumps and an awaited send per
+             client, one client after another)
+  - queued:  SIEMWebSocketServer (serialize once, bounded send queue and
+             writer task per client, slow-client policy)
+
+Reports how long broadcast() blocks the caller and the delivery latency of
+the fast clients (time from broadcast start until their send completed).
+
+Usage:
+    python benchmarks/bench_ws_broadcast.py [--clients 1000] [--messages 20] [--slow 0.01]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import websocket_server
+from websocket_server import SIEMWebSocketServer
+
+
+class SimulatedClient:
+    """Stands in for a websocket; each send takes the client's network delay."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.received = []
+
+    async def send(self, payload):
+        await asyncio.sleep(self.delay)
+        self.received.append((time.perf_counter(), payload))
+
+    async def close(self, code=1000, reason=''):
+        pass
+
+
+class LegacyBroadcaster:
+    """The previous design: serialize and await each client in turn."""
+
+    def __init__(self, clients):
+        self.clients = clients
+
+    async def broadcast(self, message):
+        for client in self.clients:
+            await client.send(json.dumps(message))
+
+    async def drain(self):
+        pass
+
+
+class QueuedBroadcaster:
+    def __init__(self, clients, policy, queue_size):
+        self.server = SIEMWebSocketServer(queue_size=queue_size, slow_client_policy=policy)
+        self.clients = clients
+
+    async def start(self):
+        for client in self.clients:
+            await self.server.register_client(client)
+        await self.drain()
+        for client in self.clients:
+            client.received.clear()
+
+    async def broadcast(self, message):
+        await self.server.broadcast(message)
+
+    async def drain(self):
+        for session in list(self.server.sessions.values()):
+            await session.drain()
+        # Let the last sends complete
+        await asyncio.sleep(0.05)
+
+
+def make_clients(count, slow_share, fast_delay, slow_delay, seed=7):
+    rng = random.Random(seed)
+    slow = set(rng.sample(range(count), int(count * slow_share)))
+    return [SimulatedClient(slow_delay if i in slow else fast_delay) for i in range(count)], slow
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+async def run(broadcaster, clients, slow, messages, interval):
+    started = {}
+    blocked = []
+    for seq in range(messages):
+        message = {'type': 'scan_complete', 'seq': seq,
+                   'data': {'url': f'https://site{seq}.com/', 'risk_score': 42, 'indicators': ['x'] * 20}}
+        started[seq] = time.perf_counter()
+        await broadcaster.broadcast(message)
+        blocked.append(time.perf_counter() - started[seq])
+        await asyncio.sleep(interval)
+    await broadcaster.drain()
+
+    latencies = [received - started[json.loads(payload)['seq']]
+                 for i, client in enumerate(clients) if i not in slow
+                 for received, payload in client.received]
+    delivered = sum(len(client.received) for i, client in enumerate(clients) if i not in slow)
+    return blocked, latencies, delivered
+
+
+async def main_async(args):
+    variants = [('legacy (sequential)', None)] + [(f'queued ({policy})', policy)
+                                                 for policy in args.policies]
+    fast_total = args.clients - int(args.clients * args.slow)
+    print(f"{args.clients} clients ({args.slow:.0%} slow: {args.slow_delay * 1000:.0f} ms/send, "
+          f"fast: {args.fast_delay * 1000:.1f} ms/send), {args.messages} broadcasts")
+    print(f"  {'variant':24s} {'broadcast() p50':>16s} {'fast p50':>10s} {'fast p99':>10s} "
+          f"{'fast max':>10s} {'delivered':>10s}")
+    for label, policy in variants:
+        clients, slow = make_clients(args.clients, args.slow, args.fast_delay, args.slow_delay)
+        if policy is None:
+            broadcaster = LegacyBroadcaster(clients)
+        else:
+            broadcaster = QueuedBroadcaster(clients, policy, args.queue_size)
+            await broadcaster.start()
+        blocked, latencies, delivered = await run(broadcaster, clients, slow,
+                                                  args.messages, args.interval)
+        print(f"  {label:24s} {percentile(blocked, 50) * 1000:13.1f} ms "
+              f"{percentile(latencies, 50) * 1000:7.1f} ms {percentile(latencies, 99) * 1000:7.1f} ms "
+              f"{max(latencies or [0]) * 1000:7.1f} ms {delivered:>5d}/{fast_total * args.messages}")
+        if policy is not None:
+            broadcaster.server.stop()
+            websocket_server.connected_clients.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--slow', type=float, default=0.01, help='share of slow clients')
+    parser.add_argument('--fast-delay', type=float, default=0.0005)
+    parser.add_argument('--slow-delay', type=float, default=0.2)
+    parser.add_argument('--interval', type=float, default=0.01, help='seconds between broadcasts')
+    parser.add_argument('--queue-size', type=int, default=8)
+    parser.add_argument('--policies', nargs='+', default=['downgrade', 'disconnect'])
+    args = parser.parse_args()
+
+    logging.getLogger('WebSocketServer').setLevel(logging.ERROR)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,192 +1,877 @@
 """
 Cache Manager for MalwareSnipper
 Implements optimized scan result caching with TTL
+
+Two tiers behind one interface:
+- a bounded in-process LRU (performance_cache.TTLCache)
+- a persistent SQLite store (ScanCache) that survives restarts
+
+Callers register a namespace with its own TTL and key canonicalizer, then
+get/set through the global ``unified_cache``. Keys are canonicalized so
+that "HTTP://Example.com:80" and "http://example.com/" share one entry.
+
+Namespaces can also opt into stale-while-revalidate: get_or_load() serves
+an expired entry for up to ``stale_seconds`` while one background refresh
+runs, and caches negative ("not found") and error results with their own
+short TTLs so a failing provider is not called on every request.
 """
 
 import sqlite3
 import json
-from datetime import datetime, timedelta
-import hashlib
+import os
+import atexit
+import time
+import queue
+import threading
+import weakref
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from config import Config
+from error_handler import CacheError
+from performance_cache import TTLCache, ShardedTTLCache
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache key
+
+    Lowercases scheme and host, drops default ports, fragments and trailing
+    dots on the host, defaults the path to "/" and sorts query parameters.
+    Strings that do not parse as URLs are returned stripped.
+    """
+    url = str(url).strip()
+    if '://' not in url:
+        url = f"http://{url}"
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').rstrip('.')
+        if ':' in host:
+            host = f"[{host}]"
+        port = parts.port
+    except ValueError:
+        return url
+    netloc = host
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username
+        if parts.password is not None:
+            userinfo = f"{userinfo}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+def canonicalize_identifier(value: str) -> str:
+    """Normalize IDs such as CVE numbers or hashes (case-insensitive)"""
+    return str(value).strip().upper()
+
+
+def canonicalize_text(value: Any) -> str:
+    """Default canonicalizer for free-form keys"""
+    return str(value).strip()
+
+
+class CacheRecord:
+    """A cached value with its storage and expiry timestamps"""
+
+    __slots__ = ('value', 'stored_at', 'expires_at')
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.stored_at
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) >= self.expires_at
+
+
+class _WriteOp:
+    """A queued write for the ScanCache writer thread"""
+
+    __slots__ = ('sql', 'params', 'done', 'error', 'rowcount', 'pending_key', 'pending_record')
+
+    def __init__(self, sql: Optional[str], params: tuple, wait: bool,
+                 pending_key: Optional[tuple], pending_record: Optional[CacheRecord]):
+        self.sql = sql
+        self.params = params
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+        self.rowcount = 0
+        self.pending_key = pending_key
+        self.pending_record = pending_record
+
+
+class _ThreadConnection:
+    """Holds a thread's read connection; closing it is tied to the thread's lifetime"""
+
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class CacheNamespace:
+    """Per-namespace cache policy"""
+
+    def __init__(self, name: str, ttl_seconds: int, persistent: bool = True,
+                 key_func: Callable[[Any], str] = canonicalize_url,
+                 stale_seconds: int = 0, negative_ttl_seconds: Optional[int] = None,
+                 error_ttl_seconds: Optional[int] = None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.key_func = key_func
+        self.stale_seconds = stale_seconds
+        self.negative_ttl_seconds = ttl_seconds if negative_ttl_seconds is None else negative_ttl_seconds
+        self.error_ttl_seconds = 0 if error_ttl_seconds is None else error_ttl_seconds
+
+    def ttl_for(self, kind: Optional[str]) -> int:
+        """TTL for a result classified as None (positive), 'negative' or 'error'"""
+        if kind == 'negative':
+            return self.negative_ttl_seconds
+        if kind == 'error':
+            return self.error_ttl_seconds
+        return self.ttl_seconds
 
 
 class ScanCache:
-    """Manages scan result caching with TTL (Time To Live)"""
-    
+    """
+    Persistent SQLite tier of the cache
+
+    Stores entries for every namespace in one ``cache_entries`` table. The
+    original scan-result API (get_cached_scan/cache_scan) is kept and maps
+    onto the 'scan' namespace.
+
+    Concurrency model:
+    - WAL journaling so readers never block the writer
+    - one connection per thread for reads (sqlite3 connections are not
+      safe to share without a lock)
+    - a single writer thread that drains a queue and commits batches of
+      UPSERTs in one transaction (group commit)
+    - writes not yet committed are served from an in-memory overlay, so a
+      thread always reads its own writes
+    """
+
+    SCAN_NAMESPACE = 'scan'
+
+    # Group commit tuning
+    MAX_BATCH_SIZE = 500
+    MAX_BATCH_DELAY_SECONDS = 0.005
+
     def __init__(self, db_path='malware_scanner.db'):
         """
         Initialize cache manager
-        
+
         Args:
             db_path: Path to SQLite database
         """
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-        self._init_cache_table()
-    
-    def _init_cache_table(self):
+
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        # Uncommitted upserts: (namespace, key) -> CacheRecord
+        self._pending: Dict[tuple, CacheRecord] = {}
+        self._pending_lock = threading.Lock()
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+        self.batches_committed = 0
+        self.writes_committed = 0
+
+        # The database file is created on first use, not at import time
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def _ensure_ready(self):
+        """Create the database directory, file and table once"""
+        if self._ready:
+            return
+        with self._ready_lock:
+            if self._ready:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                self._init_cache_table(conn)
+            finally:
+                conn.close()
+            self._ready = True
+
+    def _connect(self) -> sqlite3.Connection:
+        self._ensure_ready()
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = self._local.holder = _ThreadConnection(self._connect())
+            # Request threads come and go; close the connection when the
+            # thread exits and its thread-local storage is freed
+            weakref.finalize(holder, self._release, holder.conn)
+        return holder.conn
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._connections_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _init_cache_table(self, conn: sqlite3.Connection):
         """Create cache table if it doesn't exist"""
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS scan_cache (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                url TEXT NOT NULL UNIQUE,
-                url_hash TEXT NOT NULL,
-                result JSON NOT NULL,
-                phase TEXT,
-                cached_at INTEGER,
-                ttl_hours INTEGER DEFAULT 24
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, cache_key)
             )
         """)
-        
-        # Create index for fast lookups
-        self.conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_scan_cache_url 
-            ON scan_cache(url)
-        """)
-        
-        self.conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_scan_cache_cached_at 
-            ON scan_cache(cached_at DESC)
+
+        # Index for expiry sweeps
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_expires_at
+            ON cache_entries(expires_at)
         """)
-        
-        self.conn.commit()
-    
+
+        conn.commit()
+
+    # ── Group-commit writer ──────────────────────────────────────────────────
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._writer_loop, name='scan-cache-writer', daemon=True
+                )
+                self._writer.start()
+
+    def _submit(self, sql: str, params: tuple, wait: bool = False,
+                pending_key: Optional[tuple] = None, pending_record=None):
+        """
+        Queue a write for the writer thread
+
+        Returns:
+            Affected row count if wait=True, otherwise None
+        """
+        op = _WriteOp(sql, params, wait, pending_key, pending_record)
+        try:
+            if self._closed:
+                raise RuntimeError("ScanCache is closed")
+            self._ensure_writer()
+            self._queue.put(op)
+        except Exception:
+            # Never queued, so the writer will not clear the overlay entry
+            self._drop_pending([op])
+            raise
+        if wait:
+            op.done.wait()
+            if op.error is not None:
+                raise op.error
+            return op.rowcount
+        return None
+
+    def _writer_loop(self):
+        conn = self._connect()
+        while True:
+            op = self._queue.get()
+            if op is None:
+                return
+            batch = [op]
+            deadline = time.monotonic() + self.MAX_BATCH_DELAY_SECONDS
+            while len(batch) < self.MAX_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                try:
+                    nxt = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    break
+                batch.append(nxt)
+            self._commit_batch(conn, batch)
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: list):
+        error = None
+        try:
+            with conn:
+                for op in batch:
+                    if op.sql is not None:
+                        op.rowcount = conn.execute(op.sql, op.params).rowcount
+            self.batches_committed += 1
+            self.writes_committed += sum(1 for op in batch if op.sql is not None)
+        except Exception as e:
+            error = e
+            print(f"❌ Error committing cache batch ({len(batch)} writes): {e}")
+
+        self._drop_pending(batch)
+        for op in batch:
+            op.error = error
+            op.done.set()
+
+    def _drop_pending(self, ops: list):
+        with self._pending_lock:
+            for op in ops:
+                # Only drop the overlay entry if no newer write replaced it
+                if op.pending_key is not None and self._pending.get(op.pending_key) is op.pending_record:
+                    del self._pending[op.pending_key]
+
+    def flush(self):
+        """Block until every queued write is committed"""
+        if self._writer is None or not self._writer.is_alive() or self._closed:
+            return
+        self._submit(None, (), wait=True)
+
+    def close(self, flush: bool = True):
+        """Flush pending writes, stop the writer and close connections"""
+        if self._closed:
+            return
+        if flush:
+            self.flush()
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(None)
+            if flush:
+                self._writer.join(timeout=5)
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+
+    # ── Generic namespace API (used by UnifiedCache) ─────────────────────────
+
+    def get_entry(self, namespace: str, cache_key: str) -> Optional[CacheRecord]:
+        """
+        Fetch an entry regardless of expiry
+
+        Returns:
+            CacheRecord or None if missing
+        """
+        with self._pending_lock:
+            record = self._pending.get((namespace, cache_key))
+        if record is not None:
+            return record
+        row = self.conn.execute("""
+            SELECT value, stored_at, expires_at FROM cache_entries
+            WHERE namespace = ? AND cache_key = ?
+        """, (namespace, cache_key)).fetchone()
+        if not row:
+            return None
+        return CacheRecord(json.loads(row['value']), row['stored_at'], row['expires_at'])
+
+    def put_entry(self, namespace: str, cache_key: str, value: Any,
+                  stored_at: float, expires_at: float, wait: bool = False) -> bool:
+        """
+        Insert or update an entry
+
+        The write is committed by the writer thread in the next batch; pass
+        wait=True to block until it is durable.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            value_json = json.dumps(value, default=str)
+            record = CacheRecord(json.loads(value_json), stored_at, expires_at)
+            key = (namespace, cache_key)
+            with self._pending_lock:
+                self._pending[key] = record
+            self._submit("""
+                INSERT INTO cache_entries
+                (namespace, cache_key, value, stored_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(namespace, cache_key) DO UPDATE SET
+                    value = excluded.value,
+                    stored_at = excluded.stored_at,
+                    expires_at = excluded.expires_at
+            """, (namespace, cache_key, value_json, stored_at, expires_at),
+                wait=wait, pending_key=key, pending_record=record)
+            return True
+        except Exception as e:
+            print(f"❌ Error caching entry {namespace}:{cache_key}: {e}")
+            return False
+
+    def delete_entry(self, namespace: str, cache_key: str) -> None:
+        with self._pending_lock:
+            self._pending.pop((namespace, cache_key), None)
+        self._submit(
+            "DELETE FROM cache_entries WHERE namespace = ? AND cache_key = ?",
+            (namespace, cache_key), wait=True
+        )
+
+    def clear_namespace(self, namespace: Optional[str] = None) -> int:
+        """Delete all entries of a namespace (or everything if None)"""
+        with self._pending_lock:
+            for key in [k for k in self._pending if namespace is None or k[0] == namespace]:
+                del self._pending[key]
+        if namespace is None:
+            return self._submit("DELETE FROM cache_entries", (), wait=True)
+        return self._submit(
+            "DELETE FROM cache_entries WHERE namespace = ?", (namespace,), wait=True
+        )
+
+    def purge_expired(self, older_than: float = 0) -> int:
+        """Delete entries that expired more than ``older_than`` seconds ago"""
+        return self._submit(
+            "DELETE FROM cache_entries WHERE expires_at < ?",
+            (time.time() - older_than,), wait=True
+        )
+
+    def count_entries(self) -> Dict[str, int]:
+        """Number of stored entries per namespace"""
+        self.flush()
+        rows = self.conn.execute("""
+            SELECT namespace, COUNT(*) FROM cache_entries GROUP BY namespace
+        """).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    # ── Scan result API ──────────────────────────────────────────────────────
+
     def get_cached_scan(self, url, ttl_hours=24):
         """
         Retrieve cached scan if within TTL
-        
+
         Args:
             url: URL to lookup
             ttl_hours: Time-to-live in hours (default 24)
-        
+
         Returns:
             Cached result dict or None if expired/missing
         """
         try:
-            cutoff_timestamp = int((datetime.now() - timedelta(hours=ttl_hours)).timestamp())
-            
-            cursor = self.conn.execute("""
-                SELECT result, phase, cached_at FROM scan_cache 
-                WHERE url = ? AND cached_at > ?
-                ORDER BY cached_at DESC LIMIT 1
-            """, (url, cutoff_timestamp))
-            
-            row = cursor.fetchone()
-            if row:
+            entry = self.get_entry(self.SCAN_NAMESPACE, canonicalize_url(url))
+            if entry and entry.age_seconds < ttl_hours * 3600:
                 return {
                     'cached': True,
-                    'result': json.loads(row['result']),
-                    'phase': row['phase'],
-                    'age_seconds': int(datetime.now().timestamp()) - row['cached_at']
+                    'result': entry.value['result'],
+                    'phase': entry.value['phase'],
+                    'age_seconds': int(entry.age_seconds)
                 }
-            
+
             return None
-            
+
         except Exception as e:
             print(f"❌ Error retrieving cached scan: {e}")
             return None
-    
+
     def cache_scan(self, url, results, phase, ttl_hours=24):
         """
         Store scan results with phase indicator
-        
+
         Args:
             url: URL scanned
             results: Scan results dict
             phase: Scan phase (instant/fast/deep/complete)
             ttl_hours: Time-to-live in hours (default 24)
-        
+
         Returns:
             True if successful, False otherwise
         """
-        try:
-            url_hash = hashlib.sha256(url.encode()).hexdigest()[:16]
-            timestamp = int(datetime.now().timestamp())
-            result_json = json.dumps(results)
-            
-            # Try to update existing entry first
-            self.conn.execute("""
-                UPDATE scan_cache 
-                SET result = ?, phase = ?, cached_at = ?, ttl_hours = ?
-                WHERE url = ?
-            """, (result_json, phase, timestamp, ttl_hours, url))
-            
-            # If no rows updated, insert new
-            if self.conn.total_changes == 0:
-                self.conn.execute("""
-                    INSERT INTO scan_cache 
-                    (url, url_hash, result, phase, cached_at, ttl_hours)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (url, url_hash, result_json, phase, timestamp, ttl_hours))
-            
-            self.conn.commit()
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error caching scan: {e}")
-            return False
-    
+        now = time.time()
+        return self.put_entry(
+            self.SCAN_NAMESPACE, canonicalize_url(url),
+            {'result': results, 'phase': phase},
+            now, now + ttl_hours * 3600
+        )
+
     def clear_expired_cache(self):
         """Remove all expired cache entries"""
         try:
-            now = int(datetime.now().timestamp())
-            
-            # Delete entries where cached_at + (ttl_hours * 3600) < now
-            self.conn.execute("""
-                DELETE FROM scan_cache 
-                WHERE cached_at + (ttl_hours * 3600) < ?
-            """, (now,))
-            
-            deleted_count = self.conn.total_changes
-            self.conn.commit()
-            
+            deleted_count = self.purge_expired()
             print(f"🗑️ Cleared {deleted_count} expired cache entries")
             return deleted_count
-            
+
         except Exception as e:
             print(f"❌ Error clearing expired cache: {e}")
             return 0
-    
+
     def clear_all_cache(self):
         """Clear entire scan cache"""
         try:
-            self.conn.execute("DELETE FROM scan_cache")
-            self.conn.commit()
+            self.clear_namespace(self.SCAN_NAMESPACE)
             print("🗑️ Cleared all scan cache")
             return True
         except Exception as e:
             print(f"❌ Error clearing cache: {e}")
             return False
-    
+
     def get_cache_stats(self):
         """Get cache statistics"""
         try:
+            self.flush()
             cursor = self.conn.execute("""
-                SELECT 
-                    COUNT(*) as total_entries,
-                    COUNT(CASE WHEN phase = 'instant' THEN 1 END) as instant_count,
-                    COUNT(CASE WHEN phase = 'fast' THEN 1 END) as fast_count,
-                    COUNT(CASE WHEN phase = 'deep' THEN 1 END) as deep_count,
-                    COUNT(CASE WHEN phase = 'complete' THEN 1 END) as complete_count
-                FROM scan_cache
-            """)
-            
-            row = cursor.fetchone()
+                SELECT json_extract(value, '$.phase') AS phase, COUNT(*)
+                FROM cache_entries WHERE namespace = ?
+                GROUP BY phase
+            """, (self.SCAN_NAMESPACE,))
+            counts = {row[0]: row[1] for row in cursor.fetchall()}
+
             return {
-                'total_entries': row[0],
-                'instant': row[1],
-                'fast': row[2],
-                'deep': row[3],
-                'complete': row[4]
+                'total_entries': sum(counts.values()),
+                'instant': counts.get('instant', 0),
+                'fast': counts.get('fast', 0),
+                'deep': counts.get('deep', 0),
+                'complete': counts.get('complete', 0)
             }
-            
+
         except Exception as e:
             print(f"❌ Error getting cache stats: {e}")
             return {}
-    
+
     def __del__(self):
-        """Cleanup: close database connection"""
+        """Cleanup: close database connections"""
         try:
-            self.conn.close()
+            # Never block here; use close() or flush() for durability
+            self.close(flush=False)
         except:
             pass
+
+
+class UnifiedCache:
+    """
+    Two-tier cache shared by the scanners, TI clients and API endpoints
+
+    Reads check the in-process LRU first, then the SQLite tier (promoting
+    hits back into memory). Writes go to both tiers; namespaces registered
+    with persistent=False stay in memory only.
+    """
+
+    # Background revalidation workers shared by every namespace
+    REFRESH_WORKERS = 4
+    # Retry delay after a failed refresh in namespaces without an error TTL
+    REFRESH_RETRY_SECONDS = 60
+
+    def __init__(self, store: Optional[ScanCache] = None,
+                 memory_max_entries: int = Config.CACHE_MEMORY_MAX_ENTRIES,
+                 memory_shards: int = Config.CACHE_MEMORY_SHARDS):
+        """
+        Args:
+            store: Persistent tier (None for a memory-only cache)
+            memory_max_entries: Capacity of the in-process LRU tier
+            memory_shards: Lock shards of the in-process tier (1 = single lock)
+        """
+        self.store = store
+        if memory_shards > 1:
+            self.memory = ShardedTTLCache(max_size=memory_max_entries, shards=memory_shards)
+        else:
+            self.memory = TTLCache(max_size=memory_max_entries)
+        self.namespaces: Dict[str, CacheNamespace] = {}
+        self.generations: Dict[str, int] = defaultdict(int)
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0, 'sets': 0,
+                     'stale_hits': 0, 'refreshes': 0, 'refresh_errors': 0,
+                     'negative_sets': 0, 'error_sets': 0, 'cached_errors': 0}
+        )
+        self.lock = threading.Lock()
+        self._refreshing: set = set()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self._stats_lock = threading.Lock()
+
+    def _count(self, namespace: str, counter: str) -> None:
+        with self._stats_lock:
+            self.stats[namespace][counter] += 1
+
+    def _error_key(self, namespace: str, cache_key: str) -> str:
+        # Exceptions are not JSON-serializable, so cached errors live only in
+        # the LRU tier, which bounds them and expires them with their TTL
+        return f"!error:{self._memory_key(namespace, cache_key)}"
+
+    def register_namespace(self, name: str, ttl_seconds: int, persistent: bool = True,
+                           key_func: Callable[[Any], str] = canonicalize_url,
+                           stale_seconds: int = 0, negative_ttl_seconds: Optional[int] = None,
+                           error_ttl_seconds: Optional[int] = None) -> CacheNamespace:
+        """
+        Declare a namespace and its TTL (re-registering updates the policy)
+
+        Args:
+            name: Namespace name
+            ttl_seconds: Default time-to-live for entries
+            persistent: Also write entries to the SQLite tier
+            key_func: Canonicalizer applied to every key
+            stale_seconds: How long past expiry get_or_load() may serve an entry
+            negative_ttl_seconds: TTL for "not found" results (default: ttl_seconds)
+            error_ttl_seconds: TTL for provider errors (default: not cached)
+        """
+        namespace = CacheNamespace(name, ttl_seconds, persistent, key_func,
+                                   stale_seconds, negative_ttl_seconds, error_ttl_seconds)
+        with self.lock:
+            self.namespaces[name] = namespace
+        return namespace
+
+    def _namespace(self, name: str) -> CacheNamespace:
+        try:
+            return self.namespaces[name]
+        except KeyError:
+            raise KeyError(f"Cache namespace '{name}' is not registered")
+
+    def _memory_key(self, namespace: str, cache_key: str) -> str:
+        # Generation counter makes clear(namespace) O(1): old keys age out of the LRU
+        return f"{namespace}:{self.generations[namespace]}:{cache_key}"
+
+    def make_key(self, namespace: str, key: Any) -> str:
+        """Canonical form of a key within a namespace"""
+        return self._namespace(namespace).key_func(key)
+
+    def get_entry(self, namespace: str, key: Any) -> Optional[CacheRecord]:
+        """
+        Look up a fresh entry with its timestamps
+
+        Returns:
+            CacheRecord or None on miss/expiry
+        """
+        ns = self._namespace(namespace)
+        record = self._lookup(ns, ns.key_func(key), 0)
+        if record is None or record.is_expired():
+            self._count(namespace, 'misses')
+            return None
+        return record
+
+    def _lookup(self, ns: CacheNamespace, cache_key: str,
+                stale_seconds: float) -> Optional[CacheRecord]:
+        """Find a record that is fresh or at most stale_seconds past expiry"""
+        memory_key = self._memory_key(ns.name, cache_key)
+        horizon = time.time() - stale_seconds
+
+        record = self.memory.get(memory_key)
+        if record is not None and record.expires_at > horizon:
+            self._count(ns.name, 'memory_hits')
+            return record
+
+        if ns.persistent and self.store is not None:
+            record = self.store.get_entry(ns.name, cache_key)
+            if record is not None and record.expires_at > horizon:
+                self._count(ns.name, 'persistent_hits')
+                self._remember(memory_key, record, ns.stale_seconds)
+                return record
+        return None
+
+    def get(self, namespace: str, key: Any, default: Any = None) -> Any:
+        """Return the cached value or ``default``"""
+        record = self.get_entry(namespace, key)
+        return record.value if record is not None else default
+
+    def set(self, namespace: str, key: Any, value: Any,
+            ttl_seconds: Optional[int] = None) -> CacheRecord:
+        """
+        Store a value in both tiers
+
+        Args:
+            namespace: Registered namespace
+            key: Raw key (canonicalized by the namespace)
+            value: JSON-serializable value
+            ttl_seconds: Override the namespace TTL
+        """
+        ns = self._namespace(namespace)
+        now = time.time()
+        ttl = ns.ttl_seconds if ttl_seconds is None else ttl_seconds
+        return self._store(ns, ns.key_func(key), CacheRecord(value, now, now + ttl))
+
+    def _store(self, ns: CacheNamespace, cache_key: str, record: CacheRecord) -> CacheRecord:
+        self._remember(self._memory_key(ns.name, cache_key), record, ns.stale_seconds)
+        if ns.persistent and self.store is not None:
+            self.store.put_entry(ns.name, cache_key, record.value,
+                                 record.stored_at, record.expires_at)
+        self._count(ns.name, 'sets')
+        return record
+
+    def _remember(self, memory_key: str, record: CacheRecord, stale_seconds: float = 0) -> None:
+        # Keep the entry in memory through its stale window
+        remaining = int(record.expires_at + stale_seconds - time.time()) + 1
+        if remaining > 0:
+            self.memory.set(memory_key, record, remaining)
+
+    def get_or_load(self, namespace: str, key: Any, loader: Callable[[], Any],
+                    classify: Optional[Callable[[Any], Optional[str]]] = None,
+                    ttl_seconds: Optional[int] = None,
+                    cache_errors: Tuple[Type[BaseException], ...] = ()) -> Any:
+        """
+        Stale-while-revalidate lookup
+
+        A fresh entry is returned as is. An entry expired less than the
+        namespace's stale_seconds ago is returned immediately and one
+        background refresh is scheduled. On a miss, loader() runs inline.
+
+        Args:
+            namespace: Registered namespace
+            key: Raw key (canonicalized by the namespace)
+            loader: Zero-argument callable fetching the current value
+            classify: Maps a loaded value to None (positive), 'negative' or
+                'error'; the latter two use the namespace's short TTLs
+            ttl_seconds: Override the TTL for positive results (0 = don't cache)
+            cache_errors: Exception types raised by loader that are cached for
+                error_ttl_seconds and re-raised on lookups in that window
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        ns = self._namespace(namespace)
+        cache_key = ns.key_func(key)
+
+        record = self._lookup(ns, cache_key, ns.stale_seconds)
+        if record is not None:
+            if record.is_expired():
+                self._count(namespace, 'stale_hits')
+                self._schedule_refresh(ns, cache_key, record, loader, classify,
+                                       ttl_seconds, cache_errors)
+            return record.value
+
+        if ns.error_ttl_seconds > 0:
+            cached_error = self.memory.get(self._error_key(namespace, cache_key))
+            if cached_error is not None:
+                self._count(namespace, 'cached_errors')
+                raise cached_error
+
+        self._count(namespace, 'misses')
+        return self._load(ns, cache_key, loader, classify, ttl_seconds, cache_errors)
+
+    def _load(self, ns: CacheNamespace, cache_key: str, loader: Callable[[], Any],
+              classify: Optional[Callable[[Any], Optional[str]]],
+              ttl_seconds: Optional[int],
+              cache_errors: Tuple[Type[BaseException], ...],
+              stale: Optional[CacheRecord] = None) -> Any:
+        """Run loader and store its result with the TTL for its class"""
+        try:
+            value = loader()
+        except cache_errors as e:
+            if ns.error_ttl_seconds > 0:
+                self.memory.set(self._error_key(ns.name, cache_key), e, ns.error_ttl_seconds)
+                self._count(ns.name, 'error_sets')
+            raise
+
+        kind = classify(value) if classify else None
+        if kind == 'error' and stale is not None:
+            raise CacheError(f"loader returned an error result for {ns.name}", 'refresh')
+        ttl = ns.ttl_for(kind)
+        if kind is None and ttl_seconds is not None:
+            ttl = ttl_seconds
+        if ttl > 0:
+            now = time.time()
+            self._store(ns, cache_key, CacheRecord(value, now, now + ttl))
+            if kind in ('negative', 'error'):
+                self._count(ns.name, f'{kind}_sets')
+        return value
+
+    def _schedule_refresh(self, ns: CacheNamespace, cache_key: str, stale: CacheRecord,
+                          loader: Callable[[], Any],
+                          classify: Optional[Callable[[Any], Optional[str]]],
+                          ttl_seconds: Optional[int],
+                          cache_errors: Tuple[Type[BaseException], ...]) -> None:
+        """Start one background refresh per key; duplicates are dropped"""
+        refresh_key = (ns.name, cache_key)
+        with self.lock:
+            if refresh_key in self._refreshing:
+                return
+            self._refreshing.add(refresh_key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.REFRESH_WORKERS, thread_name_prefix='cache-refresh'
+                )
+        self._count(ns.name, 'refreshes')
+        self._refresh_executor.submit(self._refresh, ns, cache_key, stale, loader,
+                                      classify, ttl_seconds, cache_errors)
+
+    def _refresh(self, ns: CacheNamespace, cache_key: str, stale: CacheRecord,
+                 loader: Callable[[], Any],
+                 classify: Optional[Callable[[Any], Optional[str]]],
+                 ttl_seconds: Optional[int],
+                 cache_errors: Tuple[Type[BaseException], ...]) -> None:
+        try:
+            self._load(ns, cache_key, loader, classify, ttl_seconds, cache_errors, stale)
+        except Exception as e:
+            # Stale-if-error: keep serving the old value, retry after error_ttl
+            # (or a short back-off, never a full TTL of unrefreshed data)
+            print(f"⚠️ Cache refresh failed for {ns.name}:{cache_key}, serving stale: {e}")
+            self._count(ns.name, 'refresh_errors')
+            retry_in = ns.error_ttl_seconds or min(ns.ttl_seconds, self.REFRESH_RETRY_SECONDS)
+            self._store(ns, cache_key, CacheRecord(stale.value, stale.stored_at,
+                                                   time.time() + retry_in))
+        finally:
+            with self.lock:
+                self._refreshing.discard((ns.name, cache_key))
+
+    def delete(self, namespace: str, key: Any) -> None:
+        """Remove one entry from both tiers"""
+        ns = self._namespace(namespace)
+        cache_key = ns.key_func(key)
+        self.memory.delete(self._memory_key(namespace, cache_key))
+        if ns.persistent and self.store is not None:
+            self.store.delete_entry(namespace, cache_key)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Drop a namespace (or every namespace) from both tiers"""
+        with self.lock:
+            names = [namespace] if namespace else list(self.namespaces)
+            for name in names:
+                self.generations[name] += 1
+        if self.store is not None:
+            self.store.clear_namespace(namespace)
+
+    def purge_expired(self) -> int:
+        """Delete expired rows (beyond every stale window) from the persistent tier"""
+        if self.store is None:
+            return 0
+        stale_window = max((ns.stale_seconds for ns in self.namespaces.values()), default=0)
+        return self.store.purge_expired(older_than=stale_window)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per namespace plus tier sizes"""
+        persistent_counts = self.store.count_entries() if self.store is not None else {}
+        namespaces = {}
+        for name, ns in self.namespaces.items():
+            with self._stats_lock:
+                stats = dict(self.stats[name])
+            hits = stats['memory_hits'] + stats['persistent_hits']
+            lookups = hits + stats['misses']
+            stats.update({
+                'ttl_seconds': ns.ttl_seconds,
+                'stale_seconds': ns.stale_seconds,
+                'persistent': ns.persistent,
+                'persistent_entries': persistent_counts.get(name, 0),
+                'hit_rate_percent': round(hits / lookups * 100, 2) if lookups else 0,
+            })
+            namespaces[name] = stats
+        return {
+            'memory': self.memory.get_stats(),
+            'persistent_db': self.store.db_path if self.store is not None else None,
+            'namespaces': namespaces,
+        }
+
+
+# Global two-tier cache shared across the backend
+unified_cache = UnifiedCache(ScanCache(str(Config.CACHE_DB_PATH)))
+
+# Commit queued cache writes before the interpreter exits
+atexit.register(unified_cache.store.close)
@@ -0,0 +1,210 @@
+"""
+Cache Warmer Module
+
+Warms the threat-intel cache after a restart so the first scans of popular
+URLs do not pay for provider round-trips.
+
+Features:
+- Candidates are the most frequently scanned canonical URLs (and the root
+  pages of the most frequently scanned domains) from the SQLite scan table
+  and the ScanStorage history
+- Risk layers are not warmed: their cache is keyed by page content, which
+  only a live scan carries, and they are local and cheap anyway
+- Threat-intel lookups run in the WARMUP class of the quota scheduler,
+  which caps them to a share of the provider's rate limit so live scans keep
+  their quota; reports already in the persistent cache tier are only
+  promoted to memory
+- Runs in a daemon thread; progress is exposed for /health
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from cache_manager import canonicalize_url
+from config import Config
+from quota_scheduler import Priority, scheduling
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Background warm-up of the threat-intel cache.
+
+    Usage:
+        warmer = CacheWarmer(risk_engine, scan_storage)
+        warmer.start()
+        warmer.get_progress()
+    """
+
+    def __init__(self, risk_engine, scan_storage=None,
+                 history_db_path=Config.SCAN_HISTORY_DB_PATH,
+                 max_urls: int = Config.CACHE_WARMUP_MAX_URLS,
+                 ti_share: float = Config.CACHE_WARMUP_TI_SHARE):
+        """
+        Initialize cache warmer.
+
+        Args:
+            risk_engine: UnifiedRiskEngine whose TI cache is warmed
+            scan_storage: ScanStorage whose recent history is counted (optional)
+            history_db_path: SQLite database with a ``scans`` table (optional)
+            max_urls: Maximum number of URLs to warm
+            ti_share: Fraction of the VirusTotal rate limit the warm-up may use
+                      (0 disables TI warming; the quota scheduler enforces
+                      CACHE_WARMUP_TI_SHARE)
+        """
+        self.risk_engine = risk_engine
+        self.scan_storage = scan_storage
+        self.history_db_path = history_db_path
+        self.max_urls = max_urls
+        self.ti_share = ti_share
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.progress: Dict[str, Any] = {
+            'state': 'idle',
+            'phase': None,
+            'total': 0,
+            'ti_fetched': 0,
+            'ti_cached': 0,
+            'ti_skipped': 0,
+            'errors': 0,
+            'started_at': None,
+            'finished_at': None,
+        }
+
+    # ─── Candidate selection ────────────────────────────────────────────────
+
+    def _history_db_urls(self) -> Counter:
+        """Scan counts per raw URL from the SQLite scan table"""
+        counts: Counter = Counter()
+        if not self.history_db_path:
+            return counts
+        try:
+            conn = sqlite3.connect(f'file:{self.history_db_path}?mode=ro', uri=True)
+        except sqlite3.Error:
+            return counts
+        try:
+            for url, count in conn.execute('SELECT url, COUNT(*) FROM scans GROUP BY url'):
+                counts[url] += count
+        except sqlite3.Error as e:
+            # Missing table or a database written by another version
+            logger.debug(f"Scan history table not readable: {e}")
+        finally:
+            conn.close()
+        return counts
+
+    def _storage_urls(self) -> Counter:
+        """Scan counts per raw URL from the ScanStorage history"""
+        if self.scan_storage is None:
+            return Counter()
+        history = self.scan_storage.get_recent_scans(Config.SCAN_HISTORY_LIMIT)
+        return Counter(entry['url'] for entry in history if entry.get('url'))
+
+    def collect_candidates(self, sources: Optional[Iterable[Counter]] = None) -> List[str]:
+        """
+        Most frequently scanned canonical URLs, most popular first.
+
+        Every scan also counts towards the root page of its domain, so a
+        domain scanned under many different paths is warmed as well.
+        """
+        if sources is None:
+            sources = (self._history_db_urls(), self._storage_urls())
+        counts: Counter = Counter()
+        for source in sources:
+            for url, count in source.items():
+                canonical = canonicalize_url(url)
+                parts = urlsplit(canonical)
+                if parts.scheme not in Config.ALLOWED_URL_SCHEMES or not parts.netloc:
+                    continue
+                counts[canonical] += count
+                root = f'{parts.scheme}://{parts.netloc}/'
+                if root != canonical:
+                    counts[root] += count
+        # Ties keep a stable order so repeated runs warm the same set
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [url for url, _ in ranked[:self.max_urls]]
+
+    # ─── Warm-up ────────────────────────────────────────────────────────────
+
+    def start(self) -> bool:
+        """Start the warm-up thread (no-op if one is already running)"""
+        with self.lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='cache-warmer', daemon=True)
+            self._thread.start()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the warm-up finishes; False on timeout"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the warm-up; entries warmed so far stay cached"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _update(self, **changes):
+        with self.lock:
+            self.progress.update(changes)
+
+    def _count(self, field: str):
+        with self.lock:
+            self.progress[field] += 1
+
+    def _acquire_ti_quota(self) -> bool:
+        """Skip remaining provider lookups once stopped (quota comes from the scheduler)"""
+        return not self._stop.is_set()
+
+    def run(self):
+        """Warm every candidate; called on the warm-up thread"""
+        self._update(state='running', phase='collecting',
+                     started_at=datetime.now().isoformat(), finished_at=None)
+        try:
+            urls = self.collect_candidates()
+            self._update(total=len(urls))
+            logger.info(f"Cache warm-up: {len(urls)} URLs from scan history")
+
+            ti_checker = getattr(self.risk_engine, 'ti_checker', None)
+            if ti_checker is not None and self.ti_share > 0:
+                self._update(phase='threat_intel')
+                with scheduling(Priority.WARMUP, user='cache-warmer'):
+                    for url in urls:
+                        if self._stop.is_set():
+                            break
+                        try:
+                            outcome = ti_checker.warm(url, acquire=self._acquire_ti_quota)
+                            self._count(f'ti_{outcome}')
+                        except Exception as e:
+                            logger.warning(f"Cache warm-up: TI lookup failed for {url}: {e}")
+                            self._count('errors')
+
+            state = 'stopped' if self._stop.is_set() else 'completed'
+            self._update(state=state, phase=None, finished_at=datetime.now().isoformat())
+            logger.info(f"Cache warm-up {state}: {self.get_progress()}")
+        except Exception as e:
+            logger.error(f"Cache warm-up failed: {e}")
+            self._update(state='failed', phase=None, error=str(e),
+                         finished_at=datetime.now().isoformat())
+
+    def get_progress(self) -> Dict[str, Any]:
+        """Snapshot of the warm-up state and counters"""
+        with self.lock:
+            progress = dict(self.progress)
+        done = progress['ti_fetched'] + progress['ti_cached'] + progress['ti_skipped'] + progress['errors']
+        progress['ti_percent'] = round(done / progress['total'] * 100, 1) if progress['total'] else 0.0
+        return progress
@@ -58,12 +58,38 @@ class Config:
     # URL scanning limits
     MAX_URLS_PER_REQUEST: int = int(os.getenv('MAX_URLS_PER_REQUEST', '10'))
     MAX_CONCURRENT_SCANS: int = int(os.getenv('MAX_CONCURRENT_SCANS', '5'))
+    # /api/scanner/batch-scan (see async_scanner.py): URLs accepted per batch;
+    # duplicates are scanned once and at most MAX_CONCURRENT_SCANS run at a time
+    MAX_BATCH_URLS: int = int(os.getenv('MAX_BATCH_URLS', '100'))
     
     # Connection pooling
     CONNECTION_POOL_SIZE: int = int(os.getenv('CONNECTION_POOL_SIZE', '20'))
     POOL_CONNECTIONS: int = int(os.getenv('POOL_CONNECTIONS', '10'))
     POOL_MAXSIZE: int = int(os.getenv('POOL_MAXSIZE', '20'))
 
+    # Async provider client (see provider_client.py): concurrent requests per
+    # provider, with overrides given as "provider=limit,..."
+    PROVIDER_MAX_CONCURRENCY: int = int(os.getenv('PROVIDER_MAX_CONCURRENCY', '20'))
+    PROVIDER_CONCURRENCY: str = os.getenv('PROVIDER_CONCURRENCY', 'virustotal=4,nvd=2')
+
+    # Adaptive timeouts (see latency_tracker.py): once an endpoint has enough
+    # samples in the rolling window, its timeout is p99 * multiplier, never
+    # below the floor nor above the caller's configured timeout. Hedged
+    # lookups send a second request after the endpoint's p95.
+    ADAPTIVE_TIMEOUTS_ENABLED: bool = os.getenv('ADAPTIVE_TIMEOUTS_ENABLED', 'True').lower() == 'true'
+    ADAPTIVE_TIMEOUT_MULTIPLIER: float = float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', '2.0'))
+    ADAPTIVE_TIMEOUT_MIN: float = float(os.getenv('ADAPTIVE_TIMEOUT_MIN', '1.0'))
+    LATENCY_WINDOW_SECONDS: int = int(os.getenv('LATENCY_WINDOW_SECONDS', '300'))
+    LATENCY_MIN_SAMPLES: int = int(os.getenv('LATENCY_MIN_SAMPLES', '20'))
+    # Endpoint histograms beyond the cap only feed their provider-wide histogram
+    LATENCY_MAX_ENDPOINTS: int = int(os.getenv('LATENCY_MAX_ENDPOINTS', '256'))
+    PROVIDER_HEDGING_ENABLED: bool = os.getenv('PROVIDER_HEDGING_ENABLED', 'True').lower() == 'true'
+
+    # Record/replay stand-in (see provider_stub.py): when set, every provider
+    # request goes to {PROVIDER_STUB_URL}/{host}{path} instead of the real API,
+    # e.g. http://127.0.0.1:8765 for offline benchmarks and load tests
+    PROVIDER_STUB_URL: str = os.getenv('PROVIDER_STUB_URL', '').rstrip('/')
+
     # ═══════════════════════════════════════════════════════════════════════════
     # RATE LIMITING SETTINGS
     # ═══════════════════════════════════════════════════════════════════════════
@@ -77,6 +103,13 @@ class Config:
     URLSCAN_RATE_LIMIT: int = int(os.getenv('URLSCAN_RATE_LIMIT', '60'))
     WHOIS_RATE_LIMIT: int = int(os.getenv('WHOIS_RATE_LIMIT', '50'))
 
+    # Metered API scheduling: identical calls within the dedup window share
+    # one request; queued calls are dropped after the per-class max wait.
+    QUOTA_DEDUP_WINDOW: float = float(os.getenv('QUOTA_DEDUP_WINDOW', '30'))
+    QUOTA_INTERACTIVE_MAX_WAIT: float = float(os.getenv('QUOTA_INTERACTIVE_MAX_WAIT', '10'))
+    QUOTA_MANUAL_MAX_WAIT: float = float(os.getenv('QUOTA_MANUAL_MAX_WAIT', '60'))
+    QUOTA_BACKGROUND_MAX_WAIT: float = float(os.getenv('QUOTA_BACKGROUND_MAX_WAIT', '30'))
+
     # ═══════════════════════════════════════════════════════════════════════════
     # CACHING SETTINGS
     # ═══════════════════════════════════════════════════════════════════════════
@@ -85,6 +118,35 @@ class Config:
     CACHE_TTL_HOURS: int = int(os.getenv('CACHE_TTL_HOURS', '24'))
     CACHE_MAX_SIZE_MB: int = int(os.getenv('CACHE_MAX_SIZE_MB', '500'))
     
+    # Unified cache tiers (in-process LRU + persistent SQLite)
+    CACHE_MEMORY_MAX_ENTRIES: int = int(os.getenv('CACHE_MEMORY_MAX_ENTRIES', '10000'))
+    # >1 splits the in-process tier into independently locked shards
+    CACHE_MEMORY_SHARDS: int = int(os.getenv('CACHE_MEMORY_SHARDS', '1'))
+    CACHE_DB_PATH: Path = Path(os.getenv('CACHE_DB_PATH', str(DATA_DIR / 'cache.db')))
+    
+    # Threat-intel responses: stale-while-revalidate window and short TTLs
+    # for "not found" and provider-error results
+    TI_CACHE_STALE_SECONDS: int = int(os.getenv('TI_CACHE_STALE_SECONDS', '86400'))  # 1 day
+    TI_NEGATIVE_CACHE_TTL: int = int(os.getenv('TI_NEGATIVE_CACHE_TTL', '600'))  # 10 minutes
+    TI_ERROR_CACHE_TTL: int = int(os.getenv('TI_ERROR_CACHE_TTL', '60'))  # 1 minute
+
+    # Real-time detector (see real_time_threat_detector.py): identical URLs
+    # within the freshness window reuse the last verdict (0 = always fresh);
+    # provider checks run on a long-lived pool sized for
+    # REALTIME_MAX_CONCURRENT_SCANS scans of 3 checks each. Checks beyond
+    # REALTIME_MAX_PENDING_CHECKS queued or running ones (timed-out checks
+    # still count until they return) are shed and reported as failed.
+    REALTIME_FRESHNESS_SECONDS: int = int(os.getenv('REALTIME_FRESHNESS_SECONDS', '60'))
+    REALTIME_MAX_CONCURRENT_SCANS: int = int(os.getenv('REALTIME_MAX_CONCURRENT_SCANS', '4'))
+    REALTIME_WORKERS: int = int(os.getenv('REALTIME_WORKERS', str(3 * REALTIME_MAX_CONCURRENT_SCANS)))
+    REALTIME_MAX_PENDING_CHECKS: int = int(os.getenv('REALTIME_MAX_PENDING_CHECKS', str(2 * REALTIME_WORKERS)))
+
+    # Startup warm-up of the most frequently scanned URLs (see cache_warmer.py).
+    # TI lookups use at most CACHE_WARMUP_TI_SHARE of the provider's rate limit.
+    CACHE_WARMUP_ENABLED: bool = os.getenv('CACHE_WARMUP_ENABLED', 'True').lower() == 'true'
+    CACHE_WARMUP_MAX_URLS: int = int(os.getenv('CACHE_WARMUP_MAX_URLS', '200'))
+    CACHE_WARMUP_TI_SHARE: float = float(os.getenv('CACHE_WARMUP_TI_SHARE', '0.5'))
+
     # DNS cache TTL
     DNS_CACHE_TTL: int = int(os.getenv('DNS_CACHE_TTL', '3600'))  # 1 hour
     
@@ -123,6 +185,54 @@ class Config:
     LLM_TIMEOUT: int = int(os.getenv('LLM_TIMEOUT', '15'))
     LLM_MAX_RETRIES: int = int(os.getenv('LLM_MAX_RETRIES', '3'))
 
+    # ═══════════════════════════════════════════════════════════════════════════
+    # MODEL MANAGEMENT SETTINGS
+    # ═══════════════════════════════════════════════════════════════════════════
+
+    # Watch model files and hot-swap new versions without a restart
+    MODEL_RELOAD_ENABLED: bool = os.getenv('MODEL_RELOAD_ENABLED', 'True').lower() == 'true'
+    MODEL_RELOAD_INTERVAL: float = float(os.getenv('MODEL_RELOAD_INTERVAL', '5'))  # seconds
+    
+    # Shadow mode: new versions are scored alongside the active model until promoted
+    MODEL_SHADOW_MODE: bool = os.getenv('MODEL_SHADOW_MODE', 'False').lower() == 'true'
+    MODEL_SHADOW_SAMPLE_RATE: float = float(os.getenv('MODEL_SHADOW_SAMPLE_RATE', '1.0'))
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # DASHBOARD EVENT SETTINGS
+    # ═══════════════════════════════════════════════════════════════════════════
+
+    # Socket.IO event bus (see event_bus.py): progress updates for the same URL
+    # within the window are merged; events beyond the queue size are dropped
+    EVENT_COALESCE_WINDOW: float = float(os.getenv('EVENT_COALESCE_WINDOW', '0.25'))  # seconds
+    EVENT_QUEUE_SIZE: int = int(os.getenv('EVENT_QUEUE_SIZE', '10000'))
+    # Deliver events only to rooms; clients start in every "all:<severity>"
+    # room until they 'subscribe'. False also broadcasts to unsubscribed clients
+    EVENT_ROOM_SCOPED: bool = os.getenv('EVENT_ROOM_SCOPED', 'True').lower() == 'true'
+
+    # Catch-up log of final dashboard events (see event_log.py)
+    EVENT_LOG_RETENTION: int = int(os.getenv('EVENT_LOG_RETENTION', '10000'))
+    EVENT_LOG_MAX_AGE: float = float(os.getenv('EVENT_LOG_MAX_AGE', '3600'))  # seconds
+
+    # SIEM WebSocket server (see websocket_server.py): messages queued per client
+    # and what happens to a client whose queue fills up
+    # ('downgrade', 'drop_oldest' or 'disconnect')
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv('WS_SEND_QUEUE_SIZE', '256'))
+    WS_SLOW_CLIENT_POLICY: str = os.getenv('WS_SLOW_CLIENT_POLICY', 'downgrade')
+    WS_SEND_TIMEOUT: float = float(os.getenv('WS_SEND_TIMEOUT', '10'))  # seconds
+
+    # Dashboard stats stream (see stats_stream.py): one merged delta per interval;
+    # deltas kept for resuming clients and scan records kept for snapshots
+    STATS_STREAM_INTERVAL: float = float(os.getenv('STATS_STREAM_INTERVAL', '1.0'))  # seconds
+    STATS_STREAM_HISTORY: int = int(os.getenv('STATS_STREAM_HISTORY', '600'))
+    STATS_STREAM_RECORDS: int = int(os.getenv('STATS_STREAM_RECORDS', '20'))
+
+    # Shared news poller (see news_manager.py): each requested category is
+    # fetched once per interval; SSE streams send a comment every heartbeat
+    # and end after NEWS_SSE_MAX_SECONDS (EventSource reconnects on its own)
+    NEWS_POLL_INTERVAL: float = float(os.getenv('NEWS_POLL_INTERVAL', '1800'))  # seconds
+    NEWS_SSE_HEARTBEAT: float = float(os.getenv('NEWS_SSE_HEARTBEAT', '25'))  # seconds
+    NEWS_SSE_MAX_SECONDS: float = float(os.getenv('NEWS_SSE_MAX_SECONDS', '900'))
+
     # ═══════════════════════════════════════════════════════════════════════════
     # LOGGING SETTINGS
     # ═══════════════════════════════════════════════════════════════════════════
@@ -151,6 +261,26 @@ class Config:
     DATABASE_URL: str = os.getenv('DATABASE_URL', 'sqlite:///scan_results.db')
     DATABASE_POOL_SIZE: int = int(os.getenv('DATABASE_POOL_SIZE', '5'))
 
+    # Local NVD mirror (see nvd_mirror.py); feed files in NVD_FEED_DIR are
+    # ingested at startup and the live API is only used for CVEs not mirrored
+    NVD_MIRROR_DB_PATH: Path = Path(os.getenv('NVD_MIRROR_DB_PATH', str(DATA_DIR / 'nvd.db')))
+    NVD_FEED_DIR: Path = Path(os.getenv('NVD_FEED_DIR', str(DATA_DIR / 'nvd_feeds')))
+    NVD_LIVE_FALLBACK: bool = os.getenv('NVD_LIVE_FALLBACK', 'True').lower() == 'true'
+    # Unknown CVE ids are remembered this long, failed live lookups for a minute
+    NVD_MISS_CACHE_SECONDS: int = int(os.getenv('NVD_MISS_CACHE_SECONDS', '900'))
+
+    # Offline URL reputation lists (see url_reputation.py): Safe Browsing style
+    # 4-byte hash prefixes, re-read at most every RELOAD_SECONDS when changed
+    URL_REPUTATION_DIR: Path = Path(os.getenv('URL_REPUTATION_DIR', str(DATA_DIR / 'reputation_lists')))
+    URL_REPUTATION_RELOAD_SECONDS: int = int(os.getenv('URL_REPUTATION_RELOAD_SECONDS', '60'))
+
+    # Scan statistics: append-only journal compacted into a snapshot on a timer
+    SCAN_STATS_SNAPSHOT_INTERVAL: int = int(os.getenv('SCAN_STATS_SNAPSHOT_INTERVAL', '30'))  # seconds
+    SCAN_HISTORY_LIMIT: int = int(os.getenv('SCAN_HISTORY_LIMIT', '1000'))
+
+    # Per-scan history table read by the startup cache warm-up
+    SCAN_HISTORY_DB_PATH: Path = Path(os.getenv('SCAN_HISTORY_DB_PATH', str(DATA_DIR / 'scans.db')))
+
     # ═══════════════════════════════════════════════════════════════════════════
     # SECURITY SETTINGS
     # ═══════════════════════════════════════════════════════════════════════════
@@ -214,6 +214,32 @@ class RateLimitExceededError(CyberGuardException):
         )
 
 
+class QuotaDeadlineExceededError(CyberGuardException):
+    """Raised when a metered API call cannot get quota before its deadline."""
+
+    def __init__(self, api_name: str, waited_seconds: float):
+        super().__init__(
+            message=f"{api_name} request dropped after waiting {waited_seconds:.1f}s for quota",
+            error_code="QUOTA_DEADLINE_EXCEEDED",
+            status_code=503,
+            context={'api': api_name, 'waited_seconds': round(waited_seconds, 3)},
+            recovery_suggestions=f"{api_name} quota is in use by higher-priority scans; retry later"
+        )
+
+
+class DeadlineExceededError(CyberGuardException):
+    """Raised when an API call cannot finish before the scan's deadline."""
+
+    def __init__(self, api_name: str, operation: str):
+        super().__init__(
+            message=f"{api_name} {operation} would not finish before the scan deadline",
+            error_code="DEADLINE_EXCEEDED",
+            status_code=504,
+            context={'api': api_name, 'operation': operation},
+            recovery_suggestions=f"Retry with a larger time budget or when {api_name} recovers"
+        )
+
+
 class APIAuthenticationError(CyberGuardException):
     """Raised when API authentication fails."""
 
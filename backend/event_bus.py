@@ -0,0 +1,366 @@
+"""
+Event Bus Module
+
+Queued, coalesced Socket.IO delivery for dashboard events.
+
+Scan routes used to call socketio.emit() for every progress step and
+traffic record, synchronously on the request thread and to every connected
+dashboard. publish() now only queues the event; one dispatcher thread emits
+it, merging progress updates for the same URL that arrive within
+Config.EVENT_COALESCE_WINDOW.
+
+Features:
+- Non-blocking publish; a bounded queue drops events instead of stalling
+  requests when dashboards cannot keep up
+- Progress events keyed by URL keep only their latest state per window;
+  a final event for the URL supersedes its pending progress
+- Severity rooms ("all:<severity>") and per-user rooms
+  ("user:<user>:<severity>")
+- Events are delivered to rooms only: a client joins every "all:<severity>"
+  room on connect and narrows its scope and severities with the 'subscribe'
+  event (Config.EVENT_ROOM_SCOPED=False restores broadcasting every event
+  to clients that never subscribe)
+- Final (non-progress) events are numbered in the event log
+  (see event_log.py); reconnecting clients fetch what they missed with
+  'catch_up' or GET /api/events
+- Counters: published, coalesced, superseded, dropped, emitted, errors
+
+Client usage:
+    socket.emit('subscribe', {severities: ['malicious', 'suspicious']})
+    socket.emit('subscribe', {scope: 'user', user: clientId})
+    socket.emit('catch_up', {log: logId, after: lastSeq}, page => ...)
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+from event_log import EventLog, event_log
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ('malicious', 'suspicious', 'safe', 'info')
+
+# Verdict spellings used across the scanners, by severity
+_SEVERITY_LABELS = {
+    'malicious': {'MALICIOUS', 'MALWARE', 'RANSOMWARE', 'CRITICAL', 'HIGH', 'DANGEROUS'},
+    'suspicious': {'SUSPICIOUS', 'PHISHING', 'OBFUSCATED_JS', 'MEDIUM', 'WARNING'},
+    'safe': {'SAFE', 'BENIGN', 'CLEAN', 'LOW'},
+}
+
+
+def severity_of(payload: Dict[str, Any]) -> str:
+    """Severity bucket of an event payload ('info' for progress and unknowns)"""
+    for field in ('threat_level', 'classification', 'risk'):
+        label = str(payload.get(field) or '').upper()
+        for severity, labels in _SEVERITY_LABELS.items():
+            if label in labels:
+                return severity
+    return 'info'
+
+
+def room_for(severity: str, user: Optional[str] = None) -> str:
+    """Room receiving a severity, for all dashboards or one user's"""
+    return f'user:{user}:{severity}' if user else f'all:{severity}'
+
+
+class _Event:
+    __slots__ = ('name', 'payload', 'rooms')
+
+    def __init__(self, name: str, payload: Dict[str, Any], rooms: List[str]):
+        self.name = name
+        self.payload = payload
+        self.rooms = rooms
+
+
+class EventBus:
+    """
+    Off-request-path Socket.IO emitter.
+
+    Usage:
+        event_bus.attach(socketio)
+        event_bus.publish('new_scan', data, key=url, progress=True, user=quota_user())
+    """
+
+    def __init__(self, socketio=None, window: float = Config.EVENT_COALESCE_WINDOW,
+                 max_queue: int = Config.EVENT_QUEUE_SIZE, namespace: str = '/',
+                 log: Optional[EventLog] = None,
+                 room_scoped: bool = Config.EVENT_ROOM_SCOPED):
+        """
+        Initialize event bus.
+
+        Args:
+            socketio: flask_socketio.SocketIO used for delivery (see attach)
+            window: Seconds progress events are held for coalescing
+            max_queue: Max queued events before publish() drops
+            namespace: Socket.IO namespace of the dashboards
+            log: Event log numbering final events (None = not logged)
+            room_scoped: Emit to rooms only and put new clients in the
+                "all:<severity>" rooms; False also broadcasts to clients
+                that never subscribed
+        """
+        self.socketio = socketio
+        self.log = log
+        self.window = window
+        self.max_queue = max_queue
+        self.namespace = namespace
+        self.room_scoped = room_scoped
+        self.lock = threading.Lock()
+        self._changed = threading.Condition(self.lock)
+        self._ready: deque = deque()
+        # (event name, key) -> latest progress event, in first-arrival order
+        self._pending: 'OrderedDict[Tuple[str, str], _Event]' = OrderedDict()
+        self._flush_at: Optional[float] = None
+        self._emitting = 0
+        self._subscribed: set = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = False
+        self.stats = {'published': 0, 'coalesced': 0, 'superseded': 0,
+                      'dropped': 0, 'emitted': 0, 'errors': 0}
+
+    def attach(self, socketio):
+        """Deliver through socketio and register the 'subscribe' handler"""
+        self.socketio = socketio
+        register_handlers(socketio, self)
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Publishing
+    # ───────────────────────────────────────────────────────────────────────
+
+    def publish(self, event: str, payload: Dict[str, Any], key: Optional[str] = None,
+                progress: bool = False, user: Optional[str] = None) -> bool:
+        """
+        Queue an event for delivery.
+
+        Args:
+            event: Socket.IO event name
+            payload: JSON-serializable event data
+            key: Entity the event is about (usually the URL)
+            progress: Intermediate state; only the latest per (event, key)
+                      within the coalescing window is delivered
+            user: Also deliver to this user's rooms
+
+        Returns:
+            False if the queue was full and the event was dropped
+        """
+        if self.log is not None and not progress:
+            # Logged even if dropped below, so catch-up still finds it
+            payload = {**payload, 'seq': self.log.append(event, payload)}
+        severity = severity_of(payload)
+        rooms = [room_for(severity)]
+        if user:
+            rooms.append(room_for(severity, user))
+        item = _Event(event, payload, rooms)
+
+        with self.lock:
+            self.stats['published'] += 1
+            if len(self._ready) + len(self._pending) >= self.max_queue:
+                self.stats['dropped'] += 1
+                return False
+
+            if progress and key is not None:
+                pending_key = (event, key)
+                if pending_key in self._pending:
+                    self.stats['coalesced'] += 1
+                self._pending[pending_key] = item
+                if self._flush_at is None:
+                    self._flush_at = time.monotonic() + self.window
+            else:
+                if key is not None and self._pending:
+                    stale = [k for k in self._pending if k[1] == key]
+                    for pending_key in stale:
+                        del self._pending[pending_key]
+                    self.stats['superseded'] += len(stale)
+                self._ready.append(item)
+
+            self._ensure_thread()
+            self._changed.notify()
+        return True
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name='event-bus', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while not self._stop:
+                    if self._flush_at is not None and time.monotonic() >= self._flush_at:
+                        self._ready.extend(self._pending.values())
+                        self._pending.clear()
+                        self._flush_at = None
+                    if self._ready:
+                        break
+                    timeout = None if self._flush_at is None else self._flush_at - time.monotonic()
+                    self._changed.wait(timeout)
+                if self._stop and not self._ready:
+                    return
+                batch = list(self._ready)
+                self._ready.clear()
+                self._emitting = len(batch)
+                skip = list(self._subscribed)
+
+            for item in batch:
+                self._emit(item, skip)
+
+            with self.lock:
+                self._emitting = 0
+                self._changed.notify_all()
+
+    def _emit(self, item: _Event, subscribed: List[str]):
+        try:
+            if self.room_scoped or subscribed:
+                self.socketio.emit(item.name, item.payload, to=item.rooms, namespace=self.namespace)
+            if not self.room_scoped:
+                # Clients without a subscription get every event
+                self.socketio.emit(item.name, item.payload, namespace=self.namespace,
+                                   skip_sid=subscribed or None)
+            with self.lock:
+                self.stats['emitted'] += 1
+        except Exception as e:
+            with self.lock:
+                self.stats['errors'] += 1
+            logger.warning(f"Event {item.name} could not be delivered: {e}")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Deliver everything queued, including held progress events.
+
+        Returns:
+            True if the queue drained within timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            if self._pending:
+                self._flush_at = time.monotonic()
+                self._ensure_thread()
+            self._changed.notify_all()
+            while self._ready or self._pending or self._emitting:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Deliver queued events and stop the dispatcher"""
+        self.flush(timeout)
+        with self.lock:
+            self._stop = True
+            self._changed.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Subscriptions
+    # ───────────────────────────────────────────────────────────────────────
+
+    def subscribe(self, sid: str, severities: Optional[Iterable[str]] = None,
+                  scope: str = 'all', user: Optional[str] = None) -> List[str]:
+        """
+        Replace a client's rooms.
+
+        Args:
+            sid: Socket.IO session id
+            severities: Severities to receive (default: all)
+            scope: 'all' for every dashboard event, 'user' for one user's scans
+            user: User whose scans to receive when scope is 'user'
+
+        Returns:
+            Rooms the client is now in
+        """
+        wanted = [s for s in (severities or SEVERITIES) if s in SEVERITIES]
+        scoped_user = user if scope == 'user' and user else None
+        rooms = [room_for(severity, scoped_user) for severity in wanted]
+
+        server = self.socketio.server
+        for room in list(server.rooms(sid, namespace=self.namespace)):
+            if room.startswith(('all:', 'user:')):
+                server.leave_room(sid, room, namespace=self.namespace)
+        for room in rooms:
+            server.enter_room(sid, room, namespace=self.namespace)
+
+        with self.lock:
+            # Forget clients that have disconnected since they subscribed
+            self._subscribed = {s for s in self._subscribed
+                                if server.manager.is_connected(s, self.namespace)}
+            self._subscribed.add(sid)
+        return rooms
+
+    def unsubscribe(self, sid: str):
+        """Forget a disconnected client (Socket.IO drops its rooms itself)"""
+        with self.lock:
+            self._subscribed.discard(sid)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters and queue depth"""
+        with self.lock:
+            return {**self.stats,
+                    'queued': len(self._ready),
+                    'held': len(self._pending),
+                    'subscribers': len(self._subscribed),
+                    'window_s': self.window}
+
+
+def _registered_handler(socketio, event: str, namespace: str):
+    """Handler already registered for an event (called as handler(sid, *args))"""
+    if socketio.server is not None:
+        return socketio.server.handlers.get(namespace, {}).get(event)
+    for message, handler, handler_namespace in reversed(socketio.handlers):
+        if (message, handler_namespace) == (event, namespace):
+            return handler
+    return None
+
+
+def register_handlers(socketio, bus: EventBus):
+    """Register the 'subscribe', 'catch_up', 'connect' and 'disconnect' Socket.IO events"""
+    from flask import request
+
+    @socketio.on('subscribe', namespace=bus.namespace)
+    def on_subscribe(data=None):
+        data = data or {}
+        rooms = bus.subscribe(request.sid, severities=data.get('severities'),
+                              scope=data.get('scope', 'all'), user=data.get('user'))
+        return {'rooms': rooms}
+
+    # Socket.IO keeps one handler per event, so chain to an existing one
+    # (e.g. the scanner routes' connection logging)
+    if bus.room_scoped:
+        previous_connect = _registered_handler(socketio, 'connect', bus.namespace)
+
+        @socketio.on('connect', namespace=bus.namespace)
+        def on_connect(auth=None):
+            if previous_connect is not None:
+                if previous_connect(request.sid, request.environ, auth) is False:
+                    return False
+            # Every dashboard event until the client narrows it
+            bus.subscribe(request.sid)
+
+    previous_disconnect = _registered_handler(socketio, 'disconnect', bus.namespace)
+
+    @socketio.on('disconnect', namespace=bus.namespace)
+    def on_disconnect(*args):
+        bus.unsubscribe(request.sid)
+        if previous_disconnect is not None:
+            return previous_disconnect(request.sid, *args)
+
+    if bus.log is not None:
+        @socketio.on('catch_up', namespace=bus.namespace)
+        def on_catch_up(data=None):
+            data = data or {}
+            return bus.log.after(int(data.get('after') or 0),
+                                 limit=min(int(data.get('limit') or 100), 1000),
+                                 log_id=data.get('log'))
+
+
+# Global bus shared by the scan routes
+event_bus = EventBus(log=event_log)
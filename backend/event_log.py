@@ -0,0 +1,153 @@
+"""
+Event Log Module
+
+Append-only, sequence-numbered log of the final dashboard events.
+
+Dashboards catching up after a reload or reconnect used to ask
+/api/recent-scans for everything since a timestamp, which parsed and
+re-sorted the whole scan history on every call. Each event published through
+the event bus now gets the next sequence number; a client remembers the last
+one it saw and asks for the events after it.
+
+Features:
+- Monotonically increasing sequence ids, never reused within a process
+- Bounded retention by count (Config.EVENT_LOG_RETENTION) and age
+  (Config.EVENT_LOG_MAX_AGE)
+- Catch-up by sequence number or timestamp: a binary search and a slice
+- Tells clients when their cursor fell out of the retention window
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+
+class EventLog:
+    """
+    In-memory event log with cursor reads.
+
+    Usage:
+        seq = event_log.append('new_scan', payload)
+        page = event_log.after(last_seq, limit=100)
+    """
+
+    def __init__(self, retention: int = Config.EVENT_LOG_RETENTION,
+                 max_age: float = Config.EVENT_LOG_MAX_AGE):
+        """
+        Initialize event log.
+
+        Args:
+            retention: Max events kept
+            max_age: Seconds an event is kept (0 = no age limit)
+        """
+        self.retention = retention
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        # Sequence numbers restart with the process; the id tells clients apart
+        self.log_id = uuid.uuid4().hex[:12]
+        self.last_seq = 0
+        # Parallel lists, oldest first; both sorted, so bisect works on them
+        self._seqs: List[int] = []
+        self._times: List[float] = []
+        self._events: List[Dict[str, Any]] = []
+        self.stats = {'appended': 0, 'reads': 0, 'resets': 0, 'evicted': 0}
+
+    def append(self, event: str, data: Dict[str, Any]) -> int:
+        """Add an event and return its sequence number"""
+        with self.lock:
+            now = time.time()
+            # Keep times sorted even if the wall clock steps back
+            if self._times and now < self._times[-1]:
+                now = self._times[-1]
+            self.last_seq += 1
+            self._seqs.append(self.last_seq)
+            self._times.append(now)
+            self._events.append({'seq': self.last_seq, 'event': event,
+                                 'timestamp': now, 'data': data})
+            self.stats['appended'] += 1
+            self._trim(now)
+            return self.last_seq
+
+    def _trim(self, now: float):
+        drop = 0
+        # Trim in chunks so the list shift is amortized over many appends
+        if len(self._events) > self.retention + max(self.retention // 8, 1):
+            drop = len(self._events) - self.retention
+        if self.max_age:
+            drop = max(drop, bisect_left(self._times, now - self.max_age))
+        if drop:
+            del self._seqs[:drop]
+            del self._times[:drop]
+            del self._events[:drop]
+            self.stats['evicted'] += drop
+
+    def after(self, seq: int, limit: int = 100, log_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Events with a sequence number greater than seq.
+
+        Args:
+            seq: Last sequence number the client has seen (0 = none)
+            limit: Max events returned
+            log_id: Log the client's seq came from, if known
+
+        Returns:
+            {'events', 'cursor', 'has_more', 'reset'} - cursor is the seq to
+            pass next time; reset is True when events after seq were already
+            evicted (or seq is from another process) and the client should
+            reload its full state
+        """
+        with self.lock:
+            self._trim(time.time())
+            if log_id is not None and log_id != self.log_id:
+                return self._page(0, limit, True, fallback_cursor=0)
+            start = bisect_right(self._seqs, seq)
+            oldest = self._seqs[0] if self._seqs else self.last_seq + 1
+            reset = seq > self.last_seq or seq < oldest - 1
+            return self._page(start, limit, reset, fallback_cursor=max(seq, 0))
+
+    def since_time(self, timestamp: float, limit: int = 100) -> Dict[str, Any]:
+        """Events logged after a Unix timestamp (seconds)"""
+        with self.lock:
+            self._trim(time.time())
+            start = bisect_right(self._times, timestamp)
+            return self._page(start, limit, False, fallback_cursor=self.last_seq)
+
+    def _page(self, start: int, limit: int, reset: bool, fallback_cursor: int) -> Dict[str, Any]:
+        events = self._events[start:start + limit]
+        self.stats['reads'] += 1
+        if reset:
+            self.stats['resets'] += 1
+        return {
+            'log': self.log_id,
+            'events': events,
+            'cursor': events[-1]['seq'] if events else (self.last_seq if reset else fallback_cursor),
+            'has_more': start + limit < len(self._events),
+            'reset': reset,
+        }
+
+    def latest(self, count: int) -> List[Dict[str, Any]]:
+        """The newest events, oldest first"""
+        with self.lock:
+            return self._events[-count:] if count > 0 else []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters, cursor range and retention"""
+        with self.lock:
+            return {**self.stats,
+                    'log': self.log_id,
+                    'size': len(self._events),
+                    'first_seq': self._seqs[0] if self._seqs else None,
+                    'last_seq': self.last_seq,
+                    'retention': self.retention,
+                    'max_age_s': self.max_age}
+
+
+# Global log of the events published to dashboards
+event_log = EventLog()
@@ -0,0 +1,288 @@
+"""
+Latency Tracker Module
+
+Rolling latency histograms per provider and endpoint, used to derive
+timeouts and hedging delays from what providers actually deliver instead of
+fixed constants.
+
+Features:
+- Log-spaced buckets (5 ms to 120 s, ~25% wide) so quantiles stay cheap
+  and memory per endpoint is constant
+- Rolling window: two bucket generations are rotated every half window, so
+  old slow periods age out
+- Endpoints are normalized (IDs and hashes in paths collapse to {id},
+  hostnames and IP addresses to {host}, URLs to {url}); a provider-wide
+  histogram backs endpoints with too few samples
+- The number of endpoint histograms is capped, so unexpected path values
+  cannot grow memory without bound
+- Timed-out requests count at their timeout, so a slowing provider pushes
+  its own timeout up towards the configured ceiling
+- adaptive timeout = clamp(p99 * multiplier, floor, ceiling)
+- hedge delay = p95
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import bisect
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds
+BUCKET_BOUNDS: List[float] = []
+_bound = 0.005
+while _bound < 120:
+    BUCKET_BOUNDS.append(round(_bound, 4))
+    _bound *= 1.25
+BUCKET_BOUNDS.append(120.0)
+
+# Histogram of all endpoints of a provider
+ALL_ENDPOINTS = '*'
+
+_ID_SEGMENT = re.compile(r'^(?=.*\d)[A-Za-z0-9_\-=.:]{16,}$|^\d+$|^CVE-\d{4}-\d+$', re.IGNORECASE)
+
+# Hostnames, IPv4 and bracketed IPv6 addresses used as path values
+_HOST_SEGMENT = re.compile(
+    r'^(\d{1,3}(\.\d{1,3}){3}|\[[0-9a-f:.]+\]|([a-z0-9_-]+\.)+[a-z][a-z0-9-]*)(:\d+)?$', re.IGNORECASE
+)
+
+# Dotted path segments that are file names, not hosts
+_FILE_EXTENSIONS = frozenset({'json', 'xml', 'html', 'htm', 'php', 'asp', 'aspx', 'txt', 'csv',
+                              'js', 'css', 'gz', 'zip'})
+
+# URLs used as path values, raw ("http:" followed by the rest) or percent-encoded
+_URL_SEGMENT = re.compile(r'^[a-z][a-z0-9+.-]*:$|%3A|%2F', re.IGNORECASE)
+
+
+def _segment_label(segment: str) -> str:
+    if _ID_SEGMENT.match(segment):
+        return '{id}'
+    if _HOST_SEGMENT.match(segment) and segment.rsplit('.', 1)[-1].lower() not in _FILE_EXTENSIONS:
+        return '{host}'
+    return segment
+
+
+def endpoint_label(method: str, url: str) -> str:
+    """
+    Stable endpoint name for a request URL.
+
+    Example:
+        endpoint_label('GET', 'https://www.virustotal.com/api/v3/urls/9f86d0...')
+        -> 'GET www.virustotal.com/api/v3/urls/{id}'
+        endpoint_label('GET', 'https://otx.alienvault.com/api/v1/indicators/domain/a.com/general')
+        -> 'GET otx.alienvault.com/api/v1/indicators/domain/{host}/general'
+    """
+    parts = urlsplit(url)
+    segments = []
+    for segment in parts.path.split('/'):
+        if _URL_SEGMENT.search(segment):
+            # Everything after a URL-valued segment belongs to that URL
+            segments.append('{url}')
+            break
+        segments.append(_segment_label(segment))
+    return f"{method.upper()} {parts.netloc}{'/'.join(segments)}"
+
+
+class LatencyHistogram:
+    """Bucketed latencies over a rolling window."""
+
+    def __init__(self, window_seconds: float = Config.LATENCY_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self.current = [0] * len(BUCKET_BOUNDS)
+        self.previous = [0] * len(BUCKET_BOUNDS)
+        self.rotated_at = time.time()
+        self.timeouts = 0
+        self.total = 0
+
+    def _rotate(self, now: float):
+        elapsed = now - self.rotated_at
+        if elapsed < self.window_seconds / 2:
+            return
+        if elapsed < self.window_seconds:
+            self.previous = self.current
+        else:
+            self.previous = [0] * len(BUCKET_BOUNDS)
+        self.current = [0] * len(BUCKET_BOUNDS)
+        self.rotated_at = now
+
+    def record(self, seconds: float, timed_out: bool = False):
+        """Add one sample (timed-out requests are recorded at their timeout)"""
+        self._rotate(time.time())
+        index = min(bisect.bisect_left(BUCKET_BOUNDS, seconds), len(BUCKET_BOUNDS) - 1)
+        self.current[index] += 1
+        self.total += 1
+        if timed_out:
+            self.timeouts += 1
+
+    def _counts(self) -> List[int]:
+        self._rotate(time.time())
+        return [a + b for a, b in zip(self.current, self.previous)]
+
+    def count(self) -> int:
+        """Samples in the rolling window"""
+        return sum(self._counts())
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding quantile q, None without samples"""
+        counts = self._counts()
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return BUCKET_BOUNDS[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        counts = self._counts()
+        window_count = sum(counts)
+
+        def ms(q):
+            value = self.quantile(q)
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            'count': window_count,
+            'total': self.total,
+            'timeouts': self.timeouts,
+            'p50_ms': ms(0.5),
+            'p95_ms': ms(0.95),
+            'p99_ms': ms(0.99),
+            'buckets': [[round(bound * 1000, 1), count]
+                        for bound, count in zip(BUCKET_BOUNDS, counts) if count],
+        }
+
+
+class LatencyTracker:
+    """
+    Histograms per (provider, endpoint) and the policies derived from them.
+
+    Usage:
+        latency_tracker.record('nvd', endpoint, elapsed)
+        timeout = latency_tracker.timeout_for('nvd', endpoint, ceiling=10)
+        delay = latency_tracker.hedge_delay('nvd', endpoint)
+    """
+
+    def __init__(self, window_seconds: float = Config.LATENCY_WINDOW_SECONDS,
+                 min_samples: int = Config.LATENCY_MIN_SAMPLES,
+                 multiplier: float = Config.ADAPTIVE_TIMEOUT_MULTIPLIER,
+                 floor: float = Config.ADAPTIVE_TIMEOUT_MIN,
+                 adaptive: bool = Config.ADAPTIVE_TIMEOUTS_ENABLED,
+                 hedging: bool = Config.PROVIDER_HEDGING_ENABLED,
+                 max_endpoints: int = Config.LATENCY_MAX_ENDPOINTS):
+        """
+        Initialize latency tracker.
+
+        Args:
+            window_seconds: Rolling window of the histograms
+            min_samples: Samples needed before an endpoint's quantiles are used
+            multiplier: Adaptive timeout = p99 * multiplier
+            floor: Lowest adaptive timeout in seconds
+            adaptive: Derive timeouts from p99 (otherwise the ceiling is used)
+            hedging: Allow hedged requests
+            max_endpoints: Most endpoint histograms kept; further endpoints
+                           are only counted in their provider's histogram
+        """
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.floor = floor
+        self.adaptive = adaptive
+        self.hedging = hedging
+        self.max_endpoints = max_endpoints
+        self.lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._endpoint_count = 0
+        self.overflow = 0
+
+    def _histogram(self, provider: str, endpoint: str) -> Optional[LatencyHistogram]:
+        """Histogram of an endpoint, None once the endpoint cap is reached"""
+        key = (provider, endpoint)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            if endpoint != ALL_ENDPOINTS:
+                if self._endpoint_count >= self.max_endpoints:
+                    return None
+                self._endpoint_count += 1
+            histogram = self._histograms[key] = LatencyHistogram(self.window_seconds)
+        return histogram
+
+    def record(self, provider: str, endpoint: str, seconds: float, timed_out: bool = False):
+        """Record one request's latency for the endpoint and its provider"""
+        with self.lock:
+            histogram = self._histogram(provider, endpoint)
+            if histogram is not None:
+                histogram.record(seconds, timed_out)
+            else:
+                if not self.overflow:
+                    logger.warning(f"Latency tracker: {self.max_endpoints} endpoint histograms "
+                                   f"reached; {provider} {endpoint!r} uses the provider histogram")
+                self.overflow += 1
+            self._histogram(provider, ALL_ENDPOINTS).record(seconds, timed_out)
+
+    def quantile(self, provider: str, endpoint: str, q: float) -> Optional[float]:
+        """
+        Quantile q of the endpoint (or the whole provider while the endpoint
+        has too few samples); None until min_samples are seen.
+        """
+        with self.lock:
+            for name in (endpoint, ALL_ENDPOINTS):
+                histogram = self._histograms.get((provider, name))
+                if histogram is not None and histogram.count() >= self.min_samples:
+                    return histogram.quantile(q)
+        return None
+
+    def timeout_for(self, provider: str, endpoint: str, ceiling: Any) -> Any:
+        """
+        Timeout for the next request.
+
+        Args:
+            ceiling: Configured timeout in seconds (non-numeric values, e.g.
+                     None or an httpx.Timeout, are returned unchanged)
+
+        Returns:
+            min(ceiling, max(floor, p99 * multiplier)), or the ceiling while
+            there is not enough data
+        """
+        if not self.adaptive or isinstance(ceiling, bool) or not isinstance(ceiling, (int, float)):
+            return ceiling
+        p99 = self.quantile(provider, endpoint, 0.99)
+        if p99 is None:
+            return ceiling
+        return min(float(ceiling), max(self.floor, p99 * self.multiplier))
+
+    def hedge_delay(self, provider: str, endpoint: str) -> Optional[float]:
+        """Seconds after which to send a hedge request (p95), None to not hedge"""
+        if not self.hedging:
+            return None
+        return self.quantile(provider, endpoint, 0.95)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Histogram summaries per provider and endpoint, with derived timeouts"""
+        with self.lock:
+            items = sorted(self._histograms.items())
+            stats: Dict[str, Dict[str, Any]] = {}
+            for (provider, endpoint), histogram in items:
+                stats.setdefault(provider, {})[endpoint] = histogram.to_dict()
+        for provider, endpoints in stats.items():
+            for endpoint, summary in endpoints.items():
+                p99 = self.quantile(provider, endpoint, 0.99)
+                summary['adaptive_timeout_s'] = (
+                    round(max(self.floor, p99 * self.multiplier), 3) if p99 is not None else None
+                )
+        return stats
+
+
+# Global tracker shared by provider_client and api_client
+latency_tracker = LatencyTracker()
@@ -9,9 +9,17 @@ Currently provides a baseline predictor until trained model is available.
 import pickle
 import os
 import re
+import sys
+import hashlib
 import logging
 from typing import Dict, List
 
+try:
+    from compiled_forest import load_compiled_forest
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ml_advanced'))
+    from compiled_forest import load_compiled_forest
+
 logger = logging.getLogger(__name__)
 
 # Model storage path
@@ -56,6 +64,8 @@ class JavaScriptMLPredictor:
         """Initialize JS predictor"""
         self.model = None
         self.vectorizer = None
+        self.compiled = None
+        self.model_sha256 = None
         self.model_loaded = False
         self._load_model()
     
@@ -64,10 +74,14 @@ class JavaScriptMLPredictor:
         try:
             if os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH):
                 with open(MODEL_PATH, 'rb') as f:
-                    self.model = pickle.load(f)
+                    model_bytes = f.read()
+                self.model = pickle.loads(model_bytes)
                 with open(VECTORIZER_PATH, 'rb') as f:
                     self.vectorizer = pickle.load(f)
                 self.model_loaded = True
+                self.model_sha256 = hashlib.sha256(model_bytes).hexdigest()
+                # Prefer the flat-array forest when it was built from this pickle
+                self.compiled = load_compiled_forest(MODEL_PATH, self.model_sha256)
                 logger.info("✅ Trained JavaScript model loaded")
             else:
                 logger.warning("⚠️ No trained JavaScript model found - using baseline predictor")
@@ -164,8 +178,10 @@ class JavaScriptMLPredictor:
                     code_vector = self.vectorizer.transform([js_code])
                     
                     # Get prediction
-                    prediction = self.model.predict(code_vector)[0]
-                    proba = self.model.predict_proba(code_vector)[0]
+                    if self.compiled is not None:
+                        proba = self.compiled.predict_proba(code_vector)[0]
+                    else:
+                        proba = self.model.predict_proba(code_vector)[0]
                     
                     # Map to confidence and risk
                     confidence = max(proba)
@@ -194,7 +210,8 @@ class JavaScriptMLPredictor:
                 'threat_level': threat_level,
                 'features': features,
                 'detected_patterns': features.get('unique_patterns', []),
-                'model_status': 'trained' if self.model_loaded else 'baseline'
+                'model_status': 'trained' if self.model_loaded else 'baseline',
+                'inference': 'compiled' if self.compiled is not None else 'sklearn'
             }
         
         except Exception as e:
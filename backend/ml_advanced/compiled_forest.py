@@ -0,0 +1,352 @@
+"""
+Compiled Tree Ensemble
+Flattens a trained scikit-learn forest into plain NumPy arrays for fast scoring
+
+Scoring a single URL with a pickled RandomForest pays for input validation,
+joblib dispatch and one Python call per estimator. The compiled form keeps
+every node of every tree in five flat arrays (feature, threshold, left,
+right, value) and walks all trees at once with vectorized NumPy indexing,
+so only numpy is needed on the prediction path.
+
+Predictions are bit-identical to ``predict_proba`` of the source model run
+with ``n_jobs=1``: inputs are cast to float32 the same way scikit-learn
+does, leaf probabilities are taken verbatim from the trees and summed in
+estimator order before dividing by the tree count.
+
+Usage:
+    python ml_advanced/compiled_forest.py                 # compile URL + JS models
+    python ml_advanced/compiled_forest.py model.pkl out.npz --vectorizer vec.pkl --samples urls.txt
+"""
+
+import os
+import hashlib
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPILED_FORMAT_VERSION = 1
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _leaf_probabilities(estimator, n_classes: int) -> np.ndarray:
+    """
+    Per-node class probabilities exactly as the estimator's predict_proba
+    would return them for a sample landing in that node
+    """
+    import sklearn
+
+    value = np.array(estimator.tree_.value[:, 0, :n_classes], dtype=np.float64)
+    major, minor = (int(part) for part in sklearn.__version__.split('.')[:2])
+    if (major, minor) < (1, 4):
+        # Older releases stored raw class counts and normalized at predict time
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        value /= normalizer
+    return value
+
+
+class CompiledForest:
+    """Flat-array representation of a single-output tree ensemble classifier"""
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray,
+                 left: np.ndarray, right: np.ndarray, value: np.ndarray,
+                 roots: np.ndarray, classes: np.ndarray, n_features: int,
+                 max_depth: int, source_sha256: str = ''):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+        self.source_sha256 = source_sha256
+        self.n_trees = len(roots)
+
+    @classmethod
+    def from_sklearn(cls, model, source_sha256: str = '') -> 'CompiledForest':
+        """
+        Compile a fitted RandomForest/ExtraTrees/DecisionTree classifier
+
+        Args:
+            model: Fitted scikit-learn tree-based classifier
+            source_sha256: Fingerprint of the pickle the model was loaded from
+
+        Returns:
+            CompiledForest: Flattened model
+
+        Raises:
+            ValueError: If the model is not a single-output tree classifier
+        """
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None:
+            estimators = [model]
+        if not estimators or not all(hasattr(e, 'tree_') for e in estimators):
+            raise ValueError(f"Cannot compile {type(model).__name__}: not a tree ensemble")
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output classifiers can be compiled")
+
+        n_classes = int(model.n_classes_)
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point at themselves so traversal can run a fixed number
+            # of steps without branching on leaf status
+            left = np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32)
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+
+            features.append(feature)
+            thresholds.append(np.asarray(tree.threshold, dtype=np.float64))
+            lefts.append(left)
+            rights.append(right)
+            values.append(_leaf_probabilities(estimator, n_classes))
+            roots.append(offset)
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            n_features=int(model.n_features_in_),
+            max_depth=max_depth,
+            source_sha256=source_sha256,
+        )
+
+    def _as_float32_rows(self, X) -> np.ndarray:
+        """Convert a row, batch or sparse matrix to a 2-D float32 array"""
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Return the leaf index reached in every tree
+
+        Args:
+            X: Single row, 2-D batch or scipy sparse matrix
+
+        Returns:
+            np.ndarray: (n_samples, n_trees) global node indices
+        """
+        X = self._as_float32_rows(X)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities, identical to the source model's predict_proba
+
+        Args:
+            X: Single row, 2-D batch or scipy sparse matrix
+
+        Returns:
+            np.ndarray: (n_samples, n_classes) probabilities
+        """
+        leaf_values = self.value[self.apply(X)]
+        # cumsum adds left to right, matching the forest's per-estimator
+        # accumulation; np.sum would use pairwise summation instead
+        proba = np.cumsum(leaf_values, axis=1)[:, -1]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """Predicted class labels"""
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path: str):
+        """Write the compiled arrays to an .npz file (atomically)"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            format_version=np.array(COMPILED_FORMAT_VERSION),
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            classes=self.classes,
+            n_features=np.array(self.n_features),
+            max_depth=np.array(self.max_depth),
+            source_sha256=np.array(self.source_sha256),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'CompiledForest':
+        """Load a compiled model written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != COMPILED_FORMAT_VERSION:
+                raise ValueError(f"Unsupported compiled model format in {path}")
+            return cls(
+                feature=data['feature'],
+                threshold=data['threshold'],
+                left=data['left'],
+                right=data['right'],
+                value=data['value'],
+                roots=data['roots'],
+                classes=data['classes'],
+                n_features=int(data['n_features']),
+                max_depth=int(data['max_depth']),
+                source_sha256=str(data['source_sha256']),
+            )
+
+
+def compiled_path_for(model_path: str) -> str:
+    """Conventional location of the compiled artifact next to a model pickle"""
+    return os.path.splitext(model_path)[0] + '_compiled.npz'
+
+
+def export_compiled_forest(model, model_path: str, output_path: Optional[str] = None,
+                           X_validation=None) -> Optional[CompiledForest]:
+    """
+    Compile a trained model and write it next to its pickle
+
+    Args:
+        model: Fitted tree ensemble (the object stored at model_path)
+        model_path: Pickle the model was saved to, used as fingerprint
+        output_path: Destination .npz (defaults to <model>_compiled.npz)
+        X_validation: Optional feature matrix; the export is refused unless
+            the compiled predictions match predict_proba bit for bit
+
+    Returns:
+        CompiledForest or None if the model is not a tree ensemble
+
+    Raises:
+        ValueError: If compiled predictions differ on the validation set
+    """
+    output_path = output_path or compiled_path_for(model_path)
+    try:
+        compiled = CompiledForest.from_sklearn(model, source_sha256=file_sha256(model_path))
+    except ValueError as e:
+        logger.info(f"Skipping compiled export: {e}")
+        return None
+
+    if X_validation is not None and X_validation.shape[0] > 0:
+        n_jobs = getattr(model, 'n_jobs', None)
+        if n_jobs is not None:
+            # Threaded accumulation makes the reference sum order nondeterministic
+            model.set_params(n_jobs=1)
+        try:
+            expected = model.predict_proba(X_validation)
+        finally:
+            if n_jobs is not None:
+                model.set_params(n_jobs=n_jobs)
+        actual = compiled.predict_proba(X_validation)
+        if not np.array_equal(expected, actual):
+            raise ValueError("Compiled forest predictions differ from predict_proba")
+
+    compiled.save(output_path)
+    logger.info(f"   ✅ Compiled model saved: {output_path} "
+                f"({compiled.n_trees} trees, {len(compiled.feature)} nodes)")
+    return compiled
+
+
+def load_compiled_forest(model_path: str, model_sha256: str,
+                         compiled_path: Optional[str] = None) -> Optional[CompiledForest]:
+    """
+    Load the compiled artifact for a model pickle if it is up to date
+
+    Returns None when the artifact is missing, unreadable or was compiled
+    from a different pickle, so callers fall back to the sklearn model.
+    """
+    compiled_path = compiled_path or compiled_path_for(model_path)
+    if not os.path.exists(compiled_path):
+        return None
+    try:
+        compiled = CompiledForest.load(compiled_path)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to load compiled model {compiled_path}: {e}")
+        return None
+    if compiled.source_sha256 != model_sha256:
+        logger.warning(f"⚠️ Compiled model {compiled_path} is stale - ignoring")
+        return None
+    return compiled
+
+
+def _compile_from_disk(model_path: str, vectorizer_path: Optional[str],
+                       samples: list, output_path: Optional[str] = None):
+    import pickle
+
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    X_validation = None
+    if vectorizer_path and samples and os.path.exists(vectorizer_path):
+        with open(vectorizer_path, 'rb') as f:
+            vectorizer = pickle.load(f)
+        X_validation = vectorizer.transform(samples)
+    return export_compiled_forest(model, model_path, output_path, X_validation)
+
+
+def main(argv=None):
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Compile tree ensemble models to flat arrays')
+    parser.add_argument('model', nargs='?', help='Model pickle (default: URL and JS models)')
+    parser.add_argument('output', nargs='?', help='Output .npz path')
+    parser.add_argument('--vectorizer', help='Vectorizer pickle for validation')
+    parser.add_argument('--samples', help='File with one validation sample per line')
+    args = parser.parse_args(argv)
+
+    samples = []
+    if args.samples:
+        with open(args.samples, 'r', encoding='utf-8', errors='replace') as f:
+            samples = [line.rstrip('\n') for line in f if line.strip()]
+
+    if args.model:
+        _compile_from_disk(args.model, args.vectorizer, samples, args.output)
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    backend_dir = os.path.dirname(here)
+    defaults = [
+        (os.path.join(here, 'url_model.pkl'), os.path.join(here, 'url_vectorizer.pkl'),
+         samples or ['https://google.com', 'http://paypal-secure-login.xyz/verify']),
+        (os.path.join(backend_dir, 'ml', 'js_model.pkl'),
+         os.path.join(backend_dir, 'ml', 'js_vectorizer.pkl'),
+         samples or ['console.log("Hello World");', 'eval(atob("ZXZhbCgiY29kZSIp"));']),
+    ]
+    for model_path, vectorizer_path, validation in defaults:
+        if os.path.exists(model_path):
+            _compile_from_disk(model_path, vectorizer_path, validation)
+        else:
+            logger.info(f"No model at {model_path} - skipping")
+
+
+if __name__ == '__main__':
+    main()
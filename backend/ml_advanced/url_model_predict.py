@@ -8,11 +8,19 @@ Currently provides a baseline predictor until trained model is available.
 
 import pickle
 import os
+import sys
+import hashlib
 from urllib.parse import urlparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier
 import logging
 
+try:
+    from compiled_forest import load_compiled_forest
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from compiled_forest import load_compiled_forest
+
 logger = logging.getLogger(__name__)
 
 # Model storage path
@@ -27,6 +35,8 @@ class URLMLPredictor:
         """Initialize URL predictor"""
         self.model = None
         self.vectorizer = None
+        self.compiled = None
+        self.model_sha256 = None
         self.model_loaded = False
         self._load_model()
     
@@ -35,10 +45,14 @@ class URLMLPredictor:
         try:
             if os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH):
                 with open(MODEL_PATH, 'rb') as f:
-                    self.model = pickle.load(f)
+                    model_bytes = f.read()
+                self.model = pickle.loads(model_bytes)
                 with open(VECTORIZER_PATH, 'rb') as f:
                     self.vectorizer = pickle.load(f)
                 self.model_loaded = True
+                self.model_sha256 = hashlib.sha256(model_bytes).hexdigest()
+                # Prefer the flat-array forest when it was built from this pickle
+                self.compiled = load_compiled_forest(MODEL_PATH, self.model_sha256)
                 logger.info("✅ Trained URL model loaded")
             else:
                 logger.warning("⚠️ No trained URL model found - using baseline predictor")
@@ -121,8 +135,10 @@ class URLMLPredictor:
                     url_vector = self.vectorizer.transform([url])
                     
                     # Get prediction and probability
-                    prediction = self.model.predict(url_vector)[0]
-                    proba = self.model.predict_proba(url_vector)[0]
+                    if self.compiled is not None:
+                        proba = self.compiled.predict_proba(url_vector)[0]
+                    else:
+                        proba = self.model.predict_proba(url_vector)[0]
                     
                     # Map to confidence and risk
                     confidence = max(proba)
@@ -150,7 +166,8 @@ class URLMLPredictor:
                 'risk_score': risk_score,
                 'threat_level': threat_level,
                 'features': features,
-                'model_status': 'trained' if self.model_loaded else 'baseline'
+                'model_status': 'trained' if self.model_loaded else 'baseline',
+                'inference': 'compiled' if self.compiled is not None else 'sklearn'
             }
         
         except Exception as e:
@@ -13,6 +13,7 @@ This script:
 """
 
 import os
+import sys
 import pickle
 import logging
 from sklearn.ensemble import RandomForestClassifier
@@ -31,6 +32,9 @@ MODEL_OUTPUT_DIR = TRAINING_DIR  # Same as ml_js_model/
 MODEL_PATH = os.path.join(MODEL_OUTPUT_DIR, 'js_model.pkl')
 VECTORIZER_PATH = os.path.join(MODEL_OUTPUT_DIR, 'js_vectorizer.pkl')
 
+sys.path.append(os.path.join(os.path.dirname(TRAINING_DIR), 'ml_advanced'))
+from compiled_forest import export_compiled_forest
+
 
 def load_training_data() -> tuple:
     """
@@ -174,6 +178,9 @@ def train_model():
         pickle.dump(vectorizer, f)
     logger.info(f"   ✅ Vectorizer saved: {VECTORIZER_PATH}")
     
+    # Compile the forest to flat arrays for fast single-row scoring
+    export_compiled_forest(model, MODEL_PATH, X_validation=X_test)
+    
     # Test with sample JavaScript
     logger.info("\n🧪 Testing trained model...")
     test_codes = [
@@ -4,21 +4,29 @@ Trains a machine learning model for URL-based malware/phishing detection
 
 Usage:
     python ml_training/train_url_model.py
+    python ml_training/train_url_model.py --stream urls_part1.tsv urls_part2.csv
 
 This script:
 1. Loads sample URL data (benign + malicious)
 2. Extracts features from URLs
 3. Trains an ML model (Random Forest or Logistic Regression)
 4. Saves trained model for use in url_model_predict.py
+
+Streaming mode (--stream) reads "url<TAB or comma>label" files chunk by chunk,
+hashes character n-grams with a stateless HashingVectorizer and trains an
+SGD logistic model with partial_fit, so memory stays flat regardless of
+corpus size. Progress is checkpointed periodically and can be resumed.
 """
 
 import os
+import sys
+import argparse
 import pickle
 import logging
 from urllib.parse import urlparse
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import pandas as pd
@@ -32,6 +40,22 @@ CURRENT_DIR = os.path.dirname(__file__)
 MODEL_OUTPUT_DIR = os.path.join(os.path.dirname(CURRENT_DIR), 'ml_advanced')
 MODEL_PATH = os.path.join(MODEL_OUTPUT_DIR, 'url_model.pkl')
 VECTORIZER_PATH = os.path.join(MODEL_OUTPUT_DIR, 'url_vectorizer.pkl')
+CHECKPOINT_PATH = os.path.join(MODEL_OUTPUT_DIR, 'url_model.checkpoint.pkl')
+
+sys.path.append(MODEL_OUTPUT_DIR)
+from compiled_forest import export_compiled_forest
+
+# Streaming training defaults
+STREAM_N_FEATURES = 2 ** 20
+STREAM_CHUNK_SIZE = 50000
+STREAM_CHECKPOINT_EVERY = 20  # chunks
+
+# Label spellings found in the traffic-log exports and public URL feeds
+LABEL_ALIASES = {
+    '0': 0, 'benign': 0, 'safe': 0, 'clean': 0, 'good': 0, 'legitimate': 0,
+    '1': 1, 'malicious': 1, 'phishing': 1, 'malware': 1, 'bad': 1,
+    'defacement': 1, 'spam': 1, 'suspicious': 1,
+}
 
 
 class URLFeatureExtractor:
@@ -198,6 +222,9 @@ def train_model():
         pickle.dump(vectorizer, f)
     logger.info(f"   ✅ Vectorizer saved: {VECTORIZER_PATH}")
     
+    # Compile the forest to flat arrays for fast single-row scoring
+    export_compiled_forest(model, MODEL_PATH, X_validation=X_test)
+    
     # Test with sample URLs
     logger.info("\n🧪 Testing trained model...")
     test_urls = [
@@ -223,10 +250,223 @@ def train_model():
     return model, vectorizer
 
 
-def main():
+def build_hashing_vectorizer(n_features: int = STREAM_N_FEATURES) -> HashingVectorizer:
+    """
+    Create the stateless vectorizer used by streaming training
+
+    Uses the same character n-gram analyzer as the TF-IDF model, hashed into a
+    fixed-width feature space so no vocabulary has to be held in memory.
+    """
+    return HashingVectorizer(
+        analyzer='char',
+        ngram_range=(2, 3),
+        n_features=n_features,
+        alternate_sign=False,
+        norm='l2',
+    )
+
+
+def _parse_label(raw: str):
+    """Map a raw label column to 0/1, or None if it is not recognised"""
+    return LABEL_ALIASES.get(raw.strip().strip('"').lower())
+
+
+def iter_labeled_urls(paths: list):
+    """
+    Stream (url, label) pairs from one or more files
+
+    Each line holds a URL followed by a label, separated by a tab or a comma.
+    The split happens on the last separator, so commas inside URLs are kept.
+    Header lines and rows with unrecognised labels are skipped.
+
+    Args:
+        paths: Input file paths, read in order
+
+    Yields:
+        tuple: (url, label)
+    """
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                sep = '\t' if '\t' in line else ','
+                url, _, raw_label = line.rpartition(sep)
+                label = _parse_label(raw_label)
+                url = url.strip().strip('"')
+                if not url or label is None:
+                    continue
+                yield url, label
+
+
+def iter_chunks(records, chunk_size: int):
+    """Group an iterable of (url, label) pairs into (urls, labels) chunks"""
+    urls, labels = [], []
+    for url, label in records:
+        urls.append(url)
+        labels.append(label)
+        if len(urls) >= chunk_size:
+            yield urls, labels
+            urls, labels = [], []
+    if urls:
+        yield urls, labels
+
+
+def _atomic_pickle(obj, path: str):
+    """Pickle to a temp file and rename it into place"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+def _save_checkpoint(path: str, model, n_features: int, rows_seen: int,
+                     chunks_seen: int, correct: int, evaluated: int):
+    _atomic_pickle({
+        'model': model,
+        'n_features': n_features,
+        'rows_seen': rows_seen,
+        'chunks_seen': chunks_seen,
+        'progressive_correct': correct,
+        'progressive_evaluated': evaluated,
+    }, path)
+
+
+def train_streaming(paths: list,
+                    chunk_size: int = STREAM_CHUNK_SIZE,
+                    checkpoint_every: int = STREAM_CHECKPOINT_EVERY,
+                    n_features: int = STREAM_N_FEATURES,
+                    resume: bool = False,
+                    model_path: str = MODEL_PATH,
+                    vectorizer_path: str = VECTORIZER_PATH,
+                    checkpoint_path: str = CHECKPOINT_PATH):
+    """
+    Train the URL model out-of-core from labelled URL files
+
+    Only one chunk of raw URLs and its sparse feature matrix are held in
+    memory at a time. Each chunk is scored before it is learned from
+    (progressive validation), which gives a running accuracy estimate
+    without a held-out set.
+
+    Args:
+        paths: Files with "url<TAB or comma>label" lines
+        chunk_size: Rows per partial_fit call
+        checkpoint_every: Write a checkpoint every N chunks (0 disables)
+        n_features: Width of the hashed feature space
+        resume: Continue from checkpoint_path, skipping rows already seen
+        model_path: Output path for the trained model
+        vectorizer_path: Output path for the vectorizer
+        checkpoint_path: Where periodic checkpoints are written
+
+    Returns:
+        tuple: (model, vectorizer)
+    """
+    logger.info("=" * 70)
+    logger.info("🚀 URL ML Model Streaming Training")
+    logger.info("=" * 70)
+
+    os.makedirs(os.path.dirname(os.path.abspath(model_path)), exist_ok=True)
+
+    model = None
+    rows_seen = chunks_seen = 0
+    correct = evaluated = 0
+
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'rb') as f:
+            checkpoint = pickle.load(f)
+        model = checkpoint['model']
+        n_features = checkpoint['n_features']
+        rows_seen = checkpoint['rows_seen']
+        chunks_seen = checkpoint['chunks_seen']
+        correct = checkpoint.get('progressive_correct', 0)
+        evaluated = checkpoint.get('progressive_evaluated', 0)
+        logger.info(f"   ♻️ Resuming from checkpoint: {rows_seen} rows, {chunks_seen} chunks")
+
+    if model is None:
+        model = SGDClassifier(loss='log_loss', alpha=1e-6, random_state=42)
+
+    vectorizer = build_hashing_vectorizer(n_features)
+    classes = np.array([0, 1])
+
+    records = iter_labeled_urls(paths)
+    # Skip rows consumed before the checkpoint was written
+    for _ in range(rows_seen):
+        if next(records, None) is None:
+            break
+
+    for urls, labels in iter_chunks(records, chunk_size):
+        X = vectorizer.transform(urls)
+        y = np.array(labels)
+
+        if hasattr(model, 'coef_'):
+            correct += int((model.predict(X) == y).sum())
+            evaluated += len(y)
+
+        model.partial_fit(X, y, classes=classes)
+        rows_seen += len(y)
+        chunks_seen += 1
+
+        if evaluated:
+            logger.info(f"   Chunk {chunks_seen}: {rows_seen} rows, "
+                        f"progressive accuracy {correct / evaluated:.4f}")
+        else:
+            logger.info(f"   Chunk {chunks_seen}: {rows_seen} rows")
+
+        if checkpoint_every and chunks_seen % checkpoint_every == 0:
+            _save_checkpoint(checkpoint_path, model, n_features, rows_seen,
+                             chunks_seen, correct, evaluated)
+            logger.info(f"   💾 Checkpoint written: {checkpoint_path}")
+
+    if not hasattr(model, 'coef_'):
+        raise ValueError("No labelled rows found in the training files")
+
+    logger.info("\n💾 Saving model...")
+    _atomic_pickle(model, model_path)
+    logger.info(f"   ✅ Model saved: {model_path}")
+    _atomic_pickle(vectorizer, vectorizer_path)
+    logger.info(f"   ✅ Vectorizer saved: {vectorizer_path}")
+
+    if checkpoint_every:
+        _save_checkpoint(checkpoint_path, model, n_features, rows_seen,
+                         chunks_seen, correct, evaluated)
+
+    logger.info("\n" + "=" * 70)
+    logger.info(f"✅ Streaming training complete! {rows_seen} rows in {chunks_seen} chunks")
+    logger.info("=" * 70)
+
+    return model, vectorizer
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Train the URL threat model')
+    parser.add_argument('--stream', nargs='+', metavar='FILE',
+                        help='Train out-of-core from url/label files')
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE,
+                        help='Rows per partial_fit call')
+    parser.add_argument('--checkpoint-every', type=int, default=STREAM_CHECKPOINT_EVERY,
+                        help='Chunks between checkpoints (0 disables)')
+    parser.add_argument('--n-features', type=int, default=STREAM_N_FEATURES,
+                        help='Hashed feature space width')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume streaming training from the last checkpoint')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main training function"""
+    args = parse_args(argv)
     try:
-        model, vectorizer = train_model()
+        if args.stream:
+            model, vectorizer = train_streaming(
+                args.stream,
+                chunk_size=args.chunk_size,
+                checkpoint_every=args.checkpoint_every,
+                n_features=args.n_features,
+                resume=args.resume,
+            )
+        else:
+            model, vectorizer = train_model()
         logger.info("\n✅ URL ML model is ready to use!")
         logger.info("   Import with: from url_model_predict import predict_url")
         
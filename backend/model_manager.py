@@ -0,0 +1,401 @@
+"""
+Model Manager Module
+
+Hot-reloads the URL and JavaScript ML models without restarting the server.
+
+Features:
+- Polls model artifacts and loads new versions in the background
+- Atomic swap: in-flight predictions keep the predictor they started with
+- Optional shadow mode: a new version is scored on live traffic alongside
+  the active model (latency and agreement recorded) until it is promoted
+- Every prediction is tagged with the version of the model that produced it
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import os
+import time
+import hashlib
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Shadow scoring is best-effort; beyond this backlog samples are dropped
+SHADOW_MAX_PENDING = 256
+
+
+def _predictor_version(predictor: Any, companion_paths: List[str] = ()) -> str:
+    """
+    Short content hash of the loaded model, or 'baseline' if untrained.
+
+    Companion artifacts (vectorizer, compiled forest) change predictions
+    without changing the model pickle, so their contents are appended as a
+    second hash: "<model sha[:12]>+<companions sha[:8]>".
+    """
+    sha = getattr(predictor, 'model_sha256', None)
+    if not sha:
+        return 'baseline'
+    digest = hashlib.sha256()
+    found = False
+    for path in companion_paths:
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            digest.update(b'-')
+            continue
+        found = True
+        digest.update(hashlib.sha256(content).digest())
+    return f"{sha[:12]}+{digest.hexdigest()[:8]}" if found else sha[:12]
+
+
+class ShadowStats:
+    """
+    Running comparison of a candidate model against the active model.
+
+    Keeps bounded latency windows so memory use is constant.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.samples = 0
+        self.agreements = 0
+        self.total_score_delta = 0.0
+        self.errors = 0
+        self.active_latency_ms: deque = deque(maxlen=window)
+        self.candidate_latency_ms: deque = deque(maxlen=window)
+
+    def record(self, active: Dict[str, Any], candidate: Dict[str, Any],
+               active_ms: float, candidate_ms: float) -> None:
+        self.samples += 1
+        if active.get('threat_level') == candidate.get('threat_level'):
+            self.agreements += 1
+        self.total_score_delta += abs(
+            float(active.get('risk_score', 0)) - float(candidate.get('risk_score', 0))
+        )
+        self.active_latency_ms.append(active_ms)
+        self.candidate_latency_ms.append(candidate_ms)
+
+    @staticmethod
+    def _percentile(values: deque, pct: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return round(ordered[index], 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'samples': self.samples,
+            'errors': self.errors,
+            'agreement_rate': round(self.agreements / self.samples, 4) if self.samples else None,
+            'mean_abs_score_delta': round(self.total_score_delta / self.samples, 3) if self.samples else None,
+            'active_latency_ms': {
+                'p50': self._percentile(self.active_latency_ms, 50),
+                'p95': self._percentile(self.active_latency_ms, 95),
+            },
+            'candidate_latency_ms': {
+                'p50': self._percentile(self.candidate_latency_ms, 50),
+                'p95': self._percentile(self.candidate_latency_ms, 95),
+            },
+        }
+
+
+class ModelSlot:
+    """One named model (e.g. 'url') with its active and candidate versions."""
+
+    def __init__(self, name: str, factory: Callable[[], Any], watch_paths: List[str]):
+        self.name = name
+        self.factory = factory
+        self.watch_paths = list(watch_paths)
+        # (predictor, version) pairs, replaced whole so readers never see a
+        # predictor with another version's label
+        self.current: Tuple[Any, str] = (None, 'unloaded')
+        self.active_loaded_at: Optional[float] = None
+        self.staged: Tuple[Any, Optional[str]] = (None, None)
+        self.shadow = ShadowStats()
+        self.signature: Optional[Tuple] = None
+        self.pending_signature: Optional[Tuple] = None
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+
+    def file_signature(self) -> Tuple:
+        """(mtime_ns, size) of each watched file; None for missing files."""
+        signature = []
+        for path in self.watch_paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    @property
+    def active(self) -> Any:
+        return self.current[0]
+
+    @property
+    def active_version(self) -> str:
+        return self.current[1]
+
+    @property
+    def candidate(self) -> Any:
+        return self.staged[0]
+
+    @property
+    def candidate_version(self) -> Optional[str]:
+        return self.staged[1]
+
+
+class ModelManager:
+    """
+    Registry of hot-reloadable predictors.
+
+    A watcher thread polls the registered model files. When their signature
+    changes and then stays stable for one more poll (so a half-written file
+    is never loaded), a fresh predictor is built off the request path and
+    swapped in with a single reference assignment. In shadow mode the new
+    predictor becomes a candidate instead and must be promoted explicitly.
+    """
+
+    def __init__(self, poll_interval: float = Config.MODEL_RELOAD_INTERVAL,
+                 shadow_mode: bool = Config.MODEL_SHADOW_MODE,
+                 shadow_sample_rate: float = Config.MODEL_SHADOW_SAMPLE_RATE):
+        """
+        Initialize model manager.
+
+        Args:
+            poll_interval: Seconds between model file checks
+            shadow_mode: Score new versions in shadow instead of swapping
+            shadow_sample_rate: Fraction of predictions mirrored to the candidate
+        """
+        self.poll_interval = poll_interval
+        self.shadow_mode = shadow_mode
+        self.shadow_sample_rate = shadow_sample_rate
+        self.slots: Dict[str, ModelSlot] = {}
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._shadow_executor: Optional[ThreadPoolExecutor] = None
+        self._shadow_pending = 0
+
+    def register(self, name: str, factory: Callable[[], Any], watch_paths: List[str],
+                 initial: Any = None) -> None:
+        """
+        Register a model.
+
+        Args:
+            name: Model name used by predict() and the status endpoint
+            factory: Zero-argument callable that loads a predictor from disk
+            watch_paths: Files whose changes trigger a reload; the first is
+                the model, the rest are companions that also define its version
+            initial: Already-loaded predictor to adopt instead of loading now
+        """
+        slot = ModelSlot(name, factory, watch_paths)
+        slot.signature = slot.file_signature()
+        predictor = initial if initial is not None else factory()
+        with self.lock:
+            slot.current = (predictor, _predictor_version(predictor, slot.watch_paths[1:]))
+            slot.active_loaded_at = time.time()
+            self.slots[name] = slot
+        logger.info(f"Model '{name}' registered at version {slot.active_version}")
+
+    def predict(self, name: str, payload: Any) -> Dict[str, Any]:
+        """
+        Score a payload with the active model and tag the result.
+
+        Args:
+            name: Registered model name
+            payload: Input passed to the predictor's predict()
+
+        Returns:
+            Predictor result with 'model_version' added
+        """
+        slot = self.slots[name]
+        # One read of each pair, so a concurrent swap cannot mix versions
+        predictor, version = slot.current
+        candidate, candidate_version = slot.staged
+
+        start = time.perf_counter()
+        result = dict(predictor.predict(payload))
+        active_ms = (time.perf_counter() - start) * 1000
+        result['model_version'] = version
+
+        if candidate is not None and random.random() < self.shadow_sample_rate:
+            self._submit_shadow(slot, candidate, candidate_version, payload, result, active_ms)
+        return result
+
+    def bind(self, name: str) -> Callable[[Any], Dict[str, Any]]:
+        """Return a predict function for one model, e.g. predict_url."""
+        def _predict(payload: Any) -> Dict[str, Any]:
+            return self.predict(name, payload)
+        _predict.__name__ = f"predict_{name}"
+        return _predict
+
+    def version(self, name: str) -> Optional[str]:
+        """Active version of a model, or None if it is not registered."""
+        slot = self.slots.get(name)
+        return slot.active_version if slot else None
+
+    def versions(self) -> Dict[str, str]:
+        """Active version of every registered model."""
+        return {name: slot.active_version for name, slot in self.slots.items()}
+
+    def _submit_shadow(self, slot: ModelSlot, candidate: Any, candidate_version: str,
+                       payload: Any, active_result: Dict[str, Any], active_ms: float) -> None:
+        with self.lock:
+            if self._shadow_pending >= SHADOW_MAX_PENDING:
+                return
+            if self._shadow_executor is None:
+                self._shadow_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='model-shadow'
+                )
+            self._shadow_pending += 1
+        self._shadow_executor.submit(
+            self._run_shadow, slot, candidate, candidate_version, payload, active_result, active_ms
+        )
+
+    def _run_shadow(self, slot: ModelSlot, candidate: Any, candidate_version: str,
+                    payload: Any, active_result: Dict[str, Any], active_ms: float) -> None:
+        try:
+            start = time.perf_counter()
+            candidate_result = candidate.predict(payload)
+            candidate_ms = (time.perf_counter() - start) * 1000
+            with self.lock:
+                # Ignore results for a candidate that was promoted or replaced meanwhile
+                if slot.candidate_version == candidate_version:
+                    slot.shadow.record(active_result, candidate_result, active_ms, candidate_ms)
+        except Exception as e:
+            with self.lock:
+                if slot.candidate_version == candidate_version:
+                    slot.shadow.errors += 1
+            logger.warning(f"Shadow prediction failed for '{slot.name}': {e}")
+        finally:
+            with self.lock:
+                self._shadow_pending -= 1
+
+    def check_for_updates(self) -> List[str]:
+        """
+        Reload any model whose files changed and have settled.
+
+        Returns:
+            Names of models that were swapped in or staged as candidates
+        """
+        updated = []
+        for slot in list(self.slots.values()):
+            signature = slot.file_signature()
+            if signature == slot.signature:
+                slot.pending_signature = None
+                continue
+            if signature != slot.pending_signature:
+                # First sighting of a change: wait one poll for writes to finish
+                slot.pending_signature = signature
+                continue
+            if self._load(slot, signature):
+                updated.append(slot.name)
+        return updated
+
+    def _load(self, slot: ModelSlot, signature: Tuple) -> bool:
+        try:
+            predictor = slot.factory()
+        except Exception as e:
+            slot.reload_errors += 1
+            slot.last_error = str(e)
+            logger.error(f"Failed to reload model '{slot.name}': {e}")
+            return False
+
+        version = _predictor_version(predictor, slot.watch_paths[1:])
+        with self.lock:
+            slot.signature = signature
+            slot.pending_signature = None
+            slot.reloads += 1
+            if version == slot.active_version:
+                return False
+            if self.shadow_mode:
+                slot.staged = (predictor, version)
+                slot.shadow = ShadowStats()
+                logger.info(f"Model '{slot.name}' version {version} staged for shadow scoring")
+            else:
+                self._swap(slot, predictor, version)
+        return True
+
+    def _swap(self, slot: ModelSlot, predictor: Any, version: str) -> None:
+        previous = slot.active_version
+        slot.current = (predictor, version)
+        slot.active_loaded_at = time.time()
+        logger.info(f"Model '{slot.name}' swapped {previous} -> {version}")
+
+    def promote(self, name: str) -> Dict[str, Any]:
+        """
+        Make the shadow candidate the active model.
+
+        Raises:
+            KeyError: If the model is unknown
+            ValueError: If there is no candidate to promote
+        """
+        slot = self.slots[name]
+        with self.lock:
+            if slot.candidate is None:
+                raise ValueError(f"Model '{name}' has no candidate version")
+            self._swap(slot, *slot.staged)
+            slot.staged = (None, None)
+        return self.get_status()[name]
+
+    def discard_candidate(self, name: str) -> None:
+        """Drop the shadow candidate and keep the active model."""
+        slot = self.slots[name]
+        with self.lock:
+            slot.staged = (None, None)
+
+    def start(self) -> None:
+        """Start the background watcher thread (idempotent)."""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch_loop, name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Stop the watcher and shadow executor."""
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join(timeout=self.poll_interval + 1)
+        if self._shadow_executor:
+            self._shadow_executor.shutdown(wait=False)
+            self._shadow_executor = None
+
+    def _watch_loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check_for_updates()
+            except Exception as e:
+                logger.error(f"Model watcher error: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Versions, reload counters and shadow statistics per model."""
+        status = {}
+        with self.lock:
+            for name, slot in self.slots.items():
+                status[name] = {
+                    'active_version': slot.active_version,
+                    'active_loaded_at': slot.active_loaded_at,
+                    'candidate_version': slot.candidate_version,
+                    'shadow': slot.shadow.to_dict() if slot.candidate_version else None,
+                    'reloads': slot.reloads,
+                    'reload_errors': slot.reload_errors,
+                    'last_error': slot.last_error,
+                    'watch_paths': slot.watch_paths,
+                }
+        return status
+
+
+# Global model manager instance
+model_manager = ModelManager()
@@ -1,12 +1,29 @@
 """
 Simple News Manager - Fetches cybersecurity news from NewsAPI
-No caching - always fresh articles on every request
+
+CyberNewsManager performs a single NewsAPI fetch. NewsPoller is the one
+shared fetcher behind the news endpoints: it refreshes each requested
+category once per Config.NEWS_POLL_INTERVAL, keeps the latest snapshot with
+an ETag, and wakes every SSE subscriber when a category changes. SSE event
+ids carry the poller's per-process id, so a client resuming against a
+restarted server gets the current snapshot instead of waiting for a
+version the new process has not reached.
 """
 import os
-import requests
+import json
+import hashlib
+import httpx
 import logging
+import threading
+import time
+import uuid
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from config import Config
+from error_handler import APIConnectionError, APIError, APITimeoutError
+from provider_client import provider_client
+from request_coalescer import request_coalescer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -38,78 +55,92 @@ class CyberNewsManager:
             logger.warning("⚠️ NEWS_API_KEY not configured - news fetching will fail")
         logger.info(f"🔧 CyberNewsManager initialized with API key: {'✓' if self.api_key else '✗'}")
     
+    def fetch_articles(self, category: str = 'all', limit: int = 30) -> List[Dict[str, Any]]:
+        """
+        Fetch fresh articles from NewsAPI
+
+        Raises:
+            APIError: No API key configured, or NewsAPI answered with an error
+            APITimeoutError, APIConnectionError, httpx.HTTPError: Request failed
+        """
+        if not self.api_key:
+            raise APIError("API key not configured", 'NewsAPI', status_code=503)
+
+        # Get query for category
+        query = CYBER_QUERIES.get(category, CYBER_QUERIES['all'])
+
+        logger.info(f"Fetching cybersecurity news: category='{category}', limit={limit}")
+
+        params = {
+            'q': query,
+            'sortBy': 'publishedAt',
+            'language': 'en',
+            'pageSize': min(limit, 100),  # NewsAPI max is 100
+            'apiKey': self.api_key
+        }
+
+        response = provider_client.get('newsapi', NEWS_API_BASE_URL, params=params, timeout=15)
+        response.raise_for_status()
+
+        data = response.json()
+
+        if data.get('status') != 'ok':
+            raise APIError(data.get('message', 'Unknown error'), 'NewsAPI',
+                           response_status=response.status_code)
+
+        # Transform articles
+        articles = []
+        for article in data.get('articles', []):
+            # Skip articles without required fields
+            if not article.get('title') or not article.get('url'):
+                continue
+
+            processed = {
+                'title': article.get('title', ''),
+                'description': article.get('description', '') or article.get('content', '')[:250],
+                'link': article.get('url', ''),
+                'url': article.get('url', ''),
+                'image_url': article.get('urlToImage', ''),
+                'source': article.get('source', {}).get('name', 'NewsAPI'),
+                'published': article.get('publishedAt', datetime.now().isoformat()),
+                'publishedAt': article.get('publishedAt', datetime.now().isoformat()),
+                'author': article.get('author', '') or 'Unknown',
+                'category': category,
+                'priority': 'high' if any(word in article.get('title', '').lower() for word in ['critical', 'severe', 'major', 'breach']) else 'medium'
+            }
+            articles.append(processed)
+
+        logger.info(f"Successfully fetched {len(articles)} articles from NewsAPI")
+        return articles[:limit]
+
     def fetch_from_newsapi(self, category: str = 'all', limit: int = 30) -> List[Dict[str, Any]]:
         """
         Fetch fresh articles from NewsAPI
-        Always returns fresh data - NO CACHING
+        Always returns fresh data - NO CACHING; demo articles when the fetch fails
         """
         if not self.api_key:
             logger.error("❌ NewsAPI key not configured - using demo articles")
             return self._get_demo_articles(category, limit)
-        
+
         try:
-            # Get query for category
-            query = CYBER_QUERIES.get(category, CYBER_QUERIES['all'])
-            
-            logger.info(f"Fetching cybersecurity news: category='{category}', limit={limit}")
-            
-            params = {
-                'q': query,
-                'sortBy': 'publishedAt',
-                'language': 'en',
-                'pageSize': min(limit, 100),  # NewsAPI max is 100
-                'apiKey': self.api_key
-            }
-            
-            response = requests.get(NEWS_API_BASE_URL, params=params, timeout=15)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data.get('status') != 'ok':
-                error_msg = data.get('message', 'Unknown error')
-                logger.error(f"NewsAPI error: {error_msg}")
-                # Fallback to demo articles on API error
-                return self._get_demo_articles(category, limit)
-            
-            # Transform articles
-            articles = []
-            for article in data.get('articles', []):
-                # Skip articles without required fields
-                if not article.get('title') or not article.get('url'):
-                    continue
-                
-                processed = {
-                    'title': article.get('title', ''),
-                    'description': article.get('description', '') or article.get('content', '')[:250],
-                    'link': article.get('url', ''),
-                    'url': article.get('url', ''),
-                    'image_url': article.get('urlToImage', ''),
-                    'source': article.get('source', {}).get('name', 'NewsAPI'),
-                    'published': article.get('publishedAt', datetime.now().isoformat()),
-                    'publishedAt': article.get('publishedAt', datetime.now().isoformat()),
-                    'author': article.get('author', '') or 'Unknown',
-                    'category': category,
-                    'priority': 'high' if any(word in article.get('title', '').lower() for word in ['critical', 'severe', 'major', 'breach']) else 'medium'
-                }
-                articles.append(processed)
-            
-            logger.info(f"Successfully fetched {len(articles)} articles from NewsAPI")
-            return articles[:limit] if articles else self._get_demo_articles(category, limit)
-        
-        except requests.exceptions.Timeout:
+            articles = self.fetch_articles(category, limit)
+            return articles if articles else self._get_demo_articles(category, limit)
+        except APIError as e:
+            logger.error(f"NewsAPI error: {e}")
+            return self._get_demo_articles(category, limit)
+        except APITimeoutError:
             logger.error("NewsAPI request timeout - using demo articles")
             return self._get_demo_articles(category, limit)
-        except requests.exceptions.ConnectionError:
+        except APIConnectionError:
             logger.error("NewsAPI connection error - using demo articles")
             return self._get_demo_articles(category, limit)
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
                 logger.error("Rate limit exceeded - using demo articles")
             else:
                 logger.error(f"NewsAPI HTTP error: {e}")
             return self._get_demo_articles(category, limit)
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"NewsAPI request error: {e} - using demo articles")
             return self._get_demo_articles(category, limit)
         except Exception as e:
@@ -208,3 +239,228 @@ class CyberNewsManager:
 
 # Keep NewsManager as alias for backward compatibility
 NewsManager = CyberNewsManager
+
+
+def articles_etag(articles: List[Dict[str, Any]]) -> str:
+    """Identity of an article list (titles and links; demo dates change per call)"""
+    digest = hashlib.sha1(json.dumps(
+        [(a.get('title'), a.get('link') or a.get('url')) for a in articles]).encode())
+    return digest.hexdigest()[:16]
+
+
+class NewsSnapshot:
+    """Latest articles of one category"""
+
+    __slots__ = ('category', 'articles', 'etag', 'version', 'poller_id', 'fetched_at', '_sse_event')
+
+    # Articles pushed per SSE update
+    SSE_ARTICLES = 6
+
+    def __init__(self, category: str, articles: List[Dict[str, Any]], version: int,
+                 poller_id: str = ''):
+        self.category = category
+        self.articles = articles
+        self.etag = articles_etag(articles)
+        self.version = version
+        self.poller_id = poller_id
+        self.fetched_at = datetime.now().isoformat()
+        self._sse_event: Optional[str] = None
+
+    def sse_event(self) -> str:
+        """SSE frame of this snapshot, serialized once for all subscribers"""
+        if self._sse_event is None:
+            articles = [{
+                'title': article.get('title', 'N/A'),
+                'link': article.get('link', ''),
+                'pubDate': article.get('published', self.fetched_at),
+                'description': (article.get('description') or '')[:200],
+                'source': article.get('source', 'NewsAPI'),
+            } for article in self.articles[:self.SSE_ARTICLES]]
+            payload = json.dumps({'articles': articles, 'timestamp': self.fetched_at,
+                                  'source': 'NewsAPI'})
+            self._sse_event = f"id: {self.poller_id}-{self.version}\ndata: {payload}\n\n"
+        return self._sse_event
+
+
+class NewsPoller:
+    """
+    Shared NewsAPI poller with a broadcast channel for SSE subscribers.
+
+    Usage:
+        snapshot = news_poller.get('malware')
+        update = news_poller.wait_for_update('all', last_version, timeout=25)
+    """
+
+    # NewsAPI maximum page size; endpoints slice it to their limit
+    PAGE_SIZE = 100
+
+    def __init__(self, manager: Optional[CyberNewsManager] = None,
+                 interval: float = Config.NEWS_POLL_INTERVAL):
+        """
+        Initialize news poller.
+
+        Args:
+            manager: Fetcher used for NewsAPI calls
+            interval: Seconds between refreshes of each polled category
+        """
+        self.manager = manager or CyberNewsManager()
+        self.interval = interval
+        self.lock = threading.Lock()
+        self._changed = threading.Condition(self.lock)
+        self._snapshots: Dict[str, NewsSnapshot] = {}
+        self._version = 0
+        # Versions restart with the process; event ids carry this id
+        self.poller_id = uuid.uuid4().hex[:12]
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {'fetches': 0, 'updates': 0, 'unchanged': 0, 'errors': 0, 'subscribers': 0}
+
+    def get(self, category: str = 'all') -> NewsSnapshot:
+        """Latest snapshot of a category, fetched once on first use"""
+        if category not in CYBER_QUERIES:
+            category = 'all'
+        with self.lock:
+            snapshot = self._snapshots.get(category)
+        if snapshot is None:
+            # Concurrent first requests share one fetch; followers then read
+            # the stored snapshot rather than their copy of it
+            request_coalescer.do('news', category, lambda: self.refresh(category))
+            with self.lock:
+                snapshot = self._snapshots[category]
+        self._ensure_thread()
+        return snapshot
+
+    def refresh(self, category: str) -> NewsSnapshot:
+        """
+        Fetch a category now and publish it if its articles changed
+
+        A failed or empty fetch keeps the last snapshot; demo articles only
+        stand in while a category has none.
+        """
+        failed = False
+        try:
+            articles = self.manager.fetch_articles(category=category, limit=self.PAGE_SIZE)
+        except Exception as e:
+            logger.error(f"News refresh failed for {category}: {e}")
+            articles, failed = [], True
+        with self.lock:
+            self.stats['fetches'] += 1
+            if failed:
+                self.stats['errors'] += 1
+            current = self._snapshots.get(category)
+            if not articles:
+                if current is not None:
+                    return current
+                articles = self.manager._get_demo_articles(category, self.PAGE_SIZE)
+            if current is not None and current.etag == articles_etag(articles):
+                self.stats['unchanged'] += 1
+                return current
+            self._version += 1
+            snapshot = NewsSnapshot(category, articles, self._version, self.poller_id)
+            self._snapshots[category] = snapshot
+            self.stats['updates'] += 1
+            self._changed.notify_all()
+            return snapshot
+
+    def wait_for_update(self, category: str, version: int,
+                        timeout: float) -> Optional[NewsSnapshot]:
+        """
+        Block until the category has a snapshot newer than version.
+
+        Returns:
+            The newer snapshot, or None if none arrived within timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while True:
+                snapshot = self._snapshots.get(category)
+                if snapshot is not None and snapshot.version > version:
+                    return snapshot
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    return None
+                self._changed.wait(remaining)
+
+    def resume_version(self, last_event_id: str) -> int:
+        """
+        Version a client last saw, from its Last-Event-ID ("<poller id>-<version>")
+        
+        Ids from another process (or malformed ones) give 0, so the client
+        gets the current snapshot again.
+        """
+        poller_id, _, version = (last_event_id or '').rpartition('-')
+        if poller_id != self.poller_id or not version.isdigit():
+            return 0
+        return int(version)
+
+    def stream(self, category: str = 'all', last_version: int = 0,
+               heartbeat: float = Config.NEWS_SSE_HEARTBEAT,
+               max_seconds: float = Config.NEWS_SSE_MAX_SECONDS):
+        """
+        SSE frames for one subscriber: the current snapshot unless it already
+        has it (last_version, see resume_version), then every update. A
+        last_version this process has not reached also gets the snapshot.
+        Comments keep idle connections open; the stream ends after max_seconds
+        and the client's EventSource reconnects with its Last-Event-ID.
+        """
+        snapshot = self.get(category)
+        category = snapshot.category
+        with self.lock:
+            self.stats['subscribers'] += 1
+        try:
+            yield "retry: 3000\n\n"
+            with self.lock:
+                newest = self._version
+            if snapshot.version > last_version or last_version > newest:
+                yield snapshot.sse_event()
+                last_version = snapshot.version
+            ends_at = time.monotonic() + max_seconds
+            while not self._stop.is_set():
+                remaining = ends_at - time.monotonic()
+                if remaining <= 0:
+                    return
+                update = self.wait_for_update(category, last_version, min(heartbeat, remaining))
+                if update is None:
+                    yield ": keepalive\n\n"
+                    continue
+                last_version = update.version
+                yield update.sse_event()
+        finally:
+            with self.lock:
+                self.stats['subscribers'] -= 1
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='news-poller', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self.lock:
+                categories = list(self._snapshots)
+            for category in categories:
+                self.refresh(category)
+
+    def close(self):
+        """Stop polling and release waiting subscribers"""
+        self._stop.set()
+        with self.lock:
+            self._changed.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Fetch counters and the age of each category"""
+        with self.lock:
+            return {**self.stats,
+                    'interval_s': self.interval,
+                    'categories': {name: {'articles': len(s.articles), 'etag': s.etag,
+                                          'version': s.version, 'fetched_at': s.fetched_at}
+                                   for name, s in self._snapshots.items()}}
+
+
+# Global poller shared by the news endpoints
+news_poller = NewsPoller()
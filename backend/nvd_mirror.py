@@ -0,0 +1,478 @@
+"""
+NVD Mirror
+Local SQLite copy of the National Vulnerability Database for CVE enrichment
+
+CVE lookups used to call the live NVD API (10 s timeout, one request per
+CVE ID) and keyword search returned canned data. The mirror loads NVD JSON
+feed files from disk into SQLite so both become local queries:
+
+- ``cves`` holds one row per CVE with indexes on CVE ID and CVSS score
+- ``cve_fts`` is an FTS5 index over descriptions for keyword search
+- ``feed_files`` remembers which feed files were ingested (size + mtime),
+  so re-running ingestion only reads new or changed files
+
+Both the NVD API 2.0 layout ({"vulnerabilities": [{"cve": ...}]}) and the
+legacy 1.1 data feeds ({"CVE_Items": [...]}) are accepted, plain or gzipped.
+Records are upserted only when their lastModified date is not older than
+the stored one, so "modified"/"recent" feeds can be applied incrementally
+and in any order.
+
+Usage:
+    python nvd_mirror.py ingest data/nvd_feeds/            # every *.json / *.json.gz
+    python nvd_mirror.py ingest nvdcve-2.0-modified.json.gz
+    python nvd_mirror.py search "remote code execution" --limit 5
+    python nvd_mirror.py stats
+"""
+
+import os
+import re
+import glob
+import gzip
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_SIZE = 1000
+
+
+def parse_nvd_cve(vuln: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert an NVD API 2.0 ``cve`` object into the record format served by
+    the CVE endpoints
+    """
+    cvss_data = {}
+    metrics = vuln.get('metrics', {})
+    if 'cvssMetricV31' in metrics or 'cvssMetricV30' in metrics:
+        metric = (metrics.get('cvssMetricV31') or metrics.get('cvssMetricV30'))[0]['cvssData']
+        cvss_data = {
+            'version': metric.get('version', '3.1'),
+            'score': metric.get('baseScore', 0),
+            'severity': metric.get('baseSeverity', 'UNKNOWN'),
+            'vector': metric.get('vectorString', ''),
+            'attackVector': metric.get('attackVector', ''),
+            'attackComplexity': metric.get('attackComplexity', ''),
+            'privilegesRequired': metric.get('privilegesRequired', ''),
+            'userInteraction': metric.get('userInteraction', ''),
+            'scope': metric.get('scope', ''),
+            'confidentialityImpact': metric.get('confidentialityImpact', ''),
+            'integrityImpact': metric.get('integrityImpact', ''),
+            'availabilityImpact': metric.get('availabilityImpact', '')
+        }
+    elif 'cvssMetricV2' in metrics:
+        metric = metrics['cvssMetricV2'][0]
+        cvss_v2 = metric['cvssData']
+        cvss_data = {
+            'version': '2.0',
+            'score': cvss_v2.get('baseScore', 0),
+            'severity': metric.get('baseSeverity', 'MEDIUM'),
+            'vector': cvss_v2.get('vectorString', ''),
+            'accessVector': cvss_v2.get('accessVector', ''),
+            'accessComplexity': cvss_v2.get('accessComplexity', ''),
+            'authentication': cvss_v2.get('authentication', '')
+        }
+
+    description = next(
+        (d['value'] for d in vuln.get('descriptions', []) if d.get('lang') == 'en'),
+        'No description available'
+    )
+
+    return {
+        'id': vuln['id'],
+        'description': description,
+        'cvss': cvss_data,
+        'published': vuln.get('published', ''),
+        'lastModified': vuln.get('lastModified', ''),
+        'references': [
+            {
+                'url': ref.get('url', ''),
+                'source': ref.get('source', ''),
+                'tags': ref.get('tags', [])
+            }
+            for ref in vuln.get('references', [])[:5]
+        ]
+    }
+
+
+def parse_legacy_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a 1.1 data feed ``CVE_Items`` entry into the same record format"""
+    cve = item['cve']
+    impact = item.get('impact', {})
+    cvss_data = {}
+    if 'baseMetricV3' in impact:
+        metric = impact['baseMetricV3']['cvssV3']
+        cvss_data = {
+            'version': metric.get('version', '3.1'),
+            'score': metric.get('baseScore', 0),
+            'severity': metric.get('baseSeverity', 'UNKNOWN'),
+            'vector': metric.get('vectorString', ''),
+            'attackVector': metric.get('attackVector', ''),
+            'attackComplexity': metric.get('attackComplexity', ''),
+            'privilegesRequired': metric.get('privilegesRequired', ''),
+            'userInteraction': metric.get('userInteraction', ''),
+            'scope': metric.get('scope', ''),
+            'confidentialityImpact': metric.get('confidentialityImpact', ''),
+            'integrityImpact': metric.get('integrityImpact', ''),
+            'availabilityImpact': metric.get('availabilityImpact', '')
+        }
+    elif 'baseMetricV2' in impact:
+        metric = impact['baseMetricV2']
+        cvss_v2 = metric['cvssV2']
+        cvss_data = {
+            'version': '2.0',
+            'score': cvss_v2.get('baseScore', 0),
+            'severity': metric.get('severity', 'MEDIUM'),
+            'vector': cvss_v2.get('vectorString', ''),
+            'accessVector': cvss_v2.get('accessVector', ''),
+            'accessComplexity': cvss_v2.get('accessComplexity', ''),
+            'authentication': cvss_v2.get('authentication', '')
+        }
+
+    descriptions = cve.get('description', {}).get('description_data', [])
+    description = next(
+        (d['value'] for d in descriptions if d.get('lang') == 'en'),
+        'No description available'
+    )
+
+    return {
+        'id': cve['CVE_data_meta']['ID'],
+        'description': description,
+        'cvss': cvss_data,
+        'published': item.get('publishedDate', ''),
+        'lastModified': item.get('lastModifiedDate', ''),
+        'references': [
+            {
+                'url': ref.get('url', ''),
+                'source': ref.get('refsource', ''),
+                'tags': ref.get('tags', [])
+            }
+            for ref in cve.get('references', {}).get('reference_data', [])[:5]
+        ]
+    }
+
+
+def iter_feed_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield parsed CVE records from one NVD JSON feed file (.json or .json.gz)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        feed = json.load(f)
+
+    if 'vulnerabilities' in feed:
+        entries, parse = [v['cve'] for v in feed['vulnerabilities']], parse_nvd_cve
+    elif 'CVE_Items' in feed:
+        entries, parse = feed['CVE_Items'], parse_legacy_item
+    else:
+        raise ValueError(f"{path} is not an NVD JSON feed")
+
+    for entry in entries:
+        try:
+            yield parse(entry)
+        except (KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Skipping malformed CVE entry in {path}: {e}")
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match (prefix for the last)"""
+    terms = re.findall(r'\w+', text.lower())
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' AND '.join(quoted)
+
+
+class NVDMirror:
+    """
+    SQLite-backed CVE store with full-text search
+
+    One connection per thread; writes are serialized by a lock and committed
+    in batches during ingestion.
+    """
+
+    def __init__(self, db_path: str = str(Config.NVD_MIRROR_DB_PATH)):
+        self.db_path = db_path
+        self._local = threading.local()
+        self.write_lock = threading.Lock()
+        # The database file is created on first use, not at import time
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if not self._ready:
+                self._init_schema()
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _init_schema(self):
+        with self._ready_lock:
+            if self._ready:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._connect()
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cves (
+                    cve_id TEXT PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    cvss_score REAL,
+                    severity TEXT,
+                    published TEXT,
+                    last_modified TEXT,
+                    record TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_cves_score ON cves(cvss_score DESC);
+
+                CREATE VIRTUAL TABLE IF NOT EXISTS cve_fts USING fts5(
+                    description, content='cves', content_rowid='rowid'
+                );
+                CREATE TRIGGER IF NOT EXISTS cves_ai AFTER INSERT ON cves BEGIN
+                    INSERT INTO cve_fts(rowid, description) VALUES (new.rowid, new.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS cves_ad AFTER DELETE ON cves BEGIN
+                    INSERT INTO cve_fts(cve_fts, rowid, description)
+                    VALUES ('delete', old.rowid, old.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS cves_au AFTER UPDATE ON cves BEGIN
+                    INSERT INTO cve_fts(cve_fts, rowid, description)
+                    VALUES ('delete', old.rowid, old.description);
+                    INSERT INTO cve_fts(rowid, description) VALUES (new.rowid, new.description);
+                END;
+
+                CREATE TABLE IF NOT EXISTS feed_files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    records INTEGER NOT NULL,
+                    ingested_at REAL NOT NULL
+                );
+            """)
+            conn.commit()
+            conn.close()
+            self._ready = True
+
+    # ── Ingestion ────────────────────────────────────────────────────────────
+
+    def upsert_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or update CVE records, keeping the most recently modified
+        version of each
+
+        Returns:
+            Number of records processed
+        """
+        written = 0
+        batch = []
+        with self.write_lock:
+            for record in records:
+                cvss = record.get('cvss') or {}
+                batch.append((
+                    record['id'], record.get('description', ''),
+                    cvss.get('score'), cvss.get('severity'),
+                    record.get('published', ''), record.get('lastModified', ''),
+                    json.dumps(record)
+                ))
+                if len(batch) >= INGEST_BATCH_SIZE:
+                    written += self._write_batch(batch)
+                    batch = []
+            if batch:
+                written += self._write_batch(batch)
+        return written
+
+    def _write_batch(self, batch: List[tuple]) -> int:
+        self.conn.executemany("""
+            INSERT INTO cves (cve_id, description, cvss_score, severity,
+                              published, last_modified, record)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(cve_id) DO UPDATE SET
+                description = excluded.description,
+                cvss_score = excluded.cvss_score,
+                severity = excluded.severity,
+                published = excluded.published,
+                last_modified = excluded.last_modified,
+                record = excluded.record
+            WHERE excluded.last_modified >= cves.last_modified
+        """, batch)
+        self.conn.commit()
+        return len(batch)
+
+    def ingest_file(self, path: str, force: bool = False) -> int:
+        """
+        Load one feed file; unchanged files already ingested are skipped
+
+        Returns:
+            Number of records read from the file (0 if skipped)
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        if not force:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns FROM feed_files WHERE path = ?", (path,)
+            ).fetchone()
+            if row and (row['size'], row['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+                logger.info(f"NVD feed unchanged, skipping: {path}")
+                return 0
+
+        start = time.time()
+        count = 0
+
+        def counted():
+            nonlocal count
+            for record in iter_feed_records(path):
+                count += 1
+                yield record
+
+        self.upsert_records(counted())
+        with self.write_lock:
+            self.conn.execute("""
+                INSERT INTO feed_files (path, size, mtime_ns, records, ingested_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET size = excluded.size,
+                    mtime_ns = excluded.mtime_ns, records = excluded.records,
+                    ingested_at = excluded.ingested_at
+            """, (path, stat.st_size, stat.st_mtime_ns, count, time.time()))
+            self.conn.commit()
+        logger.info(f"Ingested {count} CVEs from {path} in {time.time() - start:.1f}s")
+        return count
+
+    def ingest_paths(self, paths: Iterable[str], force: bool = False) -> int:
+        """
+        Ingest feed files and directories (every *.json / *.json.gz inside)
+
+        Files are processed in name order so yearly feeds load before the
+        "modified" feed; the lastModified guard makes the order safe anyway.
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(glob.glob(os.path.join(path, '*.json')))
+                files.extend(glob.glob(os.path.join(path, '*.json.gz')))
+            else:
+                files.append(path)
+        total = 0
+        for path in sorted(files):
+            try:
+                total += self.ingest_file(path, force=force)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to ingest NVD feed {path}: {e}")
+        return total
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def get_cve(self, cve_id: str) -> Optional[Dict[str, Any]]:
+        """CVE record by ID, or None if the mirror does not have it"""
+        row = self.conn.execute(
+            "SELECT record FROM cves WHERE cve_id = ?", (cve_id.strip().upper(),)
+        ).fetchone()
+        return json.loads(row['record']) if row else None
+
+    def get_cves(self, cve_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Records for several CVE IDs in one query, keyed by ID"""
+        ids = [cve_id.strip().upper() for cve_id in cve_ids]
+        if not ids:
+            return {}
+        placeholders = ','.join('?' * len(ids))
+        rows = self.conn.execute(
+            f"SELECT cve_id, record FROM cves WHERE cve_id IN ({placeholders})", ids
+        ).fetchall()
+        return {row['cve_id']: json.loads(row['record']) for row in rows}
+
+    def search(self, text: str, limit: int = 10,
+               min_score: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Full-text search over CVE descriptions
+
+        Args:
+            text: Free-text keywords (all must match; the last one as a prefix)
+            limit: Maximum number of records
+            min_score: Only return CVEs with at least this CVSS base score
+
+        Returns:
+            Records ordered by relevance, then CVSS score
+        """
+        query = _fts_query(text)
+        if not query:
+            return []
+        sql = """
+            SELECT c.record FROM cve_fts
+            JOIN cves c ON c.rowid = cve_fts.rowid
+            WHERE cve_fts MATCH ?
+        """
+        params: List[Any] = [query]
+        if min_score is not None:
+            sql += " AND c.cvss_score >= ?"
+            params.append(min_score)
+        sql += " ORDER BY bm25(cve_fts), c.cvss_score DESC LIMIT ?"
+        params.append(limit)
+        return [json.loads(row['record']) for row in self.conn.execute(sql, params)]
+
+    def count(self) -> int:
+        if not self._ready and not os.path.exists(self.db_path):
+            return 0
+        return self.conn.execute("SELECT COUNT(*) FROM cves").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Record count, ingested feeds and newest modification date"""
+        feeds = self.conn.execute(
+            "SELECT path, records, ingested_at FROM feed_files ORDER BY ingested_at DESC"
+        ).fetchall()
+        newest = self.conn.execute("SELECT MAX(last_modified) FROM cves").fetchone()[0]
+        return {
+            'db_path': self.db_path,
+            'cve_count': self.count(),
+            'newest_last_modified': newest,
+            'feeds': [dict(row) for row in feeds],
+        }
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def main(argv=None):
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Local NVD mirror')
+    parser.add_argument('--db', default=str(Config.NVD_MIRROR_DB_PATH), help='Mirror database path')
+    sub = parser.add_subparsers(dest='command', required=True)
+    ingest = sub.add_parser('ingest', help='Load NVD JSON feed files or directories')
+    ingest.add_argument('paths', nargs='*', default=[str(Config.NVD_FEED_DIR)])
+    ingest.add_argument('--force', action='store_true', help='Re-read unchanged files')
+    search = sub.add_parser('search', help='Full-text search over descriptions')
+    search.add_argument('text')
+    search.add_argument('--limit', type=int, default=10)
+    search.add_argument('--min-score', type=float)
+    sub.add_parser('stats', help='Show mirror statistics')
+    args = parser.parse_args(argv)
+
+    mirror = NVDMirror(args.db)
+    if args.command == 'ingest':
+        total = mirror.ingest_paths(args.paths, force=args.force)
+        print(f"Read {total} CVE records; mirror holds {mirror.count()} CVEs")
+    elif args.command == 'search':
+        for record in mirror.search(args.text, args.limit, args.min_score):
+            score = (record.get('cvss') or {}).get('score', '-')
+            print(f"{record['id']:<18} {score:<5} {record['description'][:100]}")
+    else:
+        print(json.dumps(mirror.get_stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,8 @@ Implements caching for DNS/WHOIS lookups, connection pooling for HTTP requests,
 and rate limiting for external APIs to prevent abuse and reduce latency.
 
 Features:
-- LRU cache for DNS/WHOIS lookups
+- LRU cache for DNS/WHOIS lookups (O(1) eviction, heap-based expiry)
+- Optional lock-sharded cache for heavily contended tiers
 - Connection pooling with configurable pool size
 - Rate limiting with sliding window algorithm
 - Cache statistics and monitoring
@@ -16,10 +17,12 @@ Version: 1.0.0
 """
 
 import time
+import heapq
 import logging
+import itertools
 import threading
-from typing import Dict, Any, Optional, Tuple, Callable, TypeVar
-from collections import deque, defaultdict
+from typing import Dict, Any, List, Optional, Tuple, Callable, TypeVar
+from collections import OrderedDict, deque, defaultdict
 from functools import wraps, lru_cache
 from datetime import datetime, timedelta
 import hashlib
@@ -84,6 +87,12 @@ class TTLCache:
     Automatically expires entries after specified duration.
     Perfect for caching DNS lookups, WHOIS data, and API responses.
     
+    Entries live in an OrderedDict kept in LRU order (least recent first), so
+    eviction is O(1). Expiry times go into a min-heap; expired entries are
+    popped from its top on each insert, so cleanup never scans the cache.
+    Heap items of replaced or evicted entries are skipped lazily and the heap
+    is rebuilt once they outnumber live entries.
+    
     Thread-safety achieved through threading.Lock.
     """
 
@@ -97,22 +106,34 @@ class TTLCache:
         """
         self.max_size = max_size
         self.default_ttl = default_ttl_seconds
-        self.cache: Dict[str, CacheEntry] = {}
-        self.access_times: Dict[str, float] = {}
+        self.cache: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        # (expires_at, tiebreak, key, entry) for entries with a TTL
+        self._expiry_heap: List[Tuple[float, int, str, CacheEntry]] = []
+        self._tiebreak = itertools.count()
         self.lock = threading.Lock()
         self.hits = 0
         self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def _cleanup_expired(self) -> None:
-        """Remove expired entries from cache."""
-        expired_keys = [
-            key for key, entry in self.cache.items()
-            if entry.is_expired()
+        """Remove expired entries from cache (only the expired ones are visited)."""
+        heap = self._expiry_heap
+        now = time.time()
+        while heap and heap[0][0] < now:
+            _, _, key, entry = heapq.heappop(heap)
+            # Skip items of entries that were replaced or already removed
+            if self.cache.get(key) is entry:
+                del self.cache[key]
+                self.expirations += 1
+
+    def _compact_heap(self) -> None:
+        """Drop heap items of entries no longer in the cache."""
+        self._expiry_heap = [
+            item for item in self._expiry_heap
+            if self.cache.get(item[2]) is item[3]
         ]
-        for key in expired_keys:
-            del self.cache[key]
-            if key in self.access_times:
-                del self.access_times[key]
+        heapq.heapify(self._expiry_heap)
 
     def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
         """
@@ -126,19 +147,23 @@ class TTLCache:
         ttl = ttl_seconds or self.default_ttl
         
         with self.lock:
-            # Remove expired entries if cache is full
-            if len(self.cache) >= self.max_size:
-                self._cleanup_expired()
+            self._cleanup_expired()
             
-            # If still full, remove least recently used
-            if len(self.cache) >= self.max_size:
-                lru_key = min(self.access_times, key=self.access_times.get)
-                del self.cache[lru_key]
-                del self.access_times[lru_key]
+            if key in self.cache:
+                del self.cache[key]
+            elif len(self.cache) >= self.max_size:
+                # Full: remove least recently used
+                self.cache.popitem(last=False)
+                self.evictions += 1
             
-            # Add entry
-            self.cache[key] = CacheEntry(value, ttl)
-            self.access_times[key] = time.time()
+            # Add entry as most recently used
+            entry = CacheEntry(value, ttl)
+            self.cache[key] = entry
+            if ttl > 0:
+                heapq.heappush(self._expiry_heap,
+                               (entry.created_at + ttl, next(self._tiebreak), key, entry))
+                if len(self._expiry_heap) > 2 * len(self.cache) + 64:
+                    self._compact_heap()
             
             logger.debug(f"Cache SET: {key} (TTL: {ttl}s)")
 
@@ -153,33 +178,41 @@ class TTLCache:
             Cached value if exists and not expired, None otherwise
         """
         with self.lock:
-            if key not in self.cache:
+            entry = self.cache.get(key)
+            if entry is None:
                 self.misses += 1
                 return None
             
-            entry = self.cache[key]
             value = entry.get_value()
             
             if value is None:
                 # Entry expired
                 del self.cache[key]
-                if key in self.access_times:
-                    del self.access_times[key]
                 self.misses += 1
                 return None
             
-            # Update access time
-            self.access_times[key] = time.time()
+            # Mark as most recently used
+            self.cache.move_to_end(key)
             self.hits += 1
             
             logger.debug(f"Cache HIT: {key}")
             return value
 
+    def delete(self, key: str) -> None:
+        """
+        Remove a cache entry if present.
+        
+        Args:
+            key: Cache key
+        """
+        with self.lock:
+            self.cache.pop(key, None)
+
     def clear(self) -> None:
         """Clear all cache entries."""
         with self.lock:
             self.cache.clear()
-            self.access_times.clear()
+            self._expiry_heap.clear()
             logger.info("Cache cleared")
 
     def get_stats(self) -> Dict[str, Any]:
@@ -199,9 +232,79 @@ class TTLCache:
                 'hits': self.hits,
                 'misses': self.misses,
                 'hit_rate_percent': hit_rate,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
             }
 
 
+class ShardedTTLCache:
+    """
+    TTLCache split into N independently locked shards.
+    
+    Keys are routed by hash, so threads touching different keys rarely wait
+    on the same lock. LRU order and capacity are per shard: each shard holds
+    max_size / shards entries, which approximates a global LRU when keys are
+    spread evenly. Same interface as TTLCache.
+    """
+
+    def __init__(self, max_size: int = 1000, default_ttl_seconds: int = 3600,
+                 shards: int = 16):
+        """
+        Initialize sharded TTL cache.
+        
+        Args:
+            max_size: Maximum number of entries across all shards
+            default_ttl_seconds: Default time-to-live in seconds
+            shards: Number of shards (each with its own lock)
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.max_size = max_size
+        self.default_ttl = default_ttl_seconds
+        per_shard = max(1, -(-max_size // shards))
+        self.shards = [TTLCache(per_shard, default_ttl_seconds) for _ in range(shards)]
+
+    def _shard(self, key: str) -> TTLCache:
+        return self.shards[hash(key) % len(self.shards)]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        """Set cache entry (see TTLCache.set)."""
+        self._shard(key).set(key, value, ttl_seconds)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get cache entry (see TTLCache.get)."""
+        return self._shard(key).get(key)
+
+    def delete(self, key: str) -> None:
+        """Remove a cache entry if present."""
+        self._shard(key).delete(key)
+
+    def clear(self) -> None:
+        """Clear all shards."""
+        for shard in self.shards:
+            shard.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics summed over all shards.
+        
+        Returns:
+            Dictionary with hit rate, size, and other metrics
+        """
+        totals = {'size': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        for shard in self.shards:
+            stats = shard.get_stats()
+            for field in totals:
+                totals[field] += stats[field]
+        lookups = totals['hits'] + totals['misses']
+        return {
+            **totals,
+            'max_size': self.max_size,
+            'hit_rate_percent': (totals['hits'] / lookups * 100) if lookups > 0 else 0,
+            'shards': len(self.shards),
+        }
+
+
 class RateLimiter:
     """
     Token bucket rate limiter with per-API and global limits.
@@ -241,17 +344,21 @@ class RateLimiter:
         while history and history[0] < cutoff_time:
             history.popleft()
 
-    def is_allowed(self, api_name: str) -> bool:
+    def is_allowed(self, api_name: str, limit: Optional[int] = None) -> bool:
         """
         Check if request is allowed under rate limit.
         
         Args:
             api_name: Name of API being called
+            limit: Lower cap for this caller, so background work leaves
+                   headroom for interactive requests (default: full limit)
             
         Returns:
             True if request is allowed, False if rate limited
         """
         current_time = time.time()
+        if limit is None:
+            limit = self.requests_per_minute
         
         with self.lock:
             # Clean up old requests
@@ -260,7 +367,7 @@ class RateLimiter:
             history = self.request_history[api_name]
             
             # Check if under limit
-            if len(history) < self.requests_per_minute:
+            if len(history) < min(limit, self.requests_per_minute):
                 history.append(current_time)
                 return True
             
@@ -275,16 +382,18 @@ class RateLimiter:
             timeout_seconds: Maximum time to wait
             
         Returns:
-            True if allowed after waiting, False if timeout
+            True if allowed after waiting, False if timeout (returned at once
+            when the next free slot is further away than the timeout)
         """
-        start_time = time.time()
+        deadline = time.time() + timeout_seconds
         
-        while time.time() - start_time < timeout_seconds:
-            if self.is_allowed(api_name):
-                return True
-            time.sleep(0.1)  # Brief sleep before retry
+        while not self.is_allowed(api_name):
+            wait = max(self.get_retry_after(api_name), 0.01)
+            if time.time() + wait > deadline:
+                return False
+            time.sleep(wait)
         
-        return False
+        return True
 
     def get_retry_after(self, api_name: str) -> float:
         """
@@ -0,0 +1,354 @@
+"""
+Provider Client Module
+
+Asynchronous HTTP layer for threat-intel, CVE and news providers.
+
+One asyncio event loop runs on a background thread and owns an
+httpx.AsyncClient per provider, so connections are kept alive and reused
+across scans, and a single thread can have hundreds of provider lookups in
+flight instead of one blocked request thread per lookup.
+
+Features:
+- One connection pool per provider (keep-alive)
+- Per-provider concurrency limits; excess requests queue on the loop
+- Sync facade (get/post/request) for Flask routes and worker threads
+- submit() returns a concurrent.futures.Future for fan-out from sync code,
+  request_async() can be awaited from any other event loop
+- Timeouts and transport failures raise APITimeoutError / APIConnectionError
+- Adaptive timeouts: the caller's timeout is a ceiling, the effective one
+  follows the endpoint's observed p99 (see latency_tracker.py)
+- Optional hedging for idempotent lookups: a second request is sent after
+  the endpoint's p95 and the first response wins
+- Per-provider counters: requests, errors, in flight, queued, latency, hedges
+- Config.PROVIDER_STUB_URL sends every provider request to the local
+  record/replay stand-in instead (see provider_stub.py)
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import Config
+from error_handler import APIConnectionError, APITimeoutError
+from latency_tracker import LatencyTracker, endpoint_label, latency_tracker
+
+logger = logging.getLogger(__name__)
+
+# Methods that are safe to send twice (hedging)
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+def stub_route(url: str, stub_url: str) -> str:
+    """
+    URL of a provider request on the record/replay stand-in.
+
+    Example:
+        stub_route('https://urlscan.io/api/v1/search/?q=x', 'http://127.0.0.1:8765')
+        -> 'http://127.0.0.1:8765/urlscan.io/api/v1/search/?q=x'
+    """
+    parts = urlsplit(url)
+    routed = f"{stub_url}/{parts.netloc}{parts.path or '/'}"
+    return f"{routed}?{parts.query}" if parts.query else routed
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """
+    Parse per-provider limits.
+
+    Args:
+        spec: Comma-separated "provider=limit" pairs, e.g. "virustotal=4,nvd=2"
+
+    Returns:
+        Mapping of provider name to limit (malformed pairs are ignored)
+    """
+    limits = {}
+    for pair in (spec or '').split(','):
+        name, _, value = pair.partition('=')
+        try:
+            limits[name.strip().lower()] = max(1, int(value))
+        except ValueError:
+            if pair.strip():
+                logger.warning(f"Ignoring malformed provider limit: {pair!r}")
+    return limits
+
+
+class ProviderStats:
+    """Counters for one provider (only mutated on the event loop thread)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.queued = 0
+        self.total_seconds = 0.0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def to_dict(self, limit: int) -> Dict[str, Any]:
+        completed = self.requests - self.in_flight
+        return {
+            'limit': limit,
+            'requests': self.requests,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'queued': self.queued,
+            'avg_latency_ms': round(self.total_seconds / completed * 1000, 1) if completed else 0.0,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+        }
+
+
+class ProviderClient:
+    """
+    Shared async HTTP client with a sync facade.
+
+    Usage:
+        response = provider_client.get('virustotal', url, headers=headers, timeout=5)
+        response = provider_client.get('nvd', url, params=params, hedge=True)
+        futures = [provider_client.submit('nvd', 'GET', u) for u in urls]
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = Config.PROVIDER_MAX_CONCURRENCY,
+                 timeout: float = Config.REQUEST_TIMEOUT,
+                 latency: Optional[LatencyTracker] = None,
+                 stub_url: Optional[str] = None):
+        """
+        Initialize provider client.
+
+        Args:
+            limits: Max concurrent requests per provider (default: Config.PROVIDER_CONCURRENCY)
+            default_limit: Limit for providers not listed in limits
+            timeout: Default request timeout in seconds (ceiling of adaptive timeouts)
+            latency: Histograms driving adaptive timeouts and hedging (default: shared)
+            stub_url: Record/replay stand-in receiving all requests
+                      (default: Config.PROVIDER_STUB_URL, empty for the real APIs)
+        """
+        self.limits = dict(parse_limits(Config.PROVIDER_CONCURRENCY) if limits is None else limits)
+        self.default_limit = default_limit
+        self.timeout = timeout
+        self.latency = latency or latency_tracker
+        self.stub_url = (Config.PROVIDER_STUB_URL if stub_url is None else stub_url).rstrip('/')
+        self.lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # Owned by the loop thread
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, ProviderStats] = {}
+
+    def limit_for(self, provider: str) -> int:
+        """Concurrency limit of a provider"""
+        return self.limits.get(provider, self.default_limit)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='provider-io', daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _client(self, provider: str) -> httpx.AsyncClient:
+        client = self._clients.get(provider)
+        if client is None:
+            limit = self.limit_for(provider)
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+            )
+            self._clients[provider] = client
+            self._semaphores[provider] = asyncio.Semaphore(limit)
+            self._stats.setdefault(provider, ProviderStats())
+        return client
+
+    async def _arequest(self, provider: str, method: str, url: str, hedge: bool = False,
+                        endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+        """Run a request on the loop thread, hedged if asked and safe"""
+        # Labelled by the real endpoint, also when routed to the stand-in
+        endpoint = endpoint or endpoint_label(method, url)
+        if self.stub_url:
+            url = stub_route(url, self.stub_url)
+        kwargs['timeout'] = self.latency.timeout_for(provider, endpoint,
+                                                     kwargs.get('timeout', self.timeout))
+        delay = None
+        if hedge and method.upper() in IDEMPOTENT_METHODS:
+            delay = self.latency.hedge_delay(provider, endpoint)
+        if delay is None:
+            return await self._attempt(provider, endpoint, method, url, **kwargs)
+
+        primary = asyncio.ensure_future(self._attempt(provider, endpoint, method, url, **kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        stats = self._stats[provider]
+        stats.hedges += 1
+        backup = asyncio.ensure_future(self._attempt(provider, endpoint, method, url, **kwargs))
+        pending = {primary, backup}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if task is backup:
+                        stats.hedge_wins += 1
+                    return task.result()
+        # Both attempts failed: report the original request's error
+        raise primary.exception()
+
+    async def _attempt(self, provider: str, endpoint: str, method: str, url: str,
+                       **kwargs) -> httpx.Response:
+        """One HTTP exchange within the provider's limit, recorded in its histogram"""
+        client = self._client(provider)
+        stats = self._stats[provider]
+        timeout = kwargs.get('timeout')
+
+        stats.queued += 1
+        async with self._semaphores[provider]:
+            stats.queued -= 1
+            stats.requests += 1
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                self.latency.record(provider, endpoint, time.perf_counter() - start)
+                return response
+            except httpx.TimeoutException:
+                stats.timeouts += 1
+                self.latency.record(provider, endpoint, time.perf_counter() - start, timed_out=True)
+                raise APITimeoutError(provider, timeout)
+            except httpx.TransportError as e:
+                stats.errors += 1
+                raise APIConnectionError(provider, str(e) or type(e).__name__)
+            finally:
+                stats.in_flight -= 1
+                stats.total_seconds += time.perf_counter() - start
+
+    def submit(self, provider: str, method: str, url: str, **kwargs) -> Future:
+        """
+        Start a request without waiting for it.
+
+        Args:
+            provider: Provider name (selects the pool and concurrency limit)
+            method: HTTP method
+            url: Request URL
+            **kwargs: Passed to httpx (params, headers, data, json, timeout, ...);
+                      hedge=True hedges idempotent requests after the p95;
+                      endpoint=... names the latency histogram instead of
+                      the label derived from the URL
+
+        Returns:
+            Future resolving to an httpx.Response
+        """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(
+            self._arequest(provider.lower(), method, url, **kwargs), loop
+        )
+
+    def submit_coroutine(self, coro) -> Future:
+        """
+        Run a coroutine on the provider I/O loop (e.g. a retry sequence whose
+        back-off waits should not park a thread).
+
+        Returns:
+            Future resolving to the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def request(self, provider: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Blocking request for sync callers (see submit for arguments).
+
+        Raises:
+            APITimeoutError: The request timed out
+            APIConnectionError: The provider could not be reached
+        """
+        if self._thread is not None and threading.current_thread() is self._thread:
+            raise RuntimeError("Blocking provider calls cannot run on the provider I/O loop")
+        return self.submit(provider, method, url, **kwargs).result()
+
+    def get(self, provider: str, url: str, **kwargs) -> httpx.Response:
+        """Blocking GET (see request)"""
+        return self.request(provider, 'GET', url, **kwargs)
+
+    def post(self, provider: str, url: str, **kwargs) -> httpx.Response:
+        """Blocking POST (see request)"""
+        return self.request(provider, 'POST', url, **kwargs)
+
+    async def request_async(self, provider: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Await a request from any event loop (it still runs on the shared pool)"""
+        return await asyncio.wrap_future(self.submit(provider, method, url, **kwargs))
+
+    def gather(self, calls: Iterable[Tuple[str, str, str, Dict[str, Any]]]
+               ) -> List[Union[httpx.Response, BaseException]]:
+        """
+        Run many requests concurrently and wait for all of them.
+
+        Args:
+            calls: (provider, method, url, kwargs) tuples
+
+        Returns:
+            Response or raised exception per call, in order
+        """
+        futures = [self.submit(provider, method, url, **kwargs)
+                   for provider, method, url, kwargs in calls]
+        results: List[Union[httpx.Response, BaseException]] = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters per provider"""
+        stats = dict(self._stats)
+        return {name: provider_stats.to_dict(self.limit_for(name))
+                for name, provider_stats in stats.items()}
+
+    def close(self, timeout: float = 5.0):
+        """Close all pools and stop the loop thread"""
+        with self.lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        async def shutdown():
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._semaphores.clear()
+            for client in clients:
+                await client.aclose()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Error closing provider clients: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
+
+
+# Global client shared by the threat-intel layers and API routes
+provider_client = ProviderClient()
+atexit.register(provider_client.close)
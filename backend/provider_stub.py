@@ -0,0 +1,370 @@
+"""
+Provider Stub Module
+
+Record/replay stand-in for the external threat-intel, CVE and news APIs
+(VirusTotal, AbuseIPDB, OTX, PhishTank, urlscan, Safe Browsing,
+IPQualityScore, NVD, NewsAPI, A2A, Plexiglass).
+
+With Config.PROVIDER_STUB_URL set, provider_client sends every request to
+{stub}/{host}{path}?{query}; the stub answers from recorded responses, so
+throughput and latency tests run offline and give the same numbers on every
+run.
+
+Features:
+- Replays recordings from provider_recordings/<host>.json, most specific
+  match first: literal path segments beat {id}/* wildcards, recorded query
+  parameters must match
+- Record mode proxies unmatched requests to the real API and saves the
+  response (API keys in the query are not stored)
+- Per-endpoint profiles: latency_ms, jitter_ms, error_rate and error_status,
+  looked up by endpoint label ("GET urlscan.io/api/v1/search/"), then host,
+  then "*"
+- Seeded randomness for reproducible error injection
+- Counters per endpoint at GET /_stub/stats
+
+Usage:
+    python provider_stub.py --port 8765 --profile provider_recordings/profiles/realistic.json
+    PROVIDER_STUB_URL=http://127.0.0.1:8765 python app.py
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+
+from latency_tracker import endpoint_label
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                      'provider_recordings')
+
+# Query parameters holding credentials, never written to recordings
+SECRET_PARAMS = frozenset({'key', 'apikey', 'api_key', 'token'})
+
+# Request headers not forwarded upstream in record mode
+HOP_HEADERS = frozenset({'host', 'content-length', 'connection', 'accept-encoding',
+                         'keep-alive', 'transfer-encoding'})
+
+WILDCARDS = ('*', '{id}')
+
+
+class Recording:
+    """One recorded response and the requests it answers."""
+
+    def __init__(self, method: str, path: str, status: int = 200,
+                 body: Any = None, query: Optional[Dict[str, str]] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        self.method = method.upper()
+        self.path = path
+        self.segments = path.split('/')
+        self.status = status
+        self.body = body
+        self.query = dict(query or {})
+        self.headers = dict(headers or {})
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Recording':
+        return cls(data['method'], data['path'], data.get('status', 200), data.get('body'),
+                   data.get('query'), data.get('headers'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'method': self.method, 'path': self.path, 'status': self.status}
+        if self.query:
+            data['query'] = self.query
+        if self.headers:
+            data['headers'] = self.headers
+        data['body'] = self.body
+        return data
+
+    def specificity(self) -> Tuple[int, int]:
+        """Literal path segments and query constraints (higher wins)"""
+        literal = sum(1 for segment in self.segments if segment not in WILDCARDS)
+        return literal, len(self.query)
+
+    def matches(self, method: str, segments: List[str], query: Dict[str, str]) -> bool:
+        if method != self.method or len(segments) != len(self.segments):
+            return False
+        if any(pattern not in WILDCARDS and pattern != segment
+               for pattern, segment in zip(self.segments, segments)):
+            return False
+        return all(query.get(name) == value for name, value in self.query.items())
+
+    def render(self) -> Tuple[bytes, str]:
+        """Response body and content type"""
+        if isinstance(self.body, str):
+            return self.body.encode(), self.headers.get('Content-Type', 'text/plain')
+        return json.dumps(self.body).encode(), 'application/json'
+
+
+class EndpointStats:
+    """Counters for one endpoint label."""
+
+    def __init__(self):
+        self.requests = 0
+        self.injected_errors = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+class ProviderStub:
+    """
+    Recorded provider responses with injected latency and errors.
+
+    Usage:
+        stub = ProviderStub(profile={'*': {'latency_ms': 50, 'error_rate': 0.01}})
+        server = stub.serve(port=8765)
+    """
+
+    def __init__(self, recordings_dir: str = DEFAULT_RECORDINGS_DIR,
+                 profile: Optional[Dict[str, Dict[str, Any]]] = None,
+                 record: bool = False, seed: Optional[int] = None,
+                 upstream_timeout: float = 30.0):
+        """
+        Initialize provider stub.
+
+        Args:
+            recordings_dir: Directory of <host>.json recording files
+            profile: Latency/error settings per endpoint label, host or "*"
+            record: Proxy unmatched requests upstream and save the responses
+            seed: Seed for latency jitter and error injection
+            upstream_timeout: Timeout of proxied requests in record mode
+        """
+        self.recordings_dir = recordings_dir
+        self.profile = dict(profile or {})
+        self.record = record
+        self.upstream_timeout = upstream_timeout
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recordings: Dict[str, List[Recording]] = {}
+        self.stats: Dict[str, EndpointStats] = {}
+        self.load()
+
+    def load(self):
+        """(Re)load all recording files"""
+        recordings = {}
+        if os.path.isdir(self.recordings_dir):
+            for name in sorted(os.listdir(self.recordings_dir)):
+                if not name.endswith('.json'):
+                    continue
+                with open(os.path.join(self.recordings_dir, name)) as f:
+                    data = json.load(f)
+                recordings[data['host']] = [Recording.from_dict(entry)
+                                            for entry in data.get('responses', [])]
+        with self.lock:
+            self.recordings = recordings
+        logger.info(f"Loaded recordings for {len(recordings)} provider hosts")
+
+    def _save(self, host: str):
+        """Write one host's recordings (caller holds the lock)"""
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        path = os.path.join(self.recordings_dir, f'{host}.json')
+        data = {'host': host,
+                'responses': [recording.to_dict() for recording in self.recordings[host]]}
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def find(self, method: str, host: str, path: str,
+             query: Dict[str, str]) -> Optional[Recording]:
+        """Most specific recording answering a request"""
+        segments = path.split('/')
+        with self.lock:
+            candidates = [recording for recording in self.recordings.get(host, [])
+                          if recording.matches(method, segments, query)]
+        return max(candidates, key=Recording.specificity, default=None)
+
+    def settings_for(self, label: str, host: str) -> Dict[str, Any]:
+        """Profile entry of an endpoint label, else its host, else "*" """
+        for key in (label, host, '*'):
+            if key in self.profile:
+                return self.profile[key]
+        return {}
+
+    def _stats(self, label: str) -> EndpointStats:
+        stats = self.stats.get(label)
+        if stats is None:
+            stats = self.stats[label] = EndpointStats()
+        return stats
+
+    def handle(self, method: str, target: str, headers: Dict[str, str],
+               body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Answer one request routed as /{host}{path}?{query}.
+
+        Returns:
+            Status, response headers and body
+        """
+        parts = urlsplit(target)
+        host, _, path = parts.path.lstrip('/').partition('/')
+        path = '/' + path
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        label = endpoint_label(method, f'https://{host}{path}')
+        settings = self.settings_for(label, host)
+
+        with self.lock:
+            stats = self._stats(label)
+            stats.requests += 1
+            jitter = self.random.uniform(-1, 1) * settings.get('jitter_ms', 0)
+            failed = self.random.random() < settings.get('error_rate', 0)
+        delay = max(0.0, settings.get('latency_ms', 0) + jitter) / 1000
+        if delay:
+            time.sleep(delay)
+
+        if failed:
+            status = settings.get('error_status', 503)
+            with self.lock:
+                stats.injected_errors += 1
+            response_headers = {'Retry-After': '1'} if status == 429 else {}
+            return self._json(status, {'error': {'code': 'StubInjectedError',
+                                                 'message': f'Injected {status} for {label}'}},
+                              response_headers)
+
+        recording = self.find(method, host, path, query)
+        if recording is None and self.record:
+            recording = self._record(method, host, path, parts.query, headers, body)
+            if recording is not None:
+                with self.lock:
+                    stats.recorded += 1
+        if recording is None:
+            with self.lock:
+                stats.misses += 1
+            logger.warning(f"No recording for {method} {host}{path}")
+            return self._json(404, {'error': {'code': 'StubNoRecording',
+                                              'message': f'No recording for {label}'}})
+
+        payload, content_type = recording.render()
+        response_headers = dict(recording.headers)
+        response_headers['Content-Type'] = content_type
+        return recording.status, response_headers, payload
+
+    def _record(self, method: str, host: str, path: str, query_string: str,
+                headers: Dict[str, str], body: bytes) -> Optional[Recording]:
+        """Fetch a request from the real API and save the response"""
+        url = f'https://{host}{path}' + (f'?{query_string}' if query_string else '')
+        forwarded = {name: value for name, value in headers.items()
+                     if name.lower() not in HOP_HEADERS}
+        try:
+            response = httpx.request(method, url, headers=forwarded, content=body or None,
+                                     timeout=self.upstream_timeout)
+        except httpx.HTTPError as e:
+            logger.error(f"Recording {method} {url} failed: {e}")
+            return None
+
+        try:
+            payload = response.json()
+            recorded_headers = {}
+        except ValueError:
+            payload = response.text
+            recorded_headers = {'Content-Type': response.headers.get('Content-Type', 'text/plain')}
+        query = {name: value for name, value in parse_qsl(query_string, keep_blank_values=True)
+                 if name.lower() not in SECRET_PARAMS}
+        recording = Recording(method, path, response.status_code, payload, query, recorded_headers)
+
+        with self.lock:
+            self.recordings.setdefault(host, []).append(recording)
+            self._save(host)
+        logger.info(f"Recorded {method} {host}{path}?{urlencode(query)} -> {response.status_code}")
+        return recording
+
+    @staticmethod
+    def _json(status: int, data: Dict[str, Any],
+              headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        response_headers = dict(headers or {})
+        response_headers['Content-Type'] = 'application/json'
+        return status, response_headers, json.dumps(data).encode()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Counters per endpoint label"""
+        with self.lock:
+            return {label: stats.to_dict() for label, stats in self.stats.items()}
+
+    def serve(self, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+        """
+        Start serving on a background thread.
+
+        Returns:
+            The running server (port 0 picks a free port, see server_address)
+        """
+        server = ThreadingHTTPServer((host, port), _StubHandler)
+        server.daemon_threads = True
+        server.stub = self
+        threading.Thread(target=server.serve_forever, name='provider-stub', daemon=True).start()
+        return server
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a ProviderStub (server.stub)"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _dispatch(self):
+        stub = self.server.stub
+        if self.path == '/_stub/stats':
+            status, headers, body = stub._json(200, stub.get_stats())
+        else:
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = self.rfile.read(length) if length else b''
+            status, headers, body = stub.handle(self.command, self.path,
+                                                dict(self.headers.items()), payload)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _dispatch
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record/replay stand-in for provider APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--recordings', default=DEFAULT_RECORDINGS_DIR,
+                        help='directory of <host>.json recordings')
+    parser.add_argument('--profile', help='JSON file of per-endpoint latency/error settings')
+    parser.add_argument('--record', action='store_true',
+                        help='proxy unmatched requests to the real APIs and save them')
+    parser.add_argument('--seed', type=int, help='seed for jitter and error injection')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    profile = None
+    if args.profile:
+        with open(args.profile) as f:
+            profile = json.load(f)
+
+    stub = ProviderStub(args.recordings, profile, record=args.record, seed=args.seed)
+    server = stub.serve(args.host, args.port)
+    address = f'http://{args.host}:{server.server_address[1]}'
+    print(f"Provider stub listening on {address}")
+    print(f"Point the backend at it with PROVIDER_STUB_URL={address}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,478 @@
+"""
+Quota Scheduler Module
+
+Central scheduler for metered provider APIs (VirusTotal allows 4 requests
+per minute). Instead of first-come, first-served, queued calls are granted
+the provider's rate-limiter tokens by priority class:
+
+    INTERACTIVE  extension real-time scans
+    MANUAL       dashboard scans
+    WARMUP       startup cache warm-up (capped to a share of the quota)
+    BACKGROUND   traffic analysis and cache refreshes
+
+Features:
+- Fair queuing: within a class, users are served round-robin
+- Deadlines: a call that cannot start in time to finish before its deadline
+  is dropped with QuotaDeadlineExceededError instead of burning quota
+- Deduplication: identical calls share one queued/running request, and
+  results are reused for a short window; a higher-priority duplicate
+  promotes the queued request
+- Priority, user and deadline come from a scheduling() scope, so code deep
+  in the analysis layers does not need extra parameters
+- Queue depth, wait time, drop and dedup metrics per class
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+
+from config import Config
+from error_handler import QuotaDeadlineExceededError
+from performance_cache import RateLimiter, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Scheduling classes, most urgent first."""
+    INTERACTIVE = 0
+    MANUAL = 1
+    WARMUP = 2
+    BACKGROUND = 3
+
+
+# Longest a call may wait for quota when its scope sets no deadline
+DEFAULT_MAX_WAIT = {
+    Priority.INTERACTIVE: Config.QUOTA_INTERACTIVE_MAX_WAIT,
+    Priority.MANUAL: Config.QUOTA_MANUAL_MAX_WAIT,
+    Priority.WARMUP: None,
+    Priority.BACKGROUND: Config.QUOTA_BACKGROUND_MAX_WAIT,
+}
+
+
+class SchedulingContext:
+    """Who is asking, how urgently, and until when (absolute time.time())."""
+
+    def __init__(self, priority: Priority = Priority.BACKGROUND, user: str = 'system',
+                 deadline: Optional[float] = None, max_wait: Optional[float] = None):
+        self.priority = Priority(priority)
+        self.user = user
+        self.deadline = deadline
+        self.max_wait = max_wait
+
+    def renewed_deadline(self) -> Optional[float]:
+        """
+        Deadline for a follow-up call made after a deliberate pause (e.g.
+        fetching an analysis after submitting it): the scope's max_wait
+        counted from now, so the pause does not eat the follow-up's budget.
+        None falls back to the class default from the time of the call.
+        """
+        if self.max_wait is None:
+            return None
+        return time.time() + self.max_wait
+
+
+_current_context: ContextVar[SchedulingContext] = ContextVar(
+    'quota_scheduling_context', default=SchedulingContext()
+)
+
+
+@contextmanager
+def scheduling(priority: Priority, user: Optional[str] = None,
+               max_wait: Optional[float] = None):
+    """
+    Scope in which metered calls are scheduled with the given priority.
+
+    Args:
+        priority: Priority class of calls made in this scope
+        user: Fairness key (client id or address); defaults to the outer scope's
+        max_wait: Seconds from now after which queued calls are useless
+                  (default: DEFAULT_MAX_WAIT for the class)
+
+    Example:
+        with scheduling(Priority.INTERACTIVE, user=request.remote_addr):
+            result = risk_engine.analyze(url, page_data)
+    """
+    if max_wait is None:
+        max_wait = DEFAULT_MAX_WAIT[Priority(priority)]
+    deadline = time.time() + max_wait if max_wait is not None else None
+    context = SchedulingContext(priority, user or _current_context.get().user, deadline, max_wait)
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)
+
+
+def current_context() -> SchedulingContext:
+    """Scheduling context of the calling thread/task."""
+    return _current_context.get()
+
+
+class ClassStats:
+    """Counters for one priority class."""
+
+    # Recent queue waits kept for percentiles
+    WAIT_SAMPLES = 500
+
+    def __init__(self):
+        self.submitted = 0
+        self.dispatched = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.abandoned = 0
+        self.waits: Deque[float] = deque(maxlen=self.WAIT_SAMPLES)
+
+    def to_dict(self, queued: int) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        return {
+            'queued': queued,
+            'submitted': self.submitted,
+            'dispatched': self.dispatched,
+            'deduplicated': self.deduplicated,
+            'dropped': self.dropped,
+            'abandoned': self.abandoned,
+            'wait_ms_avg': round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            'wait_ms_p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+            'wait_ms_max': round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+
+class _Ticket:
+    """One scheduled call and everyone waiting for it."""
+
+    def __init__(self, fn: Callable[[], Any], key: Optional[Hashable], priority: Priority,
+                 user: str, deadline: Optional[float]):
+        self.fn = fn
+        self.key = key
+        self.priority = priority
+        self.user = user
+        self.deadline = deadline
+        self.enqueued_at = time.time()
+        self.state = 'queued'
+        self.participants = 1
+        self.shared = False
+        self.future: Future = Future()
+
+
+class QuotaScheduler:
+    """
+    Priority scheduler in front of one metered provider.
+
+    Usage:
+        response = get_scheduler('virustotal').call(
+            lambda: provider_client.get('virustotal', url), key=url)
+    """
+
+    # Weight of the newest sample in the call latency estimate
+    LATENCY_ALPHA = 0.2
+    # Upper bound between dispatcher re-checks while quota is exhausted
+    MAX_POLL_SECONDS = 1.0
+
+    def __init__(self, provider: str, rate_limiter: Optional[RateLimiter] = None,
+                 dedup_window: float = Config.QUOTA_DEDUP_WINDOW,
+                 class_shares: Optional[Dict[Priority, float]] = None,
+                 workers: int = 4):
+        """
+        Initialize quota scheduler.
+
+        Args:
+            provider: Provider name (also the rate-limiter key)
+            rate_limiter: Limiter holding the provider's quota (default: shared one)
+            dedup_window: Seconds a finished result is reused for identical calls
+            class_shares: Max fraction of the quota a class may use per window
+                          (default: warm-up limited to CACHE_WARMUP_TI_SHARE)
+            workers: Threads running granted calls
+        """
+        self.provider = provider
+        self.rate_limiter = rate_limiter or get_rate_limiter(provider)
+        self.dedup_window = dedup_window
+        self.class_shares = ({Priority.WARMUP: Config.CACHE_WARMUP_TI_SHARE}
+                             if class_shares is None else dict(class_shares))
+        self.expected_latency = 0.0
+        self.cond = threading.Condition()
+        # Per class: user -> FIFO of that user's tickets, users in round-robin order
+        self._queues: Dict[Priority, 'OrderedDict[str, Deque[_Ticket]]'] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._pending: Dict[Hashable, _Ticket] = {}
+        self._recent: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._grants: Deque[tuple] = deque()
+        self._stats = {priority: ClassStats() for priority in Priority}
+        self._running = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix=f'quota-{provider}')
+        self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                            name=f'quota-{provider}', daemon=True)
+        self._dispatcher.start()
+
+    # ─── Submission ─────────────────────────────────────────────────────────
+
+    def call(self, fn: Callable[[], Any], key: Optional[Hashable] = None,
+             priority: Optional[Priority] = None, user: Optional[str] = None,
+             deadline: Optional[float] = None) -> Any:
+        """
+        Run fn once the provider's quota allows, in priority order.
+
+        Args:
+            fn: Zero-argument callable making exactly one provider request
+            key: Dedup key (e.g. the URL); None disables deduplication
+            priority, user, deadline: Override the current scheduling() scope
+
+        Returns:
+            fn's result (a copy if it was shared with duplicate calls)
+
+        Raises:
+            QuotaDeadlineExceededError: No quota before the deadline
+            Whatever fn raised
+        """
+        context = current_context()
+        priority = Priority(context.priority if priority is None else priority)
+        user = user or context.user
+        submitted_at = time.time()
+        if deadline is None:
+            deadline = context.deadline
+        if deadline is None and DEFAULT_MAX_WAIT[priority] is not None:
+            deadline = submitted_at + DEFAULT_MAX_WAIT[priority]
+
+        with self.cond:
+            stats = self._stats[priority]
+            stats.submitted += 1
+            ticket = self._find_duplicate(key, submitted_at)
+            if isinstance(ticket, tuple):
+                stats.deduplicated += 1
+                return copy.deepcopy(ticket[0])
+            if ticket is not None:
+                stats.deduplicated += 1
+                ticket.participants += 1
+                ticket.shared = True
+                if ticket.state == 'queued':
+                    if priority < ticket.priority:
+                        self._requeue(ticket, priority)
+                    if ticket.deadline is not None:
+                        ticket.deadline = None if deadline is None else max(ticket.deadline, deadline)
+            else:
+                ticket = _Ticket(fn, key, priority, user, deadline)
+                self._enqueue(ticket)
+                if key is not None:
+                    self._pending[key] = ticket
+                self.cond.notify_all()
+
+        return self._wait(ticket, deadline, submitted_at)
+
+    def _find_duplicate(self, key: Optional[Hashable], now: float):
+        """Recent (result, finished_at) tuple, pending ticket, or None"""
+        if key is None:
+            return None
+        while self._recent:
+            _, finished_at = next(iter(self._recent.values()))
+            if now - finished_at <= self.dedup_window:
+                break
+            self._recent.popitem(last=False)
+        if key in self._recent:
+            return self._recent[key]
+        return self._pending.get(key)
+
+    def _wait(self, ticket: _Ticket, deadline: Optional[float], submitted_at: float) -> Any:
+        timeout = None if deadline is None else max(0.0, deadline - time.time())
+        try:
+            result = ticket.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with self.cond:
+                ticket.participants -= 1
+                self._stats[ticket.priority].abandoned += 1
+                if ticket.participants == 0 and ticket.state == 'queued':
+                    self._remove(ticket)
+                    self._forget(ticket)
+            raise QuotaDeadlineExceededError(self.provider, time.time() - submitted_at)
+        return copy.deepcopy(result) if ticket.shared else result
+
+    # ─── Queues (caller holds self.cond) ────────────────────────────────────
+
+    def _enqueue(self, ticket: _Ticket):
+        self._queues[ticket.priority].setdefault(ticket.user, deque()).append(ticket)
+
+    def _remove(self, ticket: _Ticket):
+        users = self._queues[ticket.priority]
+        queue = users.get(ticket.user)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del users[ticket.user]
+        ticket.state = 'removed'
+
+    def _requeue(self, ticket: _Ticket, priority: Priority):
+        self._remove(ticket)
+        ticket.priority = priority
+        ticket.state = 'queued'
+        self._enqueue(ticket)
+
+    def _forget(self, ticket: _Ticket):
+        if ticket.key is not None and self._pending.get(ticket.key) is ticket:
+            del self._pending[ticket.key]
+
+    def _queued_count(self, priority: Optional[Priority] = None) -> int:
+        classes = [priority] if priority is not None else list(Priority)
+        return sum(len(queue) for p in classes for queue in self._queues[p].values())
+
+    def _class_capped(self, priority: Priority, now: float) -> bool:
+        share = self.class_shares.get(priority)
+        if share is None:
+            return False
+        window = self.rate_limiter.window_seconds
+        while self._grants and self._grants[0][0] < now - window:
+            self._grants.popleft()
+        budget = max(1, int(self.rate_limiter.requests_per_minute * share))
+        return sum(1 for _, p in self._grants if p == priority) >= budget
+
+    def _drop_hopeless(self, now: float):
+        """Drop queued tickets that could no longer finish before their deadline"""
+        for users in self._queues.values():
+            for queue in list(users.values()):
+                for ticket in list(queue):
+                    if ticket.deadline is not None and now + self.expected_latency > ticket.deadline:
+                        self._remove(ticket)
+                        self._forget(ticket)
+                        self._stats[ticket.priority].dropped += 1
+                        ticket.future.set_exception(
+                            QuotaDeadlineExceededError(self.provider, now - ticket.enqueued_at))
+
+    def _next_ticket(self, now: float) -> Optional[_Ticket]:
+        """Head of the most urgent uncapped class, next user in round-robin"""
+        for priority in Priority:
+            users = self._queues[priority]
+            if users and not self._class_capped(priority, now):
+                return next(iter(users.values()))[0]
+        return None
+
+    def _dispatch(self, ticket: _Ticket, now: float):
+        users = self._queues[ticket.priority]
+        queue = users.pop(ticket.user)
+        queue.popleft()
+        if queue:
+            users[ticket.user] = queue  # back of the round-robin
+        ticket.state = 'running'
+        self._running += 1
+        self._grants.append((now, ticket.priority))
+        stats = self._stats[ticket.priority]
+        stats.dispatched += 1
+        stats.waits.append(now - ticket.enqueued_at)
+        self._executor.submit(self._run, ticket)
+
+    # ─── Dispatcher and workers ─────────────────────────────────────────────
+
+    def _dispatch_loop(self):
+        with self.cond:
+            while not self._closed:
+                if not self._queued_count():
+                    self.cond.wait()
+                    continue
+                now = time.time()
+                self._drop_hopeless(now)
+                ticket = self._next_ticket(now)
+                delay = self.MAX_POLL_SECONDS
+                if ticket is not None:
+                    if self.rate_limiter.is_allowed(self.provider):
+                        self._dispatch(ticket, now)
+                        continue
+                    retry_after = self.rate_limiter.get_retry_after(self.provider)
+                    delay = min(delay, max(retry_after, 0.01))
+                self.cond.wait(timeout=delay)
+
+    def _run(self, ticket: _Ticket):
+        start = time.perf_counter()
+        try:
+            result = ticket.fn()
+        except BaseException as e:
+            with self.cond:
+                self._finish(ticket, start)
+            ticket.future.set_exception(e)
+            return
+        with self.cond:
+            self._finish(ticket, start)
+            if ticket.key is not None and self.dedup_window > 0:
+                self._recent[ticket.key] = (copy.deepcopy(result), time.time())
+                self._recent.move_to_end(ticket.key)
+        ticket.future.set_result(result)
+
+    def _finish(self, ticket: _Ticket, start: float):
+        elapsed = time.perf_counter() - start
+        if self.expected_latency:
+            self.expected_latency += self.LATENCY_ALPHA * (elapsed - self.expected_latency)
+        else:
+            self.expected_latency = elapsed
+        self._running -= 1
+        ticket.state = 'done'
+        self._forget(ticket)
+
+    # ─── Metrics and lifecycle ──────────────────────────────────────────────
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, wait times and outcomes per priority class"""
+        with self.cond:
+            classes = {priority.name.lower(): stats.to_dict(self._queued_count(priority))
+                       for priority, stats in self._stats.items()}
+            return {
+                'provider': self.provider,
+                'requests_per_minute': self.rate_limiter.requests_per_minute,
+                'queue_depth': self._queued_count(),
+                'running': self._running,
+                'expected_latency_ms': round(self.expected_latency * 1000, 1),
+                'classes': classes,
+            }
+
+    def close(self):
+        """Stop dispatching; queued calls fail with QuotaDeadlineExceededError"""
+        with self.cond:
+            self._closed = True
+            for users in self._queues.values():
+                for queue in users.values():
+                    for ticket in queue:
+                        ticket.state = 'removed'
+                        ticket.future.set_exception(
+                            QuotaDeadlineExceededError(self.provider, time.time() - ticket.enqueued_at))
+                users.clear()
+            self._pending.clear()
+            self.cond.notify_all()
+        self._executor.shutdown(wait=False)
+
+
+# Schedulers per metered provider, created on first use
+_schedulers: Dict[str, QuotaScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider: str) -> QuotaScheduler:
+    """
+    Get the scheduler for a metered provider.
+
+    Args:
+        provider: Provider name (e.g. 'virustotal')
+
+    Returns:
+        Shared QuotaScheduler instance
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(provider)
+        if scheduler is None:
+            scheduler = _schedulers[provider] = QuotaScheduler(provider)
+        return scheduler
+
+
+def get_scheduler_stats() -> Dict[str, Any]:
+    """Stats of every scheduler created so far"""
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return {scheduler.provider: scheduler.get_stats() for scheduler in schedulers}
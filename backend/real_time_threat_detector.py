@@ -4,18 +4,34 @@ Integrated threat detection using multiple threat intelligence APIs
 - VirusTotal v3 API
 - Google Safe Browsing API v4
 - IPQualityScore API
+
+Provider checks run on one long-lived worker pool. A scan waits at most
+TIMEOUT for its checks; checks still queued then are cancelled, and new
+checks are shed while too many are pending. Identical URLs within a
+short freshness window (Config.REALTIME_FRESHNESS_SECONDS) share the last
+verdict, and concurrent identical scans share one run; responses report
+'cached' and 'cache_age_seconds'.
 """
 
-import requests
 import time
 import hashlib
 from urllib.parse import urlparse, quote
 from datetime import datetime, timedelta
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, List, Tuple, Optional
 
+from cache_manager import unified_cache
+from config import Config
+from error_handler import APITimeoutError
+from provider_client import provider_client
+from quota_scheduler import current_context, get_scheduler
+from request_coalescer import request_coalescer
+from url_reputation import reputation_db, safebrowsing_full_hash_check
+
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -45,6 +61,21 @@ class ThreatDetectorConfig:
     
     # Cache settings
     CACHE_TTL = 3600  # 1 hour in seconds
+    
+    # Verdicts are reused for identical URLs within this window (0 = never)
+    FRESHNESS_WINDOW = Config.REALTIME_FRESHNESS_SECONDS
+    
+    # Long-lived pool for provider checks (3 per scan)
+    MAX_WORKERS = Config.REALTIME_WORKERS
+    
+    # Queued plus running checks before new ones are shed
+    MAX_PENDING_CHECKS = Config.REALTIME_MAX_PENDING_CHECKS
+    
+    # Per-provider response caching: clean ("not found") answers and provider
+    # errors are reused briefly so a failing API is not called on every scan.
+    # Detections are never cached here; verdicts stay real-time.
+    NEGATIVE_CACHE_TTL = 300  # 5 minutes
+    ERROR_CACHE_TTL = 60  # 1 minute
 
 
 class RealTimeThreatDetector:
@@ -55,8 +86,25 @@ class RealTimeThreatDetector:
     def __init__(self, config: ThreatDetectorConfig = None):
         """Initialize detector with API configuration"""
         self.config = config or ThreatDetectorConfig()
-        self.session = requests.Session()
-        self.results_cache = {}
+        self.results_cache = unified_cache
+        self.results_cache.register_namespace('realtime_detection', self.config.CACHE_TTL)
+        for api_name in ('virustotal', 'safebrowsing', 'ipqualityscore'):
+            self.results_cache.register_namespace(
+                f'realtime_{api_name}', self.config.CACHE_TTL,
+                negative_ttl_seconds=self.config.NEGATIVE_CACHE_TTL,
+                error_ttl_seconds=self.config.ERROR_CACHE_TTL
+            )
+        
+        # Shared by every detect() call instead of a pool per scan
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.MAX_WORKERS,
+            thread_name_prefix='realtime-check'
+        )
+        # Checks submitted and not yet finished, including timed-out ones
+        # that still occupy a worker
+        self.pending_lock = threading.Lock()
+        self.pending_checks = 0
+        self.shed_checks = 0
         
         logger.info("🚀 Real-Time Threat Detector Initialized")
         logger.info(f"   VirusTotal: {'✓' if self.config.VIRUSTOTAL_API_KEY else '✗'}")
@@ -78,8 +126,25 @@ class RealTimeThreatDetector:
         if not self._is_valid_url(url):
             return self._error_response(url, "Invalid URL format")
         
-        # ALWAYS check FRESH - don't use cache for real-time threat detection
-        # Security requires current API data, not old cached results
+        # Verdicts stay real-time: a result is only reused within the short
+        # freshness window, which absorbs bursts of identical submissions
+        window = self.config.FRESHNESS_WINDOW
+        if window > 0:
+            record = self.results_cache.get_entry('realtime_detection', url)
+            if record is not None and record.age_seconds <= window:
+                logger.info(f"⚡ Reusing verdict for {url} ({record.age_seconds:.1f}s old)")
+                return self._with_cache_age(record.value, record.age_seconds)
+        
+        # Concurrent scans of the same URL share one run
+        detection_result, shared = request_coalescer.do(
+            'realtime_detection', url, lambda: self._detect_fresh(url)
+        )
+        if shared:
+            logger.info(f"🔗 Reused in-flight scan for {url}")
+        return self._with_cache_age(detection_result, 0.0)
+    
+    def _detect_fresh(self, url: str) -> Dict:
+        """Run pattern and API checks and store the verdict for the freshness window"""
         logger.info(f"🔍 Scanning URL: {url} (REAL-TIME - Fresh API Check)")
         
         # Check URL patterns first (malware test sites, known threats)
@@ -91,10 +156,18 @@ class RealTimeThreatDetector:
         # Aggregate results with pattern detection
         detection_result = self._aggregate_results(url, results, pattern_detection)
         
-        # Don't cache - always return fresh real-time results
-        # Security requires current threat intelligence, not stale cached data
+        if self.config.FRESHNESS_WINDOW > 0:
+            self._cache_result(url, detection_result, self.config.FRESHNESS_WINDOW)
         return detection_result
     
+    @staticmethod
+    def _with_cache_age(result: Dict, age_seconds: float) -> Dict:
+        """Copy of a verdict annotated with how old it is"""
+        result = dict(result)
+        result['cached'] = age_seconds > 0
+        result['cache_age_seconds'] = round(age_seconds, 1)
+        return result
+    
     def _check_url_patterns(self, url: str) -> Dict:
         """
         Check URL for malware patterns and known test sites
@@ -175,29 +248,90 @@ class RealTimeThreatDetector:
             'ipqualityscore': None
         }
         
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = {}
-            
-            # Submit all checks
-            if self.config.VIRUSTOTAL_API_KEY:
-                futures['virustotal'] = executor.submit(self._check_virustotal, url)
-            
-            if self.config.GOOGLE_SAFE_BROWSING_API_KEY:
-                futures['safebrowsing'] = executor.submit(self._check_safebrowsing, url)
-            
-            if self.config.IPQUALITYSCORE_API_KEY:
-                futures['ipqualityscore'] = executor.submit(self._check_ipqualityscore, url)
-            
-            # Collect results as they complete
-            for api_name, future in futures.items():
-                try:
-                    results[api_name] = future.result(timeout=self.config.TIMEOUT)
-                except Exception as e:
-                    logger.error(f"❌ {api_name} check failed: {str(e)}")
-                    results[api_name] = {'error': str(e), 'success': False}
+        checks = []
+        if self.config.VIRUSTOTAL_API_KEY:
+            checks.append(('virustotal', self._check_virustotal))
+        if self.config.GOOGLE_SAFE_BROWSING_API_KEY or reputation_db.available:
+            checks.append(('safebrowsing', self._check_safebrowsing))
+        if self.config.IPQUALITYSCORE_API_KEY:
+            checks.append(('ipqualityscore', self._check_ipqualityscore))
+        
+        futures = {}
+        for api_name, check in checks:
+            future = self._submit_check(api_name, check, url)
+            if future is None:
+                logger.warning(f"⚠️ {api_name} check shed: {self.pending_checks} checks pending")
+                results[api_name] = {'error': 'Detector overloaded', 'success': False, 'shed': True}
+            else:
+                futures[api_name] = future
+        
+        # One deadline for all checks of the scan
+        wait(futures.values(), timeout=self.config.TIMEOUT)
+        for api_name, future in futures.items():
+            if not future.done():
+                # Frees the slot if the check has not started; a running
+                # check keeps its worker (and its pending count) until it returns
+                future.cancel()
+                logger.error(f"❌ {api_name} check timed out")
+                results[api_name] = {'error': 'Request timeout', 'success': False}
+                continue
+            try:
+                results[api_name] = future.result()
+            except Exception as e:
+                logger.error(f"❌ {api_name} check failed: {str(e)}")
+                results[api_name] = {'error': str(e), 'success': False}
         
         return results
     
+    def _submit_check(self, api_name: str, check, url: str):
+        """
+        Queue one provider check on the shared pool, None if shed
+        
+        The check runs in a copy of the caller's context so metered calls
+        keep the request's quota priority.
+        """
+        with self.pending_lock:
+            if self.pending_checks >= self.config.MAX_PENDING_CHECKS:
+                self.shed_checks += 1
+                return None
+            self.pending_checks += 1
+        try:
+            future = self.executor.submit(
+                contextvars.copy_context().run,
+                self._cached_check, api_name, check, url)
+        except RuntimeError:
+            # Pool shut down
+            self._check_finished(None)
+            raise
+        future.add_done_callback(self._check_finished)
+        return future
+    
+    def _check_finished(self, future):
+        with self.pending_lock:
+            self.pending_checks -= 1
+    
+    def _cached_check(self, api_name: str, check, url: str) -> Dict:
+        """
+        Run one provider check through the negative/error response cache
+        
+        Clean and failed responses are reused for their short TTLs;
+        detections (positive results) are not cached.
+        """
+        return self.results_cache.get_or_load(
+            f'realtime_{api_name}', url, lambda: check(url),
+            classify=self._classify_api_result,
+            ttl_seconds=0
+        )
+    
+    @staticmethod
+    def _classify_api_result(result: Dict) -> Optional[str]:
+        """Cache class of a provider response: 'error', 'negative' or None"""
+        if not result.get('success'):
+            return 'error'
+        if not result.get('malicious') and not result.get('suspicious'):
+            return 'negative'
+        return None
+    
     def _check_virustotal(self, url: str) -> Dict:
         """
         Check URL with VirusTotal API
@@ -208,12 +342,18 @@ class RealTimeThreatDetector:
         try:
             headers = {'x-apikey': self.config.VIRUSTOTAL_API_KEY}
             
+            scheduler = get_scheduler('virustotal')
+            
             # Submit URL for scanning
-            submit_response = requests.post(
-                self.config.VIRUSTOTAL_URL_SUBMIT,
-                headers=headers,
-                data={'url': url},
-                timeout=self.config.TIMEOUT
+            submit_response = scheduler.call(
+                lambda: provider_client.post(
+                    'virustotal',
+                    self.config.VIRUSTOTAL_URL_SUBMIT,
+                    headers=headers,
+                    data={'url': url},
+                    timeout=self.config.TIMEOUT
+                ),
+                key=('submit', url)
             )
             
             if submit_response.status_code != 200:
@@ -235,10 +375,16 @@ class RealTimeThreatDetector:
             time.sleep(3)
             
             # Get analysis results
-            analysis_response = requests.get(
-                self.config.VIRUSTOTAL_URL_ANALYSE.format(url_id=url_id),
-                headers=headers,
-                timeout=self.config.TIMEOUT
+            analysis_response = scheduler.call(
+                lambda: provider_client.get(
+                    'virustotal',
+                    self.config.VIRUSTOTAL_URL_ANALYSE.format(url_id=url_id),
+                    headers=headers,
+                    timeout=self.config.TIMEOUT
+                ),
+                key=('analysis', url_id),
+                # Own wait budget, not what the pause left of the scope's
+                deadline=current_context().renewed_deadline()
             )
             
             if analysis_response.status_code == 200:
@@ -282,7 +428,7 @@ class RealTimeThreatDetector:
                     'status_code': analysis_response.status_code
                 }
         
-        except requests.Timeout:
+        except APITimeoutError:
             logger.error(f"❌ VirusTotal timeout")
             return {'success': False, 'error': 'Request timeout'}
         except Exception as e:
@@ -293,7 +439,19 @@ class RealTimeThreatDetector:
         """
         Check URL with Google Safe Browsing API
         Returns threats from Google's malware/phishing databases
+        
+        The offline hash-prefix lists answer first. A confirmed match is
+        final; a clean answer is final only without an API key or when the
+        lists are synced from Safe Browsing itself (locally built feeds
+        cover far less). Unconfirmed prefix hits also go to the network API.
         """
+        local = self._check_reputation_lists(url)
+        if local is not None and (local['malicious'] or not self.config.GOOGLE_SAFE_BROWSING_API_KEY
+                                  or reputation_db.mirrors_safebrowsing):
+            return local
+        if not self.config.GOOGLE_SAFE_BROWSING_API_KEY:
+            return {'success': False, 'error': 'Unconfirmed hash-prefix match'}
+        
         logger.info(f"📤 Checking Google Safe Browsing for {url}")
         
         try:
@@ -317,7 +475,8 @@ class RealTimeThreatDetector:
             
             params = {'key': self.config.GOOGLE_SAFE_BROWSING_API_KEY}
             
-            response = requests.post(
+            response = provider_client.post(
+                'safebrowsing',
                 self.config.GOOGLE_SAFEBROWSING_URL,
                 json=request_body,
                 params=params,
@@ -355,13 +514,37 @@ class RealTimeThreatDetector:
                     'error': f'API error: {response.status_code}'
                 }
         
-        except requests.Timeout:
+        except APITimeoutError:
             logger.error(f"❌ Google Safe Browsing timeout")
             return {'success': False, 'error': 'Request timeout'}
         except Exception as e:
             logger.error(f"❌ Google Safe Browsing error: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    def _check_reputation_lists(self, url: str) -> Optional[Dict]:
+        """
+        Check URL against the offline hash-prefix lists (see url_reputation.py)
+        
+        Returns None when no lists are loaded or a prefix hit is unconfirmed
+        """
+        api_key = self.config.GOOGLE_SAFE_BROWSING_API_KEY
+        full_hash_check = safebrowsing_full_hash_check(api_key, self.config.TIMEOUT) if api_key else None
+        local = reputation_db.lookup(url, full_hash_check)
+        if local['status'] not in ('clean', 'match'):
+            return None
+        
+        malicious = local['status'] == 'match'
+        if malicious:
+            logger.info(f"   ⚠️ Reputation lists THREAT detected: {local['threat_types']}")
+        return {
+            'success': True,
+            'malicious': malicious,
+            'threat_types': local['threat_types'],
+            'confidence': 95,
+            'risk_score': 95 if malicious else 0,
+            'source': 'local_lists'
+        }
+    
     def _check_ipqualityscore(self, url: str) -> Dict:
         """
         Check URL with IPQualityScore API
@@ -376,7 +559,8 @@ class RealTimeThreatDetector:
                 'strictness': 0  # 0 = lenient, 1 = balanced, 2 = strict
             }
             
-            response = requests.get(
+            response = provider_client.get(
+                'ipqualityscore',
                 self.config.IPQS_URL_API,
                 params=params,
                 timeout=self.config.TIMEOUT
@@ -413,7 +597,7 @@ class RealTimeThreatDetector:
                     'error': f'API error: {response.status_code}'
                 }
         
-        except requests.Timeout:
+        except APITimeoutError:
             logger.error(f"❌ IPQualityScore timeout")
             return {'success': False, 'error': 'Request timeout'}
         except Exception as e:
@@ -570,17 +754,16 @@ class RealTimeThreatDetector:
     
     def _get_cached_result(self, url: str) -> Optional[Dict]:
         """Get cached result if still valid"""
-        if url in self.results_cache:
-            result, timestamp = self.results_cache[url]
-            if time.time() - timestamp < self.config.CACHE_TTL:
-                return result
-            else:
-                del self.results_cache[url]
-        return None
+        return self.results_cache.get('realtime_detection', url)
+    
+    def _cache_result(self, url: str, result: Dict, ttl_seconds: Optional[int] = None):
+        """Cache detection result (default TTL: CACHE_TTL)"""
+        ttl = self.config.CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self.results_cache.set('realtime_detection', url, result, ttl)
     
-    def _cache_result(self, url: str, result: Dict):
-        """Cache detection result"""
-        self.results_cache[url] = (result, time.time())
+    def close(self):
+        """Stop the worker pool (running checks finish)"""
+        self.executor.shutdown(wait=False)
     
     def _error_response(self, url: str, error: str) -> Dict:
         """Generate error response"""
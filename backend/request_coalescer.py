@@ -0,0 +1,152 @@
+"""
+Request Coalescer Module
+
+Single-flight execution for duplicate scans: when several requests ask for
+the same URL at the same time, only the first one runs the scan and the
+others wait for its result.
+
+Features:
+- Keys are canonicalized (see cache_manager.canonicalize_url) so trivially
+  different spellings of a URL share one flight
+- Exceptions raised by the leader propagate to every waiter
+- Followers get a deep copy so callers can annotate results freely
+- Per-group counters of executed vs. absorbed duplicate scans
+- Optional scope (e.g. a user id) for calls whose side effects belong to
+  one caller, such as recording a scan in that user's history
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import copy
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cache_manager import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingStats:
+    """Counters for one coalescing group (e.g. 'scan_realtime')."""
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_waiters = 0
+
+    def to_dict(self, in_flight: int) -> Dict[str, Any]:
+        requests = self.executions + self.coalesced
+        return {
+            'requests': requests,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'in_flight': in_flight,
+            'max_waiters': self.max_waiters,
+            'coalesced_rate': round(self.coalesced / requests, 4) if requests else 0.0,
+        }
+
+
+class _Flight:
+    """One running execution and the number of callers waiting on it."""
+
+    def __init__(self):
+        self.future: Future = Future()
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    Named single-flight groups.
+
+    Usage:
+        result, shared = request_coalescer.do('scan_url', url, lambda: scan(url))
+    """
+
+    def __init__(self, key_func: Callable[[Any], str] = canonicalize_url):
+        """
+        Initialize request coalescer.
+
+        Args:
+            key_func: Maps a raw key (usually a URL) to its canonical form
+        """
+        self.key_func = key_func
+        self.lock = threading.Lock()
+        self._flights: Dict[Tuple[str, Any, str], _Flight] = {}
+        self._stats: Dict[str, CoalescingStats] = {}
+
+    def do(self, group: str, key: Any, fn: Callable[[], Any],
+           timeout: Optional[float] = None, scope: Any = None) -> Tuple[Any, bool]:
+        """
+        Run fn once per concurrent (group, key) and share its result.
+
+        Args:
+            group: Name of the call site; flights in different groups never merge
+            key: Raw key, canonicalized with key_func
+            fn: Zero-argument callable performing the actual work
+            timeout: Seconds a follower waits before giving up (None = no limit)
+            scope: Extra key part compared as-is; only calls with the same
+                scope share a flight
+
+        Returns:
+            (result, shared) where shared is True if another caller ran fn
+
+        Raises:
+            Whatever fn raised, in the leader and in every follower
+        """
+        flight_key = (group, scope, self.key_func(key))
+        with self.lock:
+            stats = self._stats.setdefault(group, CoalescingStats())
+            flight = self._flights.get(flight_key)
+            if flight is None:
+                flight = _Flight()
+                self._flights[flight_key] = flight
+                stats.executions += 1
+                leader = True
+            else:
+                flight.waiters += 1
+                stats.coalesced += 1
+                stats.max_waiters = max(stats.max_waiters, flight.waiters)
+                leader = False
+
+        if not leader:
+            logger.debug(f"Coalesced duplicate {group} request for {flight_key[2]}")
+            return copy.deepcopy(flight.future.result(timeout=timeout)), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self.lock:
+                stats.errors += 1
+                self._flights.pop(flight_key, None)
+            flight.future.set_exception(e)
+            raise
+        # Unregister before resolving so late arrivals start a fresh flight
+        with self.lock:
+            self._flights.pop(flight_key, None)
+        # Followers copy from a private snapshot, never from the leader's
+        # object, which the leader may still be annotating
+        flight.future.set_result(copy.deepcopy(result) if flight.waiters else result)
+        return result, False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters per group plus totals."""
+        with self.lock:
+            in_flight: Dict[str, int] = {}
+            for group, _, _ in self._flights:
+                in_flight[group] = in_flight.get(group, 0) + 1
+            groups = {name: stats.to_dict(in_flight.get(name, 0))
+                      for name, stats in self._stats.items()}
+        return {
+            'groups': groups,
+            'total_executions': sum(g['executions'] for g in groups.values()),
+            'total_coalesced': sum(g['coalesced'] for g in groups.values()),
+        }
+
+
+# Global coalescer shared by the scan endpoints
+request_coalescer = RequestCoalescer()
@@ -4,9 +4,14 @@ Combines all 6 security layers into a comprehensive risk assessment
 """
 
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+import copy
+import hashlib
+import json
 import logging
 
+from cache_manager import canonicalize_url, unified_cache
+
 # Import all security layers
 try:
     from security_layers.static_analysis import StaticAnalyzer
@@ -27,6 +32,32 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('RiskEngine')
 
+# Results of the static, signature and ML layers, reused across scans of the
+# same canonical URL with the same page content
+LAYER_CACHE_TTL = 3600  # 1 hour
+
+# page_data fields read by layers A, D and E; anything else (forms, title,
+# headers) does not change their results and is left out of the cache key
+LAYER_PAGE_FIELDS = ('html', 'scripts', 'iframes', 'redirects', 'load_time', 'resources')
+
+
+def page_fingerprint(page_data: Optional[dict]) -> str:
+    """Digest of the page_data fields the cached layers read ('' without page data)"""
+    if not page_data:
+        return ''
+    fields = {name: page_data.get(name) for name in LAYER_PAGE_FIELDS}
+    encoded = json.dumps(fields, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+def layer_cache_key(key: Tuple[str, str]) -> str:
+    """Cache key for a (url, page fingerprint) pair"""
+    url, fingerprint = key
+    return f'{canonicalize_url(url)}#{fingerprint}'
+
+
+unified_cache.register_namespace('risk_layers', LAYER_CACHE_TTL, key_func=layer_cache_key)
+
 
 class UnifiedRiskEngine:
     """
@@ -272,18 +303,16 @@ class UnifiedRiskEngine:
                 'timestamp': datetime.now().isoformat()
             }
     
+    # Layers whose result depends only on the URL and LAYER_PAGE_FIELDS
+    URL_ONLY_LAYERS = ('static_analysis', 'signature_matching', 'machine_learning')
+
     def _run_all_layers(self, url: str, domain: str, page_data: dict) -> dict:
         """Execute all 6 security layers"""
         results = {}
+        url_layers = self._run_url_layers(url, page_data)
         
         # Layer A: Static Analysis (always runs - fast)
-        logger.info("🔍 Layer A: Static Analysis...")
-        try:
-            results['static_analysis'] = self.static_analyzer.analyze(url, page_data)
-            logger.info(f"   ✓ Risk Score: {results['static_analysis']['risk_score']}/100")
-        except Exception as e:
-            logger.error(f"   ✗ Error: {e}")
-            results['static_analysis'] = {'risk_score': 0, 'status': 'error', 'error': str(e)}
+        results['static_analysis'] = url_layers['static_analysis']
         
         # Layer B: OWASP Checks (requires page data)
         logger.info("🔍 Layer B: OWASP Security Checks...")
@@ -307,6 +336,54 @@ class UnifiedRiskEngine:
             results['threat_intelligence'] = {'reputation_score': 50, 'risk_score': 50, 'status': 'error', 'error': str(e)}
         
         # Layer D: Signature Matching
+        results['signature_matching'] = url_layers['signature_matching']
+        
+        # Layer E: Enhanced ML
+        results['machine_learning'] = url_layers['machine_learning']
+        
+        # Layer F: Behavioral Heuristics
+        logger.info("🔍 Layer F: Behavioral Heuristics...")
+        try:
+            results['behavioral_heuristics'] = self.behavioral_analyzer.analyze(url, page_data)
+            logger.info(f"   ✓ Heuristic Score: {results['behavioral_heuristics']['heuristic_score']}/100")
+        except Exception as e:
+            logger.error(f"   ✗ Error: {e}")
+            results['behavioral_heuristics'] = {'heuristic_score': 0, 'status': 'error', 'error': str(e)}
+        
+        return results
+    
+    def _run_url_layers(self, url: str, page_data: Optional[dict]) -> dict:
+        """
+        Layers A, D and E; cached per canonical URL and page content
+        
+        Rescans of an unchanged page reuse the results. Callers get a
+        private copy, so they may annotate the results.
+        """
+        results = unified_cache.get_or_load(
+            'risk_layers', (url, page_fingerprint(page_data)),
+            lambda: self._compute_url_layers(url, page_data),
+            classify=self._classify_url_layers
+        )
+        return copy.deepcopy(results)
+    
+    @classmethod
+    def _classify_url_layers(cls, results: dict):
+        """Layer errors are not cached (the namespace has no error TTL)"""
+        if any(results[name].get('status') == 'error' for name in cls.URL_ONLY_LAYERS):
+            return 'error'
+        return None
+    
+    def _compute_url_layers(self, url: str, page_data: Optional[dict]) -> dict:
+        results = {}
+        
+        logger.info("🔍 Layer A: Static Analysis...")
+        try:
+            results['static_analysis'] = self.static_analyzer.analyze(url, page_data)
+            logger.info(f"   ✓ Risk Score: {results['static_analysis']['risk_score']}/100")
+        except Exception as e:
+            logger.error(f"   ✗ Error: {e}")
+            results['static_analysis'] = {'risk_score': 0, 'status': 'error', 'error': str(e)}
+        
         logger.info("🔍 Layer D: Signature Matching...")
         try:
             results['signature_matching'] = self.signature_matcher.analyze(url, page_data)
@@ -315,7 +392,6 @@ class UnifiedRiskEngine:
             logger.error(f"   ✗ Error: {e}")
             results['signature_matching'] = {'signature_score': 0, 'status': 'error', 'error': str(e)}
         
-        # Layer E: Enhanced ML
         logger.info("🔍 Layer E: Machine Learning...")
         try:
             results['machine_learning'] = self.ml_analyzer.analyze(url, page_data)
@@ -324,15 +400,6 @@ class UnifiedRiskEngine:
             logger.error(f"   ✗ Error: {e}")
             results['machine_learning'] = {'ml_confidence': 0, 'risk_score': 0, 'status': 'error', 'error': str(e)}
         
-        # Layer F: Behavioral Heuristics
-        logger.info("🔍 Layer F: Behavioral Heuristics...")
-        try:
-            results['behavioral_heuristics'] = self.behavioral_analyzer.analyze(url, page_data)
-            logger.info(f"   ✓ Heuristic Score: {results['behavioral_heuristics']['heuristic_score']}/100")
-        except Exception as e:
-            logger.error(f"   ✗ Error: {e}")
-            results['behavioral_heuristics'] = {'heuristic_score': 0, 'status': 'error', 'error': str(e)}
-        
         return results
     
     def _calculate_overall_risk(self, layer_results: dict) -> float:
@@ -1,36 +1,94 @@
 # MALWARE SNIPPER - PERSISTENT SCAN STORAGE
-# JSON-based storage for scan statistics and history
+# Journaled storage for scan statistics and history
+#
+# Every scan appends one JSON line to a journal next to the snapshot file.
+# Counters and the recent-scan window live in memory; a background timer
+# folds the journal into scan_stats.json and truncates it. On startup the
+# snapshot is loaded and any newer journal lines are replayed, so a crash
+# loses at most the lines not yet flushed to the journal.
 
+import atexit
 import json
 import os
+import threading
+from collections import deque
 from datetime import datetime
+from itertools import islice
 from threading import Lock
 
+from config import Config
+
 class ScanStorage:
     """Thread-safe persistent storage for scan statistics"""
-    
-    def __init__(self, storage_path='data/scan_stats.json'):
+
+    def __init__(self, storage_path='data/scan_stats.json',
+                 snapshot_interval=Config.SCAN_STATS_SNAPSHOT_INTERVAL,
+                 history_limit=Config.SCAN_HISTORY_LIMIT):
         self.storage_path = storage_path
+        self.journal_path = os.path.splitext(storage_path)[0] + '.journal.jsonl'
+        self.snapshot_interval = snapshot_interval
         self.lock = Lock()
-        self._ensure_data_directory()
-        self.stats = self._load_stats()
-    
+        self.stats = self._get_default_stats()
+        self.history = deque(maxlen=history_limit)
+        self.seq = 0
+        self.snapshot_seq = 0
+        self._load_stats()
+        # Opened on the first scan, so an idle process creates no files
+        self._journal = None
+        self._stop = threading.Event()
+        self._timer = None
+        if snapshot_interval and snapshot_interval > 0:
+            self._timer = threading.Thread(target=self._snapshot_loop,
+                                           name='scan-stats-snapshot', daemon=True)
+            self._timer.start()
+        atexit.register(self.close)
+
     def _ensure_data_directory(self):
         """Create data directory if it doesn't exist"""
-        os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-    
+        os.makedirs(os.path.dirname(self.storage_path) or '.', exist_ok=True)
+
+    def _journal_file(self):
+        """Open the journal for appending on first use (caller holds the lock)"""
+        if self._journal is None:
+            self._ensure_data_directory()
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        return self._journal
+
     def _load_stats(self):
-        """Load statistics from JSON file"""
+        """Load the snapshot, then replay journal entries newer than it"""
         try:
             if os.path.exists(self.storage_path):
                 with open(self.storage_path, 'r') as f:
-                    return json.load(f)
-            else:
-                return self._get_default_stats()
+                    snapshot = json.load(f)
+                for key in ('total_scans', 'benign_count', 'suspicious_count',
+                            'malicious_count', 'last_updated'):
+                    if key in snapshot:
+                        self.stats[key] = snapshot[key]
+                self.history.extend(snapshot.get('scan_history', []))
+                self.snapshot_seq = self.seq = snapshot.get('last_seq', 0)
         except Exception as e:
             print(f"⚠️ Error loading stats: {e}")
-            return self._get_default_stats()
-    
+
+        replayed = 0
+        try:
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # Torn final line from a crash mid-append
+                            continue
+                        if entry.get('seq', 0) <= self.snapshot_seq:
+                            continue
+                        self._apply(entry)
+                        self.seq = entry['seq']
+                        replayed += 1
+        except Exception as e:
+            print(f"⚠️ Error replaying stats journal: {e}")
+        if replayed:
+            print(f"✅ Replayed {replayed} scan(s) from stats journal")
+
     def _get_default_stats(self):
         """Return default statistics structure"""
         return {
@@ -39,21 +97,94 @@ class ScanStorage:
             'suspicious_count': 0,
             'malicious_count': 0,
             'last_updated': datetime.now().isoformat(),
-            'scan_history': []
         }
-    
+
+    def _apply(self, entry):
+        """Fold one journal entry into the in-memory counters and history"""
+        self.stats['total_scans'] += 1
+        counter = f"{entry.get('risk')}_count"
+        if counter in self.stats:
+            self.stats[counter] += 1
+        self.stats['last_updated'] = entry['timestamp']
+        self.history.append({
+            'url': entry['url'],
+            'risk': entry['risk'],
+            'score': entry['score'],
+            'ml_prediction': entry.get('ml_prediction'),
+            'timestamp': entry['timestamp']
+        })
+
     def _save_stats(self):
-        """Save statistics to JSON file"""
+        """Write a snapshot and drop the journal lines it covers"""
+        with self.lock:
+            snapshot = dict(self.stats)
+            snapshot['scan_history'] = list(self.history)
+            snapshot['last_seq'] = seq = self.seq
+            # A journal left by an earlier run is covered by this snapshot too
+            offset = None
+            if self._journal is not None or os.path.exists(self.journal_path):
+                journal = self._journal_file()
+                journal.flush()
+                offset = journal.tell()
+
+        # Serialize and fsync outside the lock so scans keep appending
         try:
-            with open(self.storage_path, 'w') as f:
-                json.dump(self.stats, f, indent=2)
+            self._ensure_data_directory()
+            tmp_path = self.storage_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.storage_path)
         except Exception as e:
             print(f"❌ Error saving stats: {e}")
-    
+            return False
+
+        with self.lock:
+            self.snapshot_seq = seq
+            self._truncate_journal(offset)
+        return True
+
+    def _truncate_journal(self, offset):
+        """Keep only journal bytes written after offset (caller holds the lock)"""
+        if offset is None or self._journal.closed:
+            return
+        self._journal.flush()
+        with open(self.journal_path, 'r+', encoding='utf-8') as f:
+            f.seek(offset)
+            tail = f.read()
+            f.seek(0)
+            f.write(tail)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal.seek(0, os.SEEK_END)
+
+    def _snapshot_loop(self):
+        """Compact the journal every snapshot_interval seconds"""
+        while not self._stop.wait(self.snapshot_interval):
+            if self.seq != self.snapshot_seq:
+                self._save_stats()
+
+    def _stats_summary(self):
+        """Counters with percentages (caller holds the lock)"""
+        total = self.stats['total_scans']
+        summary = {
+            'total_scans': total,
+            'benign_count': self.stats['benign_count'],
+            'suspicious_count': self.stats['suspicious_count'],
+            'malicious_count': self.stats['malicious_count'],
+            'last_updated': self.stats['last_updated'],
+        }
+        for risk in ('benign', 'suspicious', 'malicious'):
+            count = self.stats[f'{risk}_count']
+            summary[f'{risk}_percentage'] = round((count / total * 100) if total > 0 else 0, 1)
+        return summary
+
     def increment_scan(self, url, risk_category, risk_score, ml_prediction=None):
         """
         Increment scan counters and add to history
-        
+
         Args:
             url: The scanned URL
             risk_category: 'benign', 'suspicious', or 'malicious'
@@ -61,60 +192,54 @@ class ScanStorage:
             ml_prediction: ML model prediction label
         """
         with self.lock:
-            # Increment counters
-            self.stats['total_scans'] += 1
-            
-            if risk_category == 'benign':
-                self.stats['benign_count'] += 1
-            elif risk_category == 'suspicious':
-                self.stats['suspicious_count'] += 1
-            elif risk_category == 'malicious':
-                self.stats['malicious_count'] += 1
-            
-            # Add to history (keep last 1000 scans)
-            scan_entry = {
+            self.seq += 1
+            entry = {
+                'seq': self.seq,
                 'url': url,
                 'risk': risk_category,
                 'score': risk_score,
                 'ml_prediction': ml_prediction,
                 'timestamp': datetime.now().isoformat()
             }
-            
-            self.stats['scan_history'].append(scan_entry)
-            
-            # Trim history to last 1000 entries
-            if len(self.stats['scan_history']) > 1000:
-                self.stats['scan_history'] = self.stats['scan_history'][-1000:]
-            
-            self.stats['last_updated'] = datetime.now().isoformat()
-            
-            # Save to disk
-            self._save_stats()
-            
-            return self.get_stats()
-    
+            self._apply(entry)
+
+            # One appended line per scan; the snapshot timer does the rewrite
+            try:
+                journal = self._journal_file()
+                journal.write(json.dumps(entry, default=str) + '\n')
+                journal.flush()
+            except Exception as e:
+                print(f"❌ Error writing stats journal: {e}")
+
+            return self._stats_summary()
+
     def get_stats(self):
         """Get current statistics"""
         with self.lock:
-            return {
-                'total_scans': self.stats['total_scans'],
-                'benign_count': self.stats['benign_count'],
-                'suspicious_count': self.stats['suspicious_count'],
-                'malicious_count': self.stats['malicious_count'],
-                'last_updated': self.stats['last_updated'],
-                'benign_percentage': round((self.stats['benign_count'] / self.stats['total_scans'] * 100) if self.stats['total_scans'] > 0 else 0, 1),
-                'suspicious_percentage': round((self.stats['suspicious_count'] / self.stats['total_scans'] * 100) if self.stats['total_scans'] > 0 else 0, 1),
-                'malicious_percentage': round((self.stats['malicious_count'] / self.stats['total_scans'] * 100) if self.stats['total_scans'] > 0 else 0, 1)
-            }
-    
+            return self._stats_summary()
+
     def get_recent_scans(self, limit=50):
         """Get recent scan history"""
         with self.lock:
-            return self.stats['scan_history'][-limit:][::-1]  # Return most recent first
-    
+            return list(islice(reversed(self.history), max(limit, 0)))  # Most recent first
+
     def reset_stats(self):
         """Reset all statistics (admin function)"""
         with self.lock:
             self.stats = self._get_default_stats()
+            self.history.clear()
+        self._save_stats()
+        return self.get_stats()
+
+    def close(self):
+        """Stop the snapshot timer and write a final snapshot"""
+        if self._stop.is_set() or (self._journal is not None and self._journal.closed):
+            return
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join(timeout=5)
+        if self.seq != self.snapshot_seq:
             self._save_stats()
-            return self.get_stats()
+        with self.lock:
+            if self._journal is not None:
+                self._journal.close()
@@ -1,11 +1,16 @@
 # URL Scanner Routes - End-to-end threat detection pipeline
 # Integrates with real-time threat detection and safe redirect system
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from urllib.parse import unquote
+import json
 import logging
 from typing import Optional
 
+from request_coalescer import request_coalescer
+from async_scanner import AsyncURLScanner, BatchScanProgress
+from config import Config
+
 logger = logging.getLogger(__name__)
 
 # Create blueprint for URL scanner routes
@@ -17,6 +22,11 @@ notification_service = None
 risk_engine = None
 socketio = None
 
+# Shared by all batch requests; its thread pool caps concurrent URL scans
+# at Config.MAX_CONCURRENT_SCANS across requests. URLs reach the safety
+# service as submitted, like single-URL scans
+batch_scanner = AsyncURLScanner(max_concurrent=Config.MAX_CONCURRENT_SCANS, validate=False)
+
 def init_scanner_routes(app, _url_safety_service, _notification_service, _risk_engine, _socketio=None):
     """
     Initialize scanner routes with services.
@@ -149,8 +159,15 @@ def submit_url_for_scanning():
         }), 400
     
     try:
-        # Perform URL safety check
-        result = url_safety_service.check_url_safety(target_url, user_id)
+        # Perform URL safety check (one check per URL and user across concurrent
+        # requests; each user's scan is recorded in their own history)
+        result, shared = request_coalescer.do(
+            'scanner_submit', target_url,
+            lambda: url_safety_service.check_url_safety(target_url, user_id),
+            scope=user_id
+        )
+        if shared:
+            logger.info(f"[{source.upper()}] Reused in-flight scan for {target_url}")
         
         logger.info(f"[{source.upper()}] URL scanned: {target_url}")
         logger.info(f"  Verdict: {result['verdict']} | Risk: {result['risk_score']}")
@@ -202,17 +219,35 @@ def batch_scan_urls():
                     "url": "https://url1.com",
                     "verdict": "clean",
                     "risk_score": 0,
+                    "scan_duration_ms": 412.5,
                     ...
                 },
-                ...
+                {
+                    "url": "https://url2.com",
+                    "verdict": "suspicious",
+                    "action": "warned",
+                    "risk_score": 0,
+                    "scan_id": null,
+                    "error": "Scan timeout after 10 seconds",
+                    ...
+                }
             ],
             "summary": {
                 "total": 2,
                 "clean": 1,
-                "suspicious": 0,
-                "malicious": 1
+                "suspicious": 1,
+                "malicious": 0
             }
         }
+    
+    A URL whose scan fails or times out is reported as suspicious/warned
+    with an "error" field instead of failing the whole batch.
+    
+    Streaming (Accept: application/x-ndjson):
+        One JSON object per line, written as each URL finishes:
+        {"index": 1, "url": "https://url2.com", "verdict": "suspicious", ...}
+        {"index": 0, "url": "https://url1.com", "verdict": "clean", ...}
+        {"summary": {"total": 2, "clean": 1, ...}, "progress": {"completed_urls": 2, ...}}
     """
     data = request.get_json() or {}
     urls = data.get('urls', [])
@@ -221,28 +256,31 @@ def batch_scan_urls():
     if not urls or not isinstance(urls, list):
         return jsonify({'error': 'URLs list required'}), 400
     
-    if len(urls) > 100:
-        return jsonify({'error': 'Maximum 100 URLs per request'}), 400
+    if len(urls) > Config.MAX_BATCH_URLS:
+        return jsonify({'error': f'Maximum {Config.MAX_BATCH_URLS} URLs per request'}), 400
+    
+    scan_function = lambda url: url_safety_service.check_url_safety(url, user_id)
+    
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    if best == 'application/x-ndjson':
+        return Response(_stream_batch_scan(urls, scan_function, user_id),
+                        mimetype='application/x-ndjson', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
     
     results = []
     summary = {'total': len(urls), 'clean': 0, 'suspicious': 0, 'malicious': 0}
     
     try:
-        for url in urls:
-            result = url_safety_service.check_url_safety(url, user_id)
-            
-            results.append({
-                'url': url,
-                'verdict': result['verdict'],
-                'action': result['action'],
-                'risk_score': result['risk_score'],
-                'engine_detection_count': result['engine_detection_count'],
-                'engine_total_count': result['engine_total_count'],
-                'scan_id': result['scan_id']
-            })
-            
-            # Update summary
-            summary[result['verdict']] += 1
+        # Duplicates are scanned once; distinct URLs run concurrently
+        scan_results = batch_scanner.scan_urls_sync(
+            urls, scan_function, max_urls=Config.MAX_BATCH_URLS
+        )
+        
+        for scan in scan_results:
+            results.append(_batch_entry(scan))
+            summary[results[-1]['verdict']] += 1
         
         logger.info(f"Batch scan completed: {len(urls)} URLs | User: {user_id}")
         
@@ -256,6 +294,52 @@ def batch_scan_urls():
         logger.error(f"Batch scan error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _batch_entry(scan):
+    """Per-URL batch result; failed scans are reported as suspicious/warned"""
+    if scan.is_error:
+        # Same fields as a scanned URL; unscanned URLs are not allowed silently
+        return {
+            'url': scan.url,
+            'verdict': 'suspicious',
+            'action': 'warned',
+            'risk_score': scan.risk_score,
+            'engine_detection_count': 0,
+            'engine_total_count': 0,
+            'scan_id': None,
+            'error': scan.error,
+            'scan_duration_ms': round(scan.scan_duration_seconds * 1000, 1)
+        }
+    result = scan.raw_results
+    return {
+        'url': scan.url,
+        'verdict': result['verdict'],
+        'action': result['action'],
+        'risk_score': result['risk_score'],
+        'engine_detection_count': result['engine_detection_count'],
+        'engine_total_count': result['engine_total_count'],
+        'scan_id': result['scan_id'],
+        'scan_duration_ms': round(scan.scan_duration_seconds * 1000, 1)
+    }
+
+def _stream_batch_scan(urls, scan_function, user_id):
+    """Yield one NDJSON line per URL as it completes, then a summary line"""
+    summary = {'total': len(urls), 'clean': 0, 'suspicious': 0, 'malicious': 0}
+    progress = BatchScanProgress(total_urls=len(urls))
+    
+    try:
+        for index, scan in batch_scanner.iter_urls_sync(
+                urls, scan_function, max_urls=Config.MAX_BATCH_URLS, progress=progress):
+            entry = _batch_entry(scan)
+            summary[entry['verdict']] += 1
+            yield json.dumps({'index': index, **entry}, default=str) + '\n'
+    except Exception as e:
+        logger.error(f"Batch scan stream error: {e}")
+        yield json.dumps({'success': False, 'error': str(e)}) + '\n'
+        return
+    
+    logger.info(f"Batch scan streamed: {len(urls)} URLs | User: {user_id}")
+    yield json.dumps({'summary': summary, 'progress': progress.to_dict()}) + '\n'
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ENDPOINT: /api/scanner/quick-check (Ultra-fast basic check)
 # ═══════════════════════════════════════════════════════════════════════════
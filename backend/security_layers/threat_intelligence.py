@@ -3,12 +3,36 @@ LAYER C: THREAT INTELLIGENCE
 Integration with multiple threat intelligence APIs and databases
 """
 
-import requests
 import hashlib
 import time
 from typing import Dict, List
 from datetime import datetime, timedelta
 
+from config import Config
+from cache_manager import unified_cache
+from provider_client import provider_client
+from quota_scheduler import get_scheduler
+from url_reputation import reputation_db, safebrowsing_full_hash_check
+
+# VirusTotal URL reports, shared by every ThreatIntelligence instance.
+# Expired reports are served while a background refresh runs.
+unified_cache.register_namespace(
+    'ti_virustotal', 3600,
+    stale_seconds=Config.TI_CACHE_STALE_SECONDS,
+    negative_ttl_seconds=Config.TI_NEGATIVE_CACHE_TTL,
+    error_ttl_seconds=Config.TI_ERROR_CACHE_TTL
+)
+
+
+def classify_ti_result(result: dict):
+    """Cache class of a TI lookup: None (positive), 'negative' or 'error'"""
+    status = result.get('status', '')
+    if status == 'success':
+        return None
+    if status == 'not_found':
+        return 'negative'
+    return 'error'
+
 class ThreatIntelligence:
     """Integrates multiple threat intelligence sources"""
     
@@ -22,9 +46,10 @@ class ThreatIntelligence:
                 - abuseipdb
                 - alienvault_otx (optional)
                 - urlscan (optional)
+                - safebrowsing (optional, confirms reputation-list prefix hits)
         """
         self.api_keys = api_keys or {}
-        self.cache = {}
+        self.cache = unified_cache
         self.cache_duration = 3600  # 1 hour
         self.findings = []
         self.reputation_score = 100  # Start at 100 (clean), decrease for threats
@@ -58,6 +83,7 @@ class ThreatIntelligence:
             phishtank_result = self._check_phishtank(url)
             openphish_result = self._check_openphish(url)
             urlscan_result = self._check_urlscan(url)
+            lists_result = self._check_reputation_lists(url)
             
             # Aggregate results
             ti_sources = {
@@ -66,7 +92,8 @@ class ThreatIntelligence:
                 'alienvault_otx': otx_result,
                 'phishtank': phishtank_result,
                 'openphish': openphish_result,
-                'urlscan': urlscan_result
+                'urlscan': urlscan_result,
+                'reputation_lists': lists_result
             }
             
             # Calculate overall reputation
@@ -94,22 +121,60 @@ class ThreatIntelligence:
         if not api_key or api_key == 'your_api_key_here':
             return {'status': 'no_api_key', 'threat_detected': False}
         
+        # Cached (possibly stale-while-revalidating) or fetched now
+        result = self.cache.get_or_load(
+            'ti_virustotal', url,
+            lambda: self._fetch_virustotal(url, api_key),
+            classify=classify_ti_result,
+            ttl_seconds=self.cache_duration
+        )
+        if result.get('status') == 'success':
+            self._apply_virustotal_findings(result)
+        return result
+    
+    def warm(self, url: str, acquire=None) -> str:
+        """
+        Fill the VirusTotal cache for a URL without recording findings
+
+        Args:
+            url: URL to look up
+            acquire: Optional callable run before a provider request; returning
+                     False skips the lookup (e.g. quota reserved for live scans)
+
+        Returns:
+            'cached' if a fresh report was already cached (memory or SQLite),
+            'fetched' if the provider was queried, 'skipped' otherwise
+        """
+        api_key = self.api_keys.get('virustotal')
+        if not api_key or api_key == 'your_api_key_here':
+            return 'skipped'
+        if self.cache.get_entry('ti_virustotal', url) is not None:
+            return 'cached'
+        if acquire is not None and not acquire():
+            return 'skipped'
+        self.cache.get_or_load(
+            'ti_virustotal', url,
+            lambda: self._fetch_virustotal(url, api_key),
+            classify=classify_ti_result,
+            ttl_seconds=self.cache_duration
+        )
+        return 'fetched'
+
+    def _fetch_virustotal(self, url: str, api_key: str) -> dict:
+        """Fetch a VirusTotal URL report (may run on a cache refresh thread)"""
         try:
-            # Check cache
-            cache_key = f"vt_{hashlib.md5(url.encode()).hexdigest()}"
-            if cache_key in self.cache:
-                cached, timestamp = self.cache[cache_key]
-                if time.time() - timestamp < self.cache_duration:
-                    return cached
-            
             # URL ID for VT API
             url_id = hashlib.sha256(url.encode()).hexdigest()
             
             headers = {'x-apikey': api_key}
-            response = requests.get(
-                f'https://www.virustotal.com/api/v3/urls/{url_id}',
-                headers=headers,
-                timeout=5
+            response = get_scheduler('virustotal').call(
+                lambda: provider_client.get(
+                    'virustotal',
+                    f'https://www.virustotal.com/api/v3/urls/{url_id}',
+                    headers=headers,
+                    timeout=5
+                ),
+                key=('url_report', url_id)
             )
             
             if response.status_code == 200:
@@ -126,23 +191,28 @@ class ThreatIntelligence:
                     'suspicious_count': suspicious,
                     'total_engines': sum(stats.values())
                 }
-                
-                if malicious > 0:
-                    self.findings.append(f"🚨 VirusTotal: {malicious} engines detected as malicious")
-                    self.reputation_score -= min(40, malicious * 5)
-                elif suspicious > 3:
-                    self.findings.append(f"⚠️ VirusTotal: {suspicious} engines marked suspicious")
-                    self.reputation_score -= min(20, suspicious * 3)
-                
-                # Cache result
-                self.cache[cache_key] = (result, time.time())
                 return result
             
+            if response.status_code == 404:
+                # VirusTotal has never seen this URL
+                return {'status': 'not_found', 'threat_detected': False}
+            
             return {'status': 'api_error', 'threat_detected': False}
             
         except Exception as e:
             return {'status': f'error: {str(e)}', 'threat_detected': False}
     
+    def _apply_virustotal_findings(self, result: dict):
+        """Record findings and reputation impact of a VirusTotal result"""
+        malicious = result.get('malicious_count', 0)
+        suspicious = result.get('suspicious_count', 0)
+        if malicious > 0:
+            self.findings.append(f"🚨 VirusTotal: {malicious} engines detected as malicious")
+            self.reputation_score -= min(40, malicious * 5)
+        elif suspicious > 3:
+            self.findings.append(f"⚠️ VirusTotal: {suspicious} engines marked suspicious")
+            self.reputation_score -= min(20, suspicious * 3)
+    
     def _check_abuseipdb(self, ip_address: str) -> dict:
         """Check IP against AbuseIPDB"""
         if not ip_address:
@@ -154,7 +224,8 @@ class ThreatIntelligence:
         
         try:
             headers = {'Key': api_key, 'Accept': 'application/json'}
-            response = requests.get(
+            response = provider_client.get(
+                'abuseipdb',
                 'https://api.abuseipdb.com/api/v2/check',
                 headers=headers,
                 params={'ipAddress': ip_address, 'maxAgeInDays': 90},
@@ -194,9 +265,11 @@ class ThreatIntelligence:
         
         # OTX has a free tier without API key for basic queries
         try:
-            response = requests.get(
+            response = provider_client.get(
+                'alienvault_otx',
                 f'https://otx.alienvault.com/api/v1/indicators/domain/{domain}/general',
-                timeout=5
+                timeout=5,
+                hedge=True
             )
             
             if response.status_code == 200:
@@ -227,7 +300,8 @@ class ThreatIntelligence:
         """Check URL against PhishTank database"""
         try:
             # PhishTank free API (limited)
-            response = requests.post(
+            response = provider_client.post(
+                'phishtank',
                 'https://checkurl.phishtank.com/checkurl/',
                 data={
                     'url': url,
@@ -276,16 +350,43 @@ class ThreatIntelligence:
         except Exception as e:
             return {'status': f'error: {str(e)}', 'threat_detected': False}
     
+    def _check_reputation_lists(self, url: str) -> dict:
+        """Check URL against the offline hash-prefix lists (see url_reputation.py)"""
+        try:
+            api_key = self.api_keys.get('safebrowsing')
+            full_hash_check = safebrowsing_full_hash_check(api_key) if api_key else None
+            result = reputation_db.lookup(url, full_hash_check)
+            if result['status'] == 'unavailable':
+                return None
+            
+            threat_detected = result['status'] == 'match'
+            if threat_detected:
+                self.findings.append(
+                    f"🚨 Reputation lists: URL listed as {', '.join(result['threat_types'])}"
+                )
+                self.reputation_score -= 40
+            
+            return {
+                'status': 'success' if result['status'] in ('clean', 'match') else result['status'],
+                'threat_detected': threat_detected,
+                'threat_types': result['threat_types']
+            }
+            
+        except Exception as e:
+            return {'status': f'error: {str(e)}', 'threat_detected': False}
+    
     def _check_urlscan(self, url: str) -> dict:
         """Check URL against urlscan.io"""
         api_key = self.api_keys.get('urlscan')
         
         try:
             # Search for existing scans
-            response = requests.get(
+            response = provider_client.get(
+                'urlscan',
                 'https://urlscan.io/api/v1/search/',
                 params={'q': f'page.url:"{url}"'},
-                timeout=5
+                timeout=5,
+                hedge=True
             )
             
             if response.status_code == 200:
@@ -0,0 +1,322 @@
+"""
+Stats Stream Module
+
+Sequenced snapshot + delta stream of the dashboard statistics.
+
+Dashboards used to poll /api/dashboard/stats, /api/dashboard-stats and
+/api/scan/stats and receive the full JSON every time, recent_scans arrays
+included. A client now subscribes once, gets a snapshot carrying a sequence
+number, and from then on only deltas: counter increments, changed values and
+newly appended scan records, merged over Config.STATS_STREAM_INTERVAL.
+
+Features:
+- Counter sources are diffed on each tick, so existing code keeps mutating
+  its own dicts; integers become increments, other values are replaced
+- Appended records (scans, traffic) are kept in bounded lists for snapshots
+- Recent deltas are retained so a reconnecting client resumes from its last
+  sequence number; older positions get a fresh snapshot
+- Optional MessagePack encoding (falls back to JSON when msgpack is absent)
+- Nothing is computed while no client is subscribed
+
+Socket.IO usage:
+    socket.emit('stats_subscribe', {stream: streamId, since: lastSeq, encoding: 'msgpack'})
+    socket.on('stats_snapshot', s => ...)   // {stream, seq, counters, records}
+    socket.on('stats_delta', d => ...)      // {seq, inc, set, append}
+    Apply only deltas with seq greater than the last one applied.
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import logging
+import threading
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+ENCODINGS = ('json', 'msgpack')
+
+
+def encode(message: Dict[str, Any], encoding: str = 'json'):
+    """Wire form of a snapshot or delta: a dict for JSON, bytes for MessagePack"""
+    if encoding == 'msgpack' and MSGPACK_AVAILABLE:
+        return msgpack.packb(message, use_bin_type=True, default=str)
+    return message
+
+
+def diff_counters(previous: Dict[str, Any], current: Dict[str, Any]):
+    """
+    Changes from previous to current.
+
+    Returns:
+        (increments, replaced) - integer fields as differences, anything
+        else that changed with its new value
+    """
+    increments, replaced = {}, {}
+    for field, value in current.items():
+        old = previous.get(field)
+        if value == old and field in previous:
+            continue
+        if (isinstance(value, int) and not isinstance(value, bool)
+                and isinstance(old, int) and not isinstance(old, bool)):
+            increments[field] = value - old
+        else:
+            replaced[field] = value
+    return increments, replaced
+
+
+class StatsStream:
+    """
+    Snapshot/delta publisher for dashboard statistics.
+
+    Usage:
+        stats_stream.add_source('realtime', lambda: real_time_stats)
+        stats_stream.append('scans', scan_record)
+        stats_stream.attach(socketio)
+    """
+
+    def __init__(self, socketio=None, interval: float = Config.STATS_STREAM_INTERVAL,
+                 history: int = Config.STATS_STREAM_HISTORY,
+                 max_records: int = Config.STATS_STREAM_RECORDS, namespace: str = '/'):
+        """
+        Initialize stats stream.
+
+        Args:
+            socketio: flask_socketio.SocketIO used for delivery (see attach)
+            interval: Seconds between delta ticks
+            history: Deltas retained for resuming clients
+            max_records: Records kept per list for snapshots
+            namespace: Socket.IO namespace of the dashboards
+        """
+        self.socketio = socketio
+        self.interval = interval
+        self.max_records = max_records
+        self.namespace = namespace
+        self.lock = threading.RLock()
+        # Sequence numbers restart with the process; the id tells clients apart
+        self.stream_id = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._counters: Dict[str, Dict[str, Any]] = {}
+        self._records: Dict[str, deque] = {}
+        self._appended: Dict[str, List[Dict[str, Any]]] = {}
+        self._deltas: deque = deque(maxlen=history)
+        self._subscribers: Dict[str, str] = {}  # sid -> encoding
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {'ticks': 0, 'deltas': 0, 'snapshots': 0, 'resumes': 0, 'errors': 0}
+
+    def attach(self, socketio):
+        """Deliver through socketio and register the stats_* handlers"""
+        self.socketio = socketio
+        register_handlers(socketio, self)
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Producers
+    # ───────────────────────────────────────────────────────────────────────
+
+    def add_source(self, name: str, read: Callable[[], Dict[str, Any]]):
+        """Register a counter dict, read (and diffed) on every tick"""
+        with self.lock:
+            self._sources[name] = read
+            self._counters[name] = self._read(name, read)
+
+    def append(self, name: str, record: Dict[str, Any]):
+        """Record a new entry of a list (e.g. a finished scan)"""
+        with self.lock:
+            pending = self._appended.setdefault(name, [])
+            pending.append(record)
+            # Only the newest entries matter to a list capped at max_records
+            del pending[:-self.max_records]
+
+    def _read(self, name: str, read: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return dict(read() or {})
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Stats source {name} failed: {e}")
+            return dict(self._counters.get(name, {}))
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Snapshots and deltas
+    # ───────────────────────────────────────────────────────────────────────
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full state as of the current sequence number (newest records first)"""
+        with self.lock:
+            self.stats['snapshots'] += 1
+            return {
+                'stream': self.stream_id,
+                'seq': self.seq,
+                'counters': {name: dict(values) for name, values in self._counters.items()},
+                'records': {name: list(records) for name, records in self._records.items()},
+            }
+
+    def since(self, seq: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Deltas after seq, or None when seq is too old (or unknown) to resume from.
+        """
+        with self.lock:
+            if seq == self.seq:
+                return []
+            if seq > self.seq or not self._deltas or seq < self._deltas[0]['seq'] - 1:
+                return None
+            return [delta for delta in self._deltas if delta['seq'] > seq]
+
+    def tick(self) -> Optional[Dict[str, Any]]:
+        """Compute the next delta and send it to subscribers (None if nothing changed)"""
+        with self.lock:
+            delta = self._tick()
+            # Emitted under the lock so subscribers see deltas in sequence order
+            if delta is not None and self._subscribers:
+                self._emit(delta, set(self._subscribers.values()))
+        return delta
+
+    def _tick(self) -> Optional[Dict[str, Any]]:
+        self.stats['ticks'] += 1
+        increments, replaced = {}, {}
+        for name, read in self._sources.items():
+            current = self._read(name, read)
+            inc, changed = diff_counters(self._counters.get(name, {}), current)
+            if inc:
+                increments[name] = inc
+            if changed:
+                replaced[name] = changed
+            self._counters[name] = current
+        if not (increments or replaced or self._appended):
+            return None
+
+        self.seq += 1
+        delta = {'seq': self.seq}
+        if increments:
+            delta['inc'] = increments
+        if replaced:
+            delta['set'] = replaced
+        if self._appended:
+            for name, records in self._appended.items():
+                self._records.setdefault(name, deque(maxlen=self.max_records)).extendleft(records)
+            delta['append'] = self._appended
+            self._appended = {}
+        self._deltas.append(delta)
+        self.stats['deltas'] += 1
+        return delta
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Delivery
+    # ───────────────────────────────────────────────────────────────────────
+
+    def subscribe(self, sid: str, since: Optional[int] = None, encoding: str = 'json',
+                  stream_id: Optional[str] = None):
+        """
+        Add a client and return what it must receive first.
+
+        Returns:
+            ('stats_delta', [deltas]) when it can resume from since,
+            otherwise ('stats_snapshot', snapshot)
+        """
+        with self.lock:
+            self._prune()
+            if not self._subscribers:
+                # Nobody has been ticking; catch up before answering
+                self._tick()
+            self._subscribers[sid] = encoding
+            self._ensure_thread()
+            resumable = since is not None and stream_id == self.stream_id
+            deltas = self.since(since) if resumable else None
+            if deltas is not None:
+                self.stats['resumes'] += 1
+                return 'stats_delta', deltas
+            return 'stats_snapshot', self.snapshot()
+
+    def unsubscribe(self, sid: str):
+        with self.lock:
+            self._subscribers.pop(sid, None)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='stats-stream', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self.lock:
+                self._prune()
+                idle = not self._subscribers
+            if not idle:
+                self.tick()
+
+    def _prune(self):
+        server = getattr(self.socketio, 'server', None)
+        if server is None:
+            return
+        self._subscribers = {sid: encoding for sid, encoding in self._subscribers.items()
+                             if server.manager.is_connected(sid, self.namespace)}
+
+    def _emit(self, delta: Dict[str, Any], encodings):
+        for encoding in encodings:
+            try:
+                self.socketio.emit('stats_delta', encode(delta, encoding),
+                                   to=f'stats:{encoding}', namespace=self.namespace)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Stats delta {delta['seq']} could not be delivered: {e}")
+
+    def close(self):
+        """Stop the delta thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters, current sequence number and retained history"""
+        with self.lock:
+            return {**self.stats,
+                    'seq': self.seq,
+                    'retained_deltas': len(self._deltas),
+                    'subscribers': len(self._subscribers),
+                    'msgpack': MSGPACK_AVAILABLE,
+                    'interval_s': self.interval}
+
+
+def register_handlers(socketio, stream: StatsStream):
+    """Register the 'stats_subscribe' and 'stats_unsubscribe' Socket.IO events"""
+    from flask import request
+    from flask_socketio import join_room, leave_room
+
+    @socketio.on('stats_subscribe', namespace=stream.namespace)
+    def on_stats_subscribe(data=None):
+        data = data or {}
+        since = data.get('since')
+        encoding = 'msgpack' if data.get('encoding') == 'msgpack' and MSGPACK_AVAILABLE else 'json'
+        join_room(f'stats:{encoding}')
+        # Held until the catch-up is sent, so no tick's delta can overtake it
+        with stream.lock:
+            event, payload = stream.subscribe(
+                request.sid, since=int(since) if since is not None else None, encoding=encoding,
+                stream_id=data.get('stream'))
+            for message in (payload if event == 'stats_delta' else [payload]):
+                socketio.emit(event, encode(message, encoding), to=request.sid,
+                              namespace=stream.namespace)
+        return {'encoding': encoding, 'stream': stream.stream_id, 'seq': stream.seq}
+
+    @socketio.on('stats_unsubscribe', namespace=stream.namespace)
+    def on_stats_unsubscribe(data=None):
+        stream.unsubscribe(request.sid)
+        for encoding in ENCODINGS:
+            leave_room(f'stats:{encoding}')
+
+
+# Global stream shared by the dashboard routes
+stats_stream = StatsStream()
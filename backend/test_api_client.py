@@ -0,0 +1,127 @@
+"""
+TEST SUITE FOR THREAT INTELLIGENCE API CLIENT
+Verifies non-blocking retries, deadline propagation and rate-limit fail-fast
+"""
+
+import unittest
+import os
+import sys
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import performance_cache
+from api_client import ThreatIntelligenceAPIClient
+from error_handler import APIError, DeadlineExceededError, RateLimitExceededError
+from performance_cache import RateLimiter
+from quota_scheduler import Priority, scheduling
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """/flaky fails twice with 503, /down always does, anything else is 200"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+        failing = self.path.startswith('/down') or (self.path.startswith('/flaky') and hits <= 2)
+        body = json.dumps({'path': self.path, 'hits': hits}).encode()
+        self.send_response(503 if failing else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAPIClientRetries(unittest.TestCase):
+    """Test retries and deadlines of ThreatIntelligenceAPIClient"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+        self.server.lock = threading.Lock()
+        self.server.hits = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.limiter = RateLimiter(100)
+        patcher = mock.patch.dict(performance_cache.rate_limiters, {'testapi': self.limiter})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = ThreatIntelligenceAPIClient('testapi', 'key')
+        self.client.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.client.max_retries = 3
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_retries_until_success(self):
+        """503s are retried with back-off and the final JSON is returned"""
+        started = time.time()
+        result = self.client.request('GET', '/flaky')
+        self.assertEqual(result, {'path': '/flaky', 'hits': 3})
+        # Back-off of 1s then 2s
+        self.assertGreaterEqual(time.time() - started, 2.9)
+
+    @staticmethod
+    def _client_threads():
+        """Live threads, without the test server's connection handlers"""
+        return [t for t in threading.enumerate() if 'process_request' not in t.name]
+
+    def test_backoff_does_not_park_threads(self):
+        """Pending retries are timers on the I/O loop, not sleeping threads"""
+        self.client.request('GET', '/ok')  # start the I/O loop
+        threads_before = len(self._client_threads())
+
+        futures = [self.client.submit_request('GET', f'/flaky{i}') for i in range(10)]
+        time.sleep(0.3)  # every request has failed once and is backing off
+        self.assertEqual(len(self._client_threads()), threads_before)
+        self.assertFalse(any(future.done() for future in futures))
+        for future in futures:
+            future.cancel()
+
+    def test_retry_that_misses_deadline_fails_fast(self):
+        """A back-off longer than the remaining budget ends the retries"""
+        started = time.time()
+        with self.assertRaises(APIError) as ctx:
+            self.client.request('GET', '/down', deadline=time.time() + 0.5)
+        self.assertEqual(ctx.exception.context['response_status'], 503)
+        self.assertLess(time.time() - started, 0.4)
+        self.assertEqual(self.server.hits['/down'], 1)
+
+    def test_deadline_from_scheduling_scope(self):
+        """A passed deadline stops the call before any request is sent"""
+        with scheduling(Priority.INTERACTIVE, max_wait=0.01):
+            time.sleep(0.02)
+            with self.assertRaises(DeadlineExceededError):
+                self.client.request('GET', '/ok')
+        self.assertNotIn('/ok', self.server.hits)
+
+    def test_rate_limit_wait_beyond_deadline_fails_fast(self):
+        """No 60-second sleep when the limiter frees up only after the deadline"""
+        self.limiter.requests_per_minute = 1
+        self.client.request('GET', '/ok')
+
+        started = time.time()
+        with self.assertRaises(RateLimitExceededError):
+            self.client.request('GET', '/ok', deadline=time.time() + 5)
+        self.assertLess(time.time() - started, 0.5)
+        self.assertFalse(self.limiter.wait_if_needed('testapi', timeout_seconds=1))
+        self.assertLess(time.time() - started, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+"""
+TEST SUITE FOR CONCURRENT BATCH SCANNING
+Verifies deduplication, per-domain grouping, the concurrency limit and the
+/api/scanner/batch-scan response
+"""
+
+import unittest
+import os
+import sys
+import json
+import threading
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+import scanner_routes
+from async_scanner import AsyncURLScanner, BatchScanProgress
+from url_validator import URLValidator
+
+
+class RecordingScan:
+    """Scan function that sleeps, records calls and tracks peak concurrency"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.finished = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, url, user_id=None):
+        with self.lock:
+            self.calls.append(url)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+            self.finished.append(url)
+        if 'down' in url:
+            raise ConnectionError('provider down')
+        verdict = 'malicious' if 'evil' in url else 'clean'
+        return {'verdict': verdict, 'action': 'allow', 'risk_score': 90 if verdict == 'malicious' else 0,
+                'engine_detection_count': 0, 'engine_total_count': 10, 'scan_id': f'scan-{url}'}
+
+
+class TestRegistrableDomain(unittest.TestCase):
+    """Test URLValidator.registrable_domain"""
+
+    def test_registrable_domain(self):
+        self.assertEqual(URLValidator.registrable_domain('https://a.b.example.com/x'), 'example.com')
+        self.assertEqual(URLValidator.registrable_domain('http://shop.example.co.uk'), 'example.co.uk')
+        self.assertEqual(URLValidator.registrable_domain('example.org'), 'example.org')
+        self.assertEqual(URLValidator.registrable_domain('http://93.184.216.34/'), '93.184.216.34')
+
+
+class TestAsyncBatchScan(unittest.TestCase):
+    """Test AsyncURLScanner.scan_batch"""
+
+    def setUp(self):
+        self.scanner = AsyncURLScanner(max_concurrent=4, timeout_per_url=5)
+        self.addCleanup(self.scanner.close)
+
+    def test_duplicates_scanned_once(self):
+        scan = RecordingScan(delay=0)
+        urls = ['https://Example.com/a?y=2&x=1', 'https://example.com:443/a?x=1&y=2', 'https://other.org/']
+        results = self.scanner.scan_urls_sync(urls, scan, max_urls=10)
+
+        self.assertEqual(len(scan.calls), 2)
+        self.assertEqual([r.url for r in results], urls)
+        self.assertEqual(results[0].raw_results, results[1].raw_results)
+
+    def test_domain_leader_scanned_before_rest(self):
+        scan = RecordingScan(delay=0.05)
+        urls = [f'https://site.com/page{i}' for i in range(4)] + ['https://evil.net/']
+        self.scanner.scan_urls_sync(urls, scan, max_urls=10)
+
+        site_calls = [url for url in scan.calls if 'site.com' in url]
+        self.assertTrue(site_calls[0].endswith('/page0'))
+        # The other site.com URLs start only after page0 is done
+        self.assertLess(scan.finished.index(site_calls[0]), 2)
+
+    def test_concurrency_limit_and_timings(self):
+        scan = RecordingScan(delay=0.1)
+        urls = [f'https://host{i}.com/' for i in range(12)]
+        started = time.time()
+        results = self.scanner.scan_urls_sync(urls, scan, max_urls=20)
+        elapsed = time.time() - started
+
+        self.assertEqual(scan.peak, 4)
+        self.assertLess(elapsed, 12 * 0.1 / 2)
+        self.assertTrue(all(r.scan_duration_seconds >= 0.09 for r in results))
+
+    def test_timeout_starts_when_a_worker_picks_the_url_up(self):
+        """A timed-out scan keeps its worker; queued URLs do not time out meanwhile"""
+        scanner = AsyncURLScanner(max_concurrent=1, timeout_per_url=0.2)
+        self.addCleanup(scanner.close)
+        scan = RecordingScan(delay=0)
+        slow = lambda url: (time.sleep(0.5) if 'slow' in url else None) or scan(url)
+
+        results = scanner.scan_urls_sync(['https://slow.com/', 'https://fast.com/'], slow, max_urls=10)
+        self.assertEqual([r.verdict for r in results], ['error', 'clean'])
+        self.assertIn('timeout', results[0].error)
+        self.assertLess(results[1].scan_duration_seconds, 0.2)
+
+    def test_batches_share_the_pool_without_queue_timeouts(self):
+        scanner = AsyncURLScanner(max_concurrent=1, timeout_per_url=0.3)
+        self.addCleanup(scanner.close)
+        scan = RecordingScan(delay=0.2)
+        results = {}
+
+        def batch(name):
+            results[name] = scanner.scan_urls_sync([f'https://{name}1.com/', f'https://{name}2.com/'],
+                                                   scan, max_urls=10)
+        threads = [threading.Thread(target=batch, args=(name,)) for name in ('a', 'b')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(scan.calls), 4)
+        self.assertFalse(any(r.is_error for batch_results in results.values() for r in batch_results))
+
+    def test_max_urls(self):
+        with self.assertRaises(ValueError):
+            self.scanner.scan_urls_sync(['https://a.com/'] * 3, RecordingScan(), max_urls=2)
+
+    def test_streams_in_completion_order(self):
+        scan = RecordingScan(delay=0)
+        slow = lambda url: (time.sleep(0.3) if 'slow' in url else None) or scan(url)
+        urls = ['https://slow.com/', 'https://fast.com/', 'https://FAST.com/', 'https://quick.org/']
+        progress = BatchScanProgress(total_urls=0)
+
+        received = []
+        for index, result in self.scanner.iter_urls_sync(urls, slow, max_urls=10, progress=progress):
+            received.append(index)
+            self.assertEqual(result.url, urls[index])
+        self.assertEqual(received[-1], 0)
+        self.assertEqual(sorted(received), [0, 1, 2, 3])
+
+        stats = progress.to_dict()
+        self.assertEqual((stats['total_urls'], stats['duplicate_urls'], stats['completed_urls']), (3, 1, 3))
+        self.assertEqual(stats['progress_percent'], 100.0)
+
+    def test_closing_stream_cancels_pending_scans(self):
+        scan = RecordingScan(delay=0.05)
+        urls = [f'https://host{i}.com/' for i in range(12)]
+        stream = self.scanner.iter_urls_sync(urls, scan, max_urls=20)
+        next(stream)
+        stream.close()
+        time.sleep(0.1)
+        self.assertLessEqual(len(scan.calls), 8)
+
+
+class TestBatchScanRoute(unittest.TestCase):
+    """Test /api/scanner/batch-scan with a fake URL safety service"""
+
+    def setUp(self):
+        self.scan = RecordingScan(delay=0.02)
+        service = type('FakeService', (), {'check_url_safety': staticmethod(self.scan)})
+        previous = scanner_routes.url_safety_service
+        scanner_routes.url_safety_service = service
+        self.addCleanup(setattr, scanner_routes, 'url_safety_service', previous)
+
+        app = Flask(__name__)
+        app.register_blueprint(scanner_routes.url_scanner_bp)
+        self.client = app.test_client()
+
+    def test_response_format(self):
+        urls = ['https://good.com/', 'https://evil.com/', 'https://good.com', 'https://down.com/X?b=1&a=2']
+        response = self.client.post('/api/scanner/batch-scan', json={'urls': urls, 'user_id': 'u1'})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+
+        self.assertTrue(body['success'])
+        self.assertEqual([r['url'] for r in body['results']], urls)
+        self.assertEqual([r['verdict'] for r in body['results']], ['clean', 'malicious', 'clean', 'suspicious'])
+        self.assertEqual(body['results'][1]['scan_id'], 'scan-https://evil.com/')
+        self.assertIn('scan_duration_ms', body['results'][0])
+        # Failed URLs keep every per-URL field of a scanned one
+        self.assertEqual(set(body['results'][3]) - {'error'}, set(body['results'][0]))
+        self.assertEqual(body['results'][3]['action'], 'warned')
+        self.assertIn('provider down', body['results'][3]['error'])
+        self.assertEqual(body['summary'], {'total': 4, 'clean': 2, 'suspicious': 1, 'malicious': 1})
+        # The safety service gets URLs exactly as submitted
+        self.assertEqual(sorted(self.scan.calls), sorted([urls[0], urls[1], urls[3]]))
+
+    def test_ndjson_stream(self):
+        self.scan.delay = 0
+        urls = ['https://good.com/', 'https://evil.com/', 'https://good.com']
+        response = self.client.post('/api/scanner/batch-scan', json={'urls': urls},
+                                    headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        self.assertEqual(sorted(line['index'] for line in lines[:-1]), [0, 1, 2])
+        self.assertTrue(all('scan_duration_ms' in line for line in lines[:-1]))
+        self.assertEqual(lines[-1]['summary'], {'total': 3, 'clean': 2, 'suspicious': 0, 'malicious': 1})
+        self.assertEqual(lines[-1]['progress']['completed_urls'], 2)
+        self.assertEqual(lines[-1]['progress']['duplicate_urls'], 1)
+
+    def test_json_by_default(self):
+        response = self.client.post('/api/scanner/batch-scan', json={'urls': ['https://a.com/']},
+                                    headers={'Accept': '*/*'})
+        self.assertEqual(response.mimetype, 'application/json')
+
+    def test_too_many_urls(self):
+        urls = [f'https://a{i}.com/' for i in range(101)]
+        response = self.client.post('/api/scanner/batch-scan', json={'urls': urls})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
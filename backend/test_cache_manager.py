@@ -0,0 +1,349 @@
+"""
+TEST SUITE FOR THE UNIFIED CACHE
+Verifies key canonicalization, the LRU + SQLite tiers and ScanCache
+"""
+
+import unittest
+import gc
+import os
+import sys
+import time
+import tempfile
+import threading
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache_manager import (
+    ScanCache,
+    UnifiedCache,
+    canonicalize_url,
+    canonicalize_identifier,
+)
+from error_handler import APITimeoutError
+
+
+class TestCanonicalization(unittest.TestCase):
+    """Test cache key canonicalization"""
+
+    def test_equivalent_urls_share_a_key(self):
+        variants = [
+            'HTTP://Example.COM:80',
+            'http://example.com/',
+            ' http://example.com./#top ',
+            'example.com',
+        ]
+        self.assertEqual({canonicalize_url(v) for v in variants}, {'http://example.com/'})
+
+    def test_query_order_and_ports(self):
+        self.assertEqual(canonicalize_url('https://a.io:443/p?b=2&a=1'),
+                         'https://a.io/p?a=1&b=2')
+        self.assertEqual(canonicalize_url('https://a.io:8443/p'), 'https://a.io:8443/p')
+        self.assertNotEqual(canonicalize_url('https://a.io/P'), canonicalize_url('https://a.io/p'))
+
+    def test_identifier(self):
+        self.assertEqual(canonicalize_identifier(' cve-2024-1234 '), 'CVE-2024-1234')
+
+
+class TestUnifiedCache(unittest.TestCase):
+    """Test two-tier cache behaviour"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'cache.db')
+        self.stores = []
+        self.cache = self._new_cache()
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self.tmp.cleanup()
+
+    def _new_cache(self, memory_max_entries=100):
+        store = ScanCache(self.db_path)
+        self.stores.append(store)
+        cache = UnifiedCache(store, memory_max_entries=memory_max_entries)
+        cache.register_namespace('vt', 60)
+        cache.register_namespace('cve', 60, key_func=canonicalize_identifier)
+        cache.register_namespace('feed', 60, persistent=False)
+        return cache
+
+    def test_memory_then_persistent_hits(self):
+        """Values survive a restart through the SQLite tier"""
+        self.cache.set('vt', 'http://Example.com', {'threat_level': 'SAFE'})
+        self.assertEqual(self.cache.get('vt', 'http://example.com/'), {'threat_level': 'SAFE'})
+        self.assertEqual(self.cache.get_stats()['namespaces']['vt']['memory_hits'], 1)
+
+        restarted = self._new_cache()
+        self.assertEqual(restarted.get('vt', 'example.com'), {'threat_level': 'SAFE'})
+        self.assertEqual(restarted.get('vt', 'example.com'), {'threat_level': 'SAFE'})
+        stats = restarted.get_stats()['namespaces']['vt']
+        self.assertEqual((stats['persistent_hits'], stats['memory_hits']), (1, 1))
+
+    def test_namespaces_are_isolated(self):
+        self.cache.set('vt', 'CVE-1', 'vt')
+        self.cache.set('cve', 'cve-1', 'cve')
+        self.assertEqual(self.cache.get('vt', 'CVE-1'), 'vt')
+        self.assertEqual(self.cache.get('cve', 'CVE-1'), 'cve')
+        with self.assertRaises(KeyError):
+            self.cache.get('unregistered', 'x')
+
+    def test_memory_only_namespace(self):
+        self.cache.set('feed', 'latest', [1, 2])
+        self.assertEqual(self.cache.get('feed', 'latest'), [1, 2])
+        self.assertIsNone(self._new_cache().get('feed', 'latest'))
+
+    def test_expiry_and_ttl_override(self):
+        record = self.cache.set('vt', 'http://short.io', 'v', ttl_seconds=0)
+        self.assertTrue(record.is_expired())
+        self.assertIsNone(self.cache.get('vt', 'http://short.io'))
+        self.assertEqual(self.cache.get('vt', 'http://short.io', default='miss'), 'miss')
+        self.assertEqual(self.cache.purge_expired(), 1)
+
+    def test_lru_tier_is_bounded(self):
+        cache = self._new_cache(memory_max_entries=5)
+        for i in range(20):
+            cache.set('vt', f'http://site{i}.com', i)
+        self.assertEqual(cache.get_stats()['memory']['size'], 5)
+        # Evicted entries are still served from SQLite
+        self.assertEqual(cache.get('vt', 'http://site0.com'), 0)
+
+    def test_delete_and_clear(self):
+        self.cache.set('vt', 'http://a.com', 1)
+        self.cache.set('vt', 'http://b.com', 2)
+        self.cache.set('cve', 'CVE-1', 3)
+        self.cache.delete('vt', 'http://a.com')
+        self.assertIsNone(self.cache.get('vt', 'http://a.com'))
+        self.cache.clear('vt')
+        self.assertIsNone(self.cache.get('vt', 'http://b.com'))
+        self.assertEqual(self.cache.get('cve', 'CVE-1'), 3)
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+    """Test get_or_load: stale serving, background refresh, short TTLs"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ScanCache(os.path.join(self.tmp.name, 'cache.db'))
+        self.cache = UnifiedCache(self.store)
+        self.cache.register_namespace('ti', 60, stale_seconds=3600,
+                                      negative_ttl_seconds=30, error_ttl_seconds=10)
+        self.calls = 0
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def _loader(self, value):
+        def load():
+            self.calls += 1
+            return value
+        return load
+
+    def _wait_for_refreshes(self):
+        deadline = time.time() + 5
+        while self.cache._refreshing and time.time() < deadline:
+            time.sleep(0.005)
+
+    @staticmethod
+    def _classify(result):
+        return {'ok': None, 'not_found': 'negative'}.get(result['status'], 'error')
+
+    def test_fresh_entry_skips_loader(self):
+        self.cache.set('ti', 'http://a.com', {'status': 'ok'})
+        value = self.cache.get_or_load('ti', 'http://a.com', self._loader({'status': 'new'}))
+        self.assertEqual(value, {'status': 'ok'})
+        self.assertEqual(self.calls, 0)
+
+    def test_stale_entry_served_while_one_refresh_runs(self):
+        """Expired entries are returned immediately and refreshed once"""
+        self.cache.set('ti', 'http://a.com', {'status': 'ok', 'v': 1}, ttl_seconds=-1)
+        release = threading.Event()
+
+        def slow_loader():
+            self.calls += 1
+            release.wait(5)
+            return {'status': 'ok', 'v': 2}
+
+        for _ in range(5):
+            value = self.cache.get_or_load('ti', 'http://a.com', slow_loader)
+            self.assertEqual(value['v'], 1)
+        release.set()
+        self._wait_for_refreshes()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.get('ti', 'http://a.com')['v'], 2)
+        stats = self.cache.get_stats()['namespaces']['ti']
+        self.assertEqual((stats['stale_hits'], stats['refreshes']), (5, 1))
+
+    def test_negative_and_error_results_use_short_ttls(self):
+        self.cache.get_or_load('ti', 'http://new.com', self._loader({'status': 'not_found'}),
+                               classify=self._classify)
+        self.cache.get_or_load('ti', 'http://down.com', self._loader({'status': 'api_error'}),
+                               classify=self._classify)
+
+        negative = self.cache.get_entry('ti', 'http://new.com')
+        error = self.cache.get_entry('ti', 'http://down.com')
+        self.assertAlmostEqual(negative.expires_at - negative.stored_at, 30, places=3)
+        self.assertAlmostEqual(error.expires_at - error.stored_at, 10, places=3)
+
+        # Served from cache: the failing provider is not called again
+        self.cache.get_or_load('ti', 'http://down.com', self._loader({'status': 'api_error'}),
+                               classify=self._classify)
+        self.assertEqual(self.calls, 2)
+
+    def test_failed_refresh_keeps_stale_value(self):
+        """Stale-if-error: an error during refresh does not evict good data"""
+        self.cache.set('ti', 'http://a.com', {'status': 'ok'}, ttl_seconds=-1)
+        value = self.cache.get_or_load('ti', 'http://a.com', self._loader({'status': 'api_error'}),
+                                       classify=self._classify)
+        self._wait_for_refreshes()
+
+        self.assertEqual(value, {'status': 'ok'})
+        record = self.cache.get_entry('ti', 'http://a.com')
+        self.assertEqual(record.value, {'status': 'ok'})
+        self.assertGreater(record.expires_at, time.time() + 5)
+        self.assertEqual(self.cache.get_stats()['namespaces']['ti']['refresh_errors'], 1)
+
+    def test_failed_refresh_without_error_ttl_retries_soon(self):
+        self.cache.register_namespace('feed', 7200, stale_seconds=3600)
+        self.cache.set('feed', 'http://a.com', {'status': 'ok'}, ttl_seconds=-1)
+
+        def failing():
+            raise APITimeoutError('feed', 5)
+
+        self.cache.get_or_load('feed', 'http://a.com', failing)
+        self._wait_for_refreshes()
+        record = self.cache.get_entry('feed', 'http://a.com')
+        self.assertEqual(record.value, {'status': 'ok'})
+        self.assertLessEqual(record.expires_at, time.time() + UnifiedCache.REFRESH_RETRY_SECONDS)
+
+    def test_loader_exceptions_are_cached_briefly(self):
+        def failing():
+            self.calls += 1
+            raise APITimeoutError('A2A', 5)
+
+        for _ in range(3):
+            with self.assertRaises(APITimeoutError):
+                self.cache.get_or_load('ti', 'http://slow.com', failing,
+                                       cache_errors=(APITimeoutError,))
+        self.assertEqual(self.calls, 1)
+
+        # Exceptions not listed in cache_errors are never cached
+        with self.assertRaises(ValueError):
+            self.cache.get_or_load('ti', 'http://bad.com', lambda: int('x'))
+        self.assertIsNone(self.cache.get('ti', 'http://bad.com'))
+
+
+    def test_cached_errors_are_bounded(self):
+        """Distinct failing keys do not accumulate without limit"""
+        cache = UnifiedCache(None, memory_max_entries=50, memory_shards=1)
+        cache.register_namespace('ti', 60, error_ttl_seconds=10)
+
+        def failing():
+            raise APITimeoutError('A2A', 5)
+
+        for i in range(500):
+            with self.assertRaises(APITimeoutError):
+                cache.get_or_load('ti', f'http://down{i}.com', failing,
+                                  cache_errors=(APITimeoutError,))
+        self.assertLessEqual(len(cache.memory.cache), 50)
+        self.assertEqual(cache.get_stats()['namespaces']['ti']['error_sets'], 500)
+
+
+class TestScanCache(unittest.TestCase):
+    """Test the scan-result API of the persistent tier"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ScanCache(os.path.join(self.tmp.name, 'scan.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_every_new_url_is_inserted(self):
+        """Writes after the first one still insert new rows"""
+        self.assertTrue(self.store.cache_scan('http://a.com', {'v': 1}, 'instant'))
+        self.assertTrue(self.store.cache_scan('http://b.com', {'v': 2}, 'complete'))
+        self.assertTrue(self.store.cache_scan('http://a.com', {'v': 3}, 'deep'))
+
+        cached = self.store.get_cached_scan('http://a.com')
+        self.assertEqual(cached['result'], {'v': 3})
+        self.assertEqual(cached['phase'], 'deep')
+        self.assertIsNotNone(self.store.get_cached_scan('http://b.com'))
+        self.assertEqual(self.store.get_cache_stats(),
+                         {'total_entries': 2, 'instant': 0, 'fast': 0, 'deep': 1, 'complete': 1})
+
+    def test_database_created_on_first_use(self):
+        """Constructing the store creates no files"""
+        path = os.path.join(self.tmp.name, 'sub', 'lazy.db')
+        store = ScanCache(path)
+        self.addCleanup(store.close)
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+        store.cache_scan('http://a.com', {'v': 1}, 'fast')
+        store.flush()
+        self.assertTrue(os.path.exists(path))
+
+    def test_ttl_is_checked_on_read(self):
+        self.store.cache_scan('http://a.com', {'v': 1}, 'fast')
+        self.assertIsNone(self.store.get_cached_scan('http://a.com', ttl_hours=0))
+        self.assertTrue(self.store.clear_all_cache())
+        self.assertIsNone(self.store.get_cached_scan('http://a.com'))
+
+    def test_wal_and_per_thread_connections(self):
+        """Each thread gets its own connection on a WAL database"""
+        mode = self.store.conn.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode.lower(), 'wal')
+
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(self.store.conn))
+        thread.start()
+        thread.join()
+        self.assertIsNot(seen[0], self.store.conn)
+
+    def test_thread_connections_closed_when_threads_exit(self):
+        """Short-lived request threads do not leak connections"""
+        self.store.get_entry('scan', 'warm')
+        baseline = len(self.store._connections)
+        for _ in range(20):
+            thread = threading.Thread(target=lambda: self.store.get_entry('scan', 'x'))
+            thread.start()
+            thread.join()
+        gc.collect()
+        self.assertLessEqual(len(self.store._connections), baseline)
+
+    def test_failed_submit_clears_overlay(self):
+        """A write rejected before queueing leaves no phantom entry"""
+        self.store.close()
+        self.assertFalse(self.store.put_entry('scan', 'k', {'v': 1}, time.time(), time.time() + 60))
+        self.assertEqual(self.store._pending, {})
+
+    def test_concurrent_writes_are_group_committed(self):
+        """Writes from many threads all land, in fewer transactions"""
+        def writer(worker):
+            for i in range(50):
+                self.store.cache_scan(f'http://w{worker}.com/{i}', {'i': i}, 'fast')
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Readable immediately (overlay) and durable after flush
+        self.assertEqual(self.store.get_cached_scan('http://w7.com/49')['result'], {'i': 49})
+        self.store.flush()
+        self.assertEqual(self.store.get_cache_stats()['fast'], 400)
+        self.assertEqual(self.store.writes_committed, 400)
+        self.assertLess(self.store.batches_committed, 400)
+
+        reopened = ScanCache(self.store.db_path)
+        try:
+            self.assertEqual(reopened.get_cached_scan('http://w3.com/10')['result'], {'i': 10})
+        finally:
+            reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+TEST SUITE FOR CACHE WARM-UP
+Verifies candidate selection from scan history, layer warming and TI scheduling
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache_manager import UnifiedCache
+from cache_warmer import CacheWarmer
+from quota_scheduler import Priority, current_context
+import risk_engine
+
+
+class FakeStorage:
+    def __init__(self, urls):
+        self.urls = urls
+
+    def get_recent_scans(self, limit=50):
+        return [{'url': url} for url in self.urls[:limit]]
+
+
+class FakeTI:
+    def __init__(self, cached=()):
+        self.cached = set(cached)
+        self.fetch_times = []
+        self.contexts = []
+
+    def warm(self, url, acquire=None):
+        if url in self.cached:
+            return 'cached'
+        if acquire is not None and not acquire():
+            return 'skipped'
+        self.fetch_times.append(time.time())
+        context = current_context()
+        self.contexts.append((context.priority, context.user))
+        return 'fetched'
+
+
+class FakeEngine:
+    def __init__(self, ti_checker=None):
+        self.ti_checker = ti_checker
+
+
+class TestCacheWarmer(unittest.TestCase):
+    """Test background cache warm-up"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'scans.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_scans(self, urls):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE scans (id INTEGER PRIMARY KEY, url TEXT NOT NULL, verdict TEXT)')
+        conn.executemany('INSERT INTO scans (url) VALUES (?)', [(url,) for url in urls])
+        conn.commit()
+        conn.close()
+
+    def test_candidates_ranked_by_canonical_frequency(self):
+        """Spellings of a URL are merged, domains add their root page"""
+        self._write_scans(['https://Shop.com/cart', 'https://shop.com:443/cart#x',
+                           'https://shop.com/login', 'http://b.org/', 'javascript:alert(1)'])
+        storage = FakeStorage(['https://shop.com/cart', 'http://b.org'])
+        warmer = CacheWarmer(FakeEngine(), storage, history_db_path=self.db_path, max_urls=3)
+
+        self.assertEqual(warmer.collect_candidates(),
+                         ['https://shop.com/', 'https://shop.com/cart', 'http://b.org/'])
+
+    def test_missing_history_is_tolerated(self):
+        """No database or no scans table simply yields no candidates"""
+        warmer = CacheWarmer(FakeEngine(), history_db_path=os.path.join(self.tmp.name, 'none.db'))
+        self.assertEqual(warmer.collect_candidates(), [])
+
+        sqlite3.connect(self.db_path).close()
+        warmer = CacheWarmer(FakeEngine(), history_db_path=self.db_path)
+        self.assertEqual(warmer.collect_candidates(), [])
+
+    def test_run_warms_ti(self):
+        """Every candidate gets its TI entry; progress is reported"""
+        self._write_scans(['https://a.com/', 'https://b.com/', 'https://c.com/'])
+        engine = FakeEngine(FakeTI(cached={'https://c.com/'}))
+        warmer = CacheWarmer(engine, history_db_path=self.db_path, ti_share=1)
+
+        self.assertEqual(warmer.get_progress()['state'], 'idle')
+        warmer.start()
+        self.assertTrue(warmer.wait(timeout=5))
+
+        progress = warmer.get_progress()
+        self.assertEqual(progress['state'], 'completed')
+        self.assertEqual(progress['total'], 3)
+        self.assertEqual((progress['ti_fetched'], progress['ti_cached']), (2, 1))
+        self.assertEqual(progress['ti_percent'], 100.0)
+        self.assertIsNotNone(progress['finished_at'])
+
+    def test_ti_lookups_run_in_warmup_class(self):
+        """Provider lookups are scheduled as WARMUP and stop with the warmer"""
+        ti = FakeTI()
+        warmer = CacheWarmer(FakeEngine(ti), history_db_path=None, ti_share=0.5)
+        warmer.collect_candidates = lambda: [f'https://{i}.com/' for i in range(3)]
+
+        warmer.run()
+
+        self.assertEqual(ti.contexts, [(Priority.WARMUP, 'cache-warmer')] * 3)
+        self.assertEqual(current_context().priority, Priority.BACKGROUND)
+
+        warmer.stop()
+        self.assertFalse(warmer._acquire_ti_quota())
+
+
+class TestRiskLayerCache(unittest.TestCase):
+    """Test the static/signature/ML layer cache of the risk engine"""
+
+    def setUp(self):
+        cache = UnifiedCache(None)
+        cache.register_namespace('risk_layers', risk_engine.LAYER_CACHE_TTL,
+                                 key_func=risk_engine.layer_cache_key)
+        patcher = mock.patch.object(risk_engine, 'unified_cache', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.engine = risk_engine.UnifiedRiskEngine()
+
+    def test_same_page_reuses_layers(self):
+        """A rescan of the same page reuses the layers; callers get private copies"""
+        url = 'http://paypal-login.verify-account.tk/signin'
+        page = {'html': '<form action="/x"></form>', 'scripts': [{'src': '', 'content': 'eval(atob("x"))'}],
+                'iframes': 1, 'forms': 1, 'page_title': 'Sign in'}
+        first = self.engine._run_url_layers(url, page)
+        first['static_analysis']['risk_score'] = -1
+
+        with mock.patch.object(self.engine.static_analyzer, 'analyze') as analyze:
+            second = self.engine._run_url_layers('HTTP://paypal-login.verify-account.tk/signin',
+                                                 dict(page, page_title='Other title'))
+            analyze.assert_not_called()
+        self.assertNotEqual(second['static_analysis']['risk_score'], -1)
+        self.assertEqual(set(second), set(risk_engine.UnifiedRiskEngine.URL_ONLY_LAYERS))
+
+    def test_page_content_is_part_of_the_key(self):
+        """Different page content, or none at all, runs the layers again"""
+        url = 'https://example.com/'
+        self.engine._run_url_layers(url, None)
+        self.engine._run_url_layers(url, {'html': '<p>a</p>'})
+        with mock.patch.object(self.engine.static_analyzer, 'analyze',
+                               return_value={'risk_score': 7}) as analyze:
+            results = self.engine._run_url_layers(url, {'html': '<form></form>'})
+        analyze.assert_called_once()
+        self.assertEqual(results['static_analysis']['risk_score'], 7)
+
+    def test_page_fingerprint(self):
+        """Only the fields the cached layers read change the fingerprint"""
+        page = {'html': '<p></p>', 'scripts': [], 'iframes': 0}
+        self.assertEqual(risk_engine.page_fingerprint(None), '')
+        self.assertEqual(risk_engine.page_fingerprint(page),
+                         risk_engine.page_fingerprint(dict(page, forms=3, headers={})))
+        self.assertNotEqual(risk_engine.page_fingerprint(page),
+                            risk_engine.page_fingerprint(dict(page, iframes=2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
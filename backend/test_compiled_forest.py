@@ -0,0 +1,117 @@
+"""
+TEST SUITE FOR COMPILED TREE ENSEMBLES
+Verifies flat-array forests reproduce predict_proba exactly
+"""
+
+import unittest
+import os
+import sys
+import pickle
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+
+# Add backend and model directories to path
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'ml_advanced'))
+
+import compiled_forest
+import url_model_predict
+from compiled_forest import CompiledForest, export_compiled_forest, load_compiled_forest
+
+
+def _url_corpus(n, seed):
+    rng = np.random.RandomState(seed)
+    words = ['login', 'verify', 'docs', 'account', 'github', 'secure', 'paypal',
+             'news', 'update', 'blog', 'cdn', 'wiki', 'bank', 'free', 'gift']
+    tlds = ['com', 'org', 'xyz', 'tk', 'ru', 'io']
+    urls, labels = [], []
+    for _ in range(n):
+        parts = rng.choice(words, size=rng.randint(1, 4))
+        tld = rng.choice(tlds)
+        urls.append(f"http{'s' if rng.rand() > 0.5 else ''}://{'-'.join(parts)}.{tld}/{rng.choice(words)}")
+        labels.append(int(tld in ('xyz', 'tk', 'ru') or 'verify' in parts))
+    return urls, np.array(labels)
+
+
+class TestCompiledForest(unittest.TestCase):
+    """Test compiled forest equivalence and artifact handling"""
+
+    @classmethod
+    def setUpClass(cls):
+        urls, labels = _url_corpus(400, seed=1)
+        cls.vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(2, 3), max_features=100)
+        X = cls.vectorizer.fit_transform(urls)
+        cls.model = RandomForestClassifier(n_estimators=30, max_depth=12,
+                                           min_samples_leaf=2, random_state=42, n_jobs=1)
+        cls.model.fit(X, labels)
+        validation_urls, _ = _url_corpus(200, seed=2)
+        cls.X_validation = cls.vectorizer.transform(validation_urls)
+
+    def test_sparse_batch_bit_identical(self):
+        """Batch predictions on sparse input match exactly"""
+        compiled = CompiledForest.from_sklearn(self.model)
+        expected = self.model.predict_proba(self.X_validation)
+        self.assertTrue(np.array_equal(expected, compiled.predict_proba(self.X_validation)))
+
+    def test_single_row_bit_identical(self):
+        """Single-row scoring (the hot path) matches exactly"""
+        compiled = CompiledForest.from_sklearn(self.model)
+        for i in range(20):
+            row = self.X_validation[i]
+            self.assertTrue(np.array_equal(self.model.predict_proba(row),
+                                           compiled.predict_proba(row)))
+        dense_row = self.X_validation[0].toarray()[0]
+        self.assertTrue(np.array_equal(self.model.predict_proba(self.X_validation[0]),
+                                       compiled.predict_proba(dense_row)))
+
+    def test_dense_multiclass_extra_trees(self):
+        """Dense input, other ensembles and >2 classes are supported"""
+        rng = np.random.RandomState(0)
+        X = rng.rand(300, 8) * 10
+        y = (X[:, 0] + X[:, 3] > 10).astype(int) + (X[:, 5] > 7).astype(int)
+        model = ExtraTreesClassifier(n_estimators=15, random_state=0).fit(X, y)
+        compiled = CompiledForest.from_sklearn(model)
+        X_val = rng.rand(100, 8) * 10
+        self.assertTrue(np.array_equal(model.predict_proba(X_val), compiled.predict_proba(X_val)))
+        self.assertTrue(np.array_equal(model.predict(X_val), compiled.predict(X_val)))
+
+    def test_rejects_non_tree_models(self):
+        """Linear models cannot be compiled"""
+        model = SGDClassifier(loss='log_loss').fit(self.X_validation, np.arange(200) % 2)
+        with self.assertRaises(ValueError):
+            CompiledForest.from_sklearn(model)
+
+    def test_export_and_predictor_use_compiled(self):
+        """Exported artifact is picked up by URLMLPredictor and rejected when stale"""
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = os.path.join(tmp, 'url_model.pkl')
+            vectorizer_path = os.path.join(tmp, 'url_vectorizer.pkl')
+            with open(model_path, 'wb') as f:
+                pickle.dump(self.model, f)
+            with open(vectorizer_path, 'wb') as f:
+                pickle.dump(self.vectorizer, f)
+
+            export_compiled_forest(self.model, model_path, X_validation=self.X_validation)
+            compiled_path = compiled_forest.compiled_path_for(model_path)
+            self.assertTrue(os.path.exists(compiled_path))
+
+            with patch.object(url_model_predict, 'MODEL_PATH', model_path), \
+                 patch.object(url_model_predict, 'VECTORIZER_PATH', vectorizer_path):
+                predictor = url_model_predict.URLMLPredictor()
+            self.assertIsNotNone(predictor.compiled)
+            result = predictor.predict('http://paypal-verify.xyz/login')
+            self.assertEqual(result['inference'], 'compiled')
+            expected = self.model.predict_proba(self.vectorizer.transform(['http://paypal-verify.xyz/login']))[0]
+            self.assertEqual(result['risk_score'], int(expected[1] * 100))
+
+            self.assertIsNone(load_compiled_forest(model_path, 'not-the-same-hash'))
+
+
+if __name__ == '__main__':
+    unittest.main()
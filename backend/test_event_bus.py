@@ -0,0 +1,187 @@
+"""
+TEST SUITE FOR DASHBOARD EVENT BUS
+Verifies off-request-path delivery, progress coalescing, severity and user
+rooms, the bounded queue and forgetting disconnected subscribers
+"""
+
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask_socketio import SocketIO
+from socketio import packet as sio_packet
+
+from event_bus import SEVERITIES, EventBus, severity_of
+
+
+class TestEventBus(unittest.TestCase):
+    """Test EventBus against Flask-SocketIO test clients"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.socketio = SocketIO(self.app, async_mode='threading')
+        self.bus = EventBus(window=0.2)
+        self.bus.attach(self.socketio)
+        self.addCleanup(self.bus.close)
+
+    def client(self, **subscription):
+        client = self.socketio.test_client(self.app)
+        # Newer python-socketio broadcasts through _send_eio_packet, which
+        # the Flask-SocketIO test client does not intercept
+        server = self.socketio.server
+        server._send_eio_packet = lambda eio_sid, eio_pkt: server._send_packet(
+            eio_sid, sio_packet.Packet(encoded_packet=eio_pkt.data))
+        self.addCleanup(client.disconnect)
+        if subscription:
+            client.emit('subscribe', subscription, callback=True)
+        client.get_received()
+        return client
+
+    @staticmethod
+    def received(client):
+        return [(packet['name'], packet['args'][0]) for packet in client.get_received()]
+
+    def test_progress_coalesced_per_url(self):
+        dashboard = self.client()
+        for progress in (10, 30, 60):
+            self.bus.publish('scan_progress', {'url': 'a', 'progress': progress}, key='a', progress=True)
+        self.bus.publish('scan_progress', {'url': 'b', 'progress': 50}, key='b', progress=True)
+
+        time.sleep(0.05)
+        self.assertEqual(self.received(dashboard), [])  # held for the window
+        self.assertTrue(self.bus.flush())
+        self.assertEqual(self.received(dashboard), [
+            ('scan_progress', {'url': 'a', 'progress': 60}),
+            ('scan_progress', {'url': 'b', 'progress': 50}),
+        ])
+        self.assertEqual(self.bus.get_stats()['coalesced'], 2)
+
+    def test_final_event_supersedes_progress(self):
+        dashboard = self.client()
+        self.bus.publish('new_scan', {'url': 'a', 'status': 'SCAN_STARTED'}, key='a', progress=True)
+        self.bus.publish('new_scan', {'url': 'a', 'status': 'SCAN_COMPLETE',
+                                      'classification': 'BENIGN'}, key='a')
+        self.bus.flush()
+        self.assertEqual([data['status'] for _, data in self.received(dashboard)], ['SCAN_COMPLETE'])
+        self.assertEqual(self.bus.get_stats()['superseded'], 1)
+
+    def test_publish_does_not_wait_for_delivery(self):
+        """A slow emit does not block publishers"""
+        release = threading.Event()
+        original = self.socketio.emit
+        self.socketio.emit = lambda *args, **kwargs: release.wait(5)
+        self.addCleanup(release.set)
+
+        started = time.time()
+        for i in range(100):
+            self.bus.publish('new_scan', {'url': str(i)}, key=str(i))
+        self.assertLess(time.time() - started, 0.5)
+        release.set()
+        self.socketio.emit = original
+
+    def test_full_queue_drops(self):
+        bus = EventBus(window=10, max_queue=3)
+        bus.socketio = self.socketio
+        results = [bus.publish('scan_progress', {'url': str(i)}, key=str(i), progress=True)
+                   for i in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(bus.get_stats()['dropped'], 2)
+        bus.close()
+
+    def test_severity_and_user_rooms(self):
+        legacy = self.client()
+        alerts = self.client(severities=['malicious', 'suspicious'])
+        alice = self.client(scope='user', user='alice')
+
+        self.bus.publish('new_scan', {'url': 'x', 'threat_level': 'MALICIOUS'}, key='x', user='bob')
+        self.bus.publish('new_scan', {'url': 'y', 'threat_level': 'SAFE'}, key='y', user='alice')
+        self.bus.publish('new_scan', {'url': 'z', 'classification': 'PHISHING'}, key='z', user='alice')
+        self.bus.flush()
+
+        urls = lambda client: [data['url'] for _, data in self.received(client)]
+        self.assertEqual(urls(legacy), ['x', 'y', 'z'])
+        self.assertEqual(urls(alerts), ['x', 'z'])
+        self.assertEqual(urls(alice), ['y', 'z'])
+
+    def test_disconnect_forgets_subscriber(self):
+        alerts = self.socketio.test_client(self.app)
+        alerts.emit('subscribe', {'severities': ['malicious']}, callback=True)
+        self.assertEqual(self.bus.get_stats()['subscribers'], 1)
+        alerts.disconnect()
+        self.assertEqual(self.bus.get_stats()['subscribers'], 0)
+
+    def test_disconnect_chains_existing_handler(self):
+        app = Flask(__name__)
+        socketio = SocketIO(app, async_mode='threading')
+        disconnected = []
+        socketio.on('disconnect')(lambda *args: disconnected.append(True))
+        bus = EventBus()
+        bus.attach(socketio)
+        self.addCleanup(bus.close)
+
+        client = socketio.test_client(app)
+        client.emit('subscribe', {'severities': ['safe']}, callback=True)
+        client.disconnect()
+        self.assertEqual(disconnected, [True])
+        self.assertEqual(bus.get_stats()['subscribers'], 0)
+
+    def test_clients_start_in_every_severity_room(self):
+        dashboard = self.client()
+        rooms = self.socketio.server.rooms(self.socketio.server.manager.sid_from_eio_sid(
+            dashboard.eio_sid, '/'), namespace='/')
+        self.assertEqual(sorted(r for r in rooms if r.startswith('all:')),
+                         sorted(f'all:{severity}' for severity in SEVERITIES))
+
+    def test_connect_chains_existing_handler(self):
+        app = Flask(__name__)
+        socketio = SocketIO(app, async_mode='threading')
+        connected = []
+        socketio.on('connect')(lambda *args: connected.append(True))
+        bus = EventBus()
+        bus.attach(socketio)
+        self.addCleanup(bus.close)
+
+        client = socketio.test_client(app)
+        self.assertTrue(client.is_connected())
+        self.assertEqual(connected, [True])
+        self.assertEqual(bus.get_stats()['subscribers'], 1)
+        client.disconnect()
+
+    def test_broadcast_to_unsubscribed_clients_without_room_scoping(self):
+        app = Flask(__name__)
+        socketio = SocketIO(app, async_mode='threading')
+        bus = EventBus(window=0.05, room_scoped=False)
+        bus.attach(socketio)
+        self.addCleanup(bus.close)
+        legacy = socketio.test_client(app)
+        alerts = socketio.test_client(app)
+        self.addCleanup(legacy.disconnect)
+        self.addCleanup(alerts.disconnect)
+        alerts.emit('subscribe', {'severities': ['malicious']}, callback=True)
+        server = socketio.server
+        server._send_eio_packet = lambda eio_sid, eio_pkt: server._send_packet(
+            eio_sid, sio_packet.Packet(encoded_packet=eio_pkt.data))
+        legacy.get_received()
+        alerts.get_received()
+
+        bus.publish('new_scan', {'url': 'x', 'threat_level': 'SAFE'}, key='x')
+        bus.flush()
+        self.assertEqual(len(legacy.get_received()), 1)
+        self.assertEqual(alerts.get_received(), [])
+
+    def test_severity_of(self):
+        self.assertEqual(severity_of({'threat_level': 'RANSOMWARE'}), 'malicious')
+        self.assertEqual(severity_of({'risk': 'benign'}), 'safe')
+        self.assertEqual(severity_of({'threat_level': 'skipped', 'classification': 'SUSPICIOUS'}),
+                         'suspicious')
+        self.assertEqual(severity_of({'status': 'SCAN_UPDATE'}), 'info')
+
+
+if __name__ == '__main__':
+    unittest.main()
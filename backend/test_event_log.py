@@ -0,0 +1,104 @@
+"""
+TEST SUITE FOR DASHBOARD EVENT LOG
+Verifies cursor reads, paging, bounded retention and Socket.IO catch-up
+"""
+
+import unittest
+import os
+import sys
+from unittest import mock
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask_socketio import SocketIO
+
+import event_log as event_log_module
+from event_bus import EventBus
+from event_log import EventLog
+
+
+class TestEventLog(unittest.TestCase):
+    """Test EventLog cursors and retention"""
+
+    def setUp(self):
+        self.log = EventLog(retention=8, max_age=0)
+
+    def test_after_cursor_and_paging(self):
+        for i in range(5):
+            self.assertEqual(self.log.append('new_scan', {'n': i}), i + 1)
+
+        page = self.log.after(0, limit=3)
+        self.assertEqual([e['seq'] for e in page['events']], [1, 2, 3])
+        self.assertTrue(page['has_more'])
+        self.assertFalse(page['reset'])
+
+        page = self.log.after(page['cursor'], limit=3)
+        self.assertEqual([e['data']['n'] for e in page['events']], [3, 4])
+        self.assertFalse(page['has_more'])
+
+        page = self.log.after(page['cursor'])
+        self.assertEqual((page['events'], page['cursor'], page['reset']), ([], 5, False))
+
+    def test_evicted_cursor_resets(self):
+        for i in range(20):
+            self.log.append('new_scan', {'n': i})
+        self.assertLessEqual(self.log.get_stats()['size'], 9)
+
+        page = self.log.after(2)
+        self.assertTrue(page['reset'])
+        self.assertEqual(page['events'][0]['seq'], self.log.get_stats()['first_seq'])
+        self.assertEqual(page['cursor'], 20)
+
+    def test_cursor_from_another_process_resets(self):
+        self.log.append('new_scan', {})
+        self.assertTrue(self.log.after(1, log_id='elsewhere')['reset'])
+        self.assertTrue(self.log.after(7)['reset'])
+        self.assertFalse(self.log.after(1, log_id=self.log.log_id)['reset'])
+
+    def test_age_retention_and_since_time(self):
+        log = EventLog(retention=100, max_age=60)
+        with mock.patch.object(event_log_module.time, 'time', return_value=1000.0):
+            log.append('new_scan', {'n': 0})
+        with mock.patch.object(event_log_module.time, 'time', return_value=1030.0):
+            log.append('new_scan', {'n': 1})
+            self.assertEqual([e['seq'] for e in log.since_time(1010.0)['events']], [2])
+        with mock.patch.object(event_log_module.time, 'time', return_value=1070.0):
+            page = log.after(0)
+        self.assertEqual([e['seq'] for e in page['events']], [2])
+        self.assertTrue(page['reset'])
+
+
+class TestEventBusCatchUp(unittest.TestCase):
+    """Test event numbering by EventBus and the 'catch_up' Socket.IO event"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.socketio = SocketIO(self.app, async_mode='threading')
+        self.log = EventLog(retention=100, max_age=0)
+        self.bus = EventBus(window=0.05, log=self.log)
+        self.bus.attach(self.socketio)
+        self.addCleanup(self.bus.close)
+
+    def test_final_events_numbered_progress_not(self):
+        self.bus.publish('new_scan', {'url': 'a', 'status': 'SCAN_STARTED'}, key='a', progress=True)
+        self.bus.publish('new_scan', {'url': 'a', 'status': 'SCAN_COMPLETE'}, key='a')
+        self.bus.publish('new_scan', {'url': 'b'}, key='b')
+        events = self.log.after(0)['events']
+        self.assertEqual([(e['seq'], e['data']['url']) for e in events], [(1, 'a'), (2, 'b')])
+
+    def test_catch_up_over_socketio(self):
+        for url in ('a', 'b', 'c'):
+            self.bus.publish('new_scan', {'url': url}, key=url)
+        client = self.socketio.test_client(self.app)
+        self.addCleanup(client.disconnect)
+
+        page = client.emit('catch_up', {'log': self.log.log_id, 'after': 1}, callback=True)
+        self.assertEqual([e['data']['url'] for e in page['events']], ['b', 'c'])
+        self.assertEqual(page['cursor'], 3)
+        self.assertFalse(page['reset'])
+
+
+if __name__ == '__main__':
+    unittest.main()
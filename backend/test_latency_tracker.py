@@ -0,0 +1,122 @@
+"""
+TEST SUITE FOR LATENCY TRACKER
+Verifies rolling histograms, quantiles, adaptive timeouts and endpoint labels
+"""
+
+import unittest
+import os
+import sys
+from unittest import mock
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import latency_tracker
+from latency_tracker import LatencyHistogram, LatencyTracker, endpoint_label
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """Test per-endpoint latency histograms"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(latency_tracker.time, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_quantiles_from_buckets(self):
+        """Quantiles are bucket upper bounds, within ~25% of the true value"""
+        histogram = LatencyHistogram(window_seconds=60)
+        for _ in range(98):
+            histogram.record(0.1)
+        histogram.record(2.0)
+        histogram.record(3.0)
+
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.1, delta=0.025)
+        self.assertAlmostEqual(histogram.quantile(0.99), 2.0, delta=0.5)
+        self.assertAlmostEqual(histogram.quantile(1.0), 3.0, delta=0.75)
+        self.assertIsNone(LatencyHistogram().quantile(0.5))
+
+    def test_old_samples_age_out(self):
+        """Samples leave the window after one to two half-windows"""
+        histogram = LatencyHistogram(window_seconds=60)
+        histogram.record(5.0)
+        self.clock.now += 40
+        histogram.record(0.1)
+        self.assertEqual(histogram.count(), 2)
+        self.clock.now += 40
+        self.assertEqual(histogram.count(), 1)
+        self.clock.now += 100
+        self.assertEqual(histogram.count(), 0)
+        self.assertEqual(histogram.total, 2)
+
+    def test_timeout_follows_p99_within_bounds(self):
+        """Timeouts shrink to p99 * multiplier, never below floor or above ceiling"""
+        tracker = LatencyTracker(window_seconds=60, min_samples=10, multiplier=2, floor=0.5)
+        self.assertEqual(tracker.timeout_for('nvd', 'GET a/b', 10), 10)
+
+        for _ in range(10):
+            tracker.record('nvd', 'GET a/b', 0.8)
+        self.assertAlmostEqual(tracker.timeout_for('nvd', 'GET a/b', 10), 1.6, delta=0.4)
+        self.assertEqual(tracker.timeout_for('nvd', 'GET a/b', 1), 1)
+        self.assertIsNone(tracker.timeout_for('nvd', 'GET a/b', None))
+
+        for _ in range(10):
+            tracker.record('nvd', 'GET a/fast', 0.01)
+        self.assertEqual(tracker.timeout_for('nvd', 'GET a/fast', 10), 0.5)
+
+        # A new endpoint borrows the provider-wide histogram
+        self.assertIsNotNone(tracker.hedge_delay('nvd', 'GET a/new'))
+        self.assertIsNone(tracker.hedge_delay('otx', 'GET a/new'))
+
+    def test_disabled_policies(self):
+        tracker = LatencyTracker(min_samples=1, adaptive=False, hedging=False)
+        tracker.record('nvd', 'GET a', 0.01)
+        self.assertEqual(tracker.timeout_for('nvd', 'GET a', 10), 10)
+        self.assertIsNone(tracker.hedge_delay('nvd', 'GET a'))
+
+    def test_stats_and_endpoint_labels(self):
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record('virustotal', 'GET vt/urls/{id}', 0.2, timed_out=True)
+        stats = tracker.get_stats()['virustotal']
+        self.assertEqual(set(stats), {'GET vt/urls/{id}', '*'})
+        self.assertEqual(stats['*']['timeouts'], 1)
+        self.assertEqual(sum(count for _, count in stats['*']['buckets']), 1)
+        self.assertIsNotNone(stats['*']['adaptive_timeout_s'])
+
+        self.assertEqual(endpoint_label('get', 'https://www.virustotal.com/api/v3/urls/' + 'ab12' * 16),
+                         'GET www.virustotal.com/api/v3/urls/{id}')
+        self.assertEqual(endpoint_label('GET', 'https://h/rest/json/cves/2.0?cveId=CVE-2024-1'),
+                         'GET h/rest/json/cves/2.0')
+        self.assertEqual(endpoint_label('GET', 'https://h/api/v1/indicators/domain/example.com/general'),
+                         'GET h/api/v1/indicators/domain/{host}/general')
+        self.assertEqual(endpoint_label('GET', 'https://h/api/v1/indicators/IPv4/10.0.0.1/general'),
+                         'GET h/api/v1/indicators/IPv4/{host}/general')
+        self.assertEqual(endpoint_label('GET', 'https://h/api/v1/indicators/url/http://a.com/x/general'),
+                         'GET h/api/v1/indicators/url/{url}')
+        self.assertEqual(endpoint_label('GET', 'https://h/check/https%3A%2F%2Fa.com%2F'), 'GET h/check/{url}')
+        self.assertEqual(endpoint_label('GET', 'https://h/feeds/latest.json'), 'GET h/feeds/latest.json')
+        self.assertEqual(endpoint_label('POST', 'https://h/v4/threatMatches:find'), 'POST h/v4/threatMatches:find')
+
+    def test_endpoint_histograms_are_capped(self):
+        tracker = LatencyTracker(min_samples=1, max_endpoints=2)
+        for i in range(5):
+            tracker.record('otx', f'GET otx/{i}', 0.1)
+        stats = tracker.get_stats()['otx']
+        self.assertEqual(set(stats), {'GET otx/0', 'GET otx/1', '*'})
+        self.assertEqual(stats['*']['count'], 5)
+        self.assertEqual(tracker.overflow, 3)
+        # Endpoints without a histogram fall back to the provider's
+        self.assertEqual(tracker.quantile('otx', 'GET otx/4', 0.5), tracker.quantile('otx', '*', 0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+TEST SUITE FOR MODEL HOT RELOAD
+Verifies version tagging, atomic swaps and shadow scoring
+"""
+
+import unittest
+import os
+import sys
+import time
+import tempfile
+import threading
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from model_manager import ModelManager
+
+
+class FakePredictor:
+    """Predictor whose version and verdict come from a file on disk"""
+
+    def __init__(self, path):
+        with open(path) as f:
+            self.model_sha256, self.threat_level = f.read().split()
+
+    def predict(self, payload):
+        return {'risk_score': 90 if self.threat_level == 'malicious' else 10,
+                'threat_level': self.threat_level}
+
+
+class TestModelManager(unittest.TestCase):
+    """Test model manager reload behaviour"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'model.pkl')
+        self._write('aaaaaaaaaaaaaaaa', 'benign')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, sha, level):
+        with open(self.path, 'w') as f:
+            f.write(f'{sha} {level}')
+        # Make sure the mtime changes even on coarse filesystems
+        stamp = time.time() + len(sha) + (1 if level == 'malicious' else 0)
+        os.utime(self.path, (stamp, stamp))
+
+    def _manager(self, shadow=False):
+        manager = ModelManager(poll_interval=0.05, shadow_mode=shadow, shadow_sample_rate=1.0)
+        manager.register('url', lambda: FakePredictor(self.path), [self.path])
+        return manager
+
+    def test_results_are_tagged_with_version(self):
+        """Predictions carry the active model version"""
+        manager = self._manager()
+        result = manager.predict('url', 'https://example.com')
+        self.assertEqual(result['model_version'], 'aaaaaaaaaaaa')
+        self.assertEqual(manager.bind('url')('x')['model_version'], 'aaaaaaaaaaaa')
+
+    def test_reload_waits_for_stable_files_then_swaps(self):
+        """A change is loaded on the second poll that sees it"""
+        manager = self._manager()
+        self._write('bbbbbbbbbbbbbbbbbb', 'malicious')
+
+        self.assertEqual(manager.check_for_updates(), [])
+        self.assertEqual(manager.version('url'), 'aaaaaaaaaaaa')
+
+        self.assertEqual(manager.check_for_updates(), ['url'])
+        result = manager.predict('url', 'https://example.com')
+        self.assertEqual(result['model_version'], 'bbbbbbbbbbbb')
+        self.assertEqual(result['threat_level'], 'malicious')
+
+    def test_companion_change_swaps_same_model(self):
+        """A new vectorizer next to an unchanged model pickle is loaded"""
+        vectorizer = os.path.join(self.tmp.name, 'vectorizer.pkl')
+        with open(vectorizer, 'w') as f:
+            f.write('v1')
+        manager = ModelManager(poll_interval=0.05, shadow_mode=False)
+        manager.register('url', lambda: FakePredictor(self.path), [self.path, vectorizer])
+        first = manager.version('url')
+        self.assertTrue(first.startswith('aaaaaaaaaaaa+'))
+
+        with open(vectorizer, 'w') as f:
+            f.write('v2')
+        os.utime(vectorizer, (time.time() + 5, time.time() + 5))
+        manager.check_for_updates()
+        self.assertEqual(manager.check_for_updates(), ['url'])
+        second = manager.version('url')
+        self.assertTrue(second.startswith('aaaaaaaaaaaa+'))
+        self.assertNotEqual(second, first)
+
+    def test_failed_reload_keeps_active_model(self):
+        """A broken artifact is reported and the old model keeps serving"""
+        manager = self._manager()
+        with open(self.path, 'w') as f:
+            f.write('garbage')
+        manager.check_for_updates()
+        manager.check_for_updates()
+        status = manager.get_status()['url']
+        self.assertEqual(status['reload_errors'], 1)
+        self.assertEqual(manager.predict('url', 'x')['model_version'], 'aaaaaaaaaaaa')
+
+    def test_shadow_mode_records_agreement_until_promoted(self):
+        """Candidate is scored in shadow and only serves after promotion"""
+        manager = self._manager(shadow=True)
+        self._write('cccccccccccccccc', 'malicious')
+        manager.check_for_updates()
+        manager.check_for_updates()
+
+        for _ in range(5):
+            self.assertEqual(manager.predict('url', 'x')['model_version'], 'aaaaaaaaaaaa')
+        deadline = time.time() + 2
+        while manager.get_status()['url']['shadow']['samples'] < 5 and time.time() < deadline:
+            time.sleep(0.01)
+
+        shadow = manager.get_status()['url']['shadow']
+        self.assertEqual(shadow['samples'], 5)
+        self.assertEqual(shadow['agreement_rate'], 0.0)
+        self.assertEqual(shadow['mean_abs_score_delta'], 80.0)
+        self.assertIsNotNone(shadow['candidate_latency_ms']['p95'])
+
+        manager.promote('url')
+        self.assertEqual(manager.predict('url', 'x')['model_version'], 'cccccccccccc')
+        with self.assertRaises(ValueError):
+            manager.promote('url')
+        manager.stop()
+
+    def test_watcher_thread_picks_up_changes(self):
+        """Background watcher swaps without explicit polling"""
+        manager = self._manager()
+        manager.start()
+        try:
+            self._write('dddddddddddddddd', 'benign')
+            deadline = time.time() + 2
+            while manager.version('url') != 'dddddddddddd' and time.time() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(manager.version('url'), 'dddddddddddd')
+        finally:
+            manager.stop()
+
+
+    def test_concurrent_swaps_never_mix_predictor_and_version(self):
+        """A prediction is labelled with the version of the predictor that made it"""
+        manager = self._manager()
+        slot = manager.slots['url']
+        predictors = []
+        for sha, level in (('1111111111111111', 'benign'), ('2222222222222222', 'malicious')):
+            self._write(sha, level)
+            predictors.append((FakePredictor(self.path), sha[:12]))
+        stop = threading.Event()
+
+        def swapper():
+            while not stop.is_set():
+                for predictor, version in predictors:
+                    manager._swap(slot, predictor, version)
+
+        thread = threading.Thread(target=swapper)
+        thread.start()
+        try:
+            for _ in range(20000):
+                result = manager.predict('url', 'x')
+                expected = '2222' if result['threat_level'] == 'malicious' else '1111'
+                self.assertTrue(result['model_version'].startswith(expected))
+        finally:
+            stop.set()
+            thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+TEST SUITE FOR SHARED NEWS POLLER
+Verifies one fetch per category for all callers, change detection and SSE
+fan-out with Last-Event-ID resume
+"""
+
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from error_handler import APITimeoutError
+from news_manager import CyberNewsManager, NewsPoller
+
+
+class FakeNewsManager(CyberNewsManager):
+    """Returns the configured articles and counts fetches"""
+
+    def __init__(self, titles):
+        self.titles = titles
+        self.fetches = []
+        self.lock = threading.Lock()
+
+    def fetch_articles(self, category='all', limit=30):
+        with self.lock:
+            self.fetches.append(category)
+        time.sleep(0.05)
+        return [{'title': title, 'link': f'https://news.example/{title}', 'description': title}
+                for title in self.titles][:limit]
+
+
+class TestNewsPoller(unittest.TestCase):
+    """Test NewsPoller snapshots and its broadcast channel"""
+
+    def setUp(self):
+        self.manager = FakeNewsManager(['a', 'b'])
+        self.poller = NewsPoller(manager=self.manager, interval=60)
+        self.addCleanup(self.poller.close)
+
+    def test_concurrent_requests_share_one_fetch(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.poller.get('malware')))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.manager.fetches, ['malware'])
+        self.assertEqual({id(snapshot) for snapshot in results}, {id(results[0])})
+
+        self.poller.get('malware')
+        self.assertEqual(len(self.manager.fetches), 1)
+
+    def test_unknown_category_served_from_all(self):
+        self.assertEqual(self.poller.get('nonsense').category, 'all')
+
+    def test_refresh_only_publishes_changes(self):
+        first = self.poller.get('all')
+        self.assertIs(self.poller.refresh('all'), first)
+        self.assertEqual(self.poller.get_stats()['unchanged'], 1)
+
+        self.manager.titles = ['c', 'a', 'b']
+        second = self.poller.refresh('all')
+        self.assertGreater(second.version, first.version)
+        self.assertNotEqual(second.etag, first.etag)
+
+    def test_failed_refresh_keeps_last_snapshot(self):
+        first = self.poller.get('all')
+        self.manager.fetch_articles = lambda **kwargs: 1 / 0
+        self.assertIs(self.poller.refresh('all'), first)
+        self.assertEqual(self.poller.get_stats()['errors'], 1)
+
+    def test_unavailable_api_does_not_replace_real_articles(self):
+        first = self.poller.get('all')
+
+        def timeout(**kwargs):
+            raise APITimeoutError('NewsAPI', 15)
+
+        self.manager.fetch_articles = timeout
+        self.assertIs(self.poller.refresh('all'), first)
+        self.manager.titles = []
+        del self.manager.fetch_articles
+        self.assertIs(self.poller.refresh('all'), first)
+        stats = self.poller.get_stats()
+        self.assertEqual((stats['errors'], stats['updates']), (1, 1))
+
+    def test_demo_articles_only_without_snapshot(self):
+        def timeout(**kwargs):
+            raise APITimeoutError('NewsAPI', 15)
+
+        self.manager.fetch_articles = timeout
+        demo = self.poller.get('malware')
+        self.assertTrue(demo.articles)
+        self.assertEqual(self.poller.get_stats()['errors'], 1)
+
+        del self.manager.fetch_articles
+        real = self.poller.refresh('malware')
+        self.assertGreater(real.version, demo.version)
+        self.assertEqual(real.articles[0]['title'], 'a')
+
+    def test_stream_pushes_updates_to_every_subscriber(self):
+        streams = [self.poller.stream('all', heartbeat=0.05, max_seconds=2) for _ in range(3)]
+        received = [[], [], []]
+
+        def consume(index):
+            for frame in streams[index]:
+                if frame.startswith('id:'):
+                    received[index].append(frame)
+                    if len(received[index]) == 2:
+                        return
+
+        threads = [threading.Thread(target=consume, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.manager.titles = ['breaking']
+        self.poller.refresh('all')
+        for thread in threads:
+            thread.join(timeout=3)
+
+        self.assertEqual(self.manager.fetches, ['all', 'all'])
+        for frames in received:
+            self.assertEqual(len(frames), 2)
+            self.assertIn('breaking', frames[1])
+        # Serialized once for all subscribers
+        self.assertIs(received[0][1], received[1][1])
+
+    def test_stream_resumes_from_last_event_id(self):
+        snapshot = self.poller.get('all')
+        frames = list(self.poller.stream('all', last_version=snapshot.version,
+                                         heartbeat=0.05, max_seconds=0.12))
+        self.assertEqual(frames[0], 'retry: 3000\n\n')
+        self.assertTrue(all(frame == ': keepalive\n\n' for frame in frames[1:]))
+        self.assertEqual(self.poller.get_stats()['subscribers'], 0)
+
+
+    def test_event_ids_from_another_process_resend_snapshot(self):
+        snapshot = self.poller.get('all')
+        event_id = f'{self.poller.poller_id}-{snapshot.version}'
+        self.assertTrue(snapshot.sse_event().startswith(f'id: {event_id}\n'))
+        self.assertEqual(self.poller.resume_version(event_id), snapshot.version)
+        # A restarted server (new poller id) or a bare counter starts over
+        self.assertEqual(self.poller.resume_version(f'0123456789ab-{snapshot.version}'), 0)
+        self.assertEqual(self.poller.resume_version('7'), 0)
+
+        frames = list(self.poller.stream('all', last_version=snapshot.version + 5,
+                                         heartbeat=0.05, max_seconds=0.06))
+        self.assertEqual(frames[1], snapshot.sse_event())
+
+
+if __name__ == '__main__':
+    unittest.main()
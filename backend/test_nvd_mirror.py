@@ -0,0 +1,159 @@
+"""
+TEST SUITE FOR THE NVD MIRROR
+Verifies feed ingestion, incremental updates and full-text search
+"""
+
+import unittest
+import os
+import sys
+import gzip
+import json
+import tempfile
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from nvd_mirror import NVDMirror, parse_nvd_cve
+
+
+def api_cve(cve_id, description, score, modified, severity='HIGH'):
+    """A CVE object in NVD API 2.0 format"""
+    return {
+        'cve': {
+            'id': cve_id,
+            'published': '2024-01-01T00:00:00.000',
+            'lastModified': modified,
+            'descriptions': [{'lang': 'es', 'value': 'otro'}, {'lang': 'en', 'value': description}],
+            'metrics': {'cvssMetricV31': [{'cvssData': {
+                'version': '3.1', 'baseScore': score, 'baseSeverity': severity,
+                'vectorString': 'CVSS:3.1/AV:N', 'attackVector': 'NETWORK'}}]},
+            'references': [{'url': f'https://nvd.nist.gov/vuln/detail/{cve_id}', 'source': 'nvd'}],
+        }
+    }
+
+
+class TestNVDMirror(unittest.TestCase):
+    """Test the local NVD mirror"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.mirror = NVDMirror(os.path.join(self.tmp.name, 'nvd.db'))
+        self.feed_dir = os.path.join(self.tmp.name, 'feeds')
+        os.makedirs(self.feed_dir)
+
+    def tearDown(self):
+        self.mirror.close()
+        self.tmp.cleanup()
+
+    def _write_feed(self, name, vulnerabilities, gz=False):
+        path = os.path.join(self.feed_dir, name)
+        opener = gzip.open if gz else open
+        with opener(path, 'wt', encoding='utf-8') as f:
+            json.dump({'vulnerabilities': vulnerabilities}, f)
+        return path
+
+    def test_database_created_on_first_write(self):
+        """No file until the mirror is used; a write can be the first use"""
+        path = os.path.join(self.tmp.name, 'lazy', 'nvd.db')
+        mirror = NVDMirror(path)
+        self.addCleanup(mirror.close)
+        self.assertEqual(mirror.count(), 0)
+        self.assertFalse(os.path.exists(path))
+
+        mirror.upsert_records([parse_nvd_cve(api_cve('CVE-2024-0009', 'Heap overflow', 7.5,
+                                                     '2024-03-01T00:00:00.000')['cve'])])
+        self.assertEqual(mirror.count(), 1)
+
+    def test_ingest_and_lookup(self):
+        """Yearly feeds load into the mirror; lookups are case-insensitive"""
+        self._write_feed('nvdcve-2.0-2024.json.gz', [
+            api_cve('CVE-2024-0001', 'Remote code execution in the upload handler', 9.8,
+                    '2024-02-01T00:00:00.000', 'CRITICAL'),
+            api_cve('CVE-2024-0002', 'Cross-site scripting in search page', 6.1,
+                    '2024-02-01T00:00:00.000', 'MEDIUM'),
+        ], gz=True)
+
+        self.assertEqual(self.mirror.ingest_paths([self.feed_dir]), 2)
+        record = self.mirror.get_cve('cve-2024-0001')
+        self.assertEqual(record['description'], 'Remote code execution in the upload handler')
+        self.assertEqual(record['cvss']['score'], 9.8)
+        self.assertEqual(record['cvss']['severity'], 'CRITICAL')
+        self.assertIsNone(self.mirror.get_cve('CVE-1999-0001'))
+        self.assertEqual(set(self.mirror.get_cves(['CVE-2024-0002', 'CVE-2024-9999'])),
+                         {'CVE-2024-0002'})
+
+    def test_full_text_search(self):
+        """Keyword search matches descriptions, ranks and filters by CVSS"""
+        self._write_feed('2024.json', [
+            api_cve('CVE-2024-0001', 'Remote code execution via crafted upload', 9.8, '2024-02-01'),
+            api_cve('CVE-2024-0002', 'Remote code execution in admin panel', 7.2, '2024-02-01'),
+            api_cve('CVE-2024-0003', 'Phishing redirect through open redirect', 5.4, '2024-02-01'),
+        ])
+        self.mirror.ingest_paths([self.feed_dir])
+
+        ids = [r['id'] for r in self.mirror.search('remote code execution')]
+        self.assertEqual(set(ids), {'CVE-2024-0001', 'CVE-2024-0002'})
+        self.assertEqual([r['id'] for r in self.mirror.search('redir')], ['CVE-2024-0003'])
+        self.assertEqual([r['id'] for r in self.mirror.search('remote', min_score=9)],
+                         ['CVE-2024-0001'])
+        # FTS syntax in user input is treated as plain words
+        self.assertEqual(self.mirror.search('"remote" OR ('), self.mirror.search('remote or'))
+        self.assertEqual(self.mirror.search('  '), [])
+
+    def test_incremental_modified_feed(self):
+        """Modified feeds update newer records only and re-index descriptions"""
+        self._write_feed('2024.json', [
+            api_cve('CVE-2024-0001', 'Buffer overflow in parser', 5.0, '2024-02-01T00:00:00.000'),
+            api_cve('CVE-2024-0002', 'Information disclosure', 4.0, '2024-03-01T00:00:00.000'),
+        ])
+        self.mirror.ingest_paths([self.feed_dir])
+        modified = self._write_feed('modified.json', [
+            api_cve('CVE-2024-0001', 'Heap overflow in parser allows takeover', 8.8,
+                    '2024-05-01T00:00:00.000'),
+            api_cve('CVE-2024-0002', 'Older copy that must not win', 1.0,
+                    '2024-01-01T00:00:00.000'),
+            api_cve('CVE-2024-0003', 'Brand new entry', 3.3, '2024-05-01T00:00:00.000'),
+        ])
+
+        self.assertEqual(self.mirror.ingest_file(modified), 3)
+        self.assertEqual(self.mirror.count(), 3)
+        self.assertEqual(self.mirror.get_cve('CVE-2024-0001')['cvss']['score'], 8.8)
+        self.assertEqual(self.mirror.get_cve('CVE-2024-0002')['description'], 'Information disclosure')
+        self.assertEqual([r['id'] for r in self.mirror.search('heap overflow')], ['CVE-2024-0001'])
+        self.assertEqual(self.mirror.search('buffer'), [])
+
+        # Unchanged files are skipped on the next run
+        self.assertEqual(self.mirror.ingest_paths([self.feed_dir]), 0)
+
+    def test_legacy_feed_format(self):
+        """1.1 data feeds (CVE_Items) are accepted"""
+        path = os.path.join(self.feed_dir, 'nvdcve-1.1-2019.json')
+        with open(path, 'w') as f:
+            json.dump({'CVE_Items': [{
+                'cve': {
+                    'CVE_data_meta': {'ID': 'CVE-2019-0001'},
+                    'description': {'description_data': [{'lang': 'en', 'value': 'Denial of service'}]},
+                    'references': {'reference_data': [{'url': 'https://example.com', 'refsource': 'MISC'}]},
+                },
+                'impact': {'baseMetricV2': {'severity': 'HIGH', 'cvssV2': {'baseScore': 7.8}}},
+                'publishedDate': '2019-01-01T00:00Z',
+                'lastModifiedDate': '2019-06-01T00:00Z',
+            }]}, f)
+
+        self.mirror.ingest_file(path)
+        record = self.mirror.get_cve('CVE-2019-0001')
+        self.assertEqual(record['cvss'], {'version': '2.0', 'score': 7.8, 'severity': 'HIGH',
+                                          'vector': '', 'accessVector': '',
+                                          'accessComplexity': '', 'authentication': ''})
+        self.assertEqual(record['references'][0]['source'], 'MISC')
+
+    def test_parse_matches_live_api_record(self):
+        """Records parsed from the API keep the endpoint's response shape"""
+        record = parse_nvd_cve(api_cve('CVE-2024-0001', 'desc', 9.8, '2024-02-01')['cve'])
+        self.assertEqual(set(record), {'id', 'description', 'cvss', 'published',
+                                       'lastModified', 'references'})
+        self.assertEqual(record['description'], 'desc')
+
+
+if __name__ == '__main__':
+    unittest.main()
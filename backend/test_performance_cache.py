@@ -0,0 +1,136 @@
+"""
+TEST SUITE FOR TTL CACHES
+Verifies LRU eviction, heap-driven expiry and the sharded variant
+"""
+
+import unittest
+import os
+import sys
+import threading
+from unittest import mock
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import performance_cache
+from performance_cache import TTLCache, ShardedTTLCache
+
+
+class FakeClock:
+    """Drives time.time() inside performance_cache"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test the single-lock TTL cache"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(performance_cache.time, 'time', self.clock.time)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_evicts_least_recently_used(self):
+        """Reads refresh recency; a full cache drops the oldest untouched key"""
+        cache = TTLCache(max_size=3)
+        for key in 'abc':
+            cache.set(key, key.upper())
+        self.assertEqual(cache.get('a'), 'A')
+        cache.set('d', 'D')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual([cache.get(k) for k in 'acd'], ['A', 'C', 'D'])
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+        # Overwriting an existing key never evicts
+        cache.set('c', 'C2')
+        self.assertEqual(cache.get_stats()['size'], 3)
+        self.assertEqual(cache.get('a'), 'A')
+
+    def test_expired_entries_are_purged_before_eviction(self):
+        """Expired entries free their slots instead of live ones being evicted"""
+        cache = TTLCache(max_size=3, default_ttl_seconds=100)
+        cache.set('short', 1, ttl_seconds=10)
+        cache.set('long', 2)
+        cache.set('forever', 3, ttl_seconds=-1)
+        self.clock.now += 11
+        cache.set('new', 4)
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['expirations'], stats['evictions']), (1, 0))
+        self.assertEqual([cache.get(k) for k in ('long', 'forever', 'new')], [2, 3, 4])
+
+        self.clock.now += 1000
+        self.assertIsNone(cache.get('long'))
+        self.assertEqual(cache.get('forever'), 3)
+
+    def test_replaced_entries_keep_their_new_ttl(self):
+        """A stale heap item of an overwritten key does not expire the new value"""
+        cache = TTLCache(max_size=10)
+        cache.set('k', 'old', ttl_seconds=5)
+        cache.set('k', 'new', ttl_seconds=50)
+        self.clock.now += 6
+        cache.set('other', 1)
+
+        self.assertEqual(cache.get('k'), 'new')
+        self.assertEqual(cache.get_stats()['expirations'], 0)
+
+    def test_heap_stays_bounded_under_overwrites(self):
+        """Repeated overwrites do not grow the expiry heap without limit"""
+        cache = TTLCache(max_size=10)
+        for i in range(10000):
+            cache.set(f'k{i % 5}', i)
+        self.assertLess(len(cache._expiry_heap), 100)
+        cache.clear()
+        self.assertEqual(cache._expiry_heap, [])
+
+
+class TestShardedTTLCache(unittest.TestCase):
+    """Test the lock-sharded variant"""
+
+    def test_same_interface_and_aggregated_stats(self):
+        cache = ShardedTTLCache(max_size=64, shards=4)
+        # Fewer keys than one shard holds: no eviction whatever the hash seed
+        for i in range(16):
+            cache.set(f'k{i}', i)
+        self.assertEqual(cache.get('k7'), 7)
+        self.assertIsNone(cache.get('missing'))
+        cache.delete('k7')
+        self.assertIsNone(cache.get('k7'))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['shards'], 4)
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertLessEqual(stats['size'], 64)
+        cache.clear()
+        self.assertEqual(cache.get_stats()['size'], 0)
+
+    def test_concurrent_writers_respect_capacity(self):
+        """Each shard enforces its share of max_size under contention"""
+        cache = ShardedTTLCache(max_size=400, shards=8)
+
+        def worker(n):
+            for i in range(2000):
+                cache.set(f'{n}-{i}', i)
+                cache.get(f'{n}-{i // 2}')
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(cache.get_stats()['size'], 400)
+
+    def test_rejects_zero_shards(self):
+        with self.assertRaises(ValueError):
+            ShardedTTLCache(shards=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+TEST SUITE FOR PROVIDER CLIENT
+Verifies pooled keep-alive connections, concurrency limits, error mapping,
+adaptive timeouts and hedging
+"""
+
+import unittest
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from error_handler import APIConnectionError, APITimeoutError
+from latency_tracker import LatencyTracker, endpoint_label
+from provider_client import ProviderClient, parse_limits
+
+
+class ProviderHandler(BaseHTTPRequestHandler):
+    """Fake provider: /slow sleeps, /stall sleeps on its first hit only,
+    everything else echoes the request"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.connections.add(self.client_address)
+        try:
+            if self.path.startswith('/slow'):
+                time.sleep(0.2)
+            elif self.path.startswith('/stall'):
+                with server.lock:
+                    server.stalls += 1
+                    first = server.stalls == 1
+                if first:
+                    time.sleep(1.0)
+            body = json.dumps({'path': self.path}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class TestProviderClient(unittest.TestCase):
+    """Test the shared async provider client"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ProviderHandler)
+        self.server.lock = threading.Lock()
+        self.server.active = 0
+        self.server.max_active = 0
+        self.server.connections = set()
+        self.server.stalls = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.latency = LatencyTracker(min_samples=20, multiplier=2, floor=0.05)
+        self.client = ProviderClient(limits={'slowprov': 3}, default_limit=8, timeout=5,
+                                     latency=self.latency)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_sync_facade_reuses_connections(self):
+        """Sequential calls from different threads share one kept-alive connection"""
+        results = []
+
+        def worker(i):
+            response = self.client.get('fastprov', f'{self.base}/item', params={'i': i})
+            results.append(response.json()['path'])
+
+        for i in range(5):
+            thread = threading.Thread(target=worker, args=(i,))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(results, [f'/item?i={i}' for i in range(5)])
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.client.get_stats()['fastprov']['requests'], 5)
+
+    def test_concurrency_limit_per_provider(self):
+        """At most `limit` requests of a provider run at once; the rest queue"""
+        calls = [('SlowProv', 'GET', f'{self.base}/slow', {}) for _ in range(9)]
+        started = time.perf_counter()
+        responses = self.client.gather(calls)
+        elapsed = time.perf_counter() - started
+
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertEqual(self.server.max_active, 3)
+        self.assertGreaterEqual(elapsed, 0.55)
+        stats = self.client.get_stats()['slowprov']
+        self.assertEqual((stats['limit'], stats['max_in_flight']), (3, 3))
+        self.assertEqual((stats['in_flight'], stats['queued']), (0, 0))
+
+    def test_errors_map_to_api_exceptions(self):
+        """Timeouts and refused connections raise the repo's API errors"""
+        with self.assertRaises(APITimeoutError):
+            self.client.get('fastprov', f'{self.base}/slow', timeout=0.05)
+        with self.assertRaises(APIConnectionError):
+            self.client.get('down', 'http://127.0.0.1:1/')
+
+        results = self.client.gather([('down', 'GET', 'http://127.0.0.1:1/', {}),
+                                      ('fastprov', 'GET', f'{self.base}/ok', {})])
+        self.assertIsInstance(results[0], APIConnectionError)
+        self.assertEqual(results[1].status_code, 200)
+        self.assertEqual(self.client.get_stats()['down']['errors'], 2)
+
+    def test_awaitable_from_another_loop(self):
+        """Async callers on their own loop can fan out through the shared pool"""
+        async def fetch_all():
+            return await asyncio.gather(*[
+                self.client.request_async('fastprov', 'GET', f'{self.base}/a{i}')
+                for i in range(20)
+            ])
+
+        responses = asyncio.run(fetch_all())
+        self.assertEqual([r.json()['path'] for r in responses], [f'/a{i}' for i in range(20)])
+
+    def test_timeout_adapts_to_observed_latency(self):
+        """A fast endpoint's timeout shrinks below the configured ceiling"""
+        endpoint = endpoint_label('GET', f'{self.base}/slow')
+        for _ in range(20):
+            self.latency.record('fastprov', endpoint, 0.01)
+
+        with self.assertRaises(APITimeoutError):
+            self.client.get('fastprov', f'{self.base}/slow', timeout=5)
+        histogram = self.latency.get_stats()['fastprov'][endpoint]
+        self.assertEqual((histogram['count'], histogram['timeouts']), (21, 1))
+
+    def test_explicit_endpoint_name(self):
+        """Callers may name the latency histogram instead of deriving it from the URL"""
+        self.client.get('fastprov', f'{self.base}/lookup/x', endpoint='GET lookup')
+        self.assertEqual(set(self.latency.get_stats()['fastprov']), {'GET lookup', '*'})
+
+    def test_hedged_lookup_beats_stalled_request(self):
+        """After the p95 a second request is sent; the first response wins"""
+        # Pool warmed up, so the original request reaches the server first
+        self.client.get('fastprov', f'{self.base}/ok')
+        endpoint = endpoint_label('GET', f'{self.base}/stall')
+        for _ in range(20):
+            self.latency.record('fastprov', endpoint, 0.02)
+
+        started = time.perf_counter()
+        response = self.client.get('fastprov', f'{self.base}/stall', hedge=True, timeout=5)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, 0.8)
+        stats = self.client.get_stats()['fastprov']
+        self.assertEqual((stats['hedges'], stats['hedge_wins']), (1, 1))
+
+        # Without hedging (or for non-idempotent methods) only one request is sent
+        self.client.get('fastprov', f'{self.base}/ok')
+        self.assertEqual(self.client.get_stats()['fastprov']['hedges'], 1)
+
+    def test_parse_limits(self):
+        self.assertEqual(parse_limits('VirusTotal=4, nvd=2,bad,zero=0'),
+                         {'virustotal': 4, 'nvd': 2, 'zero': 1})
+        self.assertEqual(parse_limits(''), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
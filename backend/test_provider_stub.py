@@ -0,0 +1,177 @@
+"""
+TEST SUITE FOR PROVIDER STUB
+Verifies replay of the seed recordings, injected latency and errors, record
+mode and routing of provider_client through the stand-in
+"""
+
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from unittest import mock
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+import provider_stub
+from latency_tracker import LatencyTracker
+from provider_client import ProviderClient, stub_route
+from provider_stub import ProviderStub
+
+
+class TestProviderStub(unittest.TestCase):
+    """Test the record/replay stand-in behind a ProviderClient"""
+
+    def setUp(self):
+        self.stub = ProviderStub(seed=1)
+        self.server = self.stub.serve(port=0)
+        self.stub_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.latency = LatencyTracker(min_samples=1000)
+        self.client = ProviderClient(latency=self.latency, stub_url=self.stub_url)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_routes_every_provider_to_recordings(self):
+        """Each provider endpoint the backend calls has a recorded answer"""
+        calls = [
+            ('virustotal', 'POST', 'https://www.virustotal.com/api/v3/urls', {'data': {'url': 'x'}}),
+            ('virustotal', 'GET', 'https://www.virustotal.com/api/v3/urls/u-' + 'ab12' * 16 + '-1', {}),
+            ('abuseipdb', 'GET', 'https://api.abuseipdb.com/api/v2/check', {'params': {'ipAddress': '1.2.3.4'}}),
+            ('otx', 'GET', 'https://otx.alienvault.com/api/v1/indicators/domain/example.org/general', {}),
+            ('phishtank', 'POST', 'https://checkurl.phishtank.com/checkurl/', {'data': {'url': 'x'}}),
+            ('urlscan', 'GET', 'https://urlscan.io/api/v1/search/', {'params': {'q': 'domain:x'}}),
+            ('safebrowsing', 'POST', 'https://safebrowsing.googleapis.com/v4/threatMatches:find', {'json': {}}),
+            ('ipqualityscore', 'GET', 'https://ipqualityscore.com/api/json/url/detect', {'params': {'key': 'k'}}),
+            ('nvd', 'GET', 'https://services.nvd.nist.gov/rest/json/cves/2.0', {'params': {'cveId': 'CVE-2021-44228'}}),
+            ('newsapi', 'GET', 'https://newsapi.org/v2/everything', {'params': {'q': 'security'}}),
+            ('a2a', 'POST', 'https://api.a2a.io/v1/urls/scan', {'json': {'url': 'x'}}),
+            ('plexiglass', 'POST', 'https://api.plexiglass.io/v1/analyze', {'json': {'url': 'x'}}),
+        ]
+        responses = self.client.gather(calls)
+        for (provider, _, url, _), response in zip(calls, responses):
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIsInstance(response.json(), dict)
+
+        self.assertIn('last_analysis_stats', responses[1].json()['data']['attributes'])
+        self.assertEqual(responses[8].json()['vulnerabilities'][0]['cve']['id'], 'CVE-2021-44228')
+        self.assertEqual(responses[9].json()['status'], 'ok')
+
+        # Histograms are keyed by the real endpoints, not the stub
+        self.assertIn('GET www.virustotal.com/api/v3/urls/{id}', self.latency.get_stats()['virustotal'])
+        self.assertEqual(sum(s['misses'] for s in self.stub.get_stats().values()), 0)
+
+    def test_unrecorded_endpoint_is_404(self):
+        response = self.client.get('otx', 'https://otx.alienvault.com/api/v1/pulses/subscribed')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['error']['code'], 'StubNoRecording')
+
+    def test_specific_recording_wins(self):
+        """Literal segments and query constraints beat wildcards"""
+        self.stub.recordings['urlscan.io'].append(provider_stub.Recording(
+            'GET', '/api/v1/search/', body={'results': [], 'total': 0}, query={'q': 'domain:empty.test'}))
+        empty = self.client.get('urlscan', 'https://urlscan.io/api/v1/search/', params={'q': 'domain:empty.test'})
+        other = self.client.get('urlscan', 'https://urlscan.io/api/v1/search/', params={'q': 'domain:x'})
+        self.assertEqual(empty.json()['total'], 0)
+        self.assertEqual(other.json()['total'], 1)
+
+    def test_profile_latency_and_errors(self):
+        """Per-endpoint latency, error rate and error status are applied"""
+        self.stub.profile = {
+            'GET newsapi.org/v2/everything': {'latency_ms': 200, 'jitter_ms': 20},
+            'services.nvd.nist.gov': {'error_rate': 1.0, 'error_status': 429},
+            '*': {'latency_ms': 0},
+        }
+        started = time.time()
+        self.client.get('newsapi', 'https://newsapi.org/v2/everything')
+        self.assertGreaterEqual(time.time() - started, 0.17)
+
+        started = time.time()
+        response = self.client.get('nvd', 'https://services.nvd.nist.gov/rest/json/cves/2.0')
+        self.assertLess(time.time() - started, 0.15)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+        stats = httpx.get(f'{self.stub_url}/_stub/stats').json()
+        self.assertEqual(stats['GET services.nvd.nist.gov/rest/json/cves/2.0']['injected_errors'], 1)
+
+    def test_error_rate_is_reproducible(self):
+        """The same seed injects errors into the same requests"""
+        def run():
+            stub = ProviderStub(profile={'*': {'error_rate': 0.3}}, seed=7)
+            return [stub.handle('GET', '/newsapi.org/v2/everything', {}, b'')[0] for _ in range(50)]
+        first = run()
+        self.assertEqual(first, run())
+        self.assertTrue(10 <= first.count(503) <= 20, first.count(503))
+
+    def test_stub_route(self):
+        self.assertEqual(stub_route('https://urlscan.io/api/v1/search/?q=x', 'http://s:1'),
+                         'http://s:1/urlscan.io/api/v1/search/?q=x')
+        self.assertEqual(stub_route('https://newsapi.org', 'http://s:1'), 'http://s:1/newsapi.org/')
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    """Stands in for the real API during record mode"""
+
+    def do_GET(self):
+        body = json.dumps({'path': self.path, 'auth': self.headers.get('x-apikey')}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRecordMode(unittest.TestCase):
+    """Test recording of unmatched requests"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.upstream = ThreadingHTTPServer(('127.0.0.1', 0), UpstreamHandler)
+        threading.Thread(target=self.upstream.serve_forever, daemon=True).start()
+        self.addCleanup(self.upstream.server_close)
+        self.addCleanup(self.upstream.shutdown)
+
+    def test_records_and_replays_without_secrets(self):
+        host = f'127.0.0.1:{self.upstream.server_address[1]}'
+        real_request = httpx.request
+
+        def plain_http(method, url, **kwargs):
+            return real_request(method, url.replace('https://', 'http://'), **kwargs)
+
+        stub = ProviderStub(self.directory, record=True)
+        with mock.patch.object(provider_stub.httpx, 'request', plain_http):
+            status, _, body = stub.handle('GET', f'/{host}/api/check?ip=1.2.3.4&key=secret',
+                                          {'x-apikey': 'k', 'Host': 'stub'}, b'')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['auth'], 'k')
+
+        with open(os.path.join(self.directory, f'{host}.json')) as f:
+            saved = json.load(f)
+        self.assertEqual(saved['responses'][0]['query'], {'ip': '1.2.3.4'})
+        self.assertNotIn('secret', json.dumps(saved['responses'][0]['query']))
+
+        # A fresh replay-only stub answers from the file
+        self.upstream.shutdown()
+        replay = ProviderStub(self.directory)
+        status, _, replayed = replay.handle('GET', f'/{host}/api/check?ip=1.2.3.4&key=other', {}, b'')
+        self.assertEqual(status, 200)
+        self.assertEqual(replayed, body)
+        self.assertEqual(replay.handle('GET', f'/{host}/api/check?ip=5.6.7.8', {}, b'')[0], 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
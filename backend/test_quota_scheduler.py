@@ -0,0 +1,183 @@
+"""
+TEST SUITE FOR QUOTA SCHEDULER
+Verifies priority order, fair queuing, deadline drops, dedup and class shares
+"""
+
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from error_handler import QuotaDeadlineExceededError
+from performance_cache import RateLimiter
+from quota_scheduler import Priority, QuotaScheduler, current_context, scheduling
+
+
+class TestQuotaScheduler(unittest.TestCase):
+    """Test priority scheduling of a metered provider"""
+
+    def setUp(self):
+        self.schedulers = []
+
+    def tearDown(self):
+        for scheduler in self.schedulers:
+            scheduler.close()
+
+    def _scheduler(self, per_window, window, **kwargs):
+        limiter = RateLimiter(per_window, window_seconds=window)
+        scheduler = QuotaScheduler('testprov', rate_limiter=limiter, **kwargs)
+        self.schedulers.append(scheduler)
+        return scheduler, limiter
+
+    def _exhaust(self, limiter, count):
+        for _ in range(count):
+            self.assertTrue(limiter.is_allowed('testprov'))
+
+    def _submit(self, scheduler, order, name, **kwargs):
+        thread = threading.Thread(
+            target=lambda: scheduler.call(lambda: order.append(name) or name, **kwargs))
+        thread.start()
+        return thread
+
+    def _wait_queued(self, scheduler, count):
+        deadline = time.time() + 2
+        while scheduler.get_stats()['queue_depth'] < count and time.time() < deadline:
+            time.sleep(0.005)
+
+    def test_higher_priority_served_first(self):
+        """Queued calls are granted quota by class, not arrival order"""
+        scheduler, limiter = self._scheduler(1, 0.15)
+        self._exhaust(limiter, 1)
+        order = []
+        threads = [self._submit(scheduler, order, 'background', priority=Priority.BACKGROUND)]
+        self._wait_queued(scheduler, 1)
+        threads.append(self._submit(scheduler, order, 'manual', priority=Priority.MANUAL))
+        threads.append(self._submit(scheduler, order, 'interactive', priority=Priority.INTERACTIVE))
+        self._wait_queued(scheduler, 3)
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, ['interactive', 'manual', 'background'])
+
+    def test_users_served_round_robin(self):
+        """A user with many queued calls cannot starve another user"""
+        scheduler, limiter = self._scheduler(1, 0.1)
+        self._exhaust(limiter, 1)
+        order = []
+        threads = []
+        for i in range(3):
+            threads.append(self._submit(scheduler, order, f'a{i}', priority=Priority.MANUAL, user='a'))
+            self._wait_queued(scheduler, i + 1)
+        threads.append(self._submit(scheduler, order, 'b0', priority=Priority.MANUAL, user='b'))
+        self._wait_queued(scheduler, 4)
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, ['a0', 'b0', 'a1', 'a2'])
+
+    def test_call_dropped_at_deadline_without_spending_quota(self):
+        """A call that cannot get quota in time raises and is never run"""
+        scheduler, limiter = self._scheduler(1, 60)
+        self._exhaust(limiter, 1)
+        calls = []
+
+        started = time.time()
+        with self.assertRaises(QuotaDeadlineExceededError) as ctx:
+            scheduler.call(lambda: calls.append(1), priority=Priority.BACKGROUND,
+                           deadline=time.time() + 0.1)
+
+        self.assertLess(time.time() - started, 1.5)
+        self.assertEqual(calls, [])
+        self.assertEqual(ctx.exception.status_code, 503)
+        stats = scheduler.get_stats()
+        self.assertEqual(stats['queue_depth'], 0)
+        background = stats['classes']['background']
+        self.assertEqual(background['dropped'] + background['abandoned'], 1)
+        self.assertEqual(background['dispatched'], 0)
+
+    def test_duplicates_share_one_request(self):
+        """Identical queued calls and calls within the window reuse one result"""
+        scheduler, limiter = self._scheduler(1, 0.2, dedup_window=30)
+        self._exhaust(limiter, 1)
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            return {'verdict': 'clean'}
+
+        def worker(priority):
+            results.append(scheduler.call(fetch, key='https://a.com/', priority=priority))
+
+        threads = [threading.Thread(target=worker, args=(Priority.BACKGROUND,))]
+        threads[0].start()
+        self._wait_queued(scheduler, 1)
+        threads.append(threading.Thread(target=worker, args=(Priority.INTERACTIVE,)))
+        threads[1].start()
+        for thread in threads:
+            thread.join(5)
+        results.append(scheduler.call(fetch, key='https://a.com/'))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'verdict': 'clean'}] * 3)
+        self.assertIsNot(results[0], results[1])
+        stats = scheduler.get_stats()['classes']
+        # The interactive duplicate promoted the queued request
+        self.assertEqual(stats['interactive']['dispatched'], 1)
+        self.assertEqual(stats['interactive']['deduplicated'], 1)
+        self.assertEqual(stats['background']['deduplicated'], 1)
+
+    def test_warmup_capped_to_its_share(self):
+        """Warm-up uses at most its share of a window; others use the rest"""
+        scheduler, limiter = self._scheduler(4, 0.5, class_shares={Priority.WARMUP: 0.5})
+        times = {'warmup': [], 'manual': []}
+
+        def run(kind, priority, count):
+            for _ in range(count):
+                scheduler.call(lambda: times[kind].append(time.time()), priority=priority)
+
+        warmup = threading.Thread(target=run, args=('warmup', Priority.WARMUP, 3))
+        warmup.start()
+        time.sleep(0.05)
+        run('manual', Priority.MANUAL, 2)
+        warmup.join(5)
+
+        # The third warm-up call waited for the window to slide
+        self.assertGreaterEqual(times['warmup'][2] - times['warmup'][0], 0.45)
+        # Manual calls did not wait behind the capped warm-up
+        self.assertLess(times['manual'][1] - times['warmup'][0], 0.3)
+
+    def test_scheduling_scope(self):
+        """Priority, user and deadline come from the enclosing scope"""
+        self.assertEqual(current_context().priority, Priority.BACKGROUND)
+        with scheduling(Priority.INTERACTIVE, user='ext-1', max_wait=5):
+            context = current_context()
+            self.assertEqual((context.priority, context.user), (Priority.INTERACTIVE, 'ext-1'))
+            self.assertAlmostEqual(context.deadline, time.time() + 5, delta=1)
+            with scheduling(Priority.WARMUP):
+                self.assertEqual(current_context().user, 'ext-1')
+                self.assertIsNone(current_context().deadline)
+        self.assertEqual(current_context().user, 'system')
+
+        scheduler, _ = self._scheduler(10, 1)
+        with scheduling(Priority.MANUAL, user='dash'):
+            self.assertEqual(scheduler.call(lambda: 'ok'), 'ok')
+        self.assertEqual(scheduler.get_stats()['classes']['manual']['dispatched'], 1)
+
+    def test_renewed_deadline_for_follow_up_calls(self):
+        """A follow-up after a pause gets the scope's full wait budget again"""
+        self.assertIsNone(current_context().renewed_deadline())
+        with scheduling(Priority.BACKGROUND, max_wait=0.1):
+            time.sleep(0.15)
+            scheduler, _ = self._scheduler(10, 1)
+            deadline = current_context().renewed_deadline()
+            self.assertGreater(deadline, current_context().deadline + 0.1)
+            self.assertEqual(scheduler.call(lambda: 'analysis', deadline=deadline), 'analysis')
+
+
+if __name__ == '__main__':
+    unittest.main()
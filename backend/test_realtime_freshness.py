@@ -0,0 +1,168 @@
+"""
+TEST SUITE FOR REAL-TIME DETECTOR FRESHNESS WINDOW
+Verifies verdict reuse within the window, cache age reporting, coalescing
+of concurrent scans and the long-lived worker pool (deadline, cancellation
+and load shedding)
+"""
+
+import unittest
+import os
+import sys
+import threading
+import time
+from unittest import mock
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import real_time_threat_detector
+from cache_manager import UnifiedCache
+from real_time_threat_detector import RealTimeThreatDetector, ThreatDetectorConfig
+
+URL = 'https://example.com/page'
+
+
+class TestFreshnessWindow(unittest.TestCase):
+    """Test verdict reuse in RealTimeThreatDetector.detect"""
+
+    def setUp(self):
+        patcher = mock.patch.object(real_time_threat_detector, 'unified_cache',
+                                    UnifiedCache(store=None))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.config = ThreatDetectorConfig()
+        self.config.FRESHNESS_WINDOW = 60
+        self.config.VIRUSTOTAL_API_KEY = 'key'
+        self.config.GOOGLE_SAFE_BROWSING_API_KEY = 'key'
+        self.config.IPQUALITYSCORE_API_KEY = 'key'
+        self.detector = RealTimeThreatDetector(self.config)
+        self.addCleanup(self.detector.close)
+
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+        def safebrowsing(url):
+            self.calls += 1
+            self.gate.wait(5)
+            # A detection, so the per-provider negative cache stays out of the way
+            return {'success': True, 'malicious': True, 'suspicious': False, 'risk_score': 100}
+
+        def clean(url):
+            return {'success': True, 'malicious': 0, 'suspicious': 0, 'fraud_score': 0}
+        self.detector._check_safebrowsing = safebrowsing
+        self.detector._check_virustotal = self.detector._check_ipqualityscore = clean
+
+    def test_repeat_within_window_reuses_verdict(self):
+        first = self.detector.detect(URL)
+        self.assertFalse(first['cached'])
+        self.assertEqual(first['cache_age_seconds'], 0.0)
+
+        time.sleep(0.2)
+        second = self.detector.detect(URL)
+        self.assertTrue(second['cached'])
+        self.assertGreaterEqual(second['cache_age_seconds'], 0.2)
+        self.assertEqual(second['threat_level'], first['threat_level'])
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_verdict_is_rescanned(self):
+        self.config.FRESHNESS_WINDOW = 1
+        self.detector.detect(URL)
+        time.sleep(1.1)
+        result = self.detector.detect(URL)
+        self.assertFalse(result['cached'])
+        self.assertEqual(self.calls, 2)
+
+    def test_zero_window_always_fresh(self):
+        self.config.FRESHNESS_WINDOW = 0
+        self.detector.detect(URL)
+        result = self.detector.detect(URL)
+        self.assertFalse(result['cached'])
+        self.assertEqual(self.calls, 2)
+
+    def test_concurrent_identical_scans_share_one_run(self):
+        self.gate.clear()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.detector.detect(URL)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.gate.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_worker_pool_is_reused(self):
+        executor = self.detector.executor
+        self.config.FRESHNESS_WINDOW = 0
+        for i in range(5):
+            self.detector.detect(f'{URL}/{i}')
+        self.assertIs(self.detector.executor, executor)
+        workers = [t for t in threading.enumerate() if t.name.startswith('realtime-check')]
+        self.assertLessEqual(len(workers), self.config.MAX_WORKERS)
+
+
+
+class TestWorkerPoolLimits(unittest.TestCase):
+    """Test the scan deadline and load shedding of the shared pool"""
+
+    def setUp(self):
+        patcher = mock.patch.object(real_time_threat_detector, 'unified_cache',
+                                    UnifiedCache(store=None))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.config = ThreatDetectorConfig()
+        self.config.FRESHNESS_WINDOW = 0
+        self.config.TIMEOUT = 0.2
+        self.config.MAX_WORKERS = 1
+        self.config.MAX_PENDING_CHECKS = 3
+        self.config.VIRUSTOTAL_API_KEY = 'key'
+        self.config.GOOGLE_SAFE_BROWSING_API_KEY = 'key'
+        self.config.IPQUALITYSCORE_API_KEY = 'key'
+        self.detector = RealTimeThreatDetector(self.config)
+        self.addCleanup(self.detector.close)
+
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.started = []
+
+        def stuck(url):
+            self.started.append(url)
+            self.release.wait(5)
+            return {'success': True, 'malicious': 0, 'suspicious': 0}
+        self.detector._check_virustotal = self.detector._check_safebrowsing = stuck
+        self.detector._check_ipqualityscore = stuck
+
+    def test_deadline_cancels_queued_checks(self):
+        started = time.time()
+        results = self.detector._run_parallel_checks(URL)
+        self.assertLess(time.time() - started, 1)
+        self.assertTrue(all(r == {'error': 'Request timeout', 'success': False}
+                            for r in results.values()))
+        # Only the check holding the single worker started; it still counts
+        self.assertEqual(len(self.started), 1)
+        self.assertEqual(self.detector.pending_checks, 1)
+
+        self.release.set()
+        deadline = time.time() + 2
+        while self.detector.pending_checks and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.detector.pending_checks, 0)
+
+    def test_checks_shed_while_pool_is_backed_up(self):
+        self.config.MAX_PENDING_CHECKS = 2
+        results = self.detector._run_parallel_checks(URL)
+        self.assertTrue(results['ipqualityscore']['shed'])
+        self.assertEqual(self.detector.shed_checks, 1)
+
+        # The timed-out check still runs, so most of the next scan is shed
+        results = self.detector._run_parallel_checks(URL + '/2')
+        self.assertEqual(sum(1 for r in results.values() if r.get('shed')), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
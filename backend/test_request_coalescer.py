@@ -0,0 +1,130 @@
+"""
+TEST SUITE FOR REQUEST COALESCER
+Verifies single-flight execution, error propagation and metrics
+"""
+
+import unittest
+import os
+import sys
+import threading
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from request_coalescer import RequestCoalescer
+
+
+class TestRequestCoalescer(unittest.TestCase):
+    """Test single-flight request coalescing"""
+
+    def setUp(self):
+        self.coalescer = RequestCoalescer()
+        self.release = threading.Event()
+        self.calls = []
+
+    def _slow_scan(self, url):
+        def scan():
+            self.calls.append(url)
+            self.release.wait(5)
+            return {'url': url, 'risk_score': 42}
+        return scan
+
+    def _run_concurrently(self, group, urls, expected_coalesced):
+        results = [None] * len(urls)
+
+        def worker(i, url):
+            results[i] = self.coalescer.do(group, url, self._slow_scan(url))
+
+        threads = [threading.Thread(target=worker, args=(i, url)) for i, url in enumerate(urls)]
+        for thread in threads:
+            thread.start()
+        # Wait until every follower has joined the in-flight scan
+        while self.coalescer.get_stats()['total_coalesced'] < expected_coalesced:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_duplicates_run_once(self):
+        """Equivalent URLs share one execution; followers get copies"""
+        urls = ['https://Example.com/a', 'https://example.com:443/a', 'HTTPS://EXAMPLE.COM/a#top'] * 3
+        results = self._run_concurrently('scan_url', urls, expected_coalesced=len(urls) - 1)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(sum(1 for _, shared in results if not shared), 1)
+        self.assertTrue(all(r['risk_score'] == 42 for r, _ in results))
+        self.assertEqual(len({id(r) for r, _ in results}), len(urls))
+
+        stats = self.coalescer.get_stats()['groups']['scan_url']
+        self.assertEqual(stats['executions'], 1)
+        self.assertEqual(stats['coalesced'], 8)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_groups_and_sequential_calls_are_independent(self):
+        """Different groups never merge and finished flights are not reused"""
+        self.release.set()
+        self.coalescer.do('a', 'https://x.com', self._slow_scan('https://x.com'))
+        self.coalescer.do('b', 'https://x.com', self._slow_scan('https://x.com'))
+        _, shared = self.coalescer.do('a', 'https://x.com', self._slow_scan('https://x.com'))
+
+        self.assertFalse(shared)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_scopes_never_share_a_flight(self):
+        """Concurrent calls for one URL only merge within the same scope"""
+        results = {}
+
+        def worker(user):
+            results[user] = self.coalescer.do('submit', 'https://x.com',
+                                              self._slow_scan(user), scope=user)
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in ('alice', 'bob')]
+        for thread in threads:
+            thread.start()
+        while len(self.calls) < 2:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(self.calls), ['alice', 'bob'])
+        self.assertFalse(results['alice'][1] or results['bob'][1])
+        self.assertEqual(self.coalescer.get_stats()['total_coalesced'], 0)
+
+    def test_errors_propagate_to_all_waiters(self):
+        """A failing leader fails its followers too, then the key is retried"""
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise RuntimeError('provider down')
+
+        def worker():
+            try:
+                self.coalescer.do('scan', 'https://down.com', failing)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=worker)
+        follower.start()
+        while self.coalescer.get_stats()['total_coalesced'] < 1:
+            threading.Event().wait(0.001)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(errors, ['provider down', 'provider down'])
+        self.assertEqual(self.coalescer.get_stats()['groups']['scan']['errors'], 1)
+        result, shared = self.coalescer.do('scan', 'https://down.com', lambda: 'ok')
+        self.assertEqual((result, shared), ('ok', False))
+
+
+if __name__ == '__main__':
+    unittest.main()
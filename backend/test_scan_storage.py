@@ -0,0 +1,143 @@
+"""
+TEST SUITE FOR SCAN STORAGE
+Verifies journaled counters, snapshot compaction and crash recovery
+"""
+
+import unittest
+import os
+import sys
+import json
+import tempfile
+import threading
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scan_storage import ScanStorage
+
+
+class TestScanStorage(unittest.TestCase):
+    """Test append-only scan statistics storage"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'data', 'scan_stats.json')
+        self.storages = []
+
+    def tearDown(self):
+        for storage in self.storages:
+            storage.close()
+        self.tmp.cleanup()
+
+    def _open(self, **kwargs):
+        kwargs.setdefault('snapshot_interval', 0)
+        storage = ScanStorage(self.path, **kwargs)
+        self.storages.append(storage)
+        return storage
+
+    def _journal_lines(self, storage):
+        with open(storage.journal_path) as f:
+            return f.read().splitlines()
+
+    def test_increment_appends_one_journal_line(self):
+        """A scan appends to the journal and never rewrites the snapshot"""
+        storage = self._open()
+        stats = storage.increment_scan('http://a.com', 'malicious', 90, 'MALICIOUS')
+        storage.increment_scan('http://b.com', 'benign', 5)
+
+        self.assertEqual(stats['total_scans'], 1)
+        self.assertEqual(stats['malicious_percentage'], 100.0)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(len(self._journal_lines(storage)), 2)
+        self.assertEqual(storage.get_stats()['benign_count'], 1)
+
+    def test_recent_scans_are_bounded(self):
+        """History keeps only the newest entries, most recent first"""
+        storage = self._open(history_limit=3)
+        for i in range(5):
+            storage.increment_scan(f'http://{i}.com', 'benign', i)
+
+        recent = storage.get_recent_scans(10)
+        self.assertEqual([s['url'] for s in recent], ['http://4.com', 'http://3.com', 'http://2.com'])
+        self.assertEqual(len(storage.get_recent_scans(1)), 1)
+
+    def test_snapshot_compacts_journal(self):
+        """A snapshot folds the journal into the JSON file"""
+        storage = self._open()
+        for i in range(3):
+            storage.increment_scan(f'http://{i}.com', 'suspicious', 50)
+        self.assertTrue(storage._save_stats())
+
+        self.assertEqual(self._journal_lines(storage), [])
+        with open(self.path) as f:
+            snapshot = json.load(f)
+        self.assertEqual(snapshot['total_scans'], 3)
+        self.assertEqual(snapshot['last_seq'], 3)
+        self.assertEqual(len(snapshot['scan_history']), 3)
+
+        storage.increment_scan('http://after.com', 'benign', 1)
+        self.assertEqual(len(self._journal_lines(storage)), 1)
+
+    def test_recovery_replays_journal_after_crash(self):
+        """Counters survive a crash: snapshot plus journal tail are replayed"""
+        storage = self._open()
+        storage.increment_scan('http://a.com', 'malicious', 90)
+        storage._save_stats()
+        storage.increment_scan('http://b.com', 'benign', 10)
+        storage.increment_scan('http://c.com', 'benign', 10)
+
+        # Simulate a crash: no final snapshot, plus a torn last line
+        storage._journal.close()
+        with open(storage.journal_path, 'a') as f:
+            f.write('{"seq": 4, "url": "http://torn')
+
+        recovered = self._open()
+        stats = recovered.get_stats()
+        self.assertEqual(stats['total_scans'], 3)
+        self.assertEqual(stats['benign_count'], 2)
+        self.assertEqual(recovered.get_recent_scans(1)[0]['url'], 'http://c.com')
+
+        recovered.increment_scan('http://d.com', 'benign', 10)
+        self.assertEqual(recovered.get_stats()['total_scans'], 4)
+
+    def test_close_writes_final_snapshot(self):
+        """close() persists everything so a restart needs no replay"""
+        storage = self._open()
+        storage.increment_scan('http://a.com', 'benign', 1)
+        storage.close()
+
+        reopened = self._open()
+        self.assertEqual(reopened.get_stats()['total_scans'], 1)
+        self.assertEqual(self._journal_lines(reopened), [])
+
+    def test_concurrent_increments_with_timer(self):
+        """Scans from many threads are all counted while snapshots run"""
+        storage = self._open(snapshot_interval=0.01)
+
+        def worker(n):
+            for i in range(100):
+                storage.increment_scan(f'http://{n}-{i}.com', 'benign', 1)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        storage.close()
+
+        reopened = self._open()
+        self.assertEqual(reopened.get_stats()['total_scans'], 400)
+
+    def test_reset_stats(self):
+        """Reset clears counters, history and the journal"""
+        storage = self._open()
+        storage.increment_scan('http://a.com', 'malicious', 90)
+        stats = storage.reset_stats()
+
+        self.assertEqual(stats['total_scans'], 0)
+        self.assertEqual(storage.get_recent_scans(), [])
+        self.assertEqual(self._open().get_stats()['total_scans'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+TEST SUITE FOR DASHBOARD STATS STREAM
+Verifies counter deltas, appended records, resume by sequence number and
+Socket.IO delivery
+"""
+
+import unittest
+import os
+import sys
+import json
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask_socketio import SocketIO
+from socketio import packet as sio_packet
+
+import stats_stream as stats_stream_module
+from stats_stream import StatsStream, diff_counters, encode
+
+
+class TestStatsStream(unittest.TestCase):
+    """Test snapshots and deltas of StatsStream"""
+
+    def setUp(self):
+        self.counters = {'total_requests': 0, 'clean_urls': 0, 'last_updated': 'a'}
+        self.stream = StatsStream(interval=60, history=3, max_records=5)
+        self.stream.add_source('realtime', lambda: self.counters)
+        self.addCleanup(self.stream.close)
+
+    def test_diff_counters(self):
+        inc, replaced = diff_counters({'a': 1, 'b': 2.5, 'c': 'x', 'd': True},
+                                      {'a': 4, 'b': 3.0, 'c': 'x', 'd': False, 'e': 1})
+        self.assertEqual(inc, {'a': 3})
+        self.assertEqual(replaced, {'b': 3.0, 'd': False, 'e': 1})
+
+    def test_delta_carries_increments_and_appends(self):
+        self.assertIsNone(self.stream.tick())
+        self.counters['total_requests'] += 3
+        self.counters['last_updated'] = 'b'
+        self.stream.append('scans', {'url': 'https://a.com/'})
+
+        delta = self.stream.tick()
+        self.assertEqual(delta, {
+            'seq': 1,
+            'inc': {'realtime': {'total_requests': 3}},
+            'set': {'realtime': {'last_updated': 'b'}},
+            'append': {'scans': [{'url': 'https://a.com/'}]},
+        })
+        snapshot = self.stream.snapshot()
+        self.assertEqual(snapshot['seq'], 1)
+        self.assertEqual(snapshot['counters']['realtime']['total_requests'], 3)
+        self.assertEqual(snapshot['records']['scans'], [{'url': 'https://a.com/'}])
+
+    def test_snapshot_records_are_bounded_newest_first(self):
+        for i in range(8):
+            self.stream.append('scans', {'n': i})
+        self.stream.tick()
+        self.assertEqual([r['n'] for r in self.stream.snapshot()['records']['scans']], [7, 6, 5, 4, 3])
+
+    def test_resume_from_sequence_number(self):
+        for _ in range(4):
+            self.counters['clean_urls'] += 1
+            self.stream.tick()
+        self.assertEqual(self.stream.seq, 4)
+        self.assertEqual([d['seq'] for d in self.stream.since(2)], [3, 4])
+        self.assertEqual(self.stream.since(4), [])
+        # Only three deltas are retained
+        self.assertIsNone(self.stream.since(0))
+        self.assertIsNone(self.stream.since(9))
+
+    def test_delta_much_smaller_than_snapshot(self):
+        for i in range(5):
+            self.stream.append('scans', {'url': f'https://site{i}.com/', 'indicators': ['x'] * 50})
+        self.stream.tick()
+        self.counters['total_requests'] += 1
+        delta = self.stream.tick()
+        self.assertLess(len(json.dumps(delta)) * 10, len(json.dumps(self.stream.snapshot())))
+
+    @unittest.skipIf(stats_stream_module.MSGPACK_AVAILABLE, 'msgpack installed')
+    def test_encoding_falls_back_to_json(self):
+        self.assertEqual(encode({'seq': 1}, 'msgpack'), {'seq': 1})
+
+
+class TestStatsStreamSocketIO(unittest.TestCase):
+    """Test stats_subscribe against Flask-SocketIO test clients"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.socketio = SocketIO(self.app, async_mode='threading')
+        self.counters = {'total_requests': 0}
+        self.stream = StatsStream(interval=60)
+        self.stream.add_source('realtime', lambda: self.counters)
+        self.stream.attach(self.socketio)
+        self.addCleanup(self.stream.close)
+
+    def client(self):
+        client = self.socketio.test_client(self.app)
+        # Newer python-socketio broadcasts through _send_eio_packet, which
+        # the Flask-SocketIO test client does not intercept
+        server = self.socketio.server
+        server._send_eio_packet = lambda eio_sid, eio_pkt: server._send_packet(
+            eio_sid, sio_packet.Packet(encoded_packet=eio_pkt.data))
+        self.addCleanup(lambda: client.is_connected() and client.disconnect())
+        return client
+
+    @staticmethod
+    def received(client):
+        return [(packet['name'], packet['args'][0]) for packet in client.get_received()]
+
+    def test_snapshot_then_deltas(self):
+        self.counters['total_requests'] = 5
+        dashboard = self.client()
+        ack = dashboard.emit('stats_subscribe', {}, callback=True)
+        self.assertEqual(ack['encoding'], 'json')
+
+        [(event, snapshot)] = self.received(dashboard)
+        self.assertEqual(event, 'stats_snapshot')
+        self.assertEqual(snapshot['counters']['realtime'], {'total_requests': 5})
+
+        self.counters['total_requests'] = 7
+        self.stream.tick()
+        [(event, delta)] = self.received(dashboard)
+        self.assertEqual(event, 'stats_delta')
+        self.assertEqual(delta['seq'], snapshot['seq'] + 1)
+        self.assertEqual(delta['inc'], {'realtime': {'total_requests': 2}})
+
+    def test_reconnect_resumes(self):
+        dashboard = self.client()
+        dashboard.emit('stats_subscribe', {}, callback=True)
+        snapshot = self.received(dashboard)[0][1]
+        dashboard.disconnect()
+
+        for total in (1, 2):
+            self.counters['total_requests'] = total
+            self.stream.tick()
+
+        again = self.client()
+        again.emit('stats_subscribe', {'stream': snapshot['stream'], 'since': snapshot['seq']},
+                   callback=True)
+        received = self.received(again)
+        self.assertEqual([event for event, _ in received], ['stats_delta', 'stats_delta'])
+        self.assertEqual([d['seq'] for _, d in received], [snapshot['seq'] + 1, snapshot['seq'] + 2])
+
+        # Another process's sequence numbers mean nothing here
+        other = self.client()
+        other.emit('stats_subscribe', {'stream': 'elsewhere', 'since': snapshot['seq']}, callback=True)
+        self.assertEqual(self.received(other)[0][0], 'stats_snapshot')
+
+
+if __name__ == '__main__':
+    unittest.main()
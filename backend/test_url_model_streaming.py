@@ -0,0 +1,112 @@
+"""
+TEST SUITE FOR STREAMING URL MODEL TRAINING
+Verifies chunked training, checkpoint/resume and predictor compatibility
+"""
+
+import unittest
+import os
+import sys
+import pickle
+import tempfile
+from unittest.mock import patch
+
+# Add backend and model directories to path
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'ml_training'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'ml_advanced'))
+
+import train_url_model
+import url_model_predict
+
+
+BENIGN = ['https://www.google.com', 'https://github.com/org/repo',
+          'https://docs.python.org/3/library', 'https://www.wikipedia.org/wiki/URL']
+MALICIOUS = ['http://paypal-secure-login.xyz/verify', 'http://account-update.tk/confirm',
+             'http://apple-id-verification.ru/signin', 'http://free-gift,claim.ml/login']
+
+
+class TestStreamingTrainer(unittest.TestCase):
+    """Test out-of-core URL model training"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.data_path = os.path.join(self.dir, 'urls.tsv')
+        with open(self.data_path, 'w') as f:
+            f.write('url\tlabel\n')
+            for _ in range(25):
+                for url in BENIGN:
+                    f.write(f'{url}\tbenign\n')
+                for url in MALICIOUS:
+                    f.write(f'{url}\t1\n')
+            f.write('not-a-row\n')
+        self.paths = {
+            'model_path': os.path.join(self.dir, 'url_model.pkl'),
+            'vectorizer_path': os.path.join(self.dir, 'url_vectorizer.pkl'),
+            'checkpoint_path': os.path.join(self.dir, 'checkpoint.pkl'),
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_iter_labeled_urls_skips_invalid_rows(self):
+        """Header and malformed lines are skipped, commas in URLs survive"""
+        rows = list(train_url_model.iter_labeled_urls([self.data_path]))
+        self.assertEqual(len(rows), 200)
+        self.assertIn(('http://free-gift,claim.ml/login', 1), rows)
+
+    def test_chunks_are_bounded(self):
+        """No chunk exceeds the requested size"""
+        records = train_url_model.iter_labeled_urls([self.data_path])
+        sizes = [len(urls) for urls, _ in train_url_model.iter_chunks(records, 64)]
+        self.assertEqual(sizes, [64, 64, 64, 8])
+
+    def test_artifact_loads_in_predictor(self):
+        """Streaming artifact is usable by URLMLPredictor"""
+        train_url_model.train_streaming([self.data_path], chunk_size=50,
+                                        checkpoint_every=2, n_features=2 ** 12,
+                                        **self.paths)
+
+        with patch.object(url_model_predict, 'MODEL_PATH', self.paths['model_path']), \
+             patch.object(url_model_predict, 'VECTORIZER_PATH', self.paths['vectorizer_path']):
+            predictor = url_model_predict.URLMLPredictor()
+
+        self.assertTrue(predictor.model_loaded)
+        bad = predictor.predict('http://paypal-secure-login.xyz/verify')
+        good = predictor.predict('https://www.google.com')
+        self.assertEqual(bad['model_status'], 'trained')
+        self.assertGreater(bad['risk_score'], good['risk_score'])
+
+    def test_resume_from_checkpoint(self):
+        """Resuming skips rows recorded in the checkpoint"""
+        train_url_model.train_streaming([self.data_path], chunk_size=50,
+                                        checkpoint_every=1, n_features=2 ** 12,
+                                        **self.paths)
+        with open(self.paths['checkpoint_path'], 'rb') as f:
+            checkpoint = pickle.load(f)
+        self.assertEqual(checkpoint['rows_seen'], 200)
+        self.assertEqual(checkpoint['chunks_seen'], 4)
+
+        extra_path = os.path.join(self.dir, 'more.csv')
+        with open(extra_path, 'w') as f:
+            f.write('http://new-phish.top/login,phishing\n')
+
+        train_url_model.train_streaming([self.data_path, extra_path], chunk_size=50,
+                                        checkpoint_every=1, resume=True, **self.paths)
+        with open(self.paths['checkpoint_path'], 'rb') as f:
+            checkpoint = pickle.load(f)
+        self.assertEqual(checkpoint['rows_seen'], 201)
+        self.assertEqual(checkpoint['chunks_seen'], 5)
+        self.assertEqual(checkpoint['n_features'], 2 ** 12)
+
+    def test_empty_input_raises(self):
+        """Training on files without labelled rows fails loudly"""
+        empty_path = os.path.join(self.dir, 'empty.tsv')
+        open(empty_path, 'w').close()
+        with self.assertRaises(ValueError):
+            train_url_model.train_streaming([empty_path], **self.paths)
+
+
+if __name__ == '__main__':
+    unittest.main()
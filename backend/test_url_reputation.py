@@ -0,0 +1,262 @@
+"""
+TEST SUITE FOR OFFLINE URL REPUTATION LISTS
+Verifies Safe Browsing canonicalization, lookup expressions, hash-prefix
+lists, full-hash confirmation and use by the real-time detector and Layer C
+"""
+
+import unittest
+import os
+import sys
+import json
+import base64
+import struct
+import hashlib
+import shutil
+import tempfile
+from unittest import mock
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import real_time_threat_detector
+import url_reputation
+from cache_manager import UnifiedCache
+from real_time_threat_detector import RealTimeThreatDetector, ThreatDetectorConfig
+from security_layers.threat_intelligence import ThreatIntelligence
+from url_reputation import (SAFEBROWSING_THREAT_TYPES, HashPrefixList, URLReputationDB, canonicalize,
+                            sync_safebrowsing_lists, url_expressions)
+
+
+def canonical(url):
+    host, path, query = canonicalize(url)
+    return host + path + (f'?{query}' if query is not None else '')
+
+
+class TestCanonicalization(unittest.TestCase):
+    """Vectors from the Safe Browsing v4 canonicalization examples"""
+
+    def test_examples(self):
+        vectors = {
+            'http://host/%25%32%35': 'host/%25',
+            'http://host/%2525252525252525': 'host/%25',
+            'http://host/asdf%25%32%35asd': 'host/asdf%25asd',
+            'http://%31%36%38%2e%31%38%38%2e%39%39%2e%32%36/%2E%73%65%63%75%72%65/%77%77%77%2E%65%62%61%79%2E%63%6F%6D/':
+                '168.188.99.26/.secure/www.ebay.com/',
+            'http://3279880203/blah': '195.127.0.11/blah',
+            'http://www.google.com/blah/..': 'www.google.com/',
+            'www.google.com': 'www.google.com/',
+            'http://www.evil.com/blah#frag': 'www.evil.com/blah',
+            'http://www.google.com.../': 'www.google.com/',
+            'http://www.google.com/foo\tbar\rbaz\n2': 'www.google.com/foobarbaz2',
+            'http://www.google.com/q?': 'www.google.com/q?',
+            'http://www.gotaport.com:1234/': 'www.gotaport.com/',
+            'http:// leadingspace.com/': '%20leadingspace.com/',
+            'http://host.com//twoslashes?more//slashes': 'host.com/twoslashes?more//slashes',
+        }
+        for url, expected in vectors.items():
+            self.assertEqual(canonical(url), expected, url)
+
+    def test_expressions(self):
+        self.assertEqual(url_expressions('http://a.b.c/1/2.html?param=1'), [
+            'a.b.c/1/2.html?param=1', 'a.b.c/1/2.html', 'a.b.c/', 'a.b.c/1/',
+            'b.c/1/2.html?param=1', 'b.c/1/2.html', 'b.c/', 'b.c/1/'])
+        hosts = {e.split('/')[0] for e in url_expressions('http://a.b.c.d.e.f.g/1.html')}
+        self.assertEqual(hosts, {'a.b.c.d.e.f.g', 'c.d.e.f.g', 'd.e.f.g', 'e.f.g', 'f.g'})
+        self.assertEqual(url_expressions('http://1.2.3.4/1/'), ['1.2.3.4/1/', '1.2.3.4/'])
+
+
+class TestReputationDB(unittest.TestCase):
+    """Test hash-prefix lists on disk"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.db = URLReputationDB(self.directory, reload_seconds=0)
+
+    def write_list(self, name, threat_type, urls, full_hashes=True):
+        threat_list = HashPrefixList.build(name, threat_type, urls)
+        path = os.path.join(self.directory, f'{name}.json')
+        with open(path, 'w') as f:
+            json.dump(threat_list.to_dict(full_hashes), f)
+        return path
+
+    def test_listed_host_and_path_prefixes_match(self):
+        self.write_list('phishing', 'SOCIAL_ENGINEERING',
+                        ['http://evil.example/login/', 'bad.test/'])
+        match = self.db.lookup('https://evil.example/login/verify.php?id=7')
+        self.assertEqual(match['status'], 'match')
+        self.assertEqual(match['threat_types'], ['SOCIAL_ENGINEERING'])
+        # Host-suffix expressions cover subdomains
+        self.assertEqual(self.db.lookup('http://www.bad.test/anything')['status'], 'match')
+        self.assertEqual(self.db.lookup('https://evil.example/')['status'], 'clean')
+        self.assertEqual(self.db.lookup('https://example.com/login/')['status'], 'clean')
+
+    def test_prefix_hits_need_full_hash_check(self):
+        self.write_list('malware', 'MALWARE', ['http://malware.test/'], full_hashes=False)
+        self.assertEqual(self.db.lookup('http://malware.test/x')['status'], 'unverified')
+
+        checked = []
+
+        def check(threat_type, hashes):
+            checked.append((threat_type, len(hashes)))
+            return True
+        self.assertEqual(self.db.lookup('http://malware.test/x', check)['status'], 'match')
+        self.assertEqual(checked, [('MALWARE', 1)])
+
+        # Misses never reach the full-hash check
+        self.assertEqual(self.db.lookup('http://clean.test/', check)['status'], 'clean')
+        self.assertEqual(len(checked), 1)
+
+    def test_reloads_changed_lists(self):
+        self.assertEqual(self.db.lookup('http://new.test/')['status'], 'unavailable')
+        path = self.write_list('phishing', 'SOCIAL_ENGINEERING', ['http://old.test/'])
+        self.assertEqual(self.db.lookup('http://old.test/')['status'], 'match')
+
+        self.write_list('phishing', 'SOCIAL_ENGINEERING', ['http://new.test/'])
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        self.assertEqual(self.db.lookup('http://new.test/')['status'], 'match')
+        self.assertEqual(self.db.lookup('http://old.test/')['status'], 'clean')
+
+    def test_prefix_list_membership(self):
+        threat_list = HashPrefixList('l', 'MALWARE', [5, 1, 3, 3])
+        self.assertEqual(list(threat_list.prefixes), [1, 3, 5])
+        self.assertEqual([n in threat_list for n in range(7)],
+                         [False, True, False, True, False, True, False])
+        self.assertEqual(threat_list.prefixes.itemsize, 4)
+
+
+def list_update(threat_type, prefixes, state, response_type='FULL_UPDATE', removals=(), total=None):
+    """threatListUpdates:fetch entry adding prefixes; total gives the checksum"""
+    packed = lambda values: struct.pack(f'>{len(values)}I', *values)
+    update = {'threatType': threat_type, 'responseType': response_type, 'newClientState': state,
+              'additions': [{'compressionType': 'RAW', 'rawHashes': {
+                  'prefixSize': 4, 'rawHashes': base64.b64encode(packed(prefixes)).decode()}}],
+              'checksum': {'sha256': base64.b64encode(
+                  hashlib.sha256(packed(sorted(total if total is not None else prefixes))).digest()).decode()}}
+    if removals:
+        update['removals'] = [{'compressionType': 'RAW', 'rawIndices': {'indices': list(removals)}}]
+    return update
+
+
+class TestSafeBrowsingSync(unittest.TestCase):
+    """Test the threatListUpdates:fetch client with a mocked provider"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        patcher = mock.patch.object(url_reputation, 'provider_client')
+        self.provider_client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def respond(self, updates):
+        self.provider_client.post.return_value = mock.Mock(
+            status_code=200, json=lambda: {'listUpdateResponses': updates, 'minimumWaitDuration': '300s'})
+
+    def sync(self):
+        return sync_safebrowsing_lists('key', self.directory)
+
+    def sent_states(self):
+        body = self.provider_client.post.call_args.kwargs['json']
+        return {r['threatType']: r['state'] for r in body['listUpdateRequests']}
+
+    def test_full_then_partial_update(self):
+        self.respond([list_update(t, [30, 10, 20], 'state-1') for t in SAFEBROWSING_THREAT_TYPES])
+        result = self.sync()
+        self.assertEqual(result['failed'], [])
+        self.assertEqual(result['minimum_wait'], '300s')
+        self.assertEqual(set(self.sent_states().values()), {''})
+        db = URLReputationDB(self.directory, reload_seconds=0)
+        self.assertTrue(db.mirrors_safebrowsing)
+
+        # Drop index 0 (prefix 10) and add 15 to the malware list
+        self.respond([list_update('MALWARE', [15], 'state-2', 'PARTIAL_UPDATE',
+                                  removals=[0], total=[15, 20, 30])])
+        self.sync()
+        self.assertEqual(self.sent_states()['MALWARE'], 'state-1')
+        malware = HashPrefixList.from_file(os.path.join(self.directory, 'safebrowsing_malware.json'))
+        self.assertEqual(list(malware.prefixes), [15, 20, 30])
+        self.assertEqual(malware.client_state, 'state-2')
+
+    def test_checksum_mismatch_drops_the_list(self):
+        self.respond([list_update(t, [1, 2], 'state-1') for t in SAFEBROWSING_THREAT_TYPES])
+        self.sync()
+        self.respond([list_update('MALWARE', [3], 'state-2', 'PARTIAL_UPDATE', total=[9])])
+        result = self.sync()
+        self.assertEqual(result['failed'], ['MALWARE'])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'safebrowsing_malware.json')))
+        self.assertFalse(URLReputationDB(self.directory, reload_seconds=0).mirrors_safebrowsing)
+
+        self.sync()
+        self.assertEqual(self.sent_states()['MALWARE'], '')
+
+
+class TestReputationConsumers(unittest.TestCase):
+    """The detector and Layer C answer from the lists without network calls"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        threat_list = HashPrefixList.build('phishing', 'SOCIAL_ENGINEERING', ['http://evil.example/'])
+        with open(os.path.join(self.directory, 'phishing.json'), 'w') as f:
+            json.dump(threat_list.to_dict(), f)
+        db = URLReputationDB(self.directory)
+        for target in ('real_time_threat_detector.reputation_db',
+                       'security_layers.threat_intelligence.reputation_db'):
+            patcher = mock.patch(target, db)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(real_time_threat_detector, 'provider_client')
+        self.provider_client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _detector(self):
+        patcher = mock.patch.object(real_time_threat_detector, 'unified_cache', UnifiedCache(store=None))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        config = ThreatDetectorConfig()
+        config.GOOGLE_SAFE_BROWSING_API_KEY = 'key'
+        detector = RealTimeThreatDetector(config)
+        self.addCleanup(detector.close)
+        self.provider_client.post.return_value = mock.Mock(status_code=200, json=lambda: {})
+        return detector
+
+    def test_detector_answers_matches_locally(self):
+        detector = self._detector()
+        listed = detector._check_safebrowsing('https://evil.example/login')
+        self.assertTrue(listed['malicious'])
+        self.assertEqual(listed['source'], 'local_lists')
+        self.provider_client.post.assert_not_called()
+
+    def test_clean_on_built_lists_still_asks_the_api(self):
+        """Locally built feeds are not a full Safe Browsing mirror"""
+        detector = self._detector()
+        clean = detector._check_safebrowsing('https://example.com/')
+        self.assertFalse(clean['malicious'])
+        self.assertNotIn('source', clean)
+        self.provider_client.post.assert_called_once()
+
+    def test_clean_on_synced_lists_answers_locally(self):
+        for threat_type in SAFEBROWSING_THREAT_TYPES:
+            threat_list = HashPrefixList.build(threat_type.lower(), threat_type, ['http://evil.example/'])
+            threat_list.client_state = 'state'
+            with open(os.path.join(self.directory, f'{threat_type.lower()}.json'), 'w') as f:
+                json.dump(threat_list.to_dict(), f)
+        db = URLReputationDB(self.directory)
+        self.assertTrue(db.mirrors_safebrowsing)
+
+        with mock.patch.object(real_time_threat_detector, 'reputation_db', db):
+            clean = self._detector()._check_safebrowsing('https://example.com/')
+        self.assertEqual(clean['source'], 'local_lists')
+        self.provider_client.post.assert_not_called()
+
+    def test_layer_c_reports_list_match(self):
+        ti = ThreatIntelligence()
+        result = ti._check_reputation_lists('http://evil.example/')
+        self.assertTrue(result['threat_detected'])
+        self.assertEqual(result['threat_types'], ['SOCIAL_ENGINEERING'])
+        self.assertEqual(ti.reputation_score, 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
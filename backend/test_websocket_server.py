@@ -0,0 +1,123 @@
+"""
+TEST SUITE FOR SIEM WEBSOCKET SERVER
+Verifies single serialization, concurrent fan-out and the slow-client policies
+"""
+
+import unittest
+import os
+import sys
+import json
+import asyncio
+import logging
+from unittest import mock
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import websocket_server
+from websocket_server import SIEMWebSocketServer
+
+
+class FakeWebSocket:
+    """Records sent payloads; each send takes `delay` seconds"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+
+    async def send(self, payload):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(payload))
+
+    async def close(self, code=1000, reason=''):
+        self.closed_with = code
+
+    def types(self):
+        return [message['type'] for message in self.sent]
+
+
+class TestSIEMBroadcast(unittest.TestCase):
+    """Test per-client send queues of SIEMWebSocketServer"""
+
+    def setUp(self):
+        logging.getLogger('WebSocketServer').setLevel(logging.CRITICAL)
+        self.addCleanup(websocket_server.connected_clients.clear)
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    async def connect(self, server, *clients):
+        for client in clients:
+            await server.register_client(client)
+        await asyncio.sleep(0.01)  # welcome messages
+
+    def test_slow_client_does_not_delay_others(self):
+        async def scenario():
+            server = SIEMWebSocketServer(queue_size=4, slow_client_policy='drop_oldest')
+            slow = FakeWebSocket(delay=1.0)
+            fast = [FakeWebSocket() for _ in range(20)]
+            await self.connect(server, slow, *fast)
+
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await server.broadcast({'type': 'scan_complete', 'data': {'url': 'a'}})
+            self.assertLess(loop.time() - started, 0.05)
+            await asyncio.sleep(0.05)
+            self.assertTrue(all(client.types() == ['connection', 'scan_complete'] for client in fast))
+            server.stop()
+        self.run_async(scenario())
+
+    def test_payload_serialized_once(self):
+        async def scenario():
+            server = SIEMWebSocketServer()
+            clients = [FakeWebSocket() for _ in range(50)]
+            await self.connect(server, *clients)
+            with mock.patch.object(websocket_server.json, 'dumps', wraps=json.dumps) as dumps:
+                await server.broadcast({'type': 'stats_update', 'data': {'total': 1}})
+            self.assertEqual(dumps.call_count, 1)
+            server.stop()
+        self.run_async(scenario())
+
+    def test_downgrade_keeps_essential_messages(self):
+        async def scenario():
+            server = SIEMWebSocketServer(queue_size=2, slow_client_policy='downgrade')
+            client = FakeWebSocket(delay=0.05)
+            await self.connect(server, client)
+            await asyncio.sleep(0.06)
+            for i in range(5):
+                await server.broadcast({'type': 'stats_update', 'seq': i})
+            await server.broadcast({'type': 'scan_complete', 'seq': 5})
+            self.assertEqual(server.get_stats()['degraded_clients'], 1)
+
+            await asyncio.sleep(0.3)
+            self.assertIn('scan_complete', client.types())
+            self.assertLess(client.types().count('stats_update'), 5)
+            # Recovered once its queue drained
+            self.assertEqual(server.get_stats()['degraded_clients'], 0)
+            server.stop()
+        self.run_async(scenario())
+
+    def test_disconnect_policy_drops_slow_client(self):
+        async def scenario():
+            server = SIEMWebSocketServer(queue_size=2, slow_client_policy='disconnect')
+            slow, fast = FakeWebSocket(delay=1.0), FakeWebSocket()
+            await self.connect(server, slow, fast)
+            for i in range(4):
+                await server.broadcast({'type': 'stats_update', 'seq': i})
+                await asyncio.sleep(0.005)
+
+            self.assertEqual(slow.closed_with, 1013)
+            self.assertNotIn(slow, server.sessions)
+            self.assertEqual(len(fast.sent), 5)
+            self.assertEqual(server.get_stats()['slow_disconnects'], 1)
+            server.stop()
+        self.run_async(scenario())
+
+    def test_unknown_policy_rejected(self):
+        with self.assertRaises(ValueError):
+            SIEMWebSocketServer(slow_client_policy='block')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,617 @@
+"""
+URL Reputation Module
+
+Offline hash-prefix reputation lists modeled on the Safe Browsing v4 Update
+API. A URL is canonicalized, expanded into its host-suffix x path-prefix
+expressions, and each expression's SHA-256 is checked against sorted 4-byte
+prefixes loaded from list files. Most URLs miss every prefix and are
+answered locally in microseconds; only prefix hits need a full-hash check.
+
+Features:
+- Safe Browsing URL canonicalization (unescaping, IP normalization, path
+  resolution, re-escaping) and the up-to-30 lookup expressions per URL
+- One sorted array of 32-bit prefixes per list, searched with bisect
+- Full-hash confirmation from hashes shipped in the list file, otherwise
+  through a caller-supplied check (e.g. Safe Browsing fullHashes:find)
+- List files are re-read when they change on disk
+- Lists saved from a Safe Browsing threatListUpdates:fetch response (they
+  carry its newClientState) are marked as synced; only when synced lists
+  cover every Safe Browsing threat type does a clean lookup stand in for
+  the threatMatches:find API
+- Sync client for threatListUpdates:fetch: full and partial updates,
+  checksum verification, one synced list file per threat type
+- CLI to build list files from plain URL feeds, sync the Safe Browsing
+  lists and look up URLs
+
+List file format (one JSON file per list in Config.URL_REPUTATION_DIR,
+shaped like a threatListUpdates:fetch addition):
+    {"threatType": "SOCIAL_ENGINEERING",
+     "rawHashes": {"prefixSize": 4, "rawHashes": "<base64 prefixes>"},
+     "fullHashes": ["<base64 sha256>", ...],          # optional
+     "newClientState": "<state>"}                     # Safe Browsing sync only
+
+Usage:
+    python url_reputation.py build feed.txt -t SOCIAL_ENGINEERING -o data/reputation_lists/openphish.json
+    python url_reputation.py sync        # GOOGLE_SAFE_BROWSING_API_KEY; run from cron
+    python url_reputation.py lookup https://example.com/login
+
+Author: Security Team
+Version: 1.0.0
+"""
+
+import argparse
+import base64
+import bisect
+import hashlib
+import ipaddress
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+
+from config import Config
+from provider_client import provider_client
+
+logger = logging.getLogger(__name__)
+
+PREFIX_SIZE = 4
+
+SAFEBROWSING_FULL_HASHES_URL = 'https://safebrowsing.googleapis.com/v4/fullHashes:find'
+SAFEBROWSING_UPDATES_URL = 'https://safebrowsing.googleapis.com/v4/threatListUpdates:fetch'
+SAFEBROWSING_CLIENT = {'clientId': 'cyber-guard-ai', 'clientVersion': '1.0.0'}
+
+# Threat types queried by the real-time detector's threatMatches:find call
+SAFEBROWSING_THREAT_TYPES = frozenset({'MALWARE', 'SOCIAL_ENGINEERING', 'UNWANTED_SOFTWARE',
+                                       'POTENTIALLY_HARMFUL_APPLICATION'})
+
+# Confirms (threat_type, full hashes whose prefix hit) -> any of them listed
+FullHashCheck = Callable[[str, List[bytes]], bool]
+
+_URL_WHITESPACE = re.compile(r'[\t\r\n]')
+_REPEATED_DOTS = re.compile(r'\.{2,}')
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CANONICALIZATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _unescape(value: str) -> str:
+    """Percent-unescape until nothing changes"""
+    while True:
+        unescaped = unquote(value, encoding='latin-1')
+        if unescaped == value:
+            return value
+        value = unescaped
+
+
+def _escape(value: str) -> str:
+    """Escape control, space, non-ASCII, '#' and '%' characters"""
+    return ''.join(f'%{ord(c):02X}' if ord(c) <= 32 or ord(c) >= 127 or c in '#%' else c
+                   for c in value)
+
+
+def _parse_ip_part(part: str) -> int:
+    if part.lower().startswith('0x'):
+        return int(part[2:] or '0', 16)
+    if len(part) > 1 and part.startswith('0'):
+        return int(part, 8)
+    return int(part)
+
+
+def _normalize_ipv4(host: str) -> Optional[str]:
+    """Dotted-quad form of decimal/octal/hex hosts like 3279880203 or 0x7f.1"""
+    parts = host.split('.')
+    if not 1 <= len(parts) <= 4:
+        return None
+    try:
+        values = [_parse_ip_part(part) for part in parts]
+    except ValueError:
+        return None
+    *head, last = values
+    if any(value > 255 for value in head) or last >= 256 ** (5 - len(parts)):
+        return None
+    number = last
+    for i, value in enumerate(head):
+        number += value << (8 * (3 - i))
+    return str(ipaddress.IPv4Address(number))
+
+
+def canonicalize(url: str) -> Tuple[str, str, Optional[str]]:
+    """
+    Canonical host, path and query of a URL (Safe Browsing rules).
+
+    Example:
+        canonicalize('HTTP://www.Example.COM./a/../b//c?x=%2541')
+        -> ('www.example.com', '/b/c', 'x=A')
+    """
+    url = _URL_WHITESPACE.sub('', url.strip())
+    url = url.encode('utf-8').decode('latin-1')
+    url = url.split('#', 1)[0]
+    if '://' not in url:
+        url = 'http://' + url
+    url = _unescape(url)
+
+    rest = url.split('://', 1)[1]
+    authority_end = min((i for i in (rest.find('/'), rest.find('?')) if i >= 0), default=len(rest))
+    authority, rest = rest[:authority_end], rest[authority_end:]
+    path, has_query, query = rest.partition('?')
+
+    host = authority.rsplit('@', 1)[-1]
+    if not host.startswith('['):
+        host = host.split(':', 1)[0]
+    host = _REPEATED_DOTS.sub('.', host.strip('.').lower())
+    host = _normalize_ipv4(host) or host
+
+    segments: List[str] = []
+    for segment in (path or '/').split('/')[1:]:
+        if segment == '..':
+            if segments:
+                segments.pop()
+        elif segment not in ('.', ''):
+            segments.append(segment)
+    trailing = path.endswith(('/', '/.', '/..')) and bool(segments)
+    path = '/' + '/'.join(segments) + ('/' if trailing else '')
+
+    return _escape(host), _escape(path), _escape(query) if has_query else None
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+
+def url_expressions(url: str) -> List[str]:
+    """
+    Host-suffix x path-prefix expressions looked up for a URL.
+
+    Example:
+        url_expressions('http://a.b.c/1/2.html?param=1')
+        -> ['a.b.c/1/2.html?param=1', 'a.b.c/1/2.html', 'a.b.c/', 'a.b.c/1/',
+            'b.c/1/2.html?param=1', 'b.c/1/2.html', 'b.c/', 'b.c/1/']
+    """
+    host, path, query = canonicalize(url)
+
+    hosts = [host]
+    if not _is_ip(host):
+        # Up to 4 suffixes from the last 5 components, never the bare TLD
+        components = host.split('.')
+        hosts += ['.'.join(components[i:])
+                  for i in range(max(1, len(components) - 5), len(components) - 1)]
+
+    paths = [f'{path}?{query}'] if query is not None else []
+    paths.append(path)
+    prefix = '/'
+    prefixes = [prefix]
+    for segment in path.split('/')[1:-1][:3]:
+        prefix += segment + '/'
+        prefixes.append(prefix)
+    paths += [p for p in prefixes if p not in paths]
+
+    expressions = []
+    for h in hosts:
+        for p in paths:
+            expression = h + p
+            if expression not in expressions:
+                expressions.append(expression)
+    return expressions
+
+
+def full_hash(expression: str) -> bytes:
+    return hashlib.sha256(expression.encode('latin-1')).digest()
+
+
+def _prefix_value(digest: bytes) -> int:
+    return struct.unpack('>I', digest[:PREFIX_SIZE])[0]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LISTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class HashPrefixList:
+    """Sorted 4-byte prefixes of one threat list (4 bytes per entry)."""
+
+    def __init__(self, name: str, threat_type: str, prefixes: Iterable[int],
+                 full_hashes: Optional[FrozenSet[bytes]] = None,
+                 client_state: Optional[str] = None):
+        self.name = name
+        self.threat_type = threat_type
+        self.prefixes = array('I', sorted(set(prefixes)))
+        self.full_hashes = full_hashes
+        # Safe Browsing client state of a synced list, None for built lists
+        self.client_state = client_state
+
+    @property
+    def synced(self) -> bool:
+        """Whether the list comes from a Safe Browsing update"""
+        return self.client_state is not None
+
+    def __len__(self) -> int:
+        return len(self.prefixes)
+
+    def __contains__(self, prefix: int) -> bool:
+        i = bisect.bisect_left(self.prefixes, prefix)
+        return i < len(self.prefixes) and self.prefixes[i] == prefix
+
+    @classmethod
+    def from_file(cls, path: str) -> 'HashPrefixList':
+        with open(path) as f:
+            data = json.load(f)
+        raw = data.get('rawHashes', {})
+        if raw.get('prefixSize', PREFIX_SIZE) != PREFIX_SIZE:
+            raise ValueError(f"{path}: only {PREFIX_SIZE}-byte prefixes are supported")
+        blob = base64.b64decode(raw.get('rawHashes', ''))
+        if len(blob) % PREFIX_SIZE:
+            raise ValueError(f"{path}: rawHashes is not a multiple of {PREFIX_SIZE} bytes")
+        prefixes = struct.unpack(f'>{len(blob) // PREFIX_SIZE}I', blob)
+        full_hashes = None
+        if 'fullHashes' in data:
+            full_hashes = frozenset(base64.b64decode(h) for h in data['fullHashes'])
+        name = os.path.splitext(os.path.basename(path))[0]
+        return cls(name, data.get('threatType', 'THREAT_TYPE_UNSPECIFIED'), prefixes, full_hashes,
+                   data.get('newClientState'))
+
+    def to_dict(self, include_full_hashes: bool = True) -> Dict[str, Any]:
+        """List file contents"""
+        blob = struct.pack(f'>{len(self.prefixes)}I', *self.prefixes)
+        data = {
+            'threatType': self.threat_type,
+            'rawHashes': {'prefixSize': PREFIX_SIZE,
+                          'rawHashes': base64.b64encode(blob).decode()},
+        }
+        if include_full_hashes and self.full_hashes is not None:
+            data['fullHashes'] = sorted(base64.b64encode(h).decode() for h in self.full_hashes)
+        if self.client_state is not None:
+            data['newClientState'] = self.client_state
+        return data
+
+    @classmethod
+    def build(cls, name: str, threat_type: str, urls: Iterable[str]) -> 'HashPrefixList':
+        """List from blocklisted URLs (their canonical host + path expression)"""
+        hashes = set()
+        for url in urls:
+            url = url.strip()
+            if url and not url.startswith('#'):
+                host, path, _ = canonicalize(url)
+                hashes.add(full_hash(host + path))
+        return cls(name, threat_type, (_prefix_value(h) for h in hashes), frozenset(hashes))
+
+
+class URLReputationDB:
+    """
+    Hash-prefix lists loaded from a directory.
+
+    Usage:
+        result = reputation_db.lookup(url)
+        if result['status'] == 'match': ...
+    """
+
+    def __init__(self, list_dir: str = str(Config.URL_REPUTATION_DIR),
+                 reload_seconds: float = Config.URL_REPUTATION_RELOAD_SECONDS):
+        """
+        Initialize reputation DB (lists are loaded on first use).
+
+        Args:
+            list_dir: Directory of *.json list files
+            reload_seconds: Minimum interval between checks for changed files
+        """
+        self.list_dir = list_dir
+        self.reload_seconds = reload_seconds
+        self.lock = threading.Lock()
+        self.lists: List[HashPrefixList] = []
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self.stats = {'lookups': 0, 'prefix_hits': 0, 'full_hash_checks': 0,
+                      'matches': 0, 'unverified': 0}
+
+    def _files(self) -> List[str]:
+        if not os.path.isdir(self.list_dir):
+            return []
+        return sorted(os.path.join(self.list_dir, name) for name in os.listdir(self.list_dir)
+                      if name.endswith('.json'))
+
+    def load(self) -> int:
+        """
+        (Re)load every list file.
+
+        Returns:
+            Number of lists loaded
+        """
+        files = self._files()
+        lists = []
+        for path in files:
+            try:
+                lists.append(HashPrefixList.from_file(path))
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Skipping reputation list {path}: {e}")
+        signature = tuple((path, os.path.getmtime(path)) for path in files)
+        with self.lock:
+            self.lists, self._signature, self._checked_at = lists, signature, time.time()
+        logger.info(f"Loaded {len(lists)} reputation lists "
+                    f"({sum(len(l) for l in lists)} prefixes) from {self.list_dir}")
+        return len(lists)
+
+    def _maybe_reload(self):
+        now = time.time()
+        if self._signature is not None and now - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = now
+        try:
+            signature = tuple((path, os.path.getmtime(path)) for path in self._files())
+        except OSError:
+            signature = None
+        if signature != self._signature:
+            self.load()
+
+    @property
+    def available(self) -> bool:
+        """Whether any list is loaded"""
+        self._maybe_reload()
+        return bool(self.lists)
+
+    @property
+    def mirrors_safebrowsing(self) -> bool:
+        """
+        Whether synced lists cover every Safe Browsing threat type, so a
+        clean lookup answers for the threatMatches:find API
+        """
+        self._maybe_reload()
+        synced = {l.threat_type for l in self.lists if l.synced}
+        return SAFEBROWSING_THREAT_TYPES <= synced
+
+    def lookup(self, url: str, full_hash_check: Optional[FullHashCheck] = None) -> Dict[str, Any]:
+        """
+        Check a URL against every list.
+
+        Args:
+            url: URL to check
+            full_hash_check: Confirms prefix hits on lists without full hashes
+
+        Returns:
+            dict with status 'clean', 'match', 'unverified' (prefix hit that
+            could not be confirmed) or 'unavailable' (no lists), plus
+            threat_types and prefix_hits
+        """
+        self._maybe_reload()
+        lists = self.lists
+        if not lists:
+            return {'status': 'unavailable', 'threat_types': [], 'prefix_hits': 0}
+
+        hashes = [full_hash(expression) for expression in url_expressions(url)]
+        keyed = [(_prefix_value(h), h) for h in hashes]
+        threat_types, unverified, prefix_hits = [], [], 0
+
+        for threat_list in lists:
+            hits = [h for prefix, h in keyed if prefix in threat_list]
+            if not hits:
+                continue
+            prefix_hits += len(hits)
+            if threat_list.full_hashes is not None:
+                confirmed = any(h in threat_list.full_hashes for h in hits)
+            elif full_hash_check is not None:
+                self.stats['full_hash_checks'] += 1
+                try:
+                    confirmed = full_hash_check(threat_list.threat_type, hits)
+                except Exception as e:
+                    logger.warning(f"Full-hash check for {threat_list.name} failed: {e}")
+                    unverified.append(threat_list.threat_type)
+                    continue
+            else:
+                unverified.append(threat_list.threat_type)
+                continue
+            if confirmed and threat_list.threat_type not in threat_types:
+                threat_types.append(threat_list.threat_type)
+
+        self.stats['lookups'] += 1
+        self.stats['prefix_hits'] += prefix_hits > 0
+        if threat_types:
+            self.stats['matches'] += 1
+            status = 'match'
+        elif unverified:
+            self.stats['unverified'] += 1
+            status = 'unverified'
+        else:
+            status = 'clean'
+        return {'status': status, 'threat_types': threat_types or unverified,
+                'prefix_hits': prefix_hits}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Loaded lists and lookup counters"""
+        return {
+            'lists': {l.name: {'threat_type': l.threat_type, 'prefixes': len(l),
+                               'full_hashes': l.full_hashes is not None,
+                               'synced': l.synced}
+                      for l in self.lists},
+            'mirrors_safebrowsing': self.mirrors_safebrowsing,
+            **self.stats,
+        }
+
+
+def safebrowsing_full_hash_check(api_key: str, timeout: float = 10) -> FullHashCheck:
+    """
+    Full-hash check through the Safe Browsing v4 fullHashes:find API.
+
+    Only the 4-byte prefixes that hit leave the machine, never the URL.
+    """
+    def check(threat_type: str, hashes: List[bytes]) -> bool:
+        prefixes = {base64.b64encode(h[:PREFIX_SIZE]).decode() for h in hashes}
+        response = provider_client.post(
+            'safebrowsing', SAFEBROWSING_FULL_HASHES_URL,
+            params={'key': api_key},
+            json={
+                'client': SAFEBROWSING_CLIENT,
+                'clientStates': [],
+                'threatInfo': {
+                    'threatTypes': [threat_type],
+                    'platformTypes': ['ANY_PLATFORM'],
+                    'threatEntryTypes': ['URL'],
+                    'threatEntries': [{'hash': prefix} for prefix in sorted(prefixes)],
+                },
+            },
+            timeout=timeout
+        )
+        response.raise_for_status()
+        listed = {base64.b64decode(match['threat']['hash'])
+                  for match in response.json().get('matches', [])}
+        return any(h in listed for h in hashes)
+    return check
+
+
+def _apply_list_update(current: Optional[HashPrefixList],
+                       update: Dict[str, Any]) -> HashPrefixList:
+    """
+    Apply one listUpdateResponses entry to the stored list.
+
+    Raises:
+        ValueError: Unsupported compression or prefix size, or checksum mismatch
+    """
+    threat_type = update['threatType']
+    prefixes = list(current.prefixes) if current is not None else []
+    if update.get('responseType') == 'FULL_UPDATE':
+        prefixes = []
+    # Removal indices refer to the sorted list before this update's additions
+    removed = set()
+    for removal in update.get('removals', []):
+        removed.update(removal.get('rawIndices', {}).get('indices', []))
+    prefixes = [prefix for i, prefix in enumerate(prefixes) if i not in removed]
+    for addition in update.get('additions', []):
+        if addition.get('compressionType', 'RAW') != 'RAW':
+            raise ValueError(f"{threat_type}: only RAW additions are supported")
+        raw = addition.get('rawHashes', {})
+        if raw.get('prefixSize', PREFIX_SIZE) != PREFIX_SIZE:
+            raise ValueError(f"{threat_type}: only {PREFIX_SIZE}-byte prefixes are supported")
+        blob = base64.b64decode(raw.get('rawHashes', ''))
+        prefixes.extend(struct.unpack(f'>{len(blob) // PREFIX_SIZE}I', blob))
+    threat_list = HashPrefixList(f'safebrowsing_{threat_type.lower()}', threat_type, prefixes,
+                                 client_state=update.get('newClientState', ''))
+    expected = update.get('checksum', {}).get('sha256')
+    if expected:
+        # Big-endian packing keeps the lexicographic order the checksum uses
+        blob = struct.pack(f'>{len(threat_list)}I', *threat_list.prefixes)
+        if base64.b64encode(hashlib.sha256(blob).digest()).decode() != expected:
+            raise ValueError(f"{threat_type}: checksum mismatch after update")
+    return threat_list
+
+
+def sync_safebrowsing_lists(api_key: str, list_dir: str = str(Config.URL_REPUTATION_DIR),
+                            timeout: float = 30) -> Dict[str, Any]:
+    """
+    Update the synced Safe Browsing lists through threatListUpdates:fetch.
+
+    Each threat type is stored as safebrowsing_<type>.json with its
+    newClientState, so the next sync asks for a partial update. A list
+    whose checksum does not match is deleted and fetched in full next time.
+
+    Returns:
+        dict with per-list prefix counts, failed lists and the
+        minimumWaitDuration to respect before the next sync
+    """
+    os.makedirs(list_dir, exist_ok=True)
+    paths = {threat_type: os.path.join(list_dir, f'safebrowsing_{threat_type.lower()}.json')
+             for threat_type in sorted(SAFEBROWSING_THREAT_TYPES)}
+    current: Dict[str, Optional[HashPrefixList]] = {}
+    for threat_type, path in paths.items():
+        try:
+            current[threat_type] = HashPrefixList.from_file(path)
+        except (OSError, ValueError, KeyError):
+            current[threat_type] = None
+
+    response = provider_client.post(
+        'safebrowsing', SAFEBROWSING_UPDATES_URL,
+        params={'key': api_key},
+        json={
+            'client': SAFEBROWSING_CLIENT,
+            'listUpdateRequests': [{
+                'threatType': threat_type,
+                'platformType': 'ANY_PLATFORM',
+                'threatEntryType': 'URL',
+                'state': (current[threat_type].client_state or '') if current[threat_type] else '',
+                'constraints': {'supportedCompressions': ['RAW']},
+            } for threat_type in paths],
+        },
+        timeout=timeout
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    result = {'lists': {}, 'failed': [],
+              'minimum_wait': data.get('minimumWaitDuration')}
+    for update in data.get('listUpdateResponses', []):
+        threat_type = update.get('threatType')
+        if threat_type not in paths:
+            continue
+        path = paths[threat_type]
+        try:
+            threat_list = _apply_list_update(current[threat_type], update)
+        except (ValueError, KeyError, struct.error) as e:
+            logger.error(f"Safe Browsing sync of {threat_type} failed: {e}")
+            result['failed'].append(threat_type)
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        # Write then rename so URLReputationDB never reads a partial file
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(threat_list.to_dict(), f)
+        os.replace(f'{path}.tmp', path)
+        result['lists'][threat_list.name] = len(threat_list)
+    logger.info(f"Synced {len(result['lists'])} Safe Browsing lists into {list_dir}")
+    return result
+
+
+# Global DB shared by the real-time detector and Layer C
+reputation_db = URLReputationDB()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline hash-prefix URL reputation lists')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='build a list file from a plain URL feed')
+    build.add_argument('feed', help='file with one URL per line')
+    build.add_argument('-t', '--threat-type', default='SOCIAL_ENGINEERING')
+    build.add_argument('-o', '--output', required=True)
+    build.add_argument('--prefixes-only', action='store_true',
+                       help='omit full hashes (prefix hits then need a full-hash check)')
+    sync = sub.add_parser('sync', help='update the Safe Browsing lists (threatListUpdates:fetch)')
+    sync.add_argument('--api-key', default=os.getenv('GOOGLE_SAFE_BROWSING_API_KEY', ''))
+    sync.add_argument('-d', '--list-dir', default=str(Config.URL_REPUTATION_DIR))
+    lookup = sub.add_parser('lookup', help='look up URLs in the configured lists')
+    lookup.add_argument('urls', nargs='+')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    if args.command == 'build':
+        with open(args.feed) as f:
+            threat_list = HashPrefixList.build(
+                os.path.splitext(os.path.basename(args.output))[0], args.threat_type, f)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(threat_list.to_dict(not args.prefixes_only), f)
+        print(f"Wrote {len(threat_list)} prefixes to {args.output}")
+    elif args.command == 'sync':
+        if not args.api_key:
+            parser.error('sync needs --api-key or GOOGLE_SAFE_BROWSING_API_KEY')
+        result = sync_safebrowsing_lists(args.api_key, args.list_dir)
+        for name, count in result['lists'].items():
+            print(f"{name}: {count} prefixes")
+        for threat_type in result['failed']:
+            print(f"{threat_type}: failed, full update on next sync")
+        print(f"Next sync allowed after {result['minimum_wait'] or '0s'}")
+    else:
+        for url in args.urls:
+            started = time.perf_counter()
+            result = reputation_db.lookup(url)
+            elapsed = (time.perf_counter() - started) * 1e6
+            print(f"{url}: {result['status']} {result['threat_types']} ({elapsed:.0f} us)")
+
+
+if __name__ == '__main__':
+    main()
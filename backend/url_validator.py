@@ -58,6 +58,13 @@ class URLValidator:
     # Block private/internal IPs
     BLOCK_PRIVATE_IPS: bool = Config.BLOCK_PRIVATE_IPS
 
+    # Public suffixes with two labels, for registrable_domain()
+    TWO_LABEL_SUFFIXES: frozenset = frozenset({
+        'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'co.jp', 'ne.jp', 'or.jp',
+        'com.au', 'net.au', 'org.au', 'co.nz', 'co.in', 'co.za', 'com.br',
+        'com.cn', 'com.mx', 'com.tr', 'com.sg', 'com.hk', 'co.kr',
+    })
+
     # Regex patterns for injection attack detection
     # Used to detect common injection patterns
     INJECTION_PATTERNS: dict = {
@@ -368,6 +375,37 @@ class URLValidator:
         except URLValidationError:
             raise
 
+    @staticmethod
+    def registrable_domain(url: str) -> str:
+        """
+        Get the registrable domain (eTLD+1) of a URL without validating it.
+
+        Uses the last two labels of the host, or three when the suffix is a
+        common two-label public suffix such as co.uk. IP addresses are
+        returned unchanged.
+
+        Args:
+            url: URL string
+
+        Returns:
+            Registrable domain, or '' if the URL has no host
+        """
+        if '://' not in url:
+            url = f"http://{url}"
+        try:
+            host = (urlparse(url.strip()).hostname or '').rstrip('.')
+        except ValueError:
+            return ''
+        try:
+            ipaddress.ip_address(host)
+            return host
+        except ValueError:
+            pass
+        labels = host.split('.')
+        if len(labels) > 2 and '.'.join(labels[-2:]) in URLValidator.TWO_LABEL_SUFFIXES:
+            return '.'.join(labels[-3:])
+        return '.'.join(labels[-2:])
+
     @staticmethod
     def is_subdomain(url: str, parent_domain: str) -> bool:
         """
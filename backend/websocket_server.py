@@ -1,14 +1,22 @@
 # REAL-TIME WEBSOCKET SERVER FOR SIEM INTEGRATION
 # Runs alongside Flask backend to provide real-time updates to dashboard
+#
+# Broadcasts are serialized once and handed to a bounded send queue per
+# client; a writer task per client drains it, so one slow consumer no longer
+# holds up the others. Clients whose queue fills up are handled by
+# Config.WS_SLOW_CLIENT_POLICY.
 
 import asyncio
 import websockets
 import json
 import logging
+import time
 from datetime import datetime
-from typing import Set
+from typing import Dict, Set
 import signal
 
+from config import Config
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -19,17 +27,101 @@ logger = logging.getLogger('WebSocketServer')
 # Store connected clients
 connected_clients: Set[websockets.WebSocketServerProtocol] = set()
 
+SLOW_CLIENT_POLICIES = ('downgrade', 'drop_oldest', 'disconnect')
+
+# Message types a downgraded client still receives
+ESSENTIAL_TYPES = {'connection', 'pong', 'scan_complete', 'alert'}
+
+
+class ClientSession:
+    """Bounded send queue and writer task of one connected client"""
+
+    def __init__(self, websocket, server, queue_size, policy, send_timeout):
+        self.websocket = websocket
+        self.server = server
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.degraded = False
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.writer = asyncio.create_task(self._write())
+
+    def enqueue(self, payload: str, message_type: str) -> bool:
+        """Queue a serialized message without waiting; False if it was dropped"""
+        if self.closed:
+            return False
+        if self.degraded and message_type not in ESSENTIAL_TYPES:
+            self.dropped += 1
+            return False
+        if self.queue.full():
+            if self.policy == 'disconnect':
+                self.server.drop_slow_client(self, 'send queue full')
+                return False
+            if self.policy == 'downgrade' and not self.degraded:
+                self.degraded = True
+                logger.warning(f"⚠️ Slow client downgraded to essential messages "
+                               f"({self.queue.qsize()} queued)")
+                if message_type not in ESSENTIAL_TYPES:
+                    self.dropped += 1
+                    return False
+            # Make room by discarding the oldest queued message
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+        return True
+
+    async def _write(self):
+        while True:
+            payload = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send(payload), self.send_timeout)
+                self.sent += 1
+            except asyncio.TimeoutError:
+                self.server.drop_slow_client(self, f'send took over {self.send_timeout}s')
+                return
+            except websockets.exceptions.ConnectionClosed:
+                self.closed = True
+                return
+            except Exception as e:
+                logger.error(f"Error sending to client: {e}")
+            if self.degraded and self.queue.empty():
+                self.degraded = False
+
+    async def drain(self):
+        """Wait until everything queued so far has been written"""
+        while not self.queue.empty() and not self.writer.done():
+            await asyncio.sleep(0.001)
+
+    def close(self):
+        self.closed = True
+        self.writer.cancel()
+
+
 class SIEMWebSocketServer:
     """WebSocket server for real-time SIEM updates"""
     
-    def __init__(self, host='localhost', port=8080):
+    def __init__(self, host='localhost', port=8080, queue_size=Config.WS_SEND_QUEUE_SIZE,
+                 slow_client_policy=Config.WS_SLOW_CLIENT_POLICY,
+                 send_timeout=Config.WS_SEND_TIMEOUT):
+        if slow_client_policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unknown slow client policy: {slow_client_policy}")
         self.host = host
         self.port = port
         self.server = None
+        self.queue_size = queue_size
+        self.slow_client_policy = slow_client_policy
+        self.send_timeout = send_timeout
+        self.sessions: Dict[object, ClientSession] = {}
+        self.stats = {'broadcasts': 0, 'queued': 0, 'dropped': 0,
+                      'slow_disconnects': 0, 'last_broadcast_ms': 0.0}
         
     async def register_client(self, websocket):
         """Register a new client connection"""
         connected_clients.add(websocket)
+        self.sessions[websocket] = ClientSession(
+            websocket, self, self.queue_size, self.slow_client_policy, self.send_timeout)
         logger.info(f"✅ New client connected. Total clients: {len(connected_clients)}")
         
         # Send welcome message
@@ -43,37 +135,62 @@ class SIEMWebSocketServer:
     async def unregister_client(self, websocket):
         """Unregister a disconnected client"""
         connected_clients.discard(websocket)
+        session = self.sessions.pop(websocket, None)
+        if session:
+            session.close()
         logger.info(f"❌ Client disconnected. Total clients: {len(connected_clients)}")
+
+    def drop_slow_client(self, session: ClientSession, reason: str):
+        """Disconnect a client that cannot keep up"""
+        if session.closed:
+            return
+        logger.warning(f"⚠️ Dropping slow client: {reason}")
+        self.stats['slow_disconnects'] += 1
+        connected_clients.discard(session.websocket)
+        self.sessions.pop(session.websocket, None)
+        session.close()
+        # 1013: try again later
+        asyncio.ensure_future(session.websocket.close(code=1013, reason='Client too slow'))
     
     async def send_to_client(self, websocket, message):
-        """Send message to a specific client"""
-        try:
-            await websocket.send(json.dumps(message))
-        except Exception as e:
-            logger.error(f"Error sending to client: {e}")
+        """Queue a message for a specific client"""
+        session = self.sessions.get(websocket)
+        if session is None:
+            return
+        session.enqueue(json.dumps(message), message.get('type', ''))
     
     async def broadcast(self, message):
         """Broadcast message to all connected clients"""
-        if not connected_clients:
+        if not self.sessions:
             logger.debug("No clients connected to broadcast to")
             return
         
-        logger.info(f"📡 Broadcasting to {len(connected_clients)} clients: {message.get('type', 'unknown')}")
+        started = time.perf_counter()
+        message_type = message.get('type', 'unknown')
+        logger.debug(f"📡 Broadcasting to {len(self.sessions)} clients: {message_type}")
         
-        # Send to all connected clients
-        disconnected = set()
-        for websocket in connected_clients:
-            try:
-                await self.send_to_client(websocket, message)
-            except websockets.exceptions.ConnectionClosed:
-                disconnected.add(websocket)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                disconnected.add(websocket)
+        # Serialize once; each client's writer task does the sending
+        payload = json.dumps(message)
+        sessions = list(self.sessions.values())
+        queued = sum(1 for session in sessions if session.enqueue(payload, message_type))
         
-        # Remove disconnected clients
-        for websocket in disconnected:
-            await self.unregister_client(websocket)
+        self.stats['broadcasts'] += 1
+        self.stats['queued'] += queued
+        self.stats['dropped'] += len(sessions) - queued
+        self.stats['last_broadcast_ms'] = (time.perf_counter() - started) * 1000
+        # Let the writers start before the caller queues the next message
+        await asyncio.sleep(0)
+
+    def get_stats(self) -> Dict[str, object]:
+        """Client count, queue depth and drop counters"""
+        sessions = list(self.sessions.values())
+        return {
+            **self.stats,
+            'clients': len(sessions),
+            'degraded_clients': sum(1 for s in sessions if s.degraded),
+            'max_queue_depth': max((s.queue.qsize() for s in sessions), default=0),
+            'policy': self.slow_client_policy,
+        }
     
     async def handle_client(self, websocket, path):
         """Handle individual client connection"""
@@ -126,6 +243,9 @@ class SIEMWebSocketServer:
     
     def stop(self):
         """Stop the WebSocket server"""
+        for session in list(self.sessions.values()):
+            session.close()
+        self.sessions.clear()
         if self.server:
             self.server.close()
             logger.info("WebSocket server stopped")